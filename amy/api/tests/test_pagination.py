@@ -0,0 +1,34 @@
+from django.urls import reverse
+
+from workshops.models import Airport
+from workshops.tests.base import TestBase
+
+
+class TestKeysetPagination(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._setUpUsersAndLogin()
+        self.url = reverse("api:airport-list")
+
+    def test_page_numbers_without_cursor(self):
+        rv = self.client.get(self.url, {"page_size": 2, "page": 2})
+        self.assertEqual(rv.data["count"], Airport.objects.count())
+        self.assertEqual(len(rv.data["results"]), 2)
+        self.assertIn("page=3", rv.data["next"])
+
+    def test_pages_follow_cursors(self):
+        expected = list(Airport.objects.order_by("iata").values_list("iata", flat=True))
+        pages = []
+        rv = self.client.get(self.url, {"page_size": 2, "cursor": ""})
+        self.assertIsNone(rv.data["previous"])
+        self.assertGreater(rv.data["count"], 0)
+        while True:
+            pages.append([airport["iata"] for airport in rv.data["results"]])
+            if rv.data["next"] is None:
+                break
+            self.assertIn("cursor=", rv.data["next"])
+            rv = self.client.get(rv.data["next"])
+        self.assertEqual([iata for page in pages for iata in page], expected)
+
+        rv = self.client.get(rv.data["previous"])
+        self.assertEqual([airport["iata"] for airport in rv.data["results"]], pages[-2])
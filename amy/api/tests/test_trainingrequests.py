@@ -1,4 +1,6 @@
+import csv
 import datetime
+import io
 from unittest.mock import patch
 
 from django.http import QueryDict
@@ -288,7 +290,7 @@ class TestListingTrainingRequests(APITestCase):
         # get CSV-formatted output
         self.client.login(username="admin", password="admin")
         response = self.client.get(url, {"format": "csv"})
-        content = response.content.decode("utf-8")
+        content = b"".join(response.streaming_content).decode("utf-8")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         firstline = content.splitlines()[0]
@@ -316,6 +318,46 @@ class TestListingTrainingRequests(APITestCase):
 
         self.assertEqual(firstline, expected_firstline)
 
+    def test_CSV_streamed_in_chunks(self):
+        """CSV export is streamed, with requests fetched in chunks."""
+        url = reverse(self.url)
+        self.client.login(username="admin", password="admin")
+
+        with patch("workshops.util.EXPORT_CHUNK_SIZE", 1):
+            response = self.client.get(url, {"format": "csv"})
+            self.assertTrue(response.streaming)
+            rows = list(
+                csv.DictReader(
+                    io.StringIO(b"".join(response.streaming_content).decode("utf-8"))
+                )
+            )
+
+        self.assertEqual([row["Personal"] for row in rows], ["Zummi", "Grammi"])
+        self.assertEqual(rows[0]["Expertise areas"], "Chemistry, Medicine")
+        self.assertEqual(
+            rows[1]["Badges"], "swc-instructor 2018-07-12, " "dc-instructor 2018-07-12"
+        )
+        self.assertEqual(rows[1]["Training Tasks"], "2018-07-12-TTT-event")
+
+    def test_CSV_manual_score_streamed(self):
+        url = reverse(self.url)
+        self.client.login(username="admin", password="admin")
+
+        response = self.client.get(url, {"format": "csv2", "manualscore": 1})
+        content = b"".join(response.streaming_content).decode("utf-8")
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            [int(row["request_id"]) for row in rows], [self.tr1.pk, self.tr2.pk]
+        )
+
+    def test_JSON_not_streamed(self):
+        url = reverse(self.url)
+        self.client.login(username="admin", password="admin")
+
+        response = self.client.get(url, {"format": "json"})
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.json()), 2)
+
     @patch.object(TrainingRequests, "request", query_params=QueryDict(), create=True)
     def test_M2M_columns(self, mock_request):
         """Some columns are M2M fields, but should be displayed as a string,
@@ -1,6 +1,7 @@
 from collections import OrderedDict
 
 from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.metadata import SimpleMetadata
@@ -9,7 +10,9 @@ from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import APIView
+from rest_framework_csv.renderers import CSVRenderer, CSVStreamingRenderer
 
 from api.filters import EventFilter, PersonFilter, TaskFilter, TrainingRequestFilterIDs
 from api.permissions import DjangoModelPermissionsWithView
@@ -48,6 +51,7 @@ from workshops.models import (
     TrainingProgress,
     TrainingRequest,
 )
+from workshops.util import KeysetPaginator, iterate_in_chunks
 
 
 class IsAdmin(BasePermission):
@@ -86,9 +90,57 @@ class LargeResultsSetPagination(PageNumberPagination):
 
 
 class StandardResultsSetPagination(PageNumberPagination):
+    """Page number pagination, or keyset pagination if `?cursor` is present
+    in the query (use empty value for the first page).
+
+    Keyset pagination is as fast for deep pages as for the first one, but
+    returns only approximate `count`.  Querysets not supported by
+    `KeysetPaginator` are paginated by page numbers."""
+
     page_size = 100
     page_size_query_param = "page_size"
     max_page_size = 1000
+    cursor_query_param = "cursor"
+
+    keyset_page = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_page = None
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        if not KeysetPaginator.supports(queryset):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.get_page_size(request))
+        self.keyset_page = paginator.page(request.query_params[self.cursor_query_param])
+        return list(self.keyset_page)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.keyset_page.paginator.count),
+                    ("next", self.get_cursor_link(self.keyset_page.next_cursor)),
+                    (
+                        "previous",
+                        self.get_cursor_link(self.keyset_page.previous_cursor),
+                    ),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
 
 
 class ApiRoot(APIView):
@@ -208,6 +260,25 @@ class TrainingRequests(ListAPIView):
         else:
             return TrainingRequestWithPersonSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Stream CSV exports: requests are fetched, serialized and rendered in
+        chunks while the response is being sent."""
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, CSVRenderer):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def rows():
+            for chunk in iterate_in_chunks(queryset):
+                yield from self.get_serializer(chunk, many=True).data
+
+        renderer_context = {"header": renderer.header, "labels": renderer.labels}
+        content = CSVStreamingRenderer().render(
+            rows(), renderer_context=renderer_context
+        )
+        return StreamingHttpResponse(content, content_type=renderer.media_type)
+
 
 # ----------------------
 # "new" API starts below
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 import logging
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Type, Union
 
+from django.apps import apps
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.mail import EmailMultiAlternatives
+from django.db.models import Model
 from django.db.models.query import QuerySet
 from django.http.request import HttpRequest
 from django.template.exceptions import TemplateDoesNotExist, TemplateSyntaxError
@@ -14,6 +17,7 @@ import django_rq
 
 from autoemails.base_views import ActionManageMixin
 from autoemails.models import EmailTemplate, Trigger
+from autoemails.snapshots import EventSnapshot
 from autoemails.utils import compare_emails
 from consents.models import Term
 from workshops.fields import TAG_SEPARATOR
@@ -22,6 +26,8 @@ from workshops.models import Event, Person, Task
 logger = logging.getLogger("amy.signals")
 scheduler = django_rq.get_scheduler("default")
 DAY_IN_SECONDS = 86400
+# Version of compact state of pickled actions (see `BaseAction.__getstate__`).
+STATE_VERSION = 1
 
 
 def send_bulk_email(
@@ -36,24 +42,25 @@ def send_bulk_email(
         emails[i : i + settings.BULK_EMAIL_LIMIT]  # noqa
         for i in range(0, len(emails), settings.BULK_EMAIL_LIMIT)
     ]
-    for emails in emails_to_send:
-        jobs, rqjobs = ActionManageMixin.add(
-            action_class=action_class,
-            logger=logger,
-            scheduler=scheduler,
-            triggers=triggers,
-            context_objects=dict(
-                person_emails=emails,
-                **additional_context_objects,
-            ),
-            object_=object_,
-        )
-        if triggers and jobs:
+    jobs, rqjobs = ActionManageMixin.bulk_add(
+        action_class=action_class,
+        logger=logger,
+        scheduler=scheduler,
+        triggers=triggers,
+        entries=[
+            (dict(person_emails=emails, **additional_context_objects), object_)
+            for emails in emails_to_send
+        ],
+    )
+    if triggers and jobs:
+        # jobs are returned grouped by entries (chunks of emails)
+        jobs_per_chunk = len(jobs) // len(emails_to_send)
+        for i, emails in enumerate(emails_to_send):
             ActionManageMixin.bulk_schedule_message(
                 request=request,
                 num_emails=len(emails),
                 trigger=triggers[0],
-                job=jobs[0],
+                job=jobs[i * jobs_per_chunk],
                 scheduler=scheduler,
             )
 
@@ -82,6 +89,10 @@ class BaseAction:
         except AttributeError:
             self.context_objects = dict()
 
+        # remember template body to tell whether it was edited (e.g. in
+        # a scheduled job)
+        self._template_body = self.template.body_template
+
         # prepare logger
         self.logger = logger
 
@@ -89,6 +100,68 @@ class BaseAction:
         self.context: Optional[dict] = None
         self.email = None
 
+    def __getstate__(self) -> Dict:
+        """Compact state stored when the action is pickled, e.g. as RQ job.
+
+        Only primary keys of trigger and context objects (along with edited
+        template body) are kept; they're fetched from DB when the action is
+        unpickled.  Unsaved objects and other values are kept as they are."""
+        if self.trigger.pk is None:
+            # nothing to fetch the trigger with
+            return self.__dict__.copy()
+
+        state: Dict[str, Any] = dict(
+            version=STATE_VERSION,
+            trigger=self.trigger.pk,
+            objects={},
+            values={},
+        )
+        if self.template.body_template != getattr(self, "_template_body", None):
+            state["template_body"] = self.template.body_template
+        for key, value in self.context_objects.items():
+            if isinstance(value, Model) and value.pk is not None:
+                state["objects"][key] = (value._meta.label_lower, value.pk)
+            else:
+                state["values"][key] = value
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        version = state.get("version")
+        if version is None:
+            # unsaved trigger, or action pickled before compact state was
+            # introduced
+            self.__dict__.update(state)
+            return
+        if version != STATE_VERSION:
+            raise ValueError(f"Unsupported action state version: {version}")
+
+        trigger = (
+            Trigger.objects.select_related("template")
+            .filter(pk=state["trigger"])
+            .first()
+        )
+        if trigger is None:
+            # removed trigger; an attempt to send the email will fail the same
+            # way it would for a trigger removed after unpickling
+            trigger = Trigger(pk=state["trigger"], template=EmailTemplate())
+
+        # one query per model
+        pks_by_model = defaultdict(set)
+        for label, pk in state["objects"].values():
+            pks_by_model[label].add(pk)
+        instances = {
+            label: apps.get_model(label)._default_manager.in_bulk(pks)
+            for label, pks in pks_by_model.items()
+        }
+        objects = dict(state["values"])
+        for key, (label, pk) in state["objects"].items():
+            # removed objects will raise `DoesNotExist` when they're refreshed
+            objects[key] = instances[label].get(pk) or apps.get_model(label)(pk=pk)
+
+        BaseAction.__init__(self, trigger=trigger, objects=objects)
+        if "template_body" in state:
+            self.template.body_template = state["template_body"]
+
     def __eq__(self, b):
         try:
             return (
@@ -287,29 +360,31 @@ class NewInstructorAction(BaseAction):
             return ""
 
     @staticmethod
-    def check(task: Task):  # type: ignore
-        """Conditions for creating a NewInstructorAction."""
+    def check(task: Task, event: Optional[EventSnapshot] = None):  # type: ignore
+        """Conditions for creating a NewInstructorAction.
+
+        Event's data is taken from `event` snapshot, if provided."""
+        if task.role.name != "instructor":
+            return False
+        event = event or EventSnapshot(task.event)
         return bool(
             # 2019-11-01: we accept instructors without `may_contact` agreement
             #             because it was supposed to apply on for non-targeted
             #             communication like newsletter
             # task.person.may_contact and
-            task.role.name == "instructor"
-            and not task.event.tags.filter(
-                name__in=["cancelled", "unresponsive", "stalled"]
-            )
+            event.active
             # 2019-12-24: instead of accepting only upcoming Events, let's
             #             accept (more broadly) events starting in future
             #             or some without start date
             # 2020-01-31: slightly rewrite (less queries)
-            and (not task.event.start or task.event.start >= date.today())
+            and (not event.start or event.start >= date.today())
             # 2020-02-07: the task must have "automated-email" tag in order to
             #             be used for Email Automation
-            and task.event.tags.filter(name__icontains="automated-email")
+            and event.automated_email
             # 2020-02-11: only for workshops administered by LC/DC/SWC
-            and task.event.administrator
-            and task.event.administrator.domain != "self-organized"
-            and task.event.administrator.domain != "carpentries.org"
+            and event.has_administrator
+            and event.administrator_domain != "self-organized"
+            and event.administrator_domain != "carpentries.org"
         )
 
     def get_additional_context(self, objects, *args, **kwargs):
@@ -380,18 +455,20 @@ class NewSupportingInstructorAction(BaseAction):
             return ""
 
     @staticmethod
-    def check(task: Task):  # type: ignore
-        """Conditions for creating a NewSupportingInstructorAction."""
+    def check(task: Task, event: Optional[EventSnapshot] = None):  # type: ignore
+        """Conditions for creating a NewSupportingInstructorAction.
+
+        Event's data is taken from `event` snapshot, if provided."""
+        if task.role.name != "supporting-instructor":
+            return False
+        event = event or EventSnapshot(task.event)
         return bool(
-            task.role.name == "supporting-instructor"
-            and not task.event.tags.filter(
-                name__in=["cancelled", "unresponsive", "stalled"]
-            )
-            and (not task.event.start or task.event.start >= date.today())
-            and task.event.tags.filter(name__in=["automated-email", "online"])
-            and task.event.administrator
-            and task.event.administrator.domain != "self-organized"
-            and task.event.administrator.domain != "carpentries.org"
+            event.active
+            and (not event.start or event.start >= date.today())
+            and event.has_any_tag("automated-email", "online")
+            and event.has_administrator
+            and event.administrator_domain != "self-organized"
+            and event.administrator_domain != "carpentries.org"
         )
 
     def get_additional_context(self, objects, *args, **kwargs):
@@ -507,24 +584,25 @@ class PostWorkshopAction(BaseAction):
             return ""
 
     @staticmethod
-    def check(event: Event):  # type: ignore
+    def check(event: Union[Event, EventSnapshot]):  # type: ignore
         """Conditions for creating a PostWorkshopAction."""
+        event = EventSnapshot.of(event)
         return bool(
             # end date is required and in future
             event.end
             and event.end >= date.today()
             # event cannot be cancelled / unresponsive / stalled
-            and not event.tags.filter(name__in=["cancelled", "unresponsive", "stalled"])
+            and event.active
             # 2020-02-07: changed conditions below
             # must have "automated-email" tag
-            and event.tags.filter(name__icontains="automated-email")
+            and event.automated_email
             # must have LC, DC, or SWC tags
-            and event.tags.filter(name__in=["LC", "DC", "SWC", "Circuits"])
+            and event.has_any_tag("LC", "DC", "SWC", "Circuits")
             # must not be self-organized or instructor training
             # 2020-02-11: only for workshops administered by other than
             #             Instructor Training
-            and event.administrator
-            and event.administrator.domain != "carpentries.org"
+            and event.has_administrator
+            and event.administrator_domain != "carpentries.org"
         )
 
     def get_additional_context(self, objects, *args, **kwargs):
@@ -750,35 +828,26 @@ class InstructorsHostIntroductionAction(BaseAction):
             return None
 
     @staticmethod
-    def check(event: Event):  # type: ignore
-        """Conditions for creating a SelfOrganisedRequestAction."""
-        # there is 1 host task and 2 instructor tasks
-        try:
-            host = event.task_set.filter(role__name="host").first()
-            instructors = event.task_set.filter(role__name="instructor")
-            supporting_instructors = event.task_set.filter(
-                role__name="supporting-instructor"
-            )
-        except (Task.DoesNotExist, ValueError):
-            return False
-
-        online = event.tags.filter(name="online")
+    def check(event: Union[Event, EventSnapshot]):  # type: ignore
+        """Conditions for creating a InstructorsHostIntroductionAction."""
+        event = EventSnapshot.of(event)
+        online = event.has_any_tag("online")
 
         return bool(
             # is NOT self-organized
-            event.administrator
-            and event.administrator.domain != "self-organized"
+            event.has_administrator
+            and event.administrator_domain != "self-organized"
             # starts in future
             and event.start
             and event.start >= (date.today() + timedelta(days=7))
             # no "cancelled", "unresponsive", or "stalled" tags
-            and not event.tags.filter(name__in=["cancelled", "unresponsive", "stalled"])
+            and event.active
             # special "automated-email" tag
-            and event.tags.filter(name__icontains="automated-email")
+            and event.automated_email
             # roles: 1 host and 2+ instructors, and perhaps 1+ supporting instr.
-            and host
-            and len(instructors) >= 2
-            and (online and len(supporting_instructors) >= 1 or not online)
+            and event.roles["host"] >= 1
+            and event.roles["instructor"] >= 2
+            and (online and event.roles["supporting-instructor"] >= 1 or not online)
         )
 
     def get_additional_context(self, objects, *args, **kwargs):
@@ -912,10 +981,11 @@ class AskForWebsiteAction(BaseAction):
             return ""
 
     @staticmethod
-    def check(event: Event):  # type: ignore
+    def check(event: Union[Event, EventSnapshot]):  # type: ignore
         """Conditions for creating a AskForWebsiteAction."""
-        instructors = event.task_set.filter(
-            role__name__in=AskForWebsiteAction.role_names
+        event = EventSnapshot.of(event)
+        instructors = sum(
+            event.roles[role_name] for role_name in AskForWebsiteAction.role_names
         )
 
         return bool(
@@ -923,16 +993,16 @@ class AskForWebsiteAction(BaseAction):
             event.start
             and event.start >= date.today()
             # event cannot be cancelled / unresponsive / stalled
-            and not event.tags.filter(name__in=["cancelled", "unresponsive", "stalled"])
+            and event.active
             # must have "automated-email" tag
-            and event.tags.filter(name__icontains="automated-email")
+            and event.automated_email
             # must be self-organized or centrally-organised (ie. must have
             # an administrator)
-            and event.administrator
+            and event.has_administrator
             # cannot have a URL
             and not event.url
             # must have someone to send the email to
-            and len(instructors) >= 1
+            and instructors >= 1
         )
 
     def get_additional_context(self, objects, *args, **kwargs):
@@ -1044,11 +1114,9 @@ class RecruitHelpersAction(BaseAction):
             return ""
 
     @staticmethod
-    def check(event: Event):  # type: ignore
+    def check(event: Union[Event, EventSnapshot]):  # type: ignore
         """Conditions for creating a RecruitHelpersAction."""
-        hosts = event.task_set.filter(role__name="host")
-        instructors = event.task_set.filter(role__name="instructor")
-        helpers = event.task_set.filter(role__name="helper")
+        event = EventSnapshot.of(event)
 
         return bool(
             # start date is required and in future
@@ -1057,16 +1125,16 @@ class RecruitHelpersAction(BaseAction):
             # additionally it can't be sooner than 14 days
             and (event.start - date.today()) >= timedelta(days=14)
             # event cannot be cancelled / unresponsive / stalled
-            and not event.tags.filter(name__in=["cancelled", "unresponsive", "stalled"])
+            and event.active
             # must have "automated-email" tag
-            and event.tags.filter(name__icontains="automated-email")
+            and event.automated_email
             # must be centrally-organised
-            and event.administrator
-            and event.administrator.domain != "self-organized"
+            and event.has_administrator
+            and event.administrator_domain != "self-organized"
             # must have someone to send the email to
-            and (len(instructors) >= 1 or len(hosts) >= 1)
+            and (event.roles["instructor"] >= 1 or event.roles["host"] >= 1)
             # can't have any helpers
-            and len(helpers) == 0
+            and event.roles["helper"] == 0
         )
 
     def get_additional_context(self, objects, *args, **kwargs):
@@ -1316,18 +1384,22 @@ class UpdateProfileReminderRepeatedAction(BaseRepeatedAction):
             active=True,
             action="profile-update",
         )
-        for person in people:
-            ActionManageMixin.add(
-                action_class=self.EMAIL_ACTION_CLASS,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects={
-                    "person_email": person.email,
-                    "person_full_name": person.full_name,
-                },
-                object_=person,
-            )
+        ActionManageMixin.bulk_add(
+            action_class=self.EMAIL_ACTION_CLASS,
+            logger=logger,
+            scheduler=scheduler,
+            triggers=triggers,
+            entries=(
+                (
+                    {
+                        "person_email": person.email,
+                        "person_full_name": person.full_name,
+                    },
+                    person,
+                )
+                for person in people
+            ),
+        )
 
     @staticmethod
     def get_people_with_anniversary() -> Iterable[Person]:
@@ -1341,3 +1413,39 @@ class UpdateProfileReminderRepeatedAction(BaseRepeatedAction):
             created_at__day=today.day,
         )
         return people
+
+
+# Actions scheduled for an event, or for a task, when their conditions become met
+# (and removed when conditions aren't met anymore), together with action name of
+# triggers they're launched by.
+EVENT_ACTIONS: Tuple[Tuple[Type[BaseAction], str], ...] = (
+    (PostWorkshopAction, "week-after-workshop-completion"),
+    (InstructorsHostIntroductionAction, "instructors-host-introduction"),
+    (AskForWebsiteAction, "ask-for-website"),
+    (RecruitHelpersAction, "recruit-helpers"),
+)
+TASK_ACTIONS: Tuple[Tuple[Type[BaseAction], str], ...] = (
+    (NewInstructorAction, "new-instructor"),
+    (NewSupportingInstructorAction, "new-supporting-instructor"),
+)
+
+
+def action_transitions(
+    actions: Iterable[Tuple[Type[BaseAction], str]],
+    old: Optional[Tuple],
+    new: Optional[Tuple],
+) -> List[Tuple[Type[BaseAction], str, bool]]:
+    """Compare conditions of `actions` before and after a change.
+
+    `old` and `new` are arguments for actions' `check()`, e.g. `(snapshot,)` for
+    event actions or `(task, snapshot)` for task actions; `None` stands for an
+    object that didn't exist yet or doesn't exist anymore.  Returns
+    `(action class, trigger action, added)` for every action whose conditions
+    became met (`added=True`) or stopped being met (`added=False`)."""
+    transitions = []
+    for action_class, trigger_action in actions:
+        was_met = old is not None and bool(action_class.check(*old))
+        is_met = new is not None and bool(action_class.check(*new))
+        if was_met != is_met:
+            transitions.append((action_class, trigger_action, is_met))
+    return transitions
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 import logging
 
 from django.contrib import admin, messages
+from django.core.paginator import Paginator
 from django.db.models import TextField
 from django.shortcuts import get_object_or_404, redirect
 from django.template.response import TemplateResponse
@@ -14,10 +15,16 @@ from markdownx.widgets import AdminMarkdownxWidget
 from rq.exceptions import NoSuchJobError
 
 from autoemails.actions import BaseRepeatedAction
-from autoemails.forms import RescheduleForm, TemplateForm
+from autoemails.forms import QueueFilterForm, RescheduleForm, TemplateForm
 from autoemails.job import Job
 from autoemails.models import EmailTemplate, RQJob, Trigger
-from autoemails.utils import check_status, scheduled_execution_time
+from autoemails.scheduled_jobs import (
+    ScheduledJobs,
+    index_scheduled_job,
+    indexed_action_names,
+    unindex_scheduled_jobs,
+)
+from autoemails.utils import check_status, scheduled_execution_time, sync_rqjobs
 from workshops.util import admin_required
 
 logger = logging.getLogger("amy.signals")
@@ -43,13 +50,40 @@ class EmailTemplateAdmin(admin.ModelAdmin):
         ]
         return new_urls + original_urls
 
+    # number of scheduled jobs displayed on a single page of the queue
+    queue_per_page = 50
+
     def email_queue_view(self, request):
-        jobs = list(scheduler.get_jobs(with_times=True))
+        form = QueueFilterForm(
+            request.GET, action_names=indexed_action_names(scheduler.connection)
+        )
+        filters = form.cleaned_data if form.is_valid() else {}
+        scheduled_jobs = ScheduledJobs(
+            scheduler,
+            action_name=filters.get("action_name"),
+            start=filters.get("start"),
+            end=filters.get("end"),
+        )
+        page = Paginator(scheduled_jobs, self.queue_per_page).get_page(
+            request.GET.get("page")
+        )
+        jobs = list(page.object_list)
+
+        # link jobs to their previews
+        rqjobs = {
+            rqjob.job_id: rqjob
+            for rqjob in RQJob.objects.filter(
+                job_id__in=[job.get_id() for job, _ in jobs]
+            )
+        }
         context = dict(
             self.admin_site.each_context(request),
             title="Queue",
-            cl=self.get_changelist_instance(request),
+            opts=self.model._meta,
+            form=form,
+            page=page,
             queue=jobs,
+            rows=[(job, time, rqjobs.get(job.get_id())) for job, time in jobs],
         )
         return TemplateResponse(request, "queue.html", context)
 
@@ -89,14 +123,7 @@ class RQJobAdmin(admin.ModelAdmin):
     ]
 
     def action_refresh_state(self, request, queryset):
-        counter = 0
-        for rqjob in queryset:
-            status = check_status(rqjob.job_id)
-            if status is not None:
-                rqjob.status = status
-                rqjob.save()
-                counter += 1
-
+        counter = sync_rqjobs(queryset.values_list("job_id", flat=True), scheduler)
         self.message_user(request, "Refreshed status of %d RQJob(s)." % counter)
 
     action_refresh_state.short_description = "Refresh status from Redis"
@@ -251,6 +278,13 @@ class RQJobAdmin(admin.ModelAdmin):
 
                 try:
                     scheduler.change_execution_time(job, new_exec)
+                    if job.meta.get("action_name"):
+                        index_scheduled_job(
+                            scheduler.connection,
+                            job.get_id(),
+                            job.meta["action_name"],
+                            new_exec,
+                        )
                     logger.debug(f"Job {rqjob.job_id} rescheduled")
                     messages.info(
                         request,
@@ -298,6 +332,13 @@ class RQJobAdmin(admin.ModelAdmin):
 
         try:
             scheduler.change_execution_time(job, now_utc)
+            if job.meta.get("action_name"):
+                index_scheduled_job(
+                    scheduler.connection,
+                    job.get_id(),
+                    job.meta["action_name"],
+                    now_utc,
+                )
             logger.debug(f"Job {rqjob.job_id} rescheduled to now")
             messages.info(request, f"The job {rqjob.job_id} was rescheduled to now.")
 
@@ -374,6 +415,10 @@ class RQJobAdmin(admin.ModelAdmin):
         if job.is_queued or not job.get_status():
             job.cancel()  # for "pure" jobs
             scheduler.cancel(job)  # for scheduler-based jobs
+            if job.meta.get("action_name"):
+                unindex_scheduled_jobs(
+                    scheduler.connection, [job.get_id()], job.meta["action_name"]
+                )
             rqjob.status = "cancelled"
             rqjob.save()
 
@@ -1,15 +1,28 @@
+from collections import defaultdict
+from datetime import datetime
+
 from django.contrib import messages
+from django.db import transaction
 from django.urls import reverse
 from django.utils.html import format_html
 from django_rq.queues import DjangoScheduler
+import pytz
 from rq.exceptions import NoSuchJobError
+from rq_scheduler.utils import from_unix, to_unix
 
 from autoemails.models import RQJob, Trigger
 
 from .job import Job
+from .scheduled_jobs import index_scheduled_job, unindex_scheduled_jobs
 from .utils import check_status, scheduled_execution_time
 
 
+def job_meta(action_name, launch_at):
+    """Metadata of action's job.  The action itself (with its trigger, template
+    and context objects) is already stored as the job's callable."""
+    return dict(action_name=action_name, launch_at=launch_at)
+
+
 class ActionManageMixin:
     """Mixin used for adding/removing Actions related to an object."""
 
@@ -59,13 +72,7 @@ class ActionManageMixin:
 
             # prepare launch timestamp and some metadata
             launch_at = action.get_launch_at()
-            meta = dict(
-                action=action,
-                template=trigger.template,
-                launch_at=launch_at,
-                email=None,
-                context=None,
-            )
+            meta = job_meta(action_name, launch_at)
 
             # enqueue job at specified timestamp with metadata
             logger.debug("%s: enqueueing", action_name)
@@ -73,6 +80,9 @@ class ActionManageMixin:
             scheduled_at = scheduled_execution_time(
                 job.get_id(), scheduler=scheduler, naive=False
             )
+            index_scheduled_job(
+                scheduler.connection, job.get_id(), action_name, scheduled_at
+            )
             logger.debug("%s: job created [%r]", action_name, job)
 
             if object_:
@@ -124,6 +134,108 @@ class ActionManageMixin:
 
         return created_jobs, created_rqjobs
 
+    @staticmethod
+    def bulk_add(
+        action_class,
+        logger,
+        scheduler,
+        triggers,
+        entries,
+    ):
+        """Schedule jobs for many objects at once.
+
+        `entries` is an iterable of `(context_objects, object_)` pairs; for each
+        of them a job is scheduled for every trigger, just like `add` would do.
+        All jobs are saved in a single Redis pipeline, and `RQJob` rows are
+        created with a single query (plus one query per type of related objects).
+
+        Return lists of created jobs and `RQJob`s in the same order as `add`
+        does (ie. for each entry jobs for all triggers)."""
+        Action = action_class
+        action_name = Action.__name__
+
+        triggers = list(triggers)
+        entries = list(entries)
+        logger.debug(
+            "%s: adding jobs for %d triggers and %d entries...",
+            action_name,
+            len(triggers),
+            len(entries),
+        )
+
+        created_jobs = []
+        created_rqjobs = []
+        related_objects = []
+        scheduled_times = {}
+
+        # All jobs are scheduled relative to the same moment.  Scheduled
+        # execution time is known upfront, so there's no need to read it back
+        # from Redis.
+        now = datetime.utcnow()
+        with scheduler.connection.pipeline() as pipeline:
+            for context_objects, object_ in entries:
+                for trigger in triggers:
+                    action = Action(trigger=trigger, objects=dict(context_objects))
+                    launch_at = action.get_launch_at()
+                    meta = job_meta(action_name, launch_at)
+
+                    # the same as `scheduler.enqueue_in`, but without saving
+                    # the job immediately
+                    job = scheduler._create_job(action, meta=meta, commit=False)
+                    job.save(pipeline=pipeline)
+                    timestamp = to_unix(now + launch_at)
+                    scheduled_times[job.get_id()] = timestamp
+                    index_scheduled_job(
+                        pipeline, job.get_id(), action_name, from_unix(timestamp)
+                    )
+
+                    created_jobs.append(job)
+                    created_rqjobs.append(
+                        RQJob(
+                            job_id=job.get_id(),
+                            trigger=trigger,
+                            scheduled_execution=from_unix(timestamp).replace(
+                                tzinfo=pytz.UTC
+                            ),
+                            # newly created job's status is empty, which
+                            # `check_status` reports as "scheduled"
+                            status="scheduled",
+                            mail_status="",
+                            event_slug=action.event_slug(),
+                            recipients=action.all_recipients(),
+                            action_name=action_name,
+                        )
+                    )
+                    related_objects.append(object_)
+
+            if scheduled_times:
+                pipeline.zadd(scheduler.scheduled_jobs_key, scheduled_times)
+            pipeline.execute()
+        logger.debug("%s: %d jobs created", action_name, len(created_jobs))
+
+        with transaction.atomic():
+            RQJob.objects.bulk_create(created_rqjobs)
+
+            # link jobs with their objects, grouped by M2M table
+            links = defaultdict(list)
+            for object_, rqjob in zip(related_objects, created_rqjobs):
+                if object_ is None:
+                    continue
+                manager = object_.rq_jobs
+                links[manager.through].append(
+                    manager.through(
+                        **{
+                            manager.source_field_name: object_,
+                            manager.target_field_name: rqjob,
+                        }
+                    )
+                )
+            for through, rows in links.items():
+                through.objects.bulk_create(rows)
+        logger.debug("%s: %d jobs saved", action_name, len(created_rqjobs))
+
+        return created_jobs, created_rqjobs
+
     @staticmethod
     def bulk_schedule_message(
         request, num_emails: int, trigger: Trigger, job: Job, scheduler: DjangoScheduler
@@ -205,10 +317,49 @@ class ActionManageMixin:
                         fail_silently=True,
                     )
 
+            unindex_scheduled_jobs(scheduler.connection, jobs, action_name)
+
             # remove DB job objects
             object_.rq_jobs.filter(job_id__in=jobs).delete()
             logger.debug("%s: jobs removed from %r", action_name, object_)
 
+    @staticmethod
+    def apply_transitions(
+        transitions,
+        logger,
+        scheduler,
+        connection,
+        context_objects,
+        object_,
+        request=None,
+    ):
+        """Add jobs of actions whose conditions became met, and remove jobs
+        of actions whose conditions aren't met anymore.
+
+        `transitions` come from `autoemails.actions.action_transitions`."""
+        for action_class, trigger_action, added in transitions:
+            if added:
+                ActionManageMixin.add(
+                    action_class=action_class,
+                    logger=logger,
+                    scheduler=scheduler,
+                    triggers=Trigger.objects.filter(active=True, action=trigger_action),
+                    context_objects=context_objects,
+                    object_=object_,
+                    request=request,
+                )
+            else:
+                jobs = object_.rq_jobs.filter(trigger__action=trigger_action)
+                ActionManageMixin.remove(
+                    action_class=action_class,
+                    logger=logger,
+                    scheduler=scheduler,
+                    connection=connection,
+                    jobs=jobs.values_list("job_id", flat=True),
+                    object_=object_,
+                    request=request,
+                )
+
     def action_add(self, action_class):
         return ActionManageMixin.add(
             action_class=action_class,
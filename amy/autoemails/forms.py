@@ -17,6 +17,18 @@ class RescheduleForm(forms.Form):
     )
 
 
+class QueueFilterForm(forms.Form):
+    action_name = forms.ChoiceField(required=False, label="Action")
+    start = forms.DateTimeField(required=False, label="Outgoing from (UTC)")
+    end = forms.DateTimeField(required=False, label="Outgoing until (UTC)")
+
+    def __init__(self, *args, action_names=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["action_name"].choices = [("", "All")] + [
+            (name, name) for name in action_names
+        ]
+
+
 class TemplateForm(forms.Form):
     template = MarkdownxFormField(
         label="Markdown body",
@@ -1,14 +1,29 @@
 from rq.job import Job as _Job
+from rq.job import JobStatus
 
+from autoemails.scheduled_jobs import unindex_scheduled_jobs
+
+# Redis set of IDs of jobs whose status has changed since their RQJobs were last
+# synchronized (see `autoemails.utils.sync_changed_rqjobs`).
+CHANGED_JOBS_KEY = "autoemails:changed-jobs"
 
-class Job(_Job):
-    def set_status(self, status, *args, **kwargs):
-        from autoemails.models import RQJob
 
+class Job(_Job):
+    def set_status(self, status, pipeline=None):
         # update status in parent class
-        result = super().set_status(status, *args, **kwargs)
+        result = super().set_status(status, pipeline=pipeline)
+
+        # RQJob is updated later, together with other changed jobs
+        connection = pipeline if pipeline is not None else self.connection
+        connection.sadd(CHANGED_JOBS_KEY, self.get_id())
 
-        # update DB
-        RQJob.objects.filter(job_id=self.get_id()).update(status=status)
+        # job has left the scheduler (repeated jobs return to it, though)
+        action_name = self.meta.get("action_name")
+        if (
+            action_name
+            and status != JobStatus.SCHEDULED
+            and not self.meta.get("interval")
+        ):
+            unindex_scheduled_jobs(connection, [self.get_id()], action_name)
 
         return result
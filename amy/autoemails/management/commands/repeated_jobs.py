@@ -1,25 +1,42 @@
 from datetime import datetime
 import logging
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 import django_rq
 
 from autoemails.actions import BaseRepeatedAction, UpdateProfileReminderRepeatedAction
+from autoemails.base_views import job_meta
 from autoemails.models import RQJob, Trigger
-from autoemails.utils import check_status, scheduled_execution_time
+from autoemails.scheduled_jobs import backfill_scheduled_jobs_index
+from autoemails.utils import check_status, scheduled_execution_time, sync_changed_rqjobs
 
 scheduler = django_rq.get_scheduler()
 logger = logging.getLogger("amy.signals")
 REPEATED_JOBS_BY_TRIGGER = {
     "profile-update": UpdateProfileReminderRepeatedAction,
 }
+REPEATED_ACTION_NAMES = {cls.__name__ for cls in REPEATED_JOBS_BY_TRIGGER.values()}
 DAY_IN_SECONDS = 86400
+# fixed ID, so that there's only one job synchronizing RQJobs
+SYNC_RQJOBS_JOB_ID = "autoemails-sync-rqjobs"
+
+
+def is_repeated_job(job) -> bool:
+    if "action_name" in job.meta:
+        return job.meta["action_name"] in REPEATED_ACTION_NAMES
+    # jobs scheduled before job meta was trimmed down only carry the action
+    return isinstance(job.meta.get("action"), BaseRepeatedAction)
 
 
 def clear_scheduled_jobs():
     # Delete any existing repeated jobs in the scheduler
     for job in scheduler.get_jobs():
-        if issubclass(job.meta["action"].__class__, BaseRepeatedAction):
+        if job.get_id() == SYNC_RQJOBS_JOB_ID:
+            logger.debug("Deleting scheduled job %s", job)
+            scheduler.cancel(job)
+            job.delete()
+        elif is_repeated_job(job):
             logger.debug("Deleting scheduled job %s", job)
             job.delete()
             RQJob.objects.filter(job_id=job.get_id()).delete()
@@ -28,13 +45,7 @@ def clear_scheduled_jobs():
 def schedule_repeating_job(trigger, action_class: BaseRepeatedAction, _scheduler=None):
     action_name = action_class.__name__
     action = action_class(trigger=trigger)
-    meta = dict(
-        action=action,
-        template=trigger.template,
-        email=None,
-        context=None,
-        email_action_class=action_class.EMAIL_ACTION_CLASS,
-    )
+    meta = job_meta(action_name, None)
     job = _scheduler.schedule(
         scheduled_time=datetime.utcnow(),  # Time for first execution, in UTC timezone
         func=action,  # Function to be queued
@@ -66,6 +77,20 @@ def schedule_repeating_job(trigger, action_class: BaseRepeatedAction, _scheduler
     return rqj
 
 
+def schedule_rqjobs_sync(_scheduler=None):
+    """Schedule periodic synchronization of RQJobs with changed jobs' statuses
+    (see `autoemails.job.Job.set_status`)."""
+    return _scheduler.schedule(
+        scheduled_time=datetime.utcnow(),
+        func=sync_changed_rqjobs,
+        interval=settings.AUTOEMAIL_RQJOBS_SYNC_INTERVAL,
+        repeat=None,
+        id=SYNC_RQJOBS_JOB_ID,
+        # results of previous runs aren't interesting
+        result_ttl=settings.AUTOEMAIL_RQJOBS_SYNC_INTERVAL * 2,
+    )
+
+
 def register_scheduled_jobs():
     triggers = Trigger.objects.filter(
         active=True, action__in=REPEATED_JOBS_BY_TRIGGER.keys()
@@ -74,6 +99,7 @@ def register_scheduled_jobs():
         schedule_repeating_job(
             trigger, REPEATED_JOBS_BY_TRIGGER[trigger.action], scheduler
         )
+    schedule_rqjobs_sync(scheduler)
 
 
 class Command(BaseCommand):
@@ -84,3 +110,6 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         clear_scheduled_jobs()  # This is necessary to prevent dupes
         register_scheduled_jobs()
+        # jobs scheduled before the index of scheduled jobs existed aren't in it
+        indexed = backfill_scheduled_jobs_index(scheduler)
+        logger.debug("Indexed %d scheduled jobs", indexed)
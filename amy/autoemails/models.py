@@ -5,10 +5,10 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMultiAlternatives
 from django.db import models
-from django.template import Template, TemplateSyntaxError, engines
+from django.template import Template, TemplateSyntaxError
 from django.urls import reverse
-import markdown
 
+from autoemails.utils import clear_template_cache, compile_template, render_markdown
 from workshops.mixins import ActiveMixin, CreatedUpdatedMixin
 
 EmailBody = namedtuple("EmailBody", ["text", "html"])
@@ -108,8 +108,10 @@ class EmailTemplate(ActiveMixin, CreatedUpdatedMixin, models.Model):
         default_engine: name of the template backend used for rendering
         For more see:
         https://docs.djangoproject.com/en/2.2/ref/settings/#std:setting-TEMPLATES-NAME
+
+        Compiled templates are cached, see `autoemails.utils.compile_template`.
         """
-        return engines[default_engine].from_string(content)
+        return compile_template(content, default_engine)
 
     @staticmethod
     def render_template(
@@ -184,7 +186,7 @@ class EmailTemplate(ActiveMixin, CreatedUpdatedMixin, models.Model):
         if html:
             html_body = self.render_template(html, context)
         else:
-            html_body = markdown.markdown(base_template)
+            html_body = render_markdown(base_template)
 
         body = EmailBody(text=text_body, html=html_body)
         return body
@@ -233,6 +235,10 @@ class EmailTemplate(ActiveMixin, CreatedUpdatedMixin, models.Model):
 
         return msg
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        clear_template_cache()
+
     def __str__(self):
         return f"Email Template '{self.slug}' ({self.subject:.50}...)"
 
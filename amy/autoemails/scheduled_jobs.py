@@ -0,0 +1,166 @@
+"""Browsing RQ-Scheduler's queue of scheduled jobs page by page.
+
+RQ-Scheduler keeps IDs of scheduled jobs in a single sorted set (scored by
+scheduled execution time).  Jobs of actions are additionally indexed by action
+name in separate sorted sets, maintained when jobs are scheduled, rescheduled,
+or leave the scheduler.  Index entries which went out of date anyway (e.g. jobs
+cancelled directly in RQ-Scheduler) are fixed when they're found while
+browsing."""
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from rq.utils import as_text
+from rq_scheduler.utils import from_unix, to_unix
+
+# sorted set of IDs of scheduled jobs of given action (scored like in
+# RQ-Scheduler's set)
+ACTION_INDEX_KEY = "autoemails:scheduled-jobs:{}"
+# set of names of indexed actions
+ACTION_NAMES_KEY = "autoemails:scheduled-jobs-actions"
+
+
+def action_index_key(action_name: str) -> str:
+    return ACTION_INDEX_KEY.format(action_name)
+
+
+def index_scheduled_job(
+    connection, job_id: str, action_name: str, scheduled_at: datetime
+) -> None:
+    """Add job to the index of its action, or update its scheduled time.
+
+    `connection` can be a pipeline."""
+    connection.zadd(action_index_key(action_name), {job_id: to_unix(scheduled_at)})
+    connection.sadd(ACTION_NAMES_KEY, action_name)
+
+
+def unindex_scheduled_jobs(connection, job_ids: List[str], action_name: str) -> None:
+    """Remove jobs from the index of their action.  `connection` can be
+    a pipeline."""
+    if job_ids:
+        connection.zrem(action_index_key(action_name), *job_ids)
+
+
+def backfill_scheduled_jobs_index(scheduler, batch_size: int = 1000) -> int:
+    """Index all scheduled jobs of actions, including jobs scheduled before the
+    index existed.  Return number of indexed jobs."""
+    connection = scheduler.connection
+    entries = connection.zscan_iter(scheduler.scheduled_jobs_key, count=batch_size)
+    indexed = 0
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return indexed
+
+        jobs = scheduler.job_class.fetch_many(
+            [as_text(job_id) for job_id, _ in batch], connection=connection
+        )
+        with connection.pipeline() as pipeline:
+            for job, (_, score) in zip(jobs, batch):
+                if job is None:
+                    continue
+                action_name = job.meta.get("action_name")
+                if not action_name and job.meta.get("action") is not None:
+                    # older jobs only carry the action itself
+                    action_name = type(job.meta["action"]).__name__
+                if action_name:
+                    index_scheduled_job(
+                        pipeline, job.get_id(), action_name, from_unix(score)
+                    )
+                    indexed += 1
+            pipeline.execute()
+
+
+def indexed_action_names(connection) -> List[str]:
+    return sorted(as_text(name) for name in connection.smembers(ACTION_NAMES_KEY))
+
+
+class ScheduledJobs:
+    """Sequence of scheduled `(job, scheduled time)` pairs, ordered by time.
+
+    Jobs can be limited to a single action and to a time window.  Slicing it
+    (e.g. by `django.core.paginator.Paginator`) reads only IDs of jobs on the
+    requested page and then the jobs themselves, in a single round-trip."""
+
+    # how many times a page is read again after fixing the index
+    MAX_REFILLS = 3
+
+    def __init__(
+        self,
+        scheduler,
+        action_name: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ):
+        self.scheduler = scheduler
+        self.connection = scheduler.connection
+        self.action_name = action_name
+        if action_name:
+            self.key = action_index_key(action_name)
+        else:
+            self.key = scheduler.scheduled_jobs_key
+        self.min = to_unix(start) if start else "-inf"
+        self.max = to_unix(end) if end else "+inf"
+
+    def count(self) -> int:
+        return self.connection.zcount(self.key, self.min, self.max)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def _ids_with_scores(self, offset: int, limit: int) -> List[Tuple[str, float]]:
+        return [
+            (as_text(job_id), score)
+            for job_id, score in self.connection.zrangebyscore(
+                self.key, self.min, self.max, start=offset, num=limit, withscores=True
+            )
+        ]
+
+    def _refresh_index(self, entries) -> bool:
+        """Remove index entries of jobs which aren't scheduled anymore, and
+        update scores of jobs rescheduled without updating the index.  Return
+        `True` if the index was up to date."""
+        with self.connection.pipeline() as pipeline:
+            for job_id, _ in entries:
+                pipeline.zscore(self.scheduler.scheduled_jobs_key, job_id)
+            scores = pipeline.execute()
+
+        stale = []
+        rescheduled = {}
+        for (job_id, indexed_score), score in zip(entries, scores):
+            if score is None:
+                stale.append(job_id)
+            elif score != indexed_score:
+                rescheduled[job_id] = score
+
+        with self.connection.pipeline() as pipeline:
+            unindex_scheduled_jobs(pipeline, stale, self.action_name)
+            if rescheduled:
+                pipeline.zadd(self.key, rescheduled)
+            pipeline.execute()
+        return not stale and not rescheduled
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("ScheduledJobs support only slicing without step.")
+        offset = key.start or 0
+        limit = (key.stop - offset) if key.stop is not None else -1
+        if limit == 0:
+            return []
+
+        entries = self._ids_with_scores(offset, limit)
+        if self.action_name:
+            # fixing the index moves other entries in or out of the page
+            for _ in range(self.MAX_REFILLS):
+                if self._refresh_index(entries):
+                    break
+                entries = self._ids_with_scores(offset, limit)
+
+        jobs = self.scheduler.job_class.fetch_many(
+            [job_id for job_id, _ in entries], connection=self.connection
+        )
+        return [
+            (job, from_unix(score))
+            for job, (_, score) in zip(jobs, entries)
+            if job is not None
+        ]
@@ -0,0 +1,53 @@
+from collections import Counter
+from typing import FrozenSet, Optional
+
+from workshops.models import Event
+
+INACTIVE_TAGS = frozenset(["cancelled", "unresponsive", "stalled"])
+
+
+class EventSnapshot:
+    """Event's data used in conditions of event- and task-related actions.
+
+    Tags, administrator and numbers of tasks per role are loaded once (in up
+    to 3 queries), so that conditions of all actions can be checked in memory.
+    Because the data is copied, a snapshot taken before the event (or one of
+    its tasks) is changed can be compared with one taken afterwards."""
+
+    def __init__(self, event: Event):
+        self.event = event
+        self.start = event.start
+        self.end = event.end
+        self.url = event.url
+        self.administrator_domain: Optional[str] = (
+            event.administrator.domain if event.administrator_id else None
+        )
+        self.tags: FrozenSet[str] = frozenset()
+        self.roles: Counter = Counter()
+        if event.pk:
+            self.tags = frozenset(event.tags.values_list("name", flat=True))
+            self.roles = Counter(event.task_set.values_list("role__name", flat=True))
+
+    @classmethod
+    def of(cls, event) -> "EventSnapshot":
+        """Return snapshot of the event, unless it already is a snapshot."""
+        if isinstance(event, cls):
+            return event
+        return cls(event)
+
+    @property
+    def has_administrator(self) -> bool:
+        return self.administrator_domain is not None
+
+    @property
+    def active(self) -> bool:
+        """Not cancelled, unresponsive nor stalled."""
+        return not (self.tags & INACTIVE_TAGS)
+
+    @property
+    def automated_email(self) -> bool:
+        """Has a tag containing "automated-email" (case-insensitive)."""
+        return any("automated-email" in tag.lower() for tag in self.tags)
+
+    def has_any_tag(self, *names: str) -> bool:
+        return not self.tags.isdisjoint(names)
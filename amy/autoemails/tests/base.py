@@ -3,6 +3,11 @@ from fakeredis import FakeStrictRedis
 from rq import Queue
 
 from autoemails.job import Job
+from autoemails.scheduled_jobs import (
+    ACTION_NAMES_KEY,
+    action_index_key,
+    indexed_action_names,
+)
 
 connection = FakeStrictRedis()
 
@@ -36,4 +41,8 @@ class FakeRedisTestCaseMixin:
         assert self.scheduler.count() == 0
         self.queue.empty()
         assert self.queue.count == 0
+        # clear index of scheduled jobs
+        for action_name in indexed_action_names(self.connection):
+            self.connection.delete(action_index_key(action_name))
+        self.connection.delete(ACTION_NAMES_KEY)
         super().tearDown()
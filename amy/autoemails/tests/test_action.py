@@ -1,4 +1,5 @@
 from datetime import timedelta
+import pickle
 from unittest.mock import patch
 
 from django.conf import settings
@@ -304,6 +305,65 @@ Regional Coordinator""",
         with self.assertRaises(Trigger.DoesNotExist):
             a._email()
 
+    def test_pickled_state(self):
+        """Pickled action refers to its trigger and context objects by IDs."""
+        self.prepare_template()
+        self.prepare_trigger()
+        term = Term.objects.active()[0]
+        objects = dict(self.prepare_context(), term=term)
+        a = BaseAction(trigger=self.trigger, objects=objects)
+
+        data = pickle.dumps(a)
+        self.assertLess(len(data), len(pickle.dumps(a.__dict__)))
+        self.assertNotIn(self.template.body_template.encode(), data)
+
+        # trigger with template, and the term
+        with self.assertNumQueries(2):
+            unpickled = pickle.loads(data)
+        self.assertEqual(unpickled, a)
+        self.assertEqual(unpickled.context_objects, objects)
+        self.assertEqual(unpickled.template.body_template, self.template.body_template)
+
+    def test_pickled_state_edited_template(self):
+        self.prepare_template()
+        self.prepare_trigger()
+        a = BaseAction(trigger=self.trigger, objects=self.prepare_context())
+        a.template.body_template = "Short template!!!"
+
+        unpickled = pickle.loads(pickle.dumps(a))
+        self.assertEqual(unpickled.template.body_template, "Short template!!!")
+        # edit is kept when pickled again
+        unpickled = pickle.loads(pickle.dumps(unpickled))
+        self.assertEqual(unpickled.template.body_template, "Short template!!!")
+
+    def test_pickled_state_removed_objects(self):
+        self.prepare_template()
+        self.prepare_trigger()
+        term = Term.objects.create(
+            content="Test term",
+            slug="test-term",
+            required_type=Term.OPTIONAL_REQUIRE_TYPE,
+        )
+        a = BaseAction(trigger=self.trigger, objects=dict(term=term))
+        data = pickle.dumps(a)
+        term.delete()
+        self.trigger.delete()
+
+        unpickled = pickle.loads(data)
+        with self.assertRaises(Term.DoesNotExist):
+            unpickled.context_objects["term"].refresh_from_db()
+        # sending the email fails gracefully
+        self.assertEqual(unpickled(), False)
+
+    def test_pickled_state_unsaved_trigger(self):
+        a = BaseAction(
+            trigger=Trigger(action="test-action", template=EmailTemplate()),
+            objects=self.prepare_context(),
+        )
+        unpickled = pickle.loads(pickle.dumps(a))
+        self.assertEqual(unpickled.context_objects, a.context_objects)
+        self.assertEqual(unpickled.trigger.action, "test-action")
+
     @override_settings(AUTOEMAIL_OVERRIDE_OUTGOING_ADDRESS="test-address@example.org")
     def testOverrideSettings(self):
         """Check behavior with `AUTOEMAIL_OVERRIDE_OUTGOING_ADDRESS` setting.
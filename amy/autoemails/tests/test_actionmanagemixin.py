@@ -10,6 +10,7 @@ from autoemails.base_views import ActionManageMixin
 from autoemails.job import Job
 from autoemails.models import EmailTemplate, RQJob, Trigger
 from autoemails.tests.base import FakeRedisTestCaseMixin, dummy_job
+from autoemails.utils import check_status, scheduled_execution_time
 from workshops.models import Event, Organization, Person, Role, Tag, Task
 
 
@@ -163,11 +164,8 @@ class TestActionManageMixin(FakeRedisTestCaseMixin, TestCase):
         self.assertEqual(
             job.meta,
             dict(
-                action=action,
-                template=trigger.template,
+                action_name="NewInstructorAction",
                 launch_at=action.get_launch_at(),
-                email=None,
-                context=None,
             ),
         )
 
@@ -269,3 +267,89 @@ class TestActionManageMixin(FakeRedisTestCaseMixin, TestCase):
         # logger.debug is called 6 times (for action_add) and 6 times
         # (for action_remove)
         self.assertEqual(view.get_logger().debug.call_count, 6 + 6)
+
+    def testActionBulkAdding(self):
+        second_trigger = Trigger.objects.create(
+            action="test-action", template=EmailTemplate.objects.create(slug="second")
+        )
+        persons = [
+            Person.objects.create(
+                personal="Hermione",
+                family="Granger",
+                username="hgranger",
+                email="hg@magic.uk",
+            ),
+            Person.objects.create(
+                personal="Ron",
+                family="Weasley",
+                username="rweasley",
+                email="rw@magic.uk",
+            ),
+        ]
+        entries = [
+            (dict(task=self.task, event=self.event, person=person), person)
+            for person in persons
+        ]
+
+        jobs, rqjobs = ActionManageMixin.bulk_add(
+            action_class=NewInstructorAction,
+            logger=MagicMock(),
+            scheduler=self.scheduler,
+            triggers=Trigger.objects.filter(
+                pk__in=[self.trigger.pk, second_trigger.pk]
+            ),
+            entries=entries,
+        )
+
+        # a job for each trigger and entry
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual(self.scheduler.count(), 4)
+        self.assertEqual(RQJob.objects.count(), 4)
+        self.assertEqual([rqjob.job_id for rqjob in rqjobs], [job.id for job in jobs])
+
+        # jobs are scheduled, and scheduled execution time is the same as
+        # RQ-Scheduler reports
+        for job, rqjob in zip(jobs, rqjobs):
+            self.assertEqual(
+                rqjob.scheduled_execution,
+                scheduled_execution_time(job.id, self.scheduler, naive=False),
+            )
+            self.assertEqual(rqjob.status, check_status(job, self.scheduler))
+
+        # jobs are linked to their objects
+        for person, rqjob_pair in zip(persons, [rqjobs[:2], rqjobs[2:]]):
+            self.assertEqual(set(person.rq_jobs.all()), set(rqjob_pair))
+
+    def testActionBulkAddingRoundTrips(self):
+        persons = [
+            Person.objects.create(
+                personal=f"Person {i}",
+                family="Test",
+                username=f"person_{i}",
+                email=f"person{i}@example.org",
+            )
+            for i in range(20)
+        ]
+        scheduler = MagicMock(wraps=self.scheduler)
+        scheduler.connection = MagicMock(wraps=self.connection)
+        scheduler.scheduled_jobs_key = self.scheduler.scheduled_jobs_key
+
+        # INSERT into RQJob table + INSERT into M2M table, within a savepoint
+        with self.assertNumQueries(4):
+            jobs, _ = ActionManageMixin.bulk_add(
+                action_class=NewInstructorAction,
+                logger=MagicMock(),
+                scheduler=scheduler,
+                triggers=[self.trigger],
+                entries=[
+                    (dict(task=self.task, event=self.event), person)
+                    for person in persons
+                ],
+            )
+
+        self.assertEqual(len(jobs), 20)
+        self.assertEqual(self.scheduler.count(), 20)
+        # single pipeline; no other Redis commands were issued directly
+        scheduler.connection.pipeline.assert_called_once()
+        scheduler.connection.zscore.assert_not_called()
+        scheduler.connection.zadd.assert_not_called()
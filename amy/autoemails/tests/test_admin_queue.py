@@ -1,10 +1,21 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+from unittest.mock import patch
 
 from django.test import TestCase
 from django.urls import reverse
+from rq_scheduler.utils import to_unix
 
 from autoemails import admin
+from autoemails.actions import NewInstructorAction
+from autoemails.models import EmailTemplate, Trigger
+from autoemails.scheduled_jobs import (
+    action_index_key,
+    backfill_scheduled_jobs_index,
+    index_scheduled_job,
+    indexed_action_names,
+)
 from autoemails.tests.base import FakeRedisTestCaseMixin, dummy_job
+from autoemails.utils import scheduled_execution_time
 from workshops.tests.base import SuperuserMixin
 
 
@@ -74,3 +85,128 @@ class TestAdminQueueView(SuperuserMixin, FakeRedisTestCaseMixin, TestCase):
         queue = rv.context["queue"]
         job2, time = queue[0]
         self.assertEqual(job, job2)
+
+    def test_queue_pagination(self):
+        self._logSuperuserIn()
+        jobs = [
+            self.scheduler.enqueue_in(timedelta(hours=i), dummy_job)
+            for i in range(1, 4)
+        ]
+
+        with patch.object(admin.EmailTemplateAdmin, "queue_per_page", 2):
+            rv = self.client.get(self.url)
+            self.assertEqual([job for job, _ in rv.context["queue"]], jobs[:2])
+            self.assertEqual(rv.context["page"].paginator.count, 3)
+
+            rv = self.client.get(self.url, {"page": 2})
+            self.assertEqual([job for job, _ in rv.context["queue"]], jobs[2:])
+
+    def _schedule(self, action_name, launch_at):
+        job = self.scheduler.enqueue_in(
+            launch_at, dummy_job, meta=dict(action_name=action_name)
+        )
+        index_scheduled_job(
+            self.connection,
+            job.get_id(),
+            action_name,
+            scheduled_execution_time(job.get_id(), self.scheduler),
+        )
+        return job
+
+    def test_queue_filtered_by_action(self):
+        self._logSuperuserIn()
+        job1 = self._schedule("NewInstructorAction", timedelta(hours=2))
+        self._schedule("PostWorkshopAction", timedelta(hours=1))
+        job3 = self._schedule("NewInstructorAction", timedelta(hours=3))
+
+        rv = self.client.get(self.url, {"action_name": "NewInstructorAction"})
+        self.assertEqual([job for job, _ in rv.context["queue"]], [job1, job3])
+        self.assertEqual(
+            list(rv.context["form"].fields["action_name"].choices),
+            [
+                ("", "All"),
+                ("NewInstructorAction", "NewInstructorAction"),
+                ("PostWorkshopAction", "PostWorkshopAction"),
+            ],
+        )
+
+    def test_queue_filtered_by_time(self):
+        self._logSuperuserIn()
+        self._schedule("NewInstructorAction", timedelta(hours=1))
+        job2 = self._schedule("NewInstructorAction", timedelta(hours=3))
+        self._schedule("NewInstructorAction", timedelta(hours=5))
+        start = datetime.utcnow() + timedelta(hours=2)
+        end = datetime.utcnow() + timedelta(hours=4)
+        filters = {
+            "start": "{:%Y-%m-%d %H:%M}".format(start),
+            "end": "{:%Y-%m-%d %H:%M}".format(end),
+        }
+
+        rv = self.client.get(self.url, filters)
+        self.assertEqual([job for job, _ in rv.context["queue"]], [job2])
+
+        rv = self.client.get(self.url, dict(filters, action_name="NewInstructorAction"))
+        self.assertEqual([job for job, _ in rv.context["queue"]], [job2])
+
+    def test_outdated_index_entries_fixed(self):
+        self._logSuperuserIn()
+        job1 = self._schedule("NewInstructorAction", timedelta(hours=1))
+        job2 = self._schedule("NewInstructorAction", timedelta(hours=2))
+        job3 = self._schedule("NewInstructorAction", timedelta(hours=3))
+        # cancelled and rescheduled without updating the index
+        self.scheduler.cancel(job1)
+        self.scheduler.change_execution_time(
+            job3, datetime.utcnow() + timedelta(minutes=30)
+        )
+
+        rv = self.client.get(self.url, {"action_name": "NewInstructorAction"})
+        self.assertEqual([job for job, _ in rv.context["queue"]], [job3, job2])
+        self.assertEqual(
+            [
+                job_id.decode()
+                for job_id in self.connection.zrange(
+                    action_index_key("NewInstructorAction"), 0, -1
+                )
+            ],
+            [job3.get_id(), job2.get_id()],
+        )
+
+    def test_enqueued_job_leaves_index(self):
+        job = self._schedule("NewInstructorAction", timedelta(hours=1))
+        self.scheduler.enqueue_job(job)
+        self.assertEqual(
+            self.connection.zcard(action_index_key("NewInstructorAction")), 0
+        )
+
+
+class TestBackfillScheduledJobsIndex(FakeRedisTestCaseMixin, TestCase):
+    def test_backfill(self):
+        job1 = self.scheduler.enqueue_in(
+            timedelta(hours=1), dummy_job, meta=dict(action_name="NewInstructorAction")
+        )
+        # scheduled before job meta contained action name
+        action = NewInstructorAction(
+            trigger=Trigger(action="new-instructor", template=EmailTemplate())
+        )
+        job2 = self.scheduler.enqueue_in(
+            timedelta(hours=2), dummy_job, meta=dict(action=action)
+        )
+        # not an action
+        self.scheduler.enqueue_in(timedelta(hours=3), dummy_job)
+
+        rv = backfill_scheduled_jobs_index(self.scheduler, batch_size=2)
+
+        self.assertEqual(rv, 2)
+        self.assertEqual(
+            self.connection.zrange(
+                action_index_key("NewInstructorAction"), 0, -1, withscores=True
+            ),
+            [
+                (
+                    job.get_id().encode(),
+                    to_unix(scheduled_execution_time(job.get_id(), self.scheduler)),
+                )
+                for job in [job1, job2]
+            ],
+        )
+        self.assertEqual(indexed_action_names(self.connection), ["NewInstructorAction"])
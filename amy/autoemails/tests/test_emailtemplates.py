@@ -4,6 +4,7 @@ from django.template.exceptions import TemplateDoesNotExist, TemplateSyntaxError
 from django.test import TestCase
 
 from autoemails.models import EmailTemplate
+from autoemails.utils import clear_template_cache, template_cache_info
 
 
 class TestEmailTemplate(TestCase):
@@ -235,3 +236,69 @@ Regional Coordinator</p>""",
             body_template="",
         )
         tpl3.clean()
+
+
+class TestEmailTemplateCache(TestCase):
+    def setUp(self):
+        clear_template_cache()
+        self.template = EmailTemplate.objects.create(
+            slug="cached-template",
+            subject="Hello {{ name }}",
+            to_header="{{ email }}",
+            from_header="test@address.com",
+            cc_header="",
+            bcc_header="",
+            reply_to_header="",
+            body_template="Welcome, *{{ name }}*!",
+        )
+
+    def test_templates_compiled_once(self):
+        # Arrange
+        clear_template_cache()
+        # Act
+        for name in ["Harry", "Hermione", "Ron"]:
+            self.template.build_email(context={"name": name, "email": "x@y.org"})
+        info = template_cache_info()["templates"]
+        # Assert
+        # 7 templates (subject, from, to, cc, bcc, reply-to, body) where cc, bcc
+        # and reply-to are the same (empty) template
+        self.assertEqual(info["misses"], 5)
+        self.assertEqual(info["hits"], 3 * 7 - 5)
+
+    def test_same_template_object_returned(self):
+        self.assertIs(
+            EmailTemplate.get_template("Hello {{ name }}"),
+            EmailTemplate.get_template("Hello {{ name }}"),
+        )
+        self.assertIsNot(
+            EmailTemplate.get_template("Hello {{ name }}"),
+            EmailTemplate.get_template("Hello {{ name }}", default_engine="django"),
+        )
+
+    def test_markdown_cached_for_repeated_text(self):
+        # Arrange
+        clear_template_cache()
+        # Act
+        body1 = self.template.get_body(context={"name": "Harry"})
+        body2 = self.template.get_body(context={"name": "Harry"})
+        body3 = self.template.get_body(context={"name": "Ron"})
+        info = template_cache_info()["markdown"]
+        # Assert
+        self.assertEqual(body1, body2)
+        self.assertEqual(body3.html, "<p>Welcome, <em>Ron</em>!</p>")
+        self.assertEqual(info["hits"], 1)
+        self.assertEqual(info["misses"], 2)
+
+    def test_cache_cleared_on_save(self):
+        # Arrange
+        self.template.build_email(context={"name": "Harry", "email": "x@y.org"})
+        self.assertGreater(template_cache_info()["templates"]["currsize"], 0)
+        # Act
+        self.template.subject = "Hi {{ name }}"
+        self.template.save()
+        # Assert
+        info = template_cache_info()
+        self.assertEqual(info["templates"]["currsize"], 0)
+        self.assertEqual(info["markdown"]["currsize"], 0)
+        email = self.template.build_email(context={"name": "Harry", "email": "x@y.org"})
+        self.assertEqual(email.subject, "Hi Harry")
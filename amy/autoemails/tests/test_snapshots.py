@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from autoemails.actions import (
+    EVENT_ACTIONS,
+    TASK_ACTIONS,
+    AskForWebsiteAction,
+    NewInstructorAction,
+    RecruitHelpersAction,
+    action_transitions,
+)
+from autoemails.snapshots import EventSnapshot
+from workshops.models import Event, Organization, Person, Role, Tag, Task
+
+
+class TestEventSnapshot(TestCase):
+    def setUp(self):
+        # we're missing some tags
+        Tag.objects.bulk_create(
+            [
+                Tag(name="automated-email", priority=0),
+                Tag(name="SWC", priority=10),
+            ]
+        )
+        Organization.objects.create(
+            domain="librarycarpentry.org", fullname="Library Carpentry"
+        )
+        self.instructor = Role.objects.create(name="instructor")
+        self.helper = Role.objects.create(name="helper")
+        self.person = Person.objects.create(
+            personal="Harry", family="Potter", email="hp@magic.uk", username="hp"
+        )
+        self.event = Event.objects.create(
+            slug="test-event",
+            host=Organization.objects.first(),
+            administrator=Organization.objects.get(domain="librarycarpentry.org"),
+            start=date.today() + timedelta(days=30),
+            end=date.today() + timedelta(days=31),
+        )
+        self.event.tags.set(Tag.objects.filter(name__in=["automated-email", "SWC"]))
+        self.task = Task.objects.create(
+            event=self.event, person=self.person, role=self.instructor
+        )
+
+    def test_snapshot(self):
+        event = Event.objects.select_related("administrator").get(pk=self.event.pk)
+        with self.assertNumQueries(2):
+            snapshot = EventSnapshot(event)
+        self.assertEqual(snapshot.tags, {"automated-email", "SWC"})
+        self.assertEqual(snapshot.roles, {"instructor": 1})
+        self.assertEqual(snapshot.administrator_domain, "librarycarpentry.org")
+        self.assertTrue(snapshot.active)
+        self.assertTrue(snapshot.automated_email)
+
+        self.event.tags.add(Tag.objects.get(name="cancelled"))
+        # the snapshot doesn't change with the event
+        self.assertTrue(snapshot.active)
+        self.assertFalse(EventSnapshot(event).active)
+
+    def test_unsaved_event(self):
+        snapshot = EventSnapshot(Event(slug="unsaved", host=self.event.host))
+        self.assertEqual(snapshot.tags, set())
+        self.assertFalse(snapshot.has_administrator)
+        for action_class, _ in EVENT_ACTIONS:
+            self.assertFalse(action_class.check(snapshot))
+
+    def test_checks_dont_query(self):
+        snapshot = EventSnapshot(self.event)
+        task = Task.objects.select_related("role").get(pk=self.task.pk)
+        with self.assertNumQueries(0):
+            results = [
+                action_class.check(snapshot) for action_class, _ in EVENT_ACTIONS
+            ]
+            results += [
+                action_class.check(task, snapshot) for action_class, _ in TASK_ACTIONS
+            ]
+        # PostWorkshopAction, InstructorsHostIntroductionAction,
+        # AskForWebsiteAction, RecruitHelpersAction, NewInstructorAction and
+        # NewSupportingInstructorAction
+        self.assertEqual(results, [True, False, True, True, True, False])
+
+    def test_checks_match_events(self):
+        for action_class, _ in EVENT_ACTIONS:
+            with self.subTest(action=action_class.__name__):
+                self.assertEqual(
+                    action_class.check(self.event),
+                    action_class.check(EventSnapshot(self.event)),
+                )
+
+    def test_transitions(self):
+        old = EventSnapshot(self.event)
+        helper = Task.objects.create(
+            event=self.event, person=self.person, role=self.helper
+        )
+        new = EventSnapshot(self.event)
+        self.assertEqual(
+            action_transitions(EVENT_ACTIONS, (old,), (new,)),
+            [(RecruitHelpersAction, "recruit-helpers", False)],
+        )
+
+        helper.delete()
+        self.event.url = "https://example.org/"
+        self.event.save()
+        self.assertEqual(
+            action_transitions(EVENT_ACTIONS, (old,), (EventSnapshot(self.event),)),
+            [(AskForWebsiteAction, "ask-for-website", False)],
+        )
+
+    def test_transitions_of_created_and_deleted_objects(self):
+        snapshot = EventSnapshot(self.event)
+        self.assertEqual(
+            action_transitions(TASK_ACTIONS, None, (self.task, snapshot)),
+            [(NewInstructorAction, "new-instructor", True)],
+        )
+        self.assertEqual(
+            action_transitions(TASK_ACTIONS, (self.task, snapshot), None),
+            [(NewInstructorAction, "new-instructor", False)],
+        )
+        self.assertEqual(action_transitions(TASK_ACTIONS, None, None), [])
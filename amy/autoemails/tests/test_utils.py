@@ -1,16 +1,24 @@
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
+from django.db import DatabaseError
 from django.test import TestCase
 import pytz
 from rq.queue import Queue
 from rq.worker import SimpleWorker
 from rq_scheduler.utils import to_unix
 
+from autoemails.job import CHANGED_JOBS_KEY
+from autoemails.models import EmailTemplate, RQJob, Trigger
 from autoemails.tests.base import FakeRedisTestCaseMixin, dummy_fail_job, dummy_job
 from autoemails.utils import (
+    SYNCING_JOBS_KEY,
     check_status,
+    job_states,
     safe_next_or_default_url,
     scheduled_execution_time,
+    sync_changed_rqjobs,
+    sync_rqjobs,
 )
 
 
@@ -66,6 +74,106 @@ class TestScheduledExecutionTime(FakeRedisTestCaseMixin, TestCase):
         self.assertEqual(rv.tzinfo, pytz.UTC)
 
 
+class TestSyncRQJobs(FakeRedisTestCaseMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.connection.delete(CHANGED_JOBS_KEY, SYNCING_JOBS_KEY)
+        self.trigger = Trigger.objects.create(
+            action="new-instructor",
+            template=EmailTemplate.objects.create(slug="test-template"),
+        )
+
+    def tearDown(self):
+        self.connection.delete(CHANGED_JOBS_KEY, SYNCING_JOBS_KEY)
+        super().tearDown()
+
+    def test_job_states(self):
+        scheduled = self.scheduler.enqueue_in(timedelta(minutes=5), dummy_job)
+        queued = self.scheduler.enqueue_in(timedelta(minutes=5), dummy_job)
+        self.scheduler.enqueue_job(queued)
+
+        states = job_states(
+            [scheduled.get_id(), queued.get_id(), "doesn't exist"], self.scheduler
+        )
+        self.assertEqual(
+            states,
+            {
+                scheduled.get_id(): (
+                    "scheduled",
+                    scheduled_execution_time(
+                        scheduled.get_id(), self.scheduler, naive=False
+                    ),
+                ),
+                queued.get_id(): ("queued", None),
+            },
+        )
+        for job_id, (status, _) in states.items():
+            self.assertEqual(status, check_status(job_id, self.scheduler))
+
+    def test_sync_rqjobs(self):
+        jobs = [
+            self.scheduler.enqueue_in(timedelta(minutes=i), dummy_job)
+            for i in range(1, 4)
+        ]
+        self.scheduler.enqueue_job(jobs[0])
+        for job in jobs:
+            RQJob.objects.create(job_id=job.get_id(), trigger=self.trigger)
+        RQJob.objects.create(job_id="doesn't exist", trigger=self.trigger)
+
+        job_ids = list(RQJob.objects.values_list("job_id", flat=True))
+        with self.assertNumQueries(1):
+            rv = sync_rqjobs(job_ids, self.scheduler)
+        self.assertEqual(rv, 3)
+
+        rqjobs = {rqjob.job_id: rqjob for rqjob in RQJob.objects.all()}
+        self.assertEqual(rqjobs[jobs[0].get_id()].status, "queued")
+        self.assertIsNone(rqjobs[jobs[0].get_id()].scheduled_execution)
+        for job in jobs[1:]:
+            self.assertEqual(rqjobs[job.get_id()].status, "scheduled")
+            self.assertEqual(
+                rqjobs[job.get_id()].scheduled_execution,
+                scheduled_execution_time(job.get_id(), self.scheduler, naive=False),
+            )
+        self.assertEqual(rqjobs["doesn't exist"].status, "")
+
+    def test_sync_changed_rqjobs(self):
+        job = self.scheduler.enqueue_in(timedelta(minutes=5), dummy_job)
+        rqjob = RQJob.objects.create(
+            job_id=job.get_id(), trigger=self.trigger, status="scheduled"
+        )
+
+        # status change isn't saved in DB immediately
+        self.scheduler.enqueue_job(job)
+        rqjob.refresh_from_db()
+        self.assertEqual(rqjob.status, "scheduled")
+
+        self.assertEqual(sync_changed_rqjobs(self.scheduler), 1)
+        rqjob.refresh_from_db()
+        self.assertEqual(rqjob.status, "queued")
+
+        # nothing changed since
+        self.assertEqual(sync_changed_rqjobs(self.scheduler), 0)
+
+    def test_sync_changed_rqjobs_failed(self):
+        job = self.scheduler.enqueue_in(timedelta(minutes=5), dummy_job)
+        rqjob = RQJob.objects.create(
+            job_id=job.get_id(), trigger=self.trigger, status="scheduled"
+        )
+        self.scheduler.enqueue_job(job)
+
+        with patch("autoemails.utils.sync_rqjobs", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                sync_changed_rqjobs(self.scheduler)
+        rqjob.refresh_from_db()
+        self.assertEqual(rqjob.status, "scheduled")
+
+        # changed job is synchronized in the next run
+        self.assertEqual(sync_changed_rqjobs(self.scheduler), 1)
+        rqjob.refresh_from_db()
+        self.assertEqual(rqjob.status, "queued")
+        self.assertEqual(sync_changed_rqjobs(self.scheduler), 0)
+
+
 class TestCheckStatus(FakeRedisTestCaseMixin, TestCase):
     def test_status_nonexisting_job(self):
         job_id = "doesn't exists"
@@ -1,13 +1,31 @@
-from typing import Optional, Union
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, Union
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.template import Template, engines
 from django.utils.http import is_safe_url
 import django_rq
+import markdown
 import pytz
 from rq.exceptions import NoSuchJobError
 from rq.job import Job
+from rq.utils import as_text
 from rq_scheduler.utils import from_unix
 
+from autoemails.job import CHANGED_JOBS_KEY
+
+# number of compiled templates and Markdown conversions kept in memory
+TEMPLATE_CACHE_SIZE = 256
+MARKDOWN_CACHE_SIZE = 256
+# number of jobs whose state is read from Redis and saved in DB at once
+SYNC_BATCH_SIZE = 1000
+# Redis set of IDs of changed jobs taken for synchronization; they're removed
+# only after their RQJobs are saved, so that a failed run doesn't lose them
+SYNCING_JOBS_KEY = "autoemails:syncing-jobs"
+
 
 def scheduled_execution_time(job_id, scheduler=None, naive=True):
     """Get RQ-Scheduler scheduled execution time for specific job."""
@@ -70,7 +88,141 @@ def check_status(job: Union[str, Job], scheduler=None):
         return job.get_status() or "cancelled"
 
 
+def job_states(
+    job_ids: Iterable[str], scheduler=None
+) -> Dict[str, Tuple[str, Optional[datetime]]]:
+    """Get statuses (the same as `check_status` returns) and scheduled execution
+    times (TZ-aware UTC) of many jobs, read in a single Redis pipeline.
+
+    Jobs that don't exist in Redis are left out."""
+    _scheduler = scheduler
+    if not scheduler:
+        _scheduler = django_rq.get_scheduler("default")
+
+    job_ids = list(job_ids)
+    with _scheduler.connection.pipeline(transaction=False) as pipeline:
+        for job_id in job_ids:
+            pipeline.exists(Job.key_for(job_id))
+            pipeline.hget(Job.key_for(job_id), "status")
+            pipeline.zscore(_scheduler.scheduled_jobs_key, job_id)
+        results = pipeline.execute()
+
+    states = {}
+    for i, job_id in enumerate(job_ids):
+        exists, status, scheduled = results[3 * i : 3 * i + 3]  # noqa
+        if not exists:
+            continue
+        status = as_text(status) if status else ""
+        if scheduled:
+            states[job_id] = (
+                status or "scheduled",
+                from_unix(scheduled).replace(tzinfo=pytz.UTC),
+            )
+        else:
+            states[job_id] = (status or "cancelled", None)
+    return states
+
+
+def sync_rqjobs(job_ids: Iterable[str], scheduler=None) -> int:
+    """Save statuses and scheduled execution times of jobs in their RQJobs.
+
+    Jobs are processed in batches: states of a batch are read in a single Redis
+    pipeline and saved with a single `UPDATE` query.  Return number of jobs
+    found in Redis."""
+    from autoemails.models import RQJob
+
+    job_ids = list(dict.fromkeys(job_ids))
+    synced = 0
+    for i in range(0, len(job_ids), SYNC_BATCH_SIZE):
+        states = job_states(job_ids[i : i + SYNC_BATCH_SIZE], scheduler)  # noqa
+        if not states:
+            continue
+        RQJob.objects.filter(job_id__in=states.keys()).update(
+            status=Case(
+                *[
+                    When(job_id=job_id, then=Value(status))
+                    for job_id, (status, _) in states.items()
+                ],
+                default=F("status"),
+            ),
+            scheduled_execution=Case(
+                *[
+                    When(job_id=job_id, then=Value(scheduled))
+                    for job_id, (_, scheduled) in states.items()
+                    if scheduled is not None
+                ],
+                default=F("scheduled_execution"),
+                output_field=DateTimeField(),
+            ),
+        )
+        synced += len(states)
+    return synced
+
+
+def sync_changed_rqjobs(scheduler=None) -> int:
+    """Synchronize RQJobs of jobs whose status has changed since the last run.
+
+    This is run periodically (see `repeated_jobs` management command).  Return
+    number of synchronized jobs."""
+    _scheduler = scheduler
+    if not scheduler:
+        _scheduler = django_rq.get_scheduler("default")
+
+    connection = _scheduler.connection
+    # move changed jobs aside (together with leftovers of a failed run), so that
+    # jobs changing status from now on wait for the next run
+    with connection.pipeline() as pipeline:
+        pipeline.sunionstore(SYNCING_JOBS_KEY, SYNCING_JOBS_KEY, CHANGED_JOBS_KEY)
+        pipeline.delete(CHANGED_JOBS_KEY)
+        pipeline.execute()
+
+    synced = 0
+    while True:
+        job_ids = connection.srandmember(SYNCING_JOBS_KEY, SYNC_BATCH_SIZE)
+        if not job_ids:
+            return synced
+        with transaction.atomic():
+            synced += sync_rqjobs([as_text(job_id) for job_id in job_ids], _scheduler)
+        connection.srem(SYNCING_JOBS_KEY, *job_ids)
+
+
 def safe_next_or_default_url(next_url: Optional[str], default: str) -> str:
     if next_url is not None and is_safe_url(next_url, settings.ALLOWED_HOSTS):
         return next_url
     return default
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(content: str, engine: str) -> Template:
+    """Compile template content using given template engine.
+
+    Compiled templates are cached (least recently used are discarded), because
+    the same email template is usually rendered for many recipients."""
+    return engines[engine].from_string(content)
+
+
+@lru_cache(maxsize=MARKDOWN_CACHE_SIZE)
+def render_markdown(text: str) -> str:
+    """Convert Markdown into HTML; the result is cached, since the same text is
+    often sent to many recipients (e.g. in bulk emails)."""
+    return markdown.markdown(text)
+
+
+def clear_template_cache() -> None:
+    """Discard all compiled templates and converted Markdown texts.
+
+    Cached entries are keyed by their content, so they never go stale; this is
+    only used to free memory after templates change."""
+    compile_template.cache_clear()
+    render_markdown.cache_clear()
+
+
+def template_cache_info() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of the compiled templates and Markdown caches."""
+    return {
+        name: func.cache_info()._asdict()
+        for name, func in [
+            ("templates", compile_template),
+            ("markdown", render_markdown),
+        ]
+    }
@@ -11,8 +11,10 @@ from workshops.models import WorkshopRequest
 from workshops.util import admin_required
 
 from .actions import GenericAction
+from .base_views import job_meta
 from .forms import GenericEmailScheduleForm
 from .models import EmailTemplate, Trigger
+from .scheduled_jobs import index_scheduled_job
 from .utils import check_status, safe_next_or_default_url, scheduled_execution_time
 
 logger = logging.getLogger("amy.signals")
@@ -40,17 +42,6 @@ def generic_schedule_email(request, pk):
     workshop_request = get_object_or_404(WorkshopRequest, pk=pk)
 
     if form.is_valid():
-        template = EmailTemplate(
-            slug=form.cleaned_data["slug"],
-            subject=form.cleaned_data["subject"],
-            to_header=form.cleaned_data["to_header"],
-            from_header=form.cleaned_data["from_header"],
-            cc_header=form.cleaned_data["cc_header"],
-            bcc_header=form.cleaned_data["bcc_header"],
-            reply_to_header=form.cleaned_data["reply_to_header"],
-            body_template=form.cleaned_data["body_template"],
-        )
-
         objects = dict(request=workshop_request)
         if workshop_request.event:
             objects["event"] = workshop_request.event
@@ -62,19 +53,16 @@ def generic_schedule_email(request, pk):
         )
         action_name = GenericAction.__name__
         launch_at = action.get_launch_at()
-        meta = dict(
-            action=action,
-            template=template,
-            launch_at=launch_at,
-            email=None,
-            context=None,
-        )
+        meta = job_meta(action_name, launch_at)
 
         job = scheduler.enqueue_in(launch_at, action, meta=meta)
         logger.debug("%s: enqueueing", action_name)
         scheduled_at = scheduled_execution_time(
             job.get_id(), scheduler=scheduler, naive=False
         )
+        index_scheduled_job(
+            scheduler.connection, job.get_id(), action_name, scheduled_at
+        )
         logger.debug("%s: job created [%r]", action_name, job)
 
         rqj = workshop_request.rq_jobs.create(
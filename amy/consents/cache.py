@@ -0,0 +1,74 @@
+from functools import partial
+from typing import Iterable, List, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import connection, transaction
+
+# Random tokens: the global one is replaced whenever any term or term option
+# changes, and per-person ones whenever the person's consents change.  Persons
+# found to have consented to required terms remember both current tokens in
+# their session (see `consents.util.user_has_consented_to_required_terms`), so
+# that the check doesn't have to be repeated until something changes.
+CONSENTS_VERSION_CACHE_KEY = "consents:version"
+
+
+def consents_cache():
+    return caches[settings.CONSENTS_CACHE_BACKEND]
+
+
+def consents_version_key(person_id: Optional[int] = None) -> str:
+    # databases (e.g. of parallel test runs) may share the cache
+    key = "{}:{}".format(CONSENTS_VERSION_CACHE_KEY, connection.settings_dict["NAME"])
+    if person_id is not None:
+        key = "{}:person:{}".format(key, person_id)
+    return key
+
+
+def _version_timeout(key: str) -> Optional[int]:
+    # expired per-person token is just replaced with a new one (which
+    # invalidates remembered statuses), so these don't have to be kept forever
+    return None if key == consents_version_key() else DEFAULT_TIMEOUT
+
+
+def consents_version(person_id: Optional[int] = None) -> str:
+    """Current consents version token (including token of given person's
+    consents)."""
+    cache = consents_cache()
+    keys = [consents_version_key()]
+    if person_id is not None:
+        keys.append(consents_version_key(person_id))
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = uuid4().hex
+            if not cache.add(key, version, timeout=_version_timeout(key)):
+                # someone else has just set the token
+                version = cache.get(key, version)
+            versions[key] = version
+    return ":".join(versions[key] for key in keys)
+
+
+def _replace_consents_versions(keys: List[str]) -> None:
+    cache = consents_cache()
+    for key in keys:
+        cache.set(key, uuid4().hex, timeout=_version_timeout(key))
+
+
+def bump_consents_version(person_ids: Optional[Iterable[int]] = None) -> None:
+    """Invalidate consent statuses remembered in sessions of given persons (or
+    all persons).
+
+    Must be called after every change of terms, term options or consents that
+    doesn't send `post_save` signal (e.g. `bulk_create()` or `update()`)."""
+    if person_ids is None:
+        keys = [consents_version_key()]
+    else:
+        keys = [consents_version_key(person_id) for person_id in set(person_ids)]
+    replace = partial(_replace_consents_versions, keys)
+    replace()
+    # requests running concurrently with the current transaction could still
+    # see (and remember) state from before the change
+    transaction.on_commit(replace)
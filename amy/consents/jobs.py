@@ -0,0 +1,28 @@
+import logging
+
+from rq import get_current_job
+
+from consents.models import Consent, Term
+
+logger = logging.getLogger("amy.signals")
+
+
+def create_unset_consents_job(term_id: int) -> int:
+    """Redis Queue job creating unset consents for a new term.
+
+    Progress is reported in job's `meta["progress"]` as a pair of processed and
+    total number of persons."""
+    job = get_current_job()
+    try:
+        term = Term.objects.get(pk=term_id)
+    except Term.DoesNotExist:
+        logger.warning("Term %d doesn't exist, no consents created", term_id)
+        return 0
+
+    def progress(processed: int, total: int) -> None:
+        logger.debug("Term %s: consents for %d/%d persons", term, processed, total)
+        if job:
+            job.meta["progress"] = (processed, total)
+            job.save_meta()
+
+    return Consent.create_unset_consents_for_term(term, progress=progress)
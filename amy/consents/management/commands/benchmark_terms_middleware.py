@@ -0,0 +1,87 @@
+from importlib import import_module
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from consents.middleware import TermsMiddleware
+from consents.util import (
+    CONSENT_STATUS_SESSION_KEY,
+    person_has_consented_to_required_terms,
+)
+from workshops.models import Person
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure overhead of TermsMiddleware per request, with and without "
+        "consent status remembered in the session."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username",
+            action="store",
+            default=None,
+            help="User making requests. Defaults to any user who has consented "
+            "to required terms.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1000,
+            help="How many requests are measured.",
+        )
+
+    def get_person(self, username=None):
+        if username:
+            try:
+                return Person.objects.get(username=username)
+            except Person.DoesNotExist:
+                raise CommandError("No person with username {}.".format(username))
+
+        for person in Person.objects.filter(is_active=True).order_by("pk")[:1000]:
+            if person_has_consented_to_required_terms(person):
+                return person
+        raise CommandError("No person has consented to required terms.")
+
+    def measure(self, middleware, request, repeat, remembered):
+        """Return response times (in ms) and number of queries per request."""
+        times = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(repeat):
+                if not remembered:
+                    request.session.pop(CONSENT_STATUS_SESSION_KEY, None)
+                start = time.perf_counter()
+                middleware(request)
+                times.append((time.perf_counter() - start) * 1000)
+        return times, len(queries) / repeat
+
+    def handle(self, *args, **options):
+        person = self.get_person(options["username"])
+        repeat = options["repeat"]
+
+        request = RequestFactory().get("/dashboard/")
+        request.user = person
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        middleware = TermsMiddleware(lambda request: HttpResponse())
+
+        self.stdout.write("user {}, {} requests".format(person.username, repeat))
+        self.stdout.write(
+            "{:<24} {:>12} {:>12} {:>12}".format(
+                "consent status", "median [ms]", "p95 [ms]", "queries"
+            )
+        )
+        for label, remembered in [("checked", False), ("remembered", True)]:
+            times, queries = self.measure(middleware, request, repeat, remembered)
+            p95 = statistics.quantiles(times, n=20)[-1] if len(times) > 1 else 0
+            self.stdout.write(
+                "{:<24} {:>12.3f} {:>12.3f} {:>12.1f}".format(
+                    label, statistics.median(times), p95, queries
+                )
+            )
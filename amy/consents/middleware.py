@@ -1,18 +1,38 @@
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.http import urlencode
 
-from consents.util import person_has_consented_to_required_terms
+from consents.util import user_has_consented_to_required_terms
 
 
 class TermsMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
 
+    @cached_property
+    def form_url(self):
+        return reverse("action_required_terms")
+
+    @cached_property
+    def allowed_urls(self):
+        return [reverse("logout"), self.form_url]
+
     def __call__(self, request):
-        url = reverse("action_required_terms")
+        # redirect only users who didn't agree on the required terms
+        # also don't redirect if the requested page is the page we want to
+        # redirect to
+        if (
+            request.path not in self.allowed_urls
+            and not request.user.is_anonymous
+            and not user_has_consented_to_required_terms(request)
+        ):
+            return redirect(self.get_redirect_url(request))
+        else:
+            return self.get_response(request)
 
-        allowed_urls = [reverse("logout"), url]
+    def get_redirect_url(self, request):
+        url = self.form_url
 
         if "next" in request.GET:
             # prepare `?next` URL if it's already present (e.g. user refreshes
@@ -23,17 +43,7 @@ class TermsMiddleware:
             next_param = request.path
 
         # only add `?next` if it's outside the scope of allowed URLs
-        if next_param not in allowed_urls:
+        if next_param not in self.allowed_urls:
             url += "?{}".format(urlencode({"next": next_param}))
 
-        # redirect only users who didn't agree on the privacy policy
-        # also don't redirect if the requested page is the page we want to
-        # redirect to
-        if (
-            request.path not in allowed_urls
-            and not request.user.is_anonymous
-            and not person_has_consented_to_required_terms(request.user)
-        ):
-            return redirect(url)
-        else:
-            return self.get_response(request)
+        return url
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Optional
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Prefetch
+from django.db import connection, models, transaction
+from django.db.models import Max, Prefetch, QuerySet
 from django.utils import timezone
 from django.utils.functional import cached_property
 
 from autoemails.mixins import RQJobsMixin
+from consents.cache import bump_consents_version
 from workshops.mixins import CreatedUpdatedArchivedMixin
 from workshops.models import STR_MED, Person
 
@@ -178,20 +180,88 @@ class Consent(CreatedUpdatedArchivedMixin, models.Model):
         return super().save(*args, **kwargs)
 
     @classmethod
-    def create_unset_consents_for_term(cls, term: Term) -> None:
+    def create_unset_consents_for_term(
+        cls,
+        term: Term,
+        chunk_size: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
         """
         Creates unset consents for all users with the given term.
 
         Used when a term is first created so that unset consents
         are stored in the database for any given term.
+
+        Consents are inserted with `INSERT ... SELECT` for chunks of persons
+        (ordered by ID), so persons are never loaded into memory, and every chunk
+        is inserted in a separate transaction if not run inside one.  Persons who
+        already have a consent for the term are skipped, so it's safe to run again
+        after an interruption.  `progress(processed, total)` is called after every
+        chunk.  Returns number of created consents.
+        """
+        chunk_size = chunk_size or settings.CONSENTS_FANOUT_CHUNK_SIZE
+        consent_table = cls._meta.db_table
+        person_table = Person._meta.db_table
+        sql = f"""
+            INSERT INTO "{consent_table}"
+                (created_at, last_updated_at, archived_at, person_id, term_id,
+                 term_option_id)
+            SELECT %(now)s, %(now)s, %(archived_at)s, p.id, %(term_id)s, NULL
+            FROM "{person_table}" p
+            WHERE p.id > %(first_id)s AND (%(last_id)s IS NULL OR p.id <= %(last_id)s)
+                AND NOT EXISTS (
+                    SELECT 1 FROM "{consent_table}" c
+                    WHERE c.person_id = p.id AND c.term_id = %(term_id)s
+                )
         """
+
+        total = Person.objects.count()
+        processed = created = 0
+        first_id = 0
+        while processed < total:
+            # ID of the last person in this chunk; `None` for the last chunk
+            last_id = (
+                Person.objects.filter(pk__gt=first_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[chunk_size - 1 : chunk_size]  # noqa
+                .first()
+            )
+            params = {
+                "now": timezone.now(),
+                "archived_at": term.archived_at,
+                "term_id": term.pk,
+                "first_id": first_id,
+                "last_id": last_id,
+            }
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                created += cursor.rowcount
+
+            processed = total if last_id is None else processed + chunk_size
+            if progress:
+                progress(processed, total)
+            if last_id is None:
+                break
+            first_id = last_id
+
+        bump_consents_version()
+        return created
+
+    @classmethod
+    def create_unset_consents_for_persons(cls, persons: Iterable[Person]) -> None:
+        """
+        Creates unset consents for all terms for the given (new) persons.
+        """
+        terms = list(Term.objects.all())
         cls.objects.bulk_create(
             cls(
                 person=person,
                 term=term,
                 term_option=None,
+                archived_at=term.archived_at,
             )
-            for person in Person.objects.all()
+            for person in persons
+            for term in terms
         )
 
     def archive(self) -> None:
@@ -206,20 +276,49 @@ class Consent(CreatedUpdatedArchivedMixin, models.Model):
     @classmethod
     def archive_all_for_person(cls, person: Person):
         consents = cls.objects.filter(person=person).active()
-        cls.archive_all(consents)
+        cls.archive_all(consents, person_ids=[person.pk])
 
     @classmethod
-    def archive_all(cls, consents: Iterable[Consent]) -> None:
-        new_consents = [
-            cls(
-                person_id=consent.person_id,
-                term_id=consent.term_id,
-                term_option=None,
+    def archive_all(
+        cls,
+        consents: QuerySet[Consent],
+        chunk_size: Optional[int] = None,
+        person_ids: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Archive consents and create unset consents in their place.
+
+        Consents are processed in chunks (ordered by ID), each in a separate
+        transaction if not run inside one, so only one chunk is held in memory.
+
+        If `person_ids` (owners of all `consents`) are given, only their
+        consent statuses are invalidated instead of statuses of all persons.
+        """
+        chunk_size = chunk_size or settings.CONSENTS_FANOUT_CHUNK_SIZE
+        archived_at = timezone.now()
+        # newly created consents could match `consents`, too
+        last_id = consents.aggregate(last_id=Max("pk"))["last_id"]
+        first_id = 0
+        while last_id is not None and first_id < last_id:
+            chunk = list(
+                consents.filter(pk__gt=first_id, pk__lte=last_id)
+                .order_by("pk")
+                .values_list("pk", "person_id", "term_id")[:chunk_size]
             )
-            for consent in consents
-        ]
-        consents.update(archived_at=timezone.now())
-        cls.objects.bulk_create(new_consents)
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                cls.objects.filter(pk__in=[pk for pk, _, _ in chunk]).update(
+                    archived_at=archived_at
+                )
+                cls.objects.bulk_create(
+                    cls(person_id=person_id, term_id=term_id, term_option=None)
+                    for _, person_id, term_id in chunk
+                )
+            first_id = chunk[-1][0]
+
+        bump_consents_version(person_ids)
 
     @classmethod
     def reconsent(cls, consent: Consent, term_option: Optional[TermOption]) -> Consent:
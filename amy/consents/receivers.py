@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+import django_rq
 
-from consents.models import Consent, Term
+from consents.cache import bump_consents_version
+from consents.jobs import create_unset_consents_job
+from consents.models import Consent, Term, TermOption
 from workshops.models import Person
 from workshops.signals import person_archived_signal
 
@@ -11,31 +16,40 @@ def create_unset_consents_on_user_create(
     sender, instance: Person, created: bool, **kwargs
 ):
     if created:
-        Consent.objects.bulk_create(
-            Consent(
-                person=instance,
-                term=term,
-                term_option=None,
-                archived_at=term.archived_at,
-            )
-            for term in Term.objects.all()
-        )
+        Consent.create_unset_consents_for_persons([instance])
 
 
 @receiver(post_save, sender=Term)
 def create_unset_consents_on_term_create(
     sender, instance: Term, created: bool, **kwargs
 ):
-    if created:
-        Consent.objects.bulk_create(
-            Consent(
-                person=person,
-                term=instance,
-                term_option=None,
-                archived_at=instance.archived_at,
+    if not created:
+        return
+
+    if settings.CONSENTS_FANOUT_ASYNC:
+        # the job can only see the term once it's committed
+        transaction.on_commit(
+            lambda: django_rq.get_queue("default").enqueue(
+                create_unset_consents_job, instance.pk
             )
-            for person in Person.objects.all()
         )
+    else:
+        Consent.create_unset_consents_for_term(instance)
+
+
+@receiver(post_save, sender=Term)
+@receiver(post_delete, sender=Term)
+@receiver(post_save, sender=TermOption)
+@receiver(post_delete, sender=TermOption)
+def invalidate_consent_statuses(sender, **kwargs) -> None:
+    bump_consents_version()
+
+
+@receiver(post_save, sender=Consent)
+def invalidate_person_consent_status(sender, instance: Consent, **kwargs) -> None:
+    # consents are deleted only together with their person, so `post_delete` for
+    # them isn't needed (and would prevent fast deletion of persons)
+    bump_consents_version([instance.person_id])
 
 
 @receiver(person_archived_signal, sender=Person)
@@ -3,7 +3,7 @@ from django.urls import reverse
 from django.utils.http import urlencode
 
 from consents.forms import RequiredConsentsForm
-from consents.models import Term
+from consents.models import Term, TermOption
 from consents.tests.base import ConsentTestBase
 from consents.util import person_has_consented_to_required_terms
 from workshops.models import Person
@@ -174,6 +174,33 @@ class TestTermsMiddleware(ConsentTestBase):
             rv = self.client.get(url)
             self.assertEqual(rv.status_code, 200)
 
+    def test_redirects_again_after_new_required_term(self):
+        """Ensure consent status remembered in session is invalidated when a new
+        required term is added."""
+        url = reverse("instructor-dashboard")
+        self.client.force_login(self.neville)
+        self.person_agree_to_terms(
+            self.neville,
+            Term.objects.filter(required_type=Term.PROFILE_REQUIRE_TYPE),
+        )
+
+        with self.terms_middleware():
+            rv = self.client.get(url)
+            self.assertEqual(rv.status_code, 200)
+
+            term = Term.objects.create(
+                content="New required term",
+                slug="new-required-term",
+                required_type=Term.PROFILE_REQUIRE_TYPE,
+            )
+            TermOption.objects.create(term=term, option_type=TermOption.AGREE)
+
+            rv = self.client.get(url)
+            action_required_url = "{}?next={}".format(
+                reverse("action_required_terms"), url
+            )
+            self.assertRedirects(rv, action_required_url)
+
     def test_allowed_urls(self):
         url = reverse("logout")
         # ensure we're logged in
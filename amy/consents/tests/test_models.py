@@ -203,6 +203,72 @@ class TestConsentModel(ConsentTestBase):
             len(terms),
         )
 
+    def test_create_unset_consents_for_term_in_chunks(self) -> None:
+        for i in range(5):
+            Person.objects.create(
+                personal="Person", family=str(i), email=f"p{i}@magic.uk", username=i
+            )
+        term = Term.objects.create(content="term", slug="term")
+        # receiver created consents already; start over
+        Consent.objects.filter(term=term).delete()
+        consent = Consent.objects.create(
+            person=Person.objects.order_by("pk")[2], term=term
+        )
+        progress = []
+
+        created = Consent.create_unset_consents_for_term(
+            term, chunk_size=2, progress=lambda *args: progress.append(args)
+        )
+
+        total = Person.objects.count()
+        self.assertEqual(created, total - 1)
+        self.assertEqual(progress[-1], (total, total))
+        self.assertEqual(len(progress), (total + 1) // 2)
+        self.assertCountEqual(
+            Consent.objects.filter(term=term).values_list("person_id", flat=True),
+            Person.objects.values_list("pk", flat=True),
+        )
+        self.assertIn(consent, Consent.objects.filter(term=term))
+        # running again doesn't duplicate consents
+        self.assertEqual(Consent.create_unset_consents_for_term(term), 0)
+
+    def test_create_unset_consents_for_archived_term(self) -> None:
+        Person.objects.create(personal="Harry", family="Potter", email="hp@magic.uk")
+        term = Term.objects.create(
+            content="term", slug="term", archived_at=timezone.now()
+        )
+        Consent.objects.filter(term=term).delete()
+
+        Consent.create_unset_consents_for_term(term)
+
+        consents = Consent.objects.filter(term=term)
+        self.assertEqual(len(consents), Person.objects.count())
+        for consent in consents:
+            self.assertEqual(consent.archived_at, term.archived_at)
+
+    def test_archive_all_in_chunks(self) -> None:
+        terms = Term.objects.active()
+        persons = [
+            Person.objects.create(
+                personal="Person", family=str(i), email=f"p{i}@magic.uk", username=i
+            )
+            for i in range(3)
+        ]
+        for person in persons:
+            self.person_consent_active_terms(person)
+        consents = Consent.objects.filter(person__in=persons).active()
+        archived_ids = list(consents.values_list("pk", flat=True))
+
+        Consent.archive_all(consents, chunk_size=2)
+
+        self.assertFalse(
+            Consent.objects.filter(pk__in=archived_ids, archived_at=None).exists()
+        )
+        self.assertEqual(
+            len(consents.filter(term_option__isnull=True)), len(persons) * len(terms)
+        )
+        self.assertFalse(consents.filter(term_option__isnull=False).exists())
+
 
 class TestTermModel(ConsentTestBase):
     def test_archive(self):
@@ -1,5 +1,9 @@
+from unittest.mock import patch
+
+from django.test import override_settings
 from django.utils import timezone
 
+from consents.jobs import create_unset_consents_job
 from consents.models import Consent, Person, Term
 from consents.tests.base import ConsentTestBase
 
@@ -47,6 +51,22 @@ class TestTermModel(ConsentTestBase):
         self.assertIsNone(consent2.term_option)
         self.assertIsNone(consent2.archived_at)
 
+    @override_settings(CONSENTS_FANOUT_ASYNC=True)
+    @patch("consents.receivers.transaction.on_commit", lambda func: func())
+    @patch("consents.receivers.django_rq.get_queue")
+    def test_unset_consents_are_created_in_job(self, mock_get_queue) -> None:
+        term1 = Term.objects.create(
+            content="term1",
+            slug="term1",
+        )
+        mock_get_queue().enqueue.assert_called_once_with(
+            create_unset_consents_job, term1.pk
+        )
+        self.assertEqual(len(Consent.objects.filter(term=term1)), 0)
+
+        self.assertEqual(create_unset_consents_job(term1.pk), 2)
+        self.assertEqual(len(Consent.objects.filter(term=term1)), 2)
+
     def test_unset_consents_are_created_on_person_create(self) -> None:
         term1 = Term.objects.create(
             content="term1",
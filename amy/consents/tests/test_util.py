@@ -1,8 +1,13 @@
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory
 from django.utils import timezone
 
-from consents.models import Term, TermOption
+from consents.models import Consent, Term, TermOption
 from consents.tests.base import ConsentTestBase
-from consents.util import person_has_consented_to_required_terms
+from consents.util import (
+    person_has_consented_to_required_terms,
+    user_has_consented_to_required_terms,
+)
 from workshops.models import Person
 
 
@@ -38,3 +43,73 @@ class TestActiveTermConsentsForm(ConsentTestBase):
         # Consents created for the required terms; should return True
         self.person_agree_to_terms(person, required_terms)
         self.assertEqual(person_has_consented_to_required_terms(person), True)
+
+
+class TestUserHasConsentedToRequiredTerms(ConsentTestBase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.required_terms = Term.objects.filter(
+            required_type=Term.PROFILE_REQUIRE_TYPE
+        ).active()
+        self.person = Person.objects.create(
+            personal="Harry", family="Potter", email="hp@magic.uk", username="hp"
+        )
+        self.request = RequestFactory().get("/")
+        self.request.user = self.person
+        self.request.session = SessionStore()
+
+    def test_positive_status_remembered(self) -> None:
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+        with self.assertNumQueries(0):
+            self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+
+    def test_negative_status_not_remembered(self) -> None:
+        self.assertEqual(user_has_consented_to_required_terms(self.request), False)
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+
+    def test_status_not_shared_between_users(self) -> None:
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+        self.request.user = Person.objects.create(
+            personal="Ron", family="Weasley", email="rw@magic.uk", username="rw"
+        )
+        self.assertEqual(user_has_consented_to_required_terms(self.request), False)
+
+    def test_new_required_term_invalidates_status(self) -> None:
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+        term = Term.objects.create(
+            content="new_required_term",
+            slug="new_required_term",
+            required_type=Term.PROFILE_REQUIRE_TYPE,
+        )
+        TermOption.objects.create(term=term, option_type=TermOption.AGREE)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), False)
+
+    def test_archived_consents_invalidate_status(self) -> None:
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+        # `archive_all` uses bulk queries, which don't send signals
+        Consent.archive_all_for_person(self.person)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), False)
+
+    def test_other_persons_consents_dont_invalidate_status(self) -> None:
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+        other = Person.objects.create(
+            personal="Ron", family="Weasley", email="rw@magic.uk", username="rw"
+        )
+        self.person_agree_to_terms(other, self.required_terms)
+        with self.assertNumQueries(0):
+            self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+
+    def test_own_consent_invalidates_status(self) -> None:
+        self.person_agree_to_terms(self.person, self.required_terms)
+        self.assertEqual(user_has_consented_to_required_terms(self.request), True)
+        consent = Consent.objects.filter(
+            person=self.person, term=self.required_terms[0]
+        ).active()[0]
+        consent.archive()
+        self.assertEqual(user_has_consented_to_required_terms(self.request), False)
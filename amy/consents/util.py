@@ -1,8 +1,12 @@
 from autoemails.actions import NewConsentRequiredAction, send_bulk_email
 from autoemails.models import Trigger
+from consents.cache import consents_version
 from consents.models import Consent, Term
 from workshops.models import Person
 
+# session key under which the logged-in user's consent status is remembered
+CONSENT_STATUS_SESSION_KEY = "consents_required_terms"
+
 
 def person_has_consented_to_required_terms(person: Person) -> bool:
     """
@@ -26,6 +30,26 @@ def person_has_consented_to_required_terms(person: Person) -> bool:
     return set(required_term_ids) == set(term_ids_user_consented_to)
 
 
+def user_has_consented_to_required_terms(request) -> bool:
+    """
+    Same as `person_has_consented_to_required_terms` for the logged-in user.
+
+    Positive result is remembered in the session together with the current
+    consents version, so that it's not checked in the database again until any
+    term or term option, or the user's consents change.
+    """
+    person = request.user
+    version = consents_version(person.pk)
+    status = [person.pk, version]
+    if request.session.get(CONSENT_STATUS_SESSION_KEY) == status:
+        return True
+
+    consented = person_has_consented_to_required_terms(person)
+    if consented:
+        request.session[CONSENT_STATUS_SESSION_KEY] = status
+    return consented
+
+
 def send_consent_email(request, term: Term) -> None:
     """
     Sending consent emails individually to each user to avoid
@@ -7,7 +7,7 @@ from rest_framework.reverse import reverse
 
 from consents.forms import ActiveTermConsentsForm, RequiredConsentsForm
 from consents.models import Consent
-from consents.util import person_has_consented_to_required_terms
+from consents.util import user_has_consented_to_required_terms
 from workshops.base_views import AMYCreateView, RedirectSupportMixin
 from workshops.util import login_required
 
@@ -38,7 +38,7 @@ def action_required_terms(request):
     person = request.user
 
     # disable the view for users who already agreed
-    if person_has_consented_to_required_terms(person):
+    if user_has_consented_to_required_terms(request):
         raise Http404("This view is disabled.")
 
     kwargs = {
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+
+
+class ContainsSearchBackend:
+    """Case-insensitive substring search.
+
+    Works with any database backend; results are returned in the queryset's
+    ordering."""
+
+    def q(self, term, fields):
+        """Condition for objects containing `term` in any of the `fields`."""
+        q = Q()
+        for field in fields:
+            q |= Q(**{f"{field}__icontains": term})
+        return q
+
+    def filter(self, queryset, term, fields):
+        """Filter queryset for objects containing `term` in any of the `fields`."""
+        return queryset.filter(self.q(term, fields))
+
+    def rank(self, queryset, term, fields):
+        """Order queryset so that best matches come first."""
+        return queryset
+
+    def search(self, queryset, term, fields, limit, q=None):
+        """Return at most `limit` best objects matching `term` in any of the
+        `fields`.
+
+        Custom condition `q` can be used instead of the default one; `fields` are
+        then only used for ranking."""
+        if q is None:
+            q = self.q(term, fields)
+        return list(self.rank(queryset.filter(q), term, fields)[:limit])
+
+
+class TrigramSearchBackend(ContainsSearchBackend):
+    """Substring search ranked by trigram similarity (PostgreSQL only).
+
+    Filtering uses the same `icontains` lookups as `ContainsSearchBackend`; they are
+    supported by trigram GIN indexes on `UPPER(column)` of searched columns (see
+    migration `workshops.0254_search_trigram_indexes`)."""
+
+    def rank(self, queryset, term, fields):
+        similarities = [TrigramSimilarity(field, term) for field in fields]
+        if len(similarities) > 1:
+            rank = Greatest(*similarities)
+        else:
+            rank = similarities[0]
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        return queryset.annotate(search_rank=rank).order_by("-search_rank", *ordering)
+
+
+def get_search_backend():
+    """Return instance of search backend configured in `SEARCH_BACKEND`
+    setting."""
+    return import_string(settings.SEARCH_BACKEND)()
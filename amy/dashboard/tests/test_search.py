@@ -1,9 +1,12 @@
 from datetime import date, datetime, timedelta, timezone
 
+from django.test import override_settings
 from django.urls import reverse
 from django_comments.models import Comment
 
+from dashboard.search import ContainsSearchBackend, TrigramSearchBackend
 from workshops.models import (
+    Event,
     Member,
     MemberRole,
     Membership,
@@ -248,3 +251,85 @@ class TestSearch(TestBase):
         self.assertEqual(response.status_code, 200)  # doesn't redirect
         self.assertEqual(len(response.context["organisations"]), 1)
         self.assertEqual(len(response.context["comments"]), 2)
+
+    def test_search_for_events_by_host(self):
+        event = Event.objects.create(slug="2021-01-01-test", host=self.org_beta)
+
+        response = self.search_for("beta.com")
+
+        self.assertEqual(response.context["events"], [event])
+
+    @override_settings(SEARCH_RESULTS_LIMIT=2)
+    def test_search_results_limited(self):
+        response = self.search_for("a")
+        self.assertEqual(len(response.context["organisations"]), 2)
+
+    def test_search_results_ranked(self):
+        Organization.objects.create(
+            domain="alphabet.com", fullname="Alphabet Letters Company"
+        )
+
+        response = self.search_for("alpha.edu")
+
+        # only exact match for domain is found
+        self.assertEqual(response.context["organisations"], [self.org_alpha])
+
+        response = self.search_for("Alpha Organization")
+        self.assertEqual(response.context["organisations"], [self.org_alpha])
+
+        response = self.search_for("alphabet")
+        self.assertEqual(
+            [org.domain for org in response.context["organisations"]],
+            ["alphabet.com"],
+        )
+
+    @override_settings(SEARCH_BACKEND="dashboard.search.ContainsSearchBackend")
+    def test_search_with_contains_backend(self):
+        response = self.search_for("a")
+        self.assertEqual(
+            [org.domain for org in response.context["organisations"]],
+            ["alpha.edu", "beta.com", "self-organized"],
+        )
+
+
+class TestSearchBackends(TestBase):
+    """Test cases for search backends used by dashboard search."""
+
+    def test_contains_backend_keeps_ordering(self):
+        results = ContainsSearchBackend().search(
+            Organization.objects.order_by("-fullname"),
+            "organ",
+            ["domain", "fullname"],
+            limit=10,
+        )
+        self.assertEqual(
+            [org.domain for org in results],
+            ["self-organized", "beta.com", "alpha.edu"],
+        )
+
+    def test_trigram_backend_ranks_best_match_first(self):
+        Organization.objects.create(domain="betamax.com", fullname="Betamax Tapes")
+        results = TrigramSearchBackend().search(
+            Organization.objects.order_by("fullname"),
+            "beta.com",
+            ["domain", "fullname"],
+            limit=10,
+        )
+        self.assertEqual(results, [self.org_beta])
+
+        results = TrigramSearchBackend().search(
+            Organization.objects.order_by("fullname"),
+            "beta",
+            ["domain", "fullname"],
+            limit=10,
+        )
+        self.assertEqual([org.domain for org in results], ["beta.com", "betamax.com"])
+
+    def test_trigram_backend_limits_results(self):
+        results = TrigramSearchBackend().search(
+            Organization.objects.order_by("fullname"),
+            "a",
+            ["domain", "fullname"],
+            limit=1,
+        )
+        self.assertEqual(len(results), 1)
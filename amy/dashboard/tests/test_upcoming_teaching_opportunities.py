@@ -8,9 +8,10 @@ from communityroles.models import (
 )
 from dashboard.views import UpcomingTeachingOpportunitiesList
 from workshops.models import Event, Organization, Person, Role, Task
+from workshops.tests.base import RefreshSummariesMixin
 
 
-class TestUpcomingTeachingOpportunityView(TestCase):
+class TestUpcomingTeachingOpportunityView(RefreshSummariesMixin, TestCase):
     @override_settings(INSTRUCTOR_RECRUITMENT_ENABLED=True)
     def test_view_enabled__no_community_role(self):
         # Arrange
@@ -1,6 +1,7 @@
 import re
 from typing import Dict, Optional
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Case, Count, IntegerField, Prefetch, Q, Value, When
@@ -21,6 +22,7 @@ from dashboard.forms import (
     SearchForm,
     SendHomeworkForm,
 )
+from dashboard.search import get_search_backend
 from fiscal.models import MembershipTask
 from recruitment.models import InstructorRecruitment
 from recruitment.views import RecruitmentEnabledMixin
@@ -292,25 +294,8 @@ class UpcomingTeachingOpportunitiesList(
 
         # person details with tasks counted
         context["person"] = (
-            Person.objects.annotate(
-                num_taught=Count(
-                    Case(
-                        When(task__role__name="instructor", then=Value(1)),
-                        output_field=IntegerField(),
-                    )
-                ),
-                num_supporting=Count(
-                    Case(
-                        When(task__role__name="supporting-instructor", then=Value(1)),
-                        output_field=IntegerField(),
-                    )
-                ),
-                num_helper=Count(
-                    Case(
-                        When(task__role__name="helper", then=Value(1)),
-                        output_field=IntegerField(),
-                    )
-                ),
+            Person.objects.annotate_with_activity(
+                "num_taught", "num_supporting", "num_helper"
             )
             .select_related("airport")
             .get(pk=self.request.user.pk)
@@ -342,33 +327,42 @@ def search(request):
             tokens = re.split(r"\s+", term)
             results_combined = []
 
-            organizations = list(
-                Organization.objects.filter(
-                    Q(domain__icontains=term) | Q(fullname__icontains=term)
-                ).order_by("fullname")
+            backend = get_search_backend()
+            limit = settings.SEARCH_RESULTS_LIMIT
+
+            organization_fields = ["domain", "fullname"]
+            organizations = backend.search(
+                Organization.objects.order_by("fullname"),
+                term,
+                organization_fields,
+                limit,
             )
             results_combined += organizations
 
-            memberships = list(
-                Membership.objects.filter(
-                    Q(name__icontains=term) | Q(registration_code__icontains=term)
-                ).order_by("-agreement_start")
+            memberships = backend.search(
+                Membership.objects.order_by("-agreement_start"),
+                term,
+                ["name", "registration_code"],
+                limit,
             )
             results_combined += memberships
 
-            events = list(
-                Event.objects.filter(
-                    Q(slug__icontains=term)
-                    | Q(host__domain__icontains=term)
-                    | Q(host__fullname__icontains=term)
-                    | Q(url__icontains=term)
-                    | Q(contact__icontains=term)
-                    | Q(venue__icontains=term)
-                    | Q(address__icontains=term)
-                ).order_by("-slug")
+            # hosts and comment authors are matched in subqueries instead of
+            # joins, so that each table's own indexes can be used
+            hosts = backend.filter(
+                Organization.objects.all(), term, organization_fields
+            ).values("pk")
+            event_fields = ["slug", "url", "contact", "venue", "address"]
+            events = backend.search(
+                Event.objects.order_by("-slug"),
+                term,
+                event_fields,
+                limit,
+                q=backend.q(term, event_fields) | Q(host__in=hosts),
             )
             results_combined += events
 
+            person_fields = ["personal", "family", "email", "secondary_email", "github"]
             # if user searches for two words, assume they mean a person
             # name
             if len(tokens) == 2:
@@ -376,54 +370,53 @@ def search(request):
                 complex_q = (
                     (Q(personal__icontains=name1) & Q(family__icontains=name2))
                     | (Q(personal__icontains=name2) & Q(family__icontains=name1))
-                    | Q(email__icontains=term)
-                    | Q(secondary_email__icontains=term)
-                    | Q(github__icontains=term)
+                    | backend.q(term, ["email", "secondary_email", "github"])
+                )
+                persons = backend.search(
+                    Person.objects.order_by("family"),
+                    term,
+                    person_fields,
+                    limit,
+                    q=complex_q,
                 )
-                persons = list(Person.objects.filter(complex_q))
             else:
-                persons = list(
-                    Person.objects.filter(
-                        Q(personal__icontains=term)
-                        | Q(family__icontains=term)
-                        | Q(email__icontains=term)
-                        | Q(secondary_email__icontains=term)
-                        | Q(github__icontains=term)
-                    ).order_by("family")
+                persons = backend.search(
+                    Person.objects.order_by("family"), term, person_fields, limit
                 )
 
             results_combined += persons
 
-            airports = list(
-                Airport.objects.filter(
-                    Q(iata__icontains=term) | Q(fullname__icontains=term)
-                ).order_by("iata")
+            airports = backend.search(
+                Airport.objects.order_by("iata"), term, ["iata", "fullname"], limit
             )
             results_combined += airports
 
-            training_requests = list(
-                TrainingRequest.objects.filter(
-                    Q(group_name__icontains=term)
-                    | Q(family__icontains=term)
-                    | Q(email__icontains=term)
-                    | Q(github__icontains=term)
-                    | Q(affiliation__icontains=term)
-                    | Q(location__icontains=term)
-                    | Q(user_notes__icontains=term)
-                )
+            training_requests = backend.search(
+                TrainingRequest.objects.all(),
+                term,
+                [
+                    "group_name",
+                    "family",
+                    "email",
+                    "github",
+                    "affiliation",
+                    "location",
+                    "user_notes",
+                ],
+                limit,
             )
             results_combined += training_requests
 
-            comments = list(
-                Comment.objects.filter(
-                    Q(comment__icontains=term)
-                    | Q(user_name__icontains=term)
-                    | Q(user_email__icontains=term)
-                    | Q(user__personal__icontains=term)
-                    | Q(user__family__icontains=term)
-                    | Q(user__email__icontains=term)
-                    | Q(user__github__icontains=term)
-                ).prefetch_related("content_object")
+            comment_fields = ["comment", "user_name", "user_email"]
+            authors = backend.filter(
+                Person.objects.all(), term, ["personal", "family", "email", "github"]
+            ).values("pk")
+            comments = backend.search(
+                Comment.objects.prefetch_related("content_object"),
+                term,
+                comment_fields,
+                limit,
+                q=backend.q(term, comment_fields) | Q(user__in=authors),
             )
             results_combined += comments
 
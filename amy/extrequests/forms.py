@@ -93,7 +93,7 @@ class BulkChangeTrainingRequestForm(forms.Form):
     def clean(self):
         super().clean()
         unmatched_request_exists = any(
-            r.person is None for r in self.cleaned_data.get("requests", [])
+            r.person_id is None for r in self.cleaned_data.get("requests", [])
         )
         if self.check_person_matched and unmatched_request_exists:
             raise ValidationError("Select only requests matched to a person.")
@@ -165,7 +165,7 @@ class BulkMatchTrainingRequestForm(forms.Form):
         member_site = self.cleaned_data["seat_membership"]
         open_training = self.cleaned_data["seat_open_training"]
 
-        if any(r.person is None for r in self.cleaned_data.get("requests", [])):
+        if any(r.person_id is None for r in self.cleaned_data.get("requests", [])):
             raise ValidationError(
                 "Some of the requests are not matched "
                 "to a trainee yet. Before matching them to "
@@ -2,6 +2,7 @@ from datetime import date, timedelta
 
 from django.conf import settings
 from django.db.models import QuerySet
+from django.test import override_settings
 from django.urls import reverse
 from requests_mock import Mocker
 
@@ -523,6 +524,8 @@ class TestAcceptingSelfOrgSubmission(TestBase):
         self.assertNotIn("lessons", rv.context["form"].fields.keys())
 
 
+# the same website is mocked with different responses in each test
+@override_settings(WORKSHOP_METADATA_CACHE_TIMEOUT=0)
 class TestAcceptingSelfOrgSubmPrefilledform(TestBase):
     def setUp(self):
         super().setUp()
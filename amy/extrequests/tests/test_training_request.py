@@ -1,15 +1,22 @@
 from datetime import date, datetime, timedelta, timezone
+from io import StringIO
 from urllib.parse import urlencode
 
 from django.contrib.messages import WARNING
 from django.contrib.messages.middleware import MessageMiddleware
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.template import Context, Template
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_comments.models import Comment
+from reversion.models import Revision, Version
+from reversion.revisions import create_revision
 
+from autoemails.models import EmailTemplate, Trigger
 from extrequests.forms import TrainingRequestsMergeForm
 from extrequests.views import _match_training_request_to_person
 from workshops.models import (
@@ -26,6 +33,11 @@ from workshops.models import (
     TrainingRequest,
 )
 from workshops.tests.base import TestBase
+from workshops.util import (
+    bulk_change_training_requests_state,
+    bulk_match_training_requests,
+    bulk_unmatch_training_requests,
+)
 
 
 def create_training_request(state, person, open_review=True, reg_code=""):
@@ -252,6 +264,66 @@ class TestTrainingRequestModelScoring(TestBase):
             else:
                 self.assertEqual(self.tr.score_auto, 0)
 
+    def test_domains_changed_from_other_side(self):
+        domain = KnowledgeDomain.objects.get(name="Humanities")
+        domain.trainingrequest_set.add(self.tr)
+        self.tr.refresh_from_db()
+        self.assertEqual(self.tr.score_auto, 1)
+
+        domain.trainingrequest_set.clear()
+        self.tr.refresh_from_db()
+        self.assertEqual(self.tr.score_auto, 0)
+
+    def test_clearing_domains(self):
+        self.tr.domains.add(KnowledgeDomain.objects.get(name="Chemistry"))
+        self.tr.domains.clear()
+        self.assertEqual(self.tr.score_auto, 0)
+
+    def test_new_request_saved_with_single_query(self):
+        self.tr.pk = None
+        self.tr.country = "W3"
+        with self.assertNumQueries(1):
+            self.tr.save()
+        self.assertEqual(self.tr.score_auto, 1)
+
+    def test_update_score_auto(self):
+        """Scores calculated in the database match scores calculated in Python."""
+        roles = Role.objects.all()
+        requests = [self.tr]
+        for i, (country, domain) in enumerate(
+            [("W3", "Chemistry"), ("PL", "Humanities"), ("BR", "Mathematics")]
+        ):
+            tr = TrainingRequest.objects.get(pk=self.tr.pk)
+            tr.pk = None
+            tr.country = country
+            tr.underresourced = bool(i % 2)
+            tr.underrepresented = "yes" if i else "no"
+            tr.previous_training = "course" if i else "none"
+            tr.save()
+            tr.domains.add(*KnowledgeDomain.objects.filter(name=domain))
+            tr.previous_involvement.add(*roles[: i * 2])
+            requests.append(tr)
+        expected = {tr.pk: tr.recalculate_score_auto() for tr in requests}
+        TrainingRequest.objects.update(score_auto=0)
+
+        with self.assertNumQueries(1):
+            updated = TrainingRequest.objects.all().update_score_auto()
+
+        self.assertEqual(updated, len(requests))
+        self.assertEqual(
+            dict(TrainingRequest.objects.values_list("pk", "score_auto")), expected
+        )
+        self.assertEqual(sorted(expected.values()), [0, 2, 6, 6])
+
+    def test_rescore_command(self):
+        self.tr.domains.add(KnowledgeDomain.objects.get(name="Chemistry"))
+        TrainingRequest.objects.update(score_auto=0)
+        out = StringIO()
+        call_command("rescore_training_requests", stdout=out)
+        self.tr.refresh_from_db()
+        self.assertEqual(self.tr.score_auto, 1)
+        self.assertIn("Rescored 1 training requests", out.getvalue())
+
 
 class TestTrainingRequestsListView(TestBase):
     def setUp(self):
@@ -582,6 +654,134 @@ class TestTrainingRequestsListView(TestBase):
         self.assertEqual(task.seat_public, data["seat_public"])
 
 
+class TestBulkTrainingRequestTransitions(TestBase):
+    def setUp(self):
+        self._setUpRoles()
+        self._setUpTags()
+        self.org = Organization.objects.create(
+            domain="example.com", fullname="Test Organization"
+        )
+        self.training = Event.objects.create(slug="ttt-event", host=self.org)
+        self.training.tags.add(Tag.objects.get(name="TTT"))
+
+    def create_requests(self, count, start=0):
+        persons = Person.objects.bulk_create(
+            Person(
+                personal="Trainee",
+                family=str(i),
+                username=f"trainee_{i}",
+                email=f"trainee{i}@example.org",
+                github=None,
+            )
+            for i in range(start, start + count)
+        )
+        return [create_training_request(state="p", person=p) for p in persons]
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            func(*args, **kwargs)
+        return len(ctx.captured_queries)
+
+    def test_queries_dont_depend_on_number_of_requests(self):
+        few = self.create_requests(2)
+        many = self.create_requests(20, start=2)
+        for func, args in [
+            (bulk_change_training_requests_state, ("d",)),
+            (bulk_match_training_requests, (self.training,)),
+            (bulk_unmatch_training_requests, ()),
+        ]:
+            with self.subTest(func=func.__name__):
+                self.assertEqual(
+                    self.count_queries(func, few, *args),
+                    self.count_queries(func, many, *args),
+                )
+
+    def test_change_state(self):
+        requests = self.create_requests(3)
+        requests[0].state = "d"
+        requests[0].save()
+        changed = bulk_change_training_requests_state(requests, "d")
+        self.assertEqual(changed, requests[1:])
+        self.assertEqual(
+            set(TrainingRequest.objects.values_list("state", flat=True)), {"d"}
+        )
+
+    def test_match_skips_existing_tasks(self):
+        requests = self.create_requests(3)
+        learner = Role.objects.get(name="learner")
+        Task.objects.create(
+            event=self.training, person=requests[0].person, role=learner
+        )
+        tasks = bulk_match_training_requests(requests, self.training, seat_public=False)
+        self.assertEqual(
+            {task.person for task in tasks}, {r.person for r in requests[1:]}
+        )
+        self.assertEqual(
+            set(
+                Task.objects.filter(event=self.training).values_list(
+                    "person", "role", "seat_public"
+                )
+            ),
+            {(requests[0].person.pk, learner.pk, True)}
+            | {(r.person.pk, learner.pk, False) for r in requests[1:]},
+        )
+        self.assertEqual(
+            set(TrainingRequest.objects.values_list("state", flat=True)), {"a"}
+        )
+
+    def test_unmatch(self):
+        requests = self.create_requests(3)
+        bulk_match_training_requests(requests, self.training)
+        self.assertEqual(bulk_unmatch_training_requests(requests[:2]), 2)
+        self.assertEqual(
+            list(Task.objects.values_list("person", flat=True)),
+            [requests[2].person.pk],
+        )
+
+    def test_unmatch_tasks_with_scheduled_emails(self):
+        requests = self.create_requests(1)
+        (task,) = bulk_match_training_requests(requests, self.training)
+        template = EmailTemplate.objects.create(
+            slug="sample-template",
+            subject="Welcome",
+            to_header="recipient@address.com",
+            from_header="test@address.com",
+            body_template="Hello",
+        )
+        trigger = Trigger.objects.create(action="new-instructor", template=template)
+        task.rq_jobs.create(
+            job_id="fake-job-id",
+            trigger=trigger,
+            event_slug=self.training.slug,
+            recipients="trainee0@example.org",
+            action_name="NewInstructorAction",
+        )
+        self.assertEqual(bulk_unmatch_training_requests(requests), 1)
+        connection.check_constraints()
+        self.assertFalse(Task.objects.exists())
+
+    def test_match_refreshes_person_activity(self):
+        requests = self.create_requests(2)
+        bulk_match_training_requests(requests, self.training)
+        persons = Person.objects.annotate_with_activity().filter(
+            pk__in=[r.person.pk for r in requests]
+        )
+        self.assertEqual([p.num_learner for p in persons], [1, 1])
+        bulk_unmatch_training_requests(requests[:1])
+        person = Person.objects.annotate_with_activity().get(pk=requests[0].person.pk)
+        self.assertEqual(person.num_learner, 0)
+
+    def test_changes_recorded_in_single_revision(self):
+        requests = self.create_requests(3)
+        with create_revision():
+            bulk_match_training_requests(requests, self.training)
+        self.assertEqual(Revision.objects.count(), 1)
+        self.assertEqual(
+            Version.objects.get_for_model(TrainingRequest).count(), len(requests)
+        )
+        self.assertEqual(Version.objects.get_for_model(Task).count(), len(requests))
+
+
 class TestMatchingTrainingRequestAndDetailedView(TestBase):
     def setUp(self):
         self._setUpUsersAndLogin()
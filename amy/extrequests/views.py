@@ -53,6 +53,7 @@ from workshops.forms import (
     BulkUploadCSVForm,
     EventCreateForm,
 )
+from workshops.metadata_cache import fetch_workshop_metadata_cached
 from workshops.models import (
     Event,
     Language,
@@ -68,10 +69,12 @@ from workshops.util import (
     OnlyForAdminsMixin,
     WrongWorkshopURL,
     admin_required,
+    bulk_change_training_requests_state,
+    bulk_match_training_requests,
+    bulk_unmatch_training_requests,
     clean_upload_trainingrequest_manual_score,
     create_username,
     failed_to_delete,
-    fetch_workshop_metadata,
     merge_objects,
     parse_workshop_metadata,
     redirect_with_next_support,
@@ -417,7 +420,7 @@ class SelfOrganisedSubmissionAcceptEvent(
         }
 
         try:
-            metadata = fetch_workshop_metadata(url)
+            metadata = fetch_workshop_metadata_cached(url)
             parsed_data = parse_workshop_metadata(metadata)
         except (AttributeError, HTTPError, RequestException, WrongWorkshopURL):
             # ignore errors, but show warning instead
@@ -548,25 +551,14 @@ def all_trainingrequests(request):
             membership = match_form.cleaned_data["seat_membership"]
             seat_public = match_form.cleaned_data["seat_public"]
             open_seat = match_form.cleaned_data["seat_open_training"]
-            role = Role.objects.get(name="learner")
-
             # Perform bulk match
-            for r in match_form.cleaned_data["requests"]:
-                # automatically accept this request
-                r.state = "a"
-                r.save()
-
-                # assign to an event
-                Task.objects.get_or_create(
-                    event=event,
-                    person=r.person,
-                    role=role,
-                    defaults=dict(
-                        seat_membership=membership,
-                        seat_public=seat_public,
-                        seat_open_training=open_seat,
-                    ),
-                )
+            bulk_match_training_requests(
+                match_form.cleaned_data["requests"],
+                event,
+                seat_membership=membership,
+                seat_public=seat_public,
+                seat_open_training=open_seat,
+            )
 
             today = datetime.date.today()
 
@@ -615,10 +607,8 @@ def all_trainingrequests(request):
         form = BulkChangeTrainingRequestForm(request.POST)
 
         if form.is_valid():
-            # Perform bulk discard
-            for r in form.cleaned_data["requests"]:
-                r.state = "a"
-                r.save()
+            # Perform bulk accept
+            bulk_change_training_requests_state(form.cleaned_data["requests"], "a")
 
             messages.success(request, "Successfully accepted selected " "requests.")
 
@@ -628,9 +618,7 @@ def all_trainingrequests(request):
 
         if form.is_valid():
             # Perform bulk discard
-            for r in form.cleaned_data["requests"]:
-                r.state = "d"
-                r.save()
+            bulk_change_training_requests_state(form.cleaned_data["requests"], "d")
 
             messages.success(request, "Successfully discarded selected " "requests.")
 
@@ -642,8 +630,7 @@ def all_trainingrequests(request):
         form.check_person_matched = True
         if form.is_valid():
             # Perform bulk unmatch
-            for r in form.cleaned_data["requests"]:
-                r.person.get_training_tasks().delete()
+            bulk_unmatch_training_requests(form.cleaned_data["requests"])
 
             messages.success(
                 request, "Successfully unmatched selected " "people from trainings."
@@ -515,6 +515,61 @@ class TestMembershipConsortiumCountingInhouseInstructorTrainingSeats(
         self.assertEqual(self.membership.inhouse_instructor_training_seats_remaining, 2)
 
 
+class TestMembershipConsortiumCountingWithUsage(TestMembershipConsortiumCountingBase):
+    usage_properties = [
+        "workshops_without_admin_fee_completed",
+        "workshops_without_admin_fee_planned",
+        "workshops_without_admin_fee_remaining",
+        "workshops_discounted_completed",
+        "workshops_discounted_planned",
+        "self_organized_workshops_completed",
+        "self_organized_workshops_planned",
+        "public_instructor_training_seats_utilized",
+        "public_instructor_training_seats_remaining",
+        "inhouse_instructor_training_seats_utilized",
+        "inhouse_instructor_training_seats_remaining",
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.setUpWorkshops("cancelled", "completed", "planned", count=8)
+        self.setUpWorkshops("self-organised", count=2)
+        self.setUpTasks(count=3)
+
+    def test_counters_match_properties(self):
+        """Ensure counters annotated with `with_usage()` give the same results as
+        counting queries run by properties."""
+        annotated = Membership.objects.with_usage().get(pk=self.membership.pk)
+        plain = Membership.objects.get(pk=self.membership.pk)
+
+        for name in self.usage_properties:
+            with self.subTest(name=name):
+                self.assertEqual(getattr(annotated, name), getattr(plain, name))
+
+        self.assertEqual(annotated.workshops_discounted_completed, 1)
+        self.assertEqual(annotated.self_organized_workshops_completed, 2)
+        self.assertEqual(annotated.public_instructor_training_seats_utilized, 3)
+
+    def test_number_of_queries(self):
+        """Regression test: usage properties of memberships fetched with
+        `with_usage()` don't run any additional queries."""
+        Membership.objects.create(
+            name="Second membership",
+            variant="partner",
+            agreement_start=self.agreement_start,
+            agreement_end=self.agreement_end,
+            contribution_type="financial",
+        )
+
+        with self.assertNumQueries(1):
+            memberships = list(Membership.objects.with_usage())
+            for membership in memberships:
+                for name in self.usage_properties:
+                    getattr(membership, name)
+
+        self.assertEqual(len(memberships), 2)
+
+
 class TestMembershipForms(TestBase):
     def setUp(self):
         super().setUp()
@@ -3,7 +3,7 @@ from typing import Any, Dict
 
 from django.contrib import messages
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.db.models import Count, F, Prefetch, Q
+from django.db.models import F, Prefetch
 from django.db.models.functions import Coalesce, Now
 from django.forms import modelformset_factory
 from django.urls import reverse, reverse_lazy
@@ -61,7 +61,9 @@ class AllOrganizations(OnlyForAdminsMixin, AMYListView):
 
 
 class OrganizationDetails(UnquoteSlugMixin, OnlyForAdminsMixin, AMYDetailView):
-    queryset = Organization.objects.prefetch_related("memberships")
+    queryset = Organization.objects.prefetch_related(
+        Prefetch("memberships", queryset=Membership.objects.with_usage())
+    )
     context_object_name = "organization"
     template_name = "fiscal/organization.html"
     slug_field = "domain"
@@ -130,15 +132,14 @@ class AllMemberships(OnlyForAdminsMixin, AMYListView):
     template_name = "fiscal/all_memberships.html"
     filter_class = MembershipFilter
     queryset = (
-        Membership.objects.annotate(
+        Membership.objects.with_usage()
+        .annotate(
             instructor_training_seats_remaining=(
                 F("public_instructor_training_seats")
                 + F("additional_public_instructor_training_seats")
                 # Coalesce returns first non-NULL value
                 + Coalesce("public_instructor_training_seats_rolled_from_previous", 0)
-                - Count(
-                    "task", filter=Q(task__role__name="learner", task__seat_public=True)
-                )
+                - F("public_instructor_training_seats_utilized_count")
                 - Coalesce("public_instructor_training_seats_rolled_over", 0)
             ),
         )
@@ -146,13 +147,14 @@ class AllMemberships(OnlyForAdminsMixin, AMYListView):
         .order_by("id")
     )
     title = "All Memberships"
+    keyset_pagination = True
 
 
 class MembershipDetails(OnlyForAdminsMixin, AMYDetailView):
     prefetch_awards = Prefetch(
         "person__award_set", queryset=Award.objects.select_related("badge")
     )
-    queryset = Membership.objects.prefetch_related(
+    queryset = Membership.objects.with_usage().prefetch_related(
         Prefetch(
             "member_set",
             queryset=Member.objects.select_related(
@@ -2,7 +2,8 @@ from typing import Optional
 
 from django.conf import settings
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.db.models import Case, Count, IntegerField, Prefetch, Value, When
+from django.db.models import Prefetch
+from django.db.models.functions import Coalesce
 
 from recruitment.filters import InstructorRecruitmentFilter
 from recruitment.forms import InstructorRecruitmentCreateForm
@@ -43,29 +44,9 @@ class InstructorRecruitmentList(
                     InstructorRecruitmentSignup.objects.select_related(
                         "recruitment", "person"
                     ).annotate(
-                        num_instructor=Count(
-                            Case(
-                                When(
-                                    person__task__role__name="instructor", then=Value(1)
-                                ),
-                                output_field=IntegerField(),
-                            )
-                        ),
-                        num_supporting=Count(
-                            Case(
-                                When(
-                                    person__task__role__name="supporting-instructor",
-                                    then=Value(1),
-                                ),
-                                output_field=IntegerField(),
-                            )
-                        ),
-                        num_helper=Count(
-                            Case(
-                                When(person__task__role__name="helper", then=Value(1)),
-                                output_field=IntegerField(),
-                            )
-                        ),
+                        num_instructor=Coalesce("person__activity__num_taught", 0),
+                        num_supporting=Coalesce("person__activity__num_supporting", 0),
+                        num_helper=Coalesce("person__activity__num_helper", 0),
                     )
                 ),
             )
@@ -184,27 +165,9 @@ class InstructorRecruitmentDetails(
                 InstructorRecruitmentSignup.objects.select_related(
                     "recruitment", "person"
                 ).annotate(
-                    num_instructor=Count(
-                        Case(
-                            When(person__task__role__name="instructor", then=Value(1)),
-                            output_field=IntegerField(),
-                        )
-                    ),
-                    num_supporting=Count(
-                        Case(
-                            When(
-                                person__task__role__name="supporting-instructor",
-                                then=Value(1),
-                            ),
-                            output_field=IntegerField(),
-                        )
-                    ),
-                    num_helper=Count(
-                        Case(
-                            When(person__task__role__name="helper", then=Value(1)),
-                            output_field=IntegerField(),
-                        )
-                    ),
+                    num_instructor=Coalesce("person__activity__num_taught", 0),
+                    num_supporting=Coalesce("person__activity__num_supporting", 0),
+                    num_helper=Coalesce("person__activity__num_helper", 0),
                 )
             ),
         )
@@ -0,0 +1,159 @@
+from django.db.models import (
+    CharField,
+    Count,
+    Exists,
+    F,
+    Func,
+    Max,
+    Min,
+    OuterRef,
+    Value,
+)
+from django.db.models.functions import (
+    Concat,
+    Greatest,
+    Least,
+    Lower,
+    Substr,
+    Trim,
+    Upper,
+)
+
+from workshops.util import get_pagination_items
+
+# separates parts of composite keys, e.g. personal and family names
+KEY_SEPARATOR = "|"
+
+
+class Unaccent(Func):
+    """Remove accents (requires PostgreSQL `unaccent` extension).
+
+    Dictionary is passed explicitly, which saves its lookup on every call."""
+
+    function = "UNACCENT"
+    template = "%(function)s('unaccent', %(expressions)s)"
+    output_field = CharField()
+
+
+class RegexpReplace(Func):
+    function = "REGEXP_REPLACE"
+    output_field = CharField()
+
+    def __init__(self, expression, pattern, replacement, flags="g", **extra):
+        super().__init__(
+            expression, Value(pattern), Value(replacement), Value(flags), **extra
+        )
+
+
+def normalized_name(field):
+    """Lower-case name without accents and with collapsed whitespace."""
+    return Lower(Unaccent(Trim(RegexpReplace(field, r"\s+", " "))))
+
+
+def normalized_email(field):
+    """Lower-case email without "+tag" suffix of the local part."""
+    return Lower(Trim(RegexpReplace(field, r"\+[^@]*@", "@")))
+
+
+def name_key(personal="personal", family="family"):
+    """Key equal for the same names, e.g. "Ron Weasley" and "ron  weasley"."""
+    return Concat(
+        normalized_name(personal),
+        Value(KEY_SEPARATOR),
+        normalized_name(family),
+        output_field=CharField(),
+    )
+
+
+def switched_name_key(personal="personal", family="family"):
+    """Key equal for the same names in any order, e.g. "Harry Potter" and
+    "Potter Harry"."""
+    return Concat(
+        Least(normalized_name(personal), normalized_name(family)),
+        Value(KEY_SEPARATOR),
+        Greatest(normalized_name(personal), normalized_name(family)),
+        output_field=CharField(),
+    )
+
+
+def full_name(personal="personal", family="family"):
+    """Name compared for similarity.  Trigrams are case-insensitive and ignore
+    punctuation and whitespace, so no further normalization is needed."""
+    return Concat(personal, Value(" "), family, output_field=CharField())
+
+
+def name_blocks(personal="personal", family="family"):
+    """Blocking keys for similar names: first 3 letters of family name and the
+    first letter of personal name.
+
+    The same expressions are indexed in migration
+    `workshops.0256_duplicates_unaccent_blocking_index`."""
+    return [Upper(Substr(family, 1, 3)), Upper(Substr(personal, 1, 1))]
+
+
+class DuplicateFinder:
+    """Find groups of objects sharing the same (normalized) key.
+
+    Groups are found in the database with a single query: objects are annotated
+    with the key and filtered with `GROUP BY key HAVING COUNT(*) > 1` subquery.
+    If `distinct` expression is provided, groups must contain at least 2 distinct
+    values of it."""
+
+    def __init__(self, queryset, key, distinct=None, ordering=None):
+        self.queryset = queryset.annotate(duplicate_key=key)
+        self.distinct = distinct
+        self.ordering = ordering or queryset.model._meta.ordering
+
+    def groups(self):
+        """Ordered keys of groups of duplicates."""
+        groups = self.queryset.order_by().values("duplicate_key")
+        if self.distinct is None:
+            groups = groups.annotate(group_size=Count("pk")).filter(group_size__gt=1)
+        else:
+            # cheaper than `COUNT(DISTINCT ...) > 1`, which requires sorting
+            groups = groups.annotate(
+                distinct_min=Min(self.distinct), distinct_max=Max(self.distinct)
+            ).filter(distinct_min__lt=F("distinct_max"))
+        return groups.values_list("duplicate_key", flat=True).order_by("duplicate_key")
+
+    def objects(self, keys=None):
+        """Objects belonging to groups of duplicates (all groups, if `keys` are
+        not provided), ordered by group."""
+        if keys is None:
+            keys = self.groups()
+        return self.queryset.filter(duplicate_key__in=keys).order_by(
+            "duplicate_key", *self.ordering
+        )
+
+    def paginate(self, request, page_param="page"):
+        """Return page of groups and objects belonging to these groups.
+
+        Whole groups are paginated, so that no group is split between pages."""
+        groups = get_pagination_items(request, self.groups(), page_param=page_param)
+        return groups, list(self.objects(list(groups.object_list)))
+
+
+class SimilarityFinder(DuplicateFinder):
+    """Find groups of objects with similar, but not equal, keys.
+
+    Objects are compared (with trigram similarity, see `pg_trgm.similarity_threshold`
+    PostgreSQL setting) only if all their `blocks` are equal, so that the self-join
+    uses an index on the blocking keys instead of comparing every pair of objects.
+    Objects with equal `exact` key (already found by `DuplicateFinder`) are not
+    considered similar.  Groups are values of the first blocking key."""
+
+    def __init__(self, queryset, key, blocks, exact=None, ordering=None):
+        blocks = {"block_{}".format(i): block for i, block in enumerate(blocks)}
+        queryset = queryset.annotate(
+            similarity_key=key, exact_key=exact or key, **blocks
+        ).annotate(duplicate_key=F("block_0"))
+        similar = (
+            queryset.filter(**{name: OuterRef(name) for name in blocks})
+            .filter(similarity_key__trigram_similar=OuterRef("similarity_key"))
+            .exclude(exact_key=OuterRef("exact_key"))
+        )
+        self.queryset = queryset.annotate(has_similar=Exists(similar)).filter(
+            has_similar=True
+        )
+        self.distinct = None
+        self.ordering = ordering or queryset.model._meta.ordering
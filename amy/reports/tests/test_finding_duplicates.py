@@ -3,7 +3,8 @@ from datetime import timedelta
 from django.urls import reverse
 from django.utils import timezone
 
-from workshops.models import Person
+from reports.duplicates import DuplicateFinder, name_key
+from workshops.models import Person, TrainingRequest
 from workshops.tests.base import TestBase
 
 
@@ -296,3 +297,140 @@ class TestFindingReviewedDuplicates(TestBase):
         self.ron.refresh_from_db()
         self.assertTrue(self.harry.duplication_reviewed_on)
         self.assertTrue(self.ron.duplication_reviewed_on)
+
+
+class TestNormalizedDuplicates(TestBase):
+    """Names are compared case-, accent- and whitespace-insensitive."""
+
+    def setUp(self):
+        self._setUpUsersAndLogin()
+
+        self.harry = Person.objects.create(
+            personal="Harry",
+            family="Pötter",
+            username="potter_harry",
+            email="hp@hogwart.edu",
+        )
+        self.potter = Person.objects.create(
+            personal="potter ",
+            family="HARRY",
+            username="harry_potter",
+            email="hp+1@hogwart.edu",
+        )
+        self.ron = Person.objects.create(
+            personal="Ron  Bilius",
+            family="Weasley",
+            username="weasley_ron",
+            email="rw@hogwart.edu",
+        )
+        self.ron2 = Person.objects.create(
+            personal="ron bilius",
+            family="weasley",
+            username="weasley_ron_2",
+            email="rw+1@hogwart.edu",
+        )
+        self.hermione = Person.objects.create(
+            personal="Hermione",
+            family="Granger",
+            username="granger_hermione",
+            email="hg@hogwart.edu",
+        )
+        self.hermione2 = Person.objects.create(
+            personal="Hermoine",
+            family="Granger",
+            username="granger_hermoine",
+            email="hg+1@hogwart.edu",
+        )
+
+        self.url = reverse("duplicate_persons")
+
+    def test_switched_names_persons(self):
+        rv = self.client.get(self.url)
+        switched = rv.context["switched_persons"]
+        self.assertCountEqual(switched, [self.harry, self.potter])
+
+    def test_duplicate_persons(self):
+        rv = self.client.get(self.url)
+        duplicates = rv.context["duplicate_persons"]
+        self.assertCountEqual(duplicates, [self.ron2, self.ron])
+
+    def test_similar_persons_only_on_demand(self):
+        rv = self.client.get(self.url)
+        self.assertIsNone(rv.context["similar_persons"])
+
+        rv = self.client.get(self.url, {"similar": 1})
+        similar = rv.context["similar_persons"]
+        self.assertCountEqual(similar, [self.hermione, self.hermione2])
+
+    def test_switched_names_same_person(self):
+        """Person with equal personal and family names is not a duplicate."""
+        Person.objects.filter(pk=self.potter.pk).delete()
+        Person.objects.create(
+            personal="Sirius", family="Sirius", username="sirius", email="s@b.uk"
+        )
+
+        rv = self.client.get(self.url)
+        self.assertEqual(rv.context["switched_persons"], [])
+
+    def test_groups_not_split_between_pages(self):
+        for i in range(3):
+            Person.objects.create(
+                personal="Ron Bilius",
+                family="Weasley",
+                username="weasley_ron_{}".format(i + 3),
+                email="rw+{}@hogwart.edu".format(i + 3),
+            )
+            Person.objects.create(
+                personal="Fred",
+                family="Weasley",
+                username="weasley_fred_{}".format(i),
+                email="fw+{}@hogwart.edu".format(i),
+            )
+
+        rv = self.client.get(self.url, {"items_per_page": 1})
+        self.assertEqual(rv.context["duplicate_groups"].paginator.num_pages, 2)
+        self.assertEqual(len(rv.context["duplicate_persons"]), 3)  # Fred
+
+        rv = self.client.get(self.url, {"items_per_page": 1, "duplicate_page": 2})
+        self.assertEqual(len(rv.context["duplicate_persons"]), 5)  # Ron
+        self.assertIn(self.ron, rv.context["duplicate_persons"])
+        self.assertIn(self.ron2, rv.context["duplicate_persons"])
+
+    def test_single_query(self):
+        """Groups and their objects are found with a single query."""
+        finder = DuplicateFinder(Person.objects.all(), name_key())
+        with self.assertNumQueries(1):
+            persons = list(finder.objects())
+        self.assertCountEqual(persons, [self.ron2, self.ron])
+
+
+class TestFindingDuplicateTrainingRequests(TestBase):
+    def setUp(self):
+        self._setUpUsersAndLogin()
+
+        self.request1 = TrainingRequest.objects.create(
+            personal="Harry", family="Potter", email="hp@hogwart.edu"
+        )
+        self.request2 = TrainingRequest.objects.create(
+            personal="harry", family="Pötter", email="H.P+amy@Hogwart.edu"
+        )
+        self.request3 = TrainingRequest.objects.create(
+            personal="Ron", family="Weasley", email="HP+Spam@hogwart.edu"
+        )
+        self.request4 = TrainingRequest.objects.create(
+            personal="Hermione", family="Granger", email="hg@hogwart.edu"
+        )
+
+        self.url = reverse("duplicate_training_requests")
+
+    def test_duplicate_names(self):
+        rv = self.client.get(self.url)
+        self.assertCountEqual(
+            rv.context["duplicate_names"], [self.request1, self.request2]
+        )
+
+    def test_duplicate_emails(self):
+        rv = self.client.get(self.url)
+        self.assertCountEqual(
+            rv.context["duplicate_emails"], [self.request3, self.request1]
+        )
@@ -1,6 +1,6 @@
 from django.urls import reverse
 
-from workshops.models import Event, Role, Tag, Task
+from workshops.models import Award, Badge, Event, Role, Tag, Task
 from workshops.tests.base import TestBase
 
 
@@ -26,6 +26,7 @@ class TestInstructorIssues(TestBase):
         Task.objects.create(event=e1, person=self.ironman, role=learner)
         Task.objects.create(event=e1, person=self.blackwidow, role=learner)
         Task.objects.create(event=e2, person=self.spiderman, role=learner)
+        self.e2 = e2
 
     def test_stalled_trainees_not_in_pending(self):
         """"""
@@ -39,3 +40,30 @@ class TestInstructorIssues(TestBase):
         self.assertIn(self.ironman, stalled)
         self.assertNotIn(self.blackwidow, pending)
         self.assertIn(self.blackwidow, stalled)
+
+    def test_trainees_refreshed(self):
+        """Trainees follow changes of tasks, tags of trainings and badges."""
+        self.e2.tags.add(Tag.objects.get(name="stalled"))
+        rv = self.client.get(reverse("instructor_issues"))
+        self.assertEqual(list(rv.context["pending"]), [])
+        self.assertIn(self.spiderman, [t.person for t in rv.context["stalled"]])
+
+        Award.objects.create(
+            person=self.ironman, badge=Badge.objects.get(name="swc-instructor")
+        )
+        rv = self.client.get(reverse("instructor_issues"))
+        self.assertNotIn(self.ironman, [t.person for t in rv.context["stalled"]])
+
+    def test_instructors_without_airport(self):
+        """Instructors without airport follow changes of airports and badges."""
+        rv = self.client.get(reverse("instructor_issues"))
+        self.assertNotIn(self.hermione, rv.context["instructors"])
+
+        self.hermione.airport = None
+        self.hermione.save()
+        rv = self.client.get(reverse("instructor_issues"))
+        self.assertIn(self.hermione, rv.context["instructors"])
+
+        self.hermione.award_set.all().delete()
+        rv = self.client.get(reverse("instructor_issues"))
+        self.assertNotIn(self.hermione, rv.context["instructors"])
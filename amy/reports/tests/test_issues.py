@@ -1,8 +1,10 @@
 from datetime import date, timedelta
+from io import StringIO
 
+from django.core.management import call_command
 from django.urls import reverse
 
-from workshops.models import Event, Organization, Person, Role, Tag
+from workshops.models import Event, EventIssues, Organization, Person, Role, Tag
 from workshops.tests.base import TestBase
 
 
@@ -148,6 +150,28 @@ class TestIssuesViews(TestBase):
         self.assertNotIn(location, rv.context["events"])
         self.assertIn(no_location, rv.context["events"])
 
+    def test_workshop_issues_empty_country(self):
+        """Test if workshop issues don't consider empty country a missing
+        location (only missing country)."""
+        empty_country = Event.objects.create(
+            slug="event-with-empty-country",
+            start=self.weekago,
+            end=self.yesterday,
+            manual_attendance=36,
+            host=Organization.objects.first(),
+            country="",
+            address="A",
+            venue="B",
+            latitude=89,
+            longitude=179,
+        )
+        empty_country.task_set.create(
+            person=Person.objects.first(), role=self.instructor_role
+        )
+
+        rv = self.client.get(self.url)
+        self.assertNotIn(empty_country, rv.context["events"])
+
     def test_workshop_issues_wrong_dates(self):
         """Test if workshop issues collects events with invalid dates."""
         okay = Event.objects.create(
@@ -216,3 +240,69 @@ class TestIssuesViews(TestBase):
         rv = self.client.get(self.url)
         self.assertNotIn(instructor, rv.context["events"])
         self.assertIn(no_instructors, rv.context["events"])
+
+    def test_workshop_issues_refreshed(self):
+        """Test if workshop issues follow changes of events, their tags and
+        tasks."""
+        event = Event.objects.create(
+            slug="event-with-no-instructors",
+            start=self.weekago,
+            end=self.yesterday,
+            manual_attendance=36,
+            host=Organization.objects.first(),
+            country="US",
+            address="A",
+            venue="B",
+            latitude=89,
+            longitude=179,
+        )
+        rv = self.client.get(self.url)
+        self.assertIn(event, rv.context["events"])
+        self.assertEqual(rv.context["events"][0].num_instructors, 0)
+
+        task = event.task_set.create(
+            person=Person.objects.first(), role=self.instructor_role
+        )
+        self.assertNotIn(event, self.client.get(self.url).context["events"])
+
+        task.delete()
+        event.tags.add(Tag.objects.get(name="unresponsive"))
+        self.assertNotIn(event, self.client.get(self.url).context["events"])
+
+        event.tags.clear()
+        rv = self.client.get(self.url)
+        self.assertIn(event, rv.context["events"])
+
+        event.completed = True
+        event.save()
+        self.assertNotIn(event, self.client.get(self.url).context["events"])
+
+    def test_workshop_issues_assigned_to(self):
+        """Test if workshop issues can be filtered by assigned admin."""
+        assigned = Event.objects.create(
+            slug="assigned-event",
+            start=self.yesterday,
+            host=Organization.objects.first(),
+            assigned_to=self.admin,
+        )
+        unassigned = Event.objects.create(
+            slug="unassigned-event",
+            start=self.yesterday,
+            host=Organization.objects.first(),
+        )
+
+        rv = self.client.get(self.url, {"assigned_to": self.admin.pk})
+        self.assertIn(assigned, rv.context["events"])
+        self.assertNotIn(unassigned, rv.context["events"])
+
+    def test_refresh_command(self):
+        event = Event.objects.create(
+            slug="event-with-no-instructors",
+            start=self.yesterday,
+            host=Organization.objects.first(),
+        )
+        EventIssues.objects.all().delete()
+        self.assertNotIn(event, self.client.get(self.url).context["events"])
+
+        call_command("refresh_issues", stdout=StringIO())
+        self.assertIn(event, self.client.get(self.url).context["events"])
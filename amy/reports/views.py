@@ -1,7 +1,7 @@
 from typing import Optional
 
 from django.contrib import messages
-from django.db.models import Case, Count, F, IntegerField, Prefetch, Q, Value, When
+from django.db.models import F, Prefetch, Q
 from django.db.models.functions import Coalesce
 from django.shortcuts import redirect, render
 from django.urls import reverse
@@ -9,13 +9,21 @@ from django.utils import timezone
 
 from dashboard.forms import AssignmentForm
 from fiscal.filters import MembershipTrainingsFilter
+from reports.duplicates import (
+    DuplicateFinder,
+    SimilarityFinder,
+    full_name,
+    name_blocks,
+    name_key,
+    normalized_email,
+    normalized_name,
+    switched_name_key,
+)
 from workshops.models import (
-    Badge,
     Event,
+    EventIssues,
     Membership,
     Person,
-    Role,
-    Tag,
     Task,
     TrainingRequest,
 )
@@ -25,47 +33,43 @@ from workshops.util import admin_required, get_pagination_items
 @admin_required
 def membership_trainings_stats(request):
     """Display basic statistics for memberships and instructor trainings."""
-    data = Membership.objects.prefetch_related("organizations", "task_set").annotate(
-        instructor_training_seats_public_total=(
-            F("public_instructor_training_seats")
-            + F("additional_public_instructor_training_seats")
-            # Coalesce returns first non-NULL value
-            + Coalesce("public_instructor_training_seats_rolled_from_previous", 0)
-        ),
-        instructor_training_seats_public_utilized=(
-            Count("task", filter=Q(task__role__name="learner", task__seat_public=True))
-        ),
-        instructor_training_seats_public_remaining=(
-            F("public_instructor_training_seats")
-            + F("additional_public_instructor_training_seats")
-            + Coalesce("public_instructor_training_seats_rolled_from_previous", 0)
-            - Count(
-                "task", filter=Q(task__role__name="learner", task__seat_public=True)
-            )
-            - Coalesce("public_instructor_training_seats_rolled_over", 0)
-        ),
-        instructor_training_seats_inhouse_total=(
-            F("inhouse_instructor_training_seats")
-            + F("additional_inhouse_instructor_training_seats")
-            # Coalesce returns first non-NULL value
-            + Coalesce("inhouse_instructor_training_seats_rolled_from_previous", 0)
-        ),
-        instructor_training_seats_inhouse_utilized=(
-            Count(
-                "task",
-                filter=Q(task__role__name="learner", task__seat_public=False),
-            )
-        ),
-        instructor_training_seats_inhouse_remaining=(
-            F("inhouse_instructor_training_seats")
-            + F("additional_inhouse_instructor_training_seats")
-            + Coalesce("inhouse_instructor_training_seats_rolled_from_previous", 0)
-            - Count(
-                "task",
-                filter=Q(task__role__name="learner", task__seat_public=False),
-            )
-            - Coalesce("inhouse_instructor_training_seats_rolled_over", 0)
-        ),
+    data = (
+        Membership.objects.with_usage()
+        .prefetch_related("organizations", "task_set")
+        .annotate(
+            instructor_training_seats_public_total=(
+                F("public_instructor_training_seats")
+                + F("additional_public_instructor_training_seats")
+                # Coalesce returns first non-NULL value
+                + Coalesce("public_instructor_training_seats_rolled_from_previous", 0)
+            ),
+            instructor_training_seats_public_utilized=(
+                F("public_instructor_training_seats_utilized_count")
+            ),
+            instructor_training_seats_public_remaining=(
+                F("public_instructor_training_seats")
+                + F("additional_public_instructor_training_seats")
+                + Coalesce("public_instructor_training_seats_rolled_from_previous", 0)
+                - F("public_instructor_training_seats_utilized_count")
+                - Coalesce("public_instructor_training_seats_rolled_over", 0)
+            ),
+            instructor_training_seats_inhouse_total=(
+                F("inhouse_instructor_training_seats")
+                + F("additional_inhouse_instructor_training_seats")
+                # Coalesce returns first non-NULL value
+                + Coalesce("inhouse_instructor_training_seats_rolled_from_previous", 0)
+            ),
+            instructor_training_seats_inhouse_utilized=(
+                F("inhouse_instructor_training_seats_utilized_count")
+            ),
+            instructor_training_seats_inhouse_remaining=(
+                F("inhouse_instructor_training_seats")
+                + F("additional_inhouse_instructor_training_seats")
+                + Coalesce("inhouse_instructor_training_seats_rolled_from_previous", 0)
+                - F("inhouse_instructor_training_seats_utilized_count")
+                - Coalesce("inhouse_instructor_training_seats_rolled_over", 0)
+            ),
+        )
     )
 
     filter_ = MembershipTrainingsFilter(request.GET, data)
@@ -87,77 +91,34 @@ def workshop_issues(request):
     if assignment_form.is_valid():
         assigned_to = assignment_form.cleaned_data["assigned_to"]
 
+    # issues of active events are precomputed in `EventIssues`
     events = (
-        Event.objects.active()
-        .past_events()
+        Event.objects.past_events()
+        .filter(issues__isnull=False)
         .annotate(
-            num_instructors=Count(
-                Case(
-                    When(task__role__name="instructor", then=Value(1)),
-                    output_field=IntegerField(),
+            **{field: F("issues__{}".format(field)) for field in EventIssues.FIELDS}
+        )
+        .prefetch_related(
+            Prefetch(
+                "task_set",
+                to_attr="contacts",
+                queryset=Task.objects.select_related("person")
+                .filter(
+                    # we only want hosts, organizers and instructors
+                    Q(role__name="host")
+                    | Q(role__name="organizer")
+                    | Q(role__name="instructor")
                 )
+                .filter(person__may_contact=True)
+                .exclude(Q(person__email="") | Q(person__email=None)),
             )
         )
-        .attendance()
         .order_by("-start")
     )
 
-    no_attendance = Q(attendance=None) | Q(attendance=0)
-    no_location = (
-        Q(country=None)
-        | Q(venue=None)
-        | Q(venue__exact="")
-        | Q(address=None)
-        | Q(address__exact="")
-        | Q(latitude=None)
-        | Q(longitude=None)
-    )
-    bad_dates = Q(start__gt=F("end"))
-
-    events = events.filter(
-        (no_attendance & ~Q(tags__name="unresponsive"))
-        | no_location
-        | bad_dates
-        | Q(num_instructors=0)
-    ).prefetch_related("task_set", "task_set__person")
-
-    events = events.prefetch_related(
-        Prefetch(
-            "task_set",
-            to_attr="contacts",
-            queryset=Task.objects.select_related("person")
-            .filter(
-                # we only want hosts, organizers and instructors
-                Q(role__name="host")
-                | Q(role__name="organizer")
-                | Q(role__name="instructor")
-            )
-            .filter(person__may_contact=True)
-            .exclude(Q(person__email="") | Q(person__email=None)),
-        )
-    )
-
     if assigned_to is not None:
         events = events.filter(assigned_to=assigned_to)
 
-    events = events.annotate(
-        missing_attendance=Case(
-            When(no_attendance, then=Value(1)),
-            default=Value(0),
-            output_field=IntegerField(),
-        ),
-        missing_location=Case(
-            When(no_location, then=Value(1)),
-            default=Value(0),
-            output_field=IntegerField(),
-        ),
-        bad_dates=Case(
-            When(bad_dates, then=Value(1)),
-            default=Value(0),
-            output_field=IntegerField(),
-        ),
-    )
-
     context = {
         "title": "Workshops with Issues",
         "events": events,
@@ -171,31 +132,21 @@ def workshop_issues(request):
 def instructor_issues(request):
     """Display instructors in the database who need attention."""
 
+    # Issues of instructors and trainees are precomputed in `PersonIssues`.
     # Everyone who has a badge but needs attention.
-    instructor_badges = Badge.objects.instructor_badges()
-    instructors = Person.objects.filter(badges__in=instructor_badges).filter(
-        airport__isnull=True
-    )
+    instructors = Person.objects.filter(issues__missing_airport=True)
 
     # Everyone who's been in instructor training but doesn't yet have a badge.
-    learner = Role.objects.get(name="learner")
-    ttt = Tag.objects.get(name="TTT")
-    stalled = Tag.objects.get(name="stalled")
     trainees = (
-        Task.objects.filter(event__tags__in=[ttt], role=learner)
-        .exclude(person__badges__in=instructor_badges)
+        Task.objects.filter(role__name="learner", event__tags__name="TTT")
         .order_by("person__family", "person__personal", "event__start")
         .select_related("person", "event")
     )
-
-    pending_instructors = trainees.exclude(event__tags=stalled)
-    pending_instructors_person_ids = pending_instructors.values_list(
-        "person__pk",
-        flat=True,
+    pending_instructors = trainees.filter(person__issues__pending_trainee=True).exclude(
+        event__tags__name="stalled"
     )
-
-    stalled_instructors = trainees.filter(event__tags=stalled).exclude(
-        person__id__in=pending_instructors_person_ids
+    stalled_instructors = trainees.filter(person__issues__stalled_trainee=True).filter(
+        event__tags__name="stalled"
     )
 
     context = {
@@ -213,51 +164,44 @@ def duplicate_persons(request):
 
     Criteria for persons:
     * switched personal/family names
-    * same name on different people."""
-
-    names_normal = set(
-        Person.objects.duplication_review_expired().values_list("personal", "family")
-    )
-    names_switched = set(
-        Person.objects.duplication_review_expired().values_list("family", "personal")
-    )
-    names = names_normal & names_switched  # intersection
-
-    switched_criteria = Q(id=0)
-    # empty query results if names is empty
-    for personal, family in names:
-        # get people who appear in `names`
-        switched_criteria |= Q(personal=personal) & Q(family=family)
-
-    switched_persons = (
-        Person.objects.duplication_review_expired()
-        .filter(switched_criteria)
-        .order_by("email")
-    )
-
-    duplicate_names = (
-        Person.objects.duplication_review_expired()
-        .values("personal", "family")
-        .order_by("family", "personal")
-        .annotate(count_id=Count("id"))
-        .filter(count_id__gt=1)
-    )
-
-    duplicate_criteria = Q(id=0)
-    for name in duplicate_names:
-        # get people who appear in `names`
-        duplicate_criteria |= Q(personal=name["personal"]) & Q(family=name["family"])
-
-    duplicate_persons = (
-        Person.objects.duplication_review_expired()
-        .filter(duplicate_criteria)
-        .order_by("family", "personal", "email")
-    )
+    * same name on different people
+    * similar names (only if `similar` GET parameter is set).
+
+    Names are compared case-, accent- and whitespace-insensitive."""
+    persons = Person.objects.duplication_review_expired()
+    ordering = ["family", "personal", "email"]
+
+    switched_groups, switched_persons = DuplicateFinder(
+        persons,
+        switched_name_key(),
+        distinct=normalized_name("personal"),
+        ordering=ordering,
+    ).paginate(request, page_param="switched_page")
+
+    duplicate_groups, duplicate_persons = DuplicateFinder(
+        persons, name_key(), ordering=ordering
+    ).paginate(request, page_param="duplicate_page")
+
+    similar = bool(request.GET.get("similar"))
+    similar_groups, similar_persons = None, None
+    if similar:
+        similar_groups, similar_persons = SimilarityFinder(
+            persons,
+            full_name(),
+            name_blocks(),
+            exact=name_key(),
+            ordering=ordering,
+        ).paginate(request, page_param="similar_page")
 
     context = {
         "title": "Possible duplicate persons",
+        "switched_groups": switched_groups,
         "switched_persons": switched_persons,
+        "duplicate_groups": duplicate_groups,
         "duplicate_persons": duplicate_persons,
+        "similar": similar,
+        "similar_groups": similar_groups,
+        "similar_persons": similar_persons,
     }
 
     return render(request, "reports/duplicate_persons.html", context)
@@ -284,41 +228,24 @@ def duplicate_training_requests(request):
     """Find possible duplicates amongst training requests.
 
     Criteria:
-    * the same name
-    * the same email.
+    * the same name (case-, accent- and whitespace-insensitive)
+    * the same email (case-insensitive, ignoring "+tag" suffix).
     """
-    names = (
-        TrainingRequest.objects.values("personal", "family")
-        .order_by("family", "personal")
-        .annotate(count_id=Count("id"))
-        .filter(count_id__gt=1)
-    )
-    duplicate_names_criteria = Q(id=0)
-    for name in names:
-        duplicate_names_criteria |= Q(personal=name["personal"]) & Q(
-            family=name["family"]
-        )
+    training_requests = TrainingRequest.objects.all()
 
-    emails = (
-        TrainingRequest.objects.values_list("email", flat=True)
-        .order_by("family", "personal")
-        .annotate(count_id=Count("id"))
-        .filter(count_id__gt=1)
-    )
-    duplicate_emails_criteria = Q(id=0)
-    for email in emails:
-        duplicate_emails_criteria |= Q(email=email)
+    name_groups, duplicate_names = DuplicateFinder(
+        training_requests, name_key(), ordering=["family", "personal"]
+    ).paginate(request, page_param="names_page")
 
-    duplicate_names = TrainingRequest.objects.filter(duplicate_names_criteria).order_by(
-        "family", "personal"
-    )
-    duplicate_emails = TrainingRequest.objects.filter(
-        duplicate_emails_criteria
-    ).order_by("email")
+    email_groups, duplicate_emails = DuplicateFinder(
+        training_requests, normalized_email("email"), ordering=["email"]
+    ).paginate(request, page_param="emails_page")
 
     context = {
         "title": "Possible duplicate training requests",
+        "name_groups": name_groups,
         "duplicate_names": duplicate_names,
+        "email_groups": email_groups,
         "duplicate_emails": duplicate_emails,
     }
 
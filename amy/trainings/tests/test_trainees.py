@@ -1,6 +1,8 @@
 from datetime import date, datetime
 from functools import partial
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from trainings.filters import filter_trainees_by_instructor_status
@@ -8,6 +10,7 @@ from trainings.views import all_trainees_queryset
 from workshops.models import (
     Award,
     Event,
+    InstructorEligibility,
     Organization,
     Person,
     Role,
@@ -16,6 +19,7 @@ from workshops.models import (
     TrainingRequirement,
 )
 from workshops.tests.base import TestBase
+from workshops.util import bulk_add_training_progress
 
 
 class TestTraineesView(TestBase):
@@ -107,6 +111,44 @@ class TestTraineesView(TestBase):
         blackwidow_progress.refresh_from_db()
         self.assertFalse(blackwidow_progress.discarded)
 
+    def test_bulk_discard_progress_refreshes_eligibility(self):
+        TrainingProgress.objects.create(
+            trainee=self.spiderman, requirement=self.training, state="p"
+        )
+        spiderman = all_trainees_queryset().get(pk=self.spiderman.pk)
+        self.assertEqual(spiderman.passed_training, 1)
+
+        data = {
+            "trainees": [self.spiderman.pk],
+            "discard": "",
+        }
+        self.client.post(reverse("all_trainees"), data, follow=True)
+
+        spiderman = all_trainees_queryset().get(pk=self.spiderman.pk)
+        self.assertEqual(spiderman.passed_training, 0)
+
+    def test_bulk_add_progress_refreshes_eligibility(self):
+        bulk_add_training_progress(
+            [self.spiderman, self.ironman], requirement=self.training, state="p"
+        )
+        trainees = all_trainees_queryset().filter(
+            pk__in=[self.spiderman.pk, self.ironman.pk]
+        )
+        self.assertEqual([t.passed_training for t in trainees], [1, 1])
+
+    def test_bulk_add_progress_queries(self):
+        def count_queries(trainees):
+            with CaptureQueriesContext(connection) as ctx:
+                bulk_add_training_progress(
+                    trainees, requirement=self.discussion, state="a"
+                )
+            return len(ctx.captured_queries)
+
+        self.assertEqual(
+            count_queries([self.spiderman]),
+            count_queries([self.spiderman, self.ironman, self.blackwidow]),
+        )
+
 
 class TestFilterTraineesByInstructorStatus(TestBase):
     def _setUpPermissions(self):
@@ -295,6 +337,8 @@ class TestFilterTraineesByInstructorStatus(TestBase):
                 ),
             ]
         )
+        # `bulk_create()` doesn't send signals
+        InstructorEligibility.objects.refresh()
 
     def setUp(self):
         self._setUpTrainingRequirements()
@@ -327,6 +371,7 @@ class TestFilterTraineesByInstructorStatus(TestBase):
             self.instructor2,
             self.instructor3,
             self.instructor4,
+            self.trainee2,
         ]
         self.assertQuerysetEqual(rv, values, transform=lambda x: x)
 
@@ -345,7 +390,7 @@ class TestFilterTraineesByInstructorStatus(TestBase):
     def test_lc_instructors(self):
         # only LC instructors should be returned
         rv = self.filter(choice="lc")
-        values = [self.instructor3, self.instructor4]
+        values = [self.instructor3, self.instructor4, self.trainee2]
         self.assertQuerysetEqual(rv, values, transform=lambda x: x)
 
     def test_eligible_trainees(self):
@@ -419,10 +464,8 @@ class TestFilterTraineesByInstructorStatus(TestBase):
                 username="trainee2_trainee2",
                 is_swc_instructor=0,
                 is_dc_instructor=0,
-                # no idea why this is counting this way, but
-                # bool(5) == True so we're cool?
-                is_lc_instructor=5,
-                is_instructor=5,
+                is_lc_instructor=1,
+                is_instructor=1,
                 passed_training=1,
                 passed_discussion=1,
                 passed_swc_homework=0,
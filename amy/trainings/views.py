@@ -1,5 +1,5 @@
 from django.contrib import messages
-from django.db.models import Case, Count, F, IntegerField, Prefetch, Sum, When
+from django.db.models import Case, Count, F, IntegerField, Prefetch, When
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 
@@ -25,7 +25,13 @@ from workshops.models import (
     TrainingProgress,
     TrainingRequirement,
 )
-from workshops.util import OnlyForAdminsMixin, admin_required, get_pagination_items
+from workshops.util import (
+    OnlyForAdminsMixin,
+    admin_required,
+    bulk_add_training_progress,
+    bulk_discard_training_progress,
+    get_pagination_items,
+)
 
 
 class AllTrainings(OnlyForAdminsMixin, AMYListView):
@@ -93,13 +99,6 @@ class TrainingProgressDelete(RedirectSupportMixin, OnlyForAdminsMixin, AMYDelete
 
 
 def all_trainees_queryset():
-    def has_badge(badge):
-        return Sum(
-            Case(
-                When(badges__name=badge, then=1), default=0, output_field=IntegerField()
-            )
-        )
-
     return (
         Person.objects.annotate_with_instructor_eligibility()
         .prefetch_related(
@@ -116,18 +115,6 @@ def all_trainees_queryset():
             "trainingprogress_set__requirement",
             "trainingprogress_set__evaluated_by",
         )
-        .annotate(
-            is_swc_instructor=has_badge("swc-instructor"),
-            is_dc_instructor=has_badge("dc-instructor"),
-            is_lc_instructor=has_badge("lc-instructor"),
-            is_instructor=Sum(
-                Case(
-                    When(badges__name__in=Badge.INSTRUCTOR_BADGES, then=1),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
         .order_by("family", "personal")
     )
 
@@ -138,15 +125,15 @@ def all_trainees(request):
         request.GET,
         queryset=all_trainees_queryset(),
     )
-    trainees = get_pagination_items(request, filter.qs)
+    trainees = get_pagination_items(request, filter.qs, keyset=True)
 
     if request.method == "POST" and "discard" in request.POST:
         # Bulk discard progress of selected trainees
         form = BulkAddTrainingProgressForm()
         discard_form = BulkDiscardProgressesForm(request.POST)
         if discard_form.is_valid():
-            for trainee in discard_form.cleaned_data["trainees"]:
-                TrainingProgress.objects.filter(trainee=trainee).update(discarded=True)
+            trainees = discard_form.cleaned_data["trainees"]
+            bulk_discard_training_progress(trainees)
             messages.success(
                 request, "Successfully discarded progress of " "all selected trainees."
             )
@@ -161,17 +148,16 @@ def all_trainees(request):
         form = BulkAddTrainingProgressForm(request.POST, instance=instance)
         discard_form = BulkDiscardProgressesForm()
         if form.is_valid():
-            for trainee in form.cleaned_data["trainees"]:
-                TrainingProgress.objects.create(
-                    trainee=trainee,
-                    evaluated_by=request.user,
-                    requirement=form.cleaned_data["requirement"],
-                    state=form.cleaned_data["state"],
-                    discarded=False,
-                    event=form.cleaned_data["event"],
-                    url=form.cleaned_data["url"],
-                    notes=form.cleaned_data["notes"],
-                )
+            bulk_add_training_progress(
+                form.cleaned_data["trainees"],
+                evaluated_by=request.user,
+                requirement=form.cleaned_data["requirement"],
+                state=form.cleaned_data["state"],
+                discarded=False,
+                event=form.cleaned_data["event"],
+                url=form.cleaned_data["url"],
+                notes=form.cleaned_data["notes"],
+            )
             messages.success(
                 request, "Successfully changed progress of " "all selected trainees."
             )
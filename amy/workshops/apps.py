@@ -9,22 +9,42 @@ def trainingrequest_m2m_changed(sender, **kwargs):
     `TrainingRequest.previous_involvement` change and recalculate request's
     automatic score, which depends on these M2M fields.
 
-    Originally calculation takes place in model's `save` method, but
-    it was being called before M2M fields changed."""
+    Scores are recalculated in the database with a single `UPDATE`, so changes
+    made from the other side of the relation (e.g. from
+    `KnowledgeDomain.trainingrequest_set`) are handled, too."""
+    from workshops.models import TrainingRequest
 
-    # react only on "post_add"/"post_remove", forward (not reverse) action
     action = kwargs.get("action", "")
-    forward = not kwargs.get("reverse", True)
+    reverse = kwargs.get("reverse", False)
     instance = kwargs.get("instance", None)
+    pk_set = kwargs.get("pk_set", None)
     using = kwargs.get("using")
 
-    # There's a catch - we can alter the relation from a different side, ie.
-    # from KnowledgeDomain.trainingrequest_set, but it's harder to recalculate
-    # because we'd have to make N recalculations. Therefore we only allow
-    # `forward` direction.
-    if instance and forward and action in ["post_add", "post_remove"]:
-        # recalculation happens in `save()` method
-        instance.save(using=using)
+    if instance is None:
+        return
+
+    if reverse and action == "pre_clear":
+        # related requests can't be found after the relation is cleared
+        instance._score_auto_request_ids = list(
+            sender.objects.filter(**{instance._meta.model_name: instance}).values_list(
+                "trainingrequest_id", flat=True
+            )
+        )
+        return
+
+    if action not in ["post_add", "post_remove", "post_clear"]:
+        return
+
+    if not reverse:
+        request_ids = [instance.pk]
+    elif action == "post_clear":
+        request_ids = getattr(instance, "_score_auto_request_ids", [])
+    else:
+        request_ids = pk_set or []
+
+    TrainingRequest.objects.using(using).filter(pk__in=request_ids).update_score_auto()
+    if not reverse:
+        instance.refresh_from_db(using=using, fields=["score_auto"])
 
 
 class WorkshopsConfig(AppConfig):
@@ -23,7 +23,13 @@ from django.views.generic import (
 from django.views.generic.detail import SingleObjectMixin
 
 from workshops.forms import BootstrapHelper
-from workshops.util import Paginator, assign, failed_to_delete, get_pagination_items
+from workshops.util import (
+    PAGINATOR_COUNT_CACHED_MODELS,
+    Paginator,
+    assign,
+    failed_to_delete,
+    get_pagination_items,
+)
 
 
 class FormInvalidMessageMixin:
@@ -176,6 +182,15 @@ class AMYListView(ListView):
     filter_class = None
     queryset = None
     title = None
+    # use `KeysetPaginator` (if queryset's ordering allows it)
+    keyset_pagination = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # counts of listed objects are cached until the model changes
+        model = cls.model if cls.queryset is None else cls.queryset.model
+        if model is not None:
+            PAGINATOR_COUNT_CACHED_MODELS.add(model)
 
     def get_filter_data(self):
         """Datasource for the filter."""
@@ -192,7 +207,9 @@ class AMYListView(ListView):
                 self.get_filter_data(), super().get_queryset(), request=self.request
             )
             self.qs = self.filter.qs
-        paginated = get_pagination_items(self.request, self.qs)
+        paginated = get_pagination_items(
+            self.request, self.qs, keyset=self.keyset_pagination, count_cache=True
+        )
         return paginated
 
     def get_context_data(self, **kwargs):
@@ -0,0 +1,136 @@
+import logging
+
+from django.core.cache import caches
+import requests
+
+logger = logging.getLogger("amy.server_logs")
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# number of repositories resolved in a single GraphQL query
+HEADS_CHUNK_SIZE = 50
+
+# resolved heads are cached for 10 minutes
+HEADS_CACHE_TTL = 10 * 60
+
+
+class GithubHeadsError(Exception):
+    """Raised when GitHub GraphQL API returns an invalid response."""
+
+    def __init__(self, msg: str):
+        self.msg = msg
+        super().__init__()
+
+
+class GithubHeadsResolver:
+    """Resolve heads of the same branch in many GitHub repositories.
+
+    Repositories are queried in chunks, each chunk being a single GraphQL query
+    with one aliased `repository` field per repository.  Resolved commit hashes
+    are cached per repository, so that repositories shared by multiple events are
+    only resolved once."""
+
+    QUERY_FIELD = (
+        "r{i}: repository(owner: $owner{i}, name: $name{i}) "
+        "{{ ref(qualifiedName: $branch) {{ target {{ oid }} }} }}"
+    )
+
+    def __init__(
+        self,
+        token,
+        branch="gh-pages",
+        url=GITHUB_GRAPHQL_URL,
+        chunk_size=HEADS_CHUNK_SIZE,
+        ttl=HEADS_CACHE_TTL,
+        cache=None,
+        session=None,
+        timeout=10,
+    ):
+        self.token = token
+        self.branch = branch
+        self.url = url
+        self.chunk_size = chunk_size
+        self.ttl = ttl
+        self.cache = cache if cache is not None else caches["default"]
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def cache_key(self, repository):
+        owner, name = repository
+        # GitHub owners and repository names are case-insensitive
+        return "github-head:{}/{}:{}".format(owner, name, self.branch).lower()
+
+    def build_query(self, repositories):
+        """Build aliased GraphQL query and its variables for given repositories."""
+        definitions = ["$branch: String!"]
+        fields = []
+        variables = {"branch": "refs/heads/{}".format(self.branch)}
+
+        for i, (owner, name) in enumerate(repositories):
+            definitions.append("$owner{i}: String!, $name{i}: String!".format(i=i))
+            fields.append(self.QUERY_FIELD.format(i=i))
+            variables["owner{}".format(i)] = owner
+            variables["name{}".format(i)] = name
+
+        query = "query({}) {{ {} }}".format(", ".join(definitions), " ".join(fields))
+        return query, variables
+
+    def fetch(self, repositories):
+        """Fetch heads of given repositories from GitHub in a single query.
+
+        Repositories (or branches) that don't exist are missing from the result."""
+        query, variables = self.build_query(repositories)
+        response = self.session.post(
+            self.url,
+            json={"query": query, "variables": variables},
+            headers={"Authorization": "bearer {}".format(self.token)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        # partial errors (e.g. NOT_FOUND repository) come along with data
+        data = response.json().get("data")
+        if data is None:
+            raise GithubHeadsError("No data in GitHub GraphQL API response.")
+
+        heads = {}
+        for i, repository in enumerate(repositories):
+            try:
+                heads[repository] = data["r{}".format(i)]["ref"]["target"]["oid"]
+            except (KeyError, TypeError):
+                # TypeError: repository or ref is `null`
+                continue
+        return heads
+
+    def resolve(self, repositories):
+        """Return dict of `(owner, name)` -> head commit SHA for given
+        repositories.
+
+        Repositories from chunks which couldn't be resolved (e.g. because of
+        a network error) are missing from the result, like non-existing ones."""
+        repositories = list(dict.fromkeys(repositories))  # remove duplicates
+        keys = {repository: self.cache_key(repository) for repository in repositories}
+
+        cached = self.cache.get_many(keys.values())
+        heads = {
+            repository: cached[key] for repository, key in keys.items() if key in cached
+        }
+        missing = [repository for repository in repositories if repository not in heads]
+
+        for start in range(0, len(missing), self.chunk_size):
+            end = start + self.chunk_size
+            chunk = missing[start:end]
+            try:
+                fetched = self.fetch(chunk)
+            except (GithubHeadsError, requests.exceptions.RequestException) as e:
+                logger.warning(
+                    "Failed to resolve heads of %d repositories: %s", len(chunk), e
+                )
+                continue
+            self.cache.set_many(
+                {keys[repository]: sha for repository, sha in fetched.items()},
+                timeout=self.ttl,
+            )
+            heads.update(fetched)
+
+        return heads
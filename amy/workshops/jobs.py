@@ -0,0 +1,58 @@
+from workshops.models import (
+    Award,
+    Event,
+    EventIssues,
+    InstructorEligibility,
+    PersonActivity,
+    PersonIssues,
+    Task,
+    TrainingProgress,
+)
+
+
+def refresh_person_summaries(person_ids):
+    person_ids = set(person_ids)
+    PersonActivity.objects.refresh(person_ids)
+    PersonIssues.objects.refresh(person_ids)
+
+
+def refresh_event_summaries(event_ids):
+    """Refresh issues of events, and summaries of persons with tasks at them."""
+    event_ids = set(event_ids)
+    EventIssues.objects.refresh(event_ids)
+    refresh_person_summaries(
+        Task.objects.filter(event__in=event_ids).values_list("person_id", flat=True)
+    )
+
+
+# Roles, tags, badges and training requirements are matched by name, so renaming
+# one affects summaries of all related events and persons.  These Redis Queue
+# jobs refresh them outside of the request.
+
+
+def refresh_role_summaries_job(role_id: int) -> None:
+    refresh_event_summaries(
+        Task.objects.filter(role_id=role_id).values_list("event_id", flat=True)
+    )
+
+
+def refresh_tag_summaries_job(tag_id: int) -> None:
+    refresh_event_summaries(
+        Event.objects.filter(tags=tag_id).values_list("pk", flat=True)
+    )
+
+
+def refresh_badge_summaries_job(badge_id: int) -> None:
+    person_ids = set(
+        Award.objects.filter(badge_id=badge_id).values_list("person_id", flat=True)
+    )
+    InstructorEligibility.objects.refresh(person_ids)
+    refresh_person_summaries(person_ids)
+
+
+def refresh_requirement_summaries_job(requirement_id: int) -> None:
+    InstructorEligibility.objects.refresh(
+        TrainingProgress.objects.filter(requirement_id=requirement_id).values_list(
+            "trainee_id", flat=True
+        )
+    )
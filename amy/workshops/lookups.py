@@ -1,13 +1,17 @@
 from datetime import datetime
 from functools import partial, reduce
+import hashlib
 import logging
 import operator
 import re
 
+from django.conf import settings
 from django.conf.urls import url
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.db import connection
 from django.db.models import Count, Q
 from django.db.models.query import QuerySet
 from django.http import JsonResponse
@@ -20,20 +24,132 @@ from workshops.util import LoginNotRequiredMixin, OnlyForAdminsNoRedirectMixin
 
 logger = logging.getLogger("amy.server_logs")
 
+# Models whose changes invalidate cached lookup results; populated by lookup views
+# and used by `invalidate_lookup_cache` receiver.
+LOOKUP_CACHED_MODELS = set()
+
+
+def lookup_cache():
+    return caches[settings.SELECT2_CACHE_BACKEND]
+
+
+def lookup_cache_version_key(model):
+    return "lookup-version:{}:{}".format(
+        connection.settings_dict["NAME"], model._meta.label_lower
+    )
+
+
+def lookup_cache_versions(models):
+    """Current cache versions of given models; version changes whenever an object
+    of the model is saved or deleted."""
+    keys = [lookup_cache_version_key(model) for model in models]
+    versions = lookup_cache().get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump_lookup_cache_version(model):
+    cache = lookup_cache()
+    key = lookup_cache_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # key doesn't exist yet
+        cache.set(key, 1, timeout=None)
+
 
 class ExtensibleAutoResponseView(AutoResponseView):
+    """Lookup view shared by Select2 widgets.
+
+    Objects are searched in `search_fields` with `icontains` (supported by
+    trigram indexes for terms of at least 3 characters).  Views with more complex
+    searches override `get_search_q`.
+
+    Only one page of results (plus one object, to tell if there are more) is
+    fetched, without counting all matching objects.
+
+    Responses are cached in Select2 cache for `LOOKUP_CACHE_TIMEOUT` seconds.
+    Cache keys include versions of `cache_models`, so that saving or deleting any
+    of these models makes cached results stale immediately."""
+
+    search_fields = ()
+    cache_models = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        LOOKUP_CACHED_MODELS.update(cls.cache_models)
+
     def get(self, request, *args, **kwargs):
         self.widget = self.get_widget_or_404()
         self.term = kwargs.get("term", request.GET.get("term", ""))
-        self.object_list = self.get_queryset()
-        context = self.get_context_data()
-        return JsonResponse(
-            {
-                "results": self.parse_results(context["object_list"]),
-                "more": context["page_obj"].has_next(),
-            }
+
+        cache_key = self.get_cache_key()
+        data = lookup_cache().get(cache_key) if cache_key else None
+        if data is None:
+            data = self.get_results()
+            if cache_key:
+                lookup_cache().set(
+                    cache_key, data, timeout=settings.LOOKUP_CACHE_TIMEOUT
+                )
+        return JsonResponse(data)
+
+    def fields_q(self, fields, term):
+        """Condition for objects matching `term` in any of the `fields`."""
+        return reduce(
+            operator.or_, [Q(**{f"{field}__icontains": term}) for field in fields]
         )
 
+    def get_search_q(self, term):
+        return self.fields_q(self.search_fields, term)
+
+    def search(self, queryset):
+        """Filter queryset by the search term (if provided)."""
+        if self.term:
+            return queryset.filter(self.get_search_q(self.term))
+        return queryset
+
+    def get_page_number(self):
+        page = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg)
+        try:
+            page = int(page or 1)
+        except ValueError:
+            raise Http404("Page is not a number.")
+        if page < 1:
+            raise Http404("Invalid page.")
+        return page
+
+    def get_results(self):
+        """Return single page of results in Select2 format."""
+        limit = self.get_paginate_by(None)
+        start = (self.get_page_number() - 1) * limit
+        end = start + limit + 1
+        object_list = list(self.get_queryset()[start:end])
+        return {
+            "results": self.parse_results(object_list[:limit]),
+            "more": len(object_list) > limit,
+        }
+
+    def get_cache_key(self):
+        """Key of cached results, or `None` if results shouldn't be cached."""
+        if not self.cache_models or not settings.LOOKUP_CACHE_TIMEOUT:
+            return None
+
+        # all GET parameters except for widget ID (it's different for each
+        # rendered form) can affect results
+        params = sorted(
+            (key, value)
+            for key, value in self.request.GET.items()
+            if key not in ("field_id", "term")
+        )
+        parts = [
+            type(self).__name__,
+            type(self.widget).__name__,
+            self.term.lower(),
+            params,
+            lookup_cache_versions(self.cache_models),
+        ]
+        digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+        return "lookup:{}:{}".format(connection.settings_dict["NAME"], digest)
+
     def parse_results(self, object_list):
         return [
             {"text": self.widget.label_from_instance(obj), "id": obj.pk}
@@ -41,62 +157,52 @@ class ExtensibleAutoResponseView(AutoResponseView):
         ]
 
 
-class TagLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
-    def get_queryset(self):
-        q = models.Tag.objects.all()
-        if self.term:
-            return q.filter(name__icontains=self.term)
-        return q
-
+class TagLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("name",)
+    cache_models = (models.Tag,)
 
-class BadgeLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
     def get_queryset(self):
-        q = models.Badge.objects.all()
-        if self.term:
-            return q.filter(
-                Q(name__icontains=self.term) | Q(title__icontains=self.term)
-            )
-        return q
+        return self.search(models.Tag.objects.all())
 
 
-class LessonLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
+class BadgeLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("name", "title")
+    cache_models = (models.Badge,)
+
     def get_queryset(self):
-        q = models.Lesson.objects.all()
-        if self.term:
-            return q.filter(name__icontains=self.term)
-        return q
+        return self.search(models.Badge.objects.all())
 
 
-class EventLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
-    def get_queryset(self):
-        results = models.Event.objects.all()
+class LessonLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("name",)
+    cache_models = (models.Lesson,)
 
-        if self.term:
-            results = results.filter(slug__icontains=self.term)
+    def get_queryset(self):
+        return self.search(models.Lesson.objects.all())
 
-        return results
 
+class EventLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("slug",)
+    cache_models = (models.Event,)
 
-class TTTEventLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
     def get_queryset(self):
-        results = models.Event.objects.filter(tags__name="TTT")
+        return self.search(models.Event.objects.all())
 
-        if self.term:
-            results = results.filter(slug__icontains=self.term)
-
-        return results
 
+class TTTEventLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("slug",)
+    cache_models = (models.Event, models.Event.tags.through)
 
-class OrganizationLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
     def get_queryset(self):
-        results = models.Organization.objects.order_by("fullname")
+        return self.search(models.Event.objects.filter(tags__name="TTT"))
 
-        if self.term:
-            results = results.filter(
-                Q(domain__icontains=self.term) | Q(fullname__icontains=self.term)
-            )
 
-        return results
+class OrganizationLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("domain", "fullname")
+    cache_models = (models.Organization,)
+
+    def get_queryset(self):
+        return self.search(models.Organization.objects.order_by("fullname"))
 
     def parse_results(self, object_list):
         return [
@@ -110,153 +216,127 @@ class OrganizationLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoRespons
 
 
 class AdministratorOrganizationLookupView(
-    OnlyForAdminsNoRedirectMixin, AutoResponseView
+    OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView
 ):
-    def get_queryset(self):
-        results = models.Organization.objects.administrators()
+    search_fields = ("domain", "fullname")
+    cache_models = (models.Organization,)
 
-        if self.term:
-            results = results.filter(
-                Q(domain__icontains=self.term) | Q(fullname__icontains=self.term)
-            )
+    def get_queryset(self):
+        return self.search(models.Organization.objects.administrators())
 
-        return results
 
+class MembershipLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("name", "variant")
+    cache_models = (models.Membership, models.Member, models.Organization)
 
-class MembershipLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
-    def get_queryset(self):
-        results = models.Membership.objects.all()
+    def get_search_q(self, term):
+        # filter by membership name or variant
+        q = super().get_search_q(term)
 
-        if self.term:
-            # parse query into date
-            try:
-                date = datetime.strptime(self.term, "%Y-%m-%d").date()
-            except ValueError:
-                date = None
-
-            # filter by membership name
-            name = Q(name__icontains=self.term)
-
-            # filter by organization name
-            org_q = Q(organizations__domain__icontains=self.term) | Q(
-                organizations__fullname__icontains=self.term
+        # filter by organization name; subquery instead of a join, so that
+        # results don't need to be made distinct
+        organizations = models.Organization.objects.filter(
+            self.fields_q(["domain", "fullname"], term)
+        )
+        q |= Q(
+            pk__in=models.Member.objects.filter(organization__in=organizations).values(
+                "membership"
             )
+        )
 
-            # filter by variant
-            variant_q = Q(variant__icontains=self.term)
+        # parse query into date
+        try:
+            date = datetime.strptime(term, "%Y-%m-%d").date()
+        except ValueError:
+            date = None
 
-            if date:
-                # filter by agreement date range
-                agreement_q = Q(agreement_start__lte=date, agreement_end__gte=date)
+        if date:
+            # filter by agreement date range
+            q |= Q(agreement_start__lte=date, agreement_end__gte=date)
 
-                results = results.filter(
-                    name | org_q | variant_q | agreement_q
-                ).distinct()
-            else:
-                results = results.filter(name | org_q | variant_q).distinct()
+        return q
+
+    def get_queryset(self):
+        return self.search(models.Membership.objects.all())
 
-        return results
 
+class MemberRoleLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("name", "verbose_name")
+    cache_models = (models.MemberRole,)
 
-class MemberRoleLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
     def get_queryset(self):
-        q = models.MemberRole.objects.all()
-        if self.term:
-            return q.filter(
-                Q(name__icontains=self.term) | Q(verbose_name__icontains=self.term)
-            )
-        return q
+        return self.search(models.MemberRole.objects.all())
+
 
+class MembershipPersonRoleLookupView(
+    OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView
+):
+    search_fields = ("name", "verbose_name")
+    cache_models = (MembershipPersonRole,)
 
-class MembershipPersonRoleLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
     def get_queryset(self):
-        q = MembershipPersonRole.objects.all()
-        if self.term:
-            return q.filter(
-                Q(name__icontains=self.term) | Q(verbose_name__icontains=self.term)
-            )
-        return q
+        return self.search(MembershipPersonRole.objects.all())
 
 
-class PersonLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
-    def get_queryset(self):
-        results = models.Person.objects.all()
+class PersonLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("personal", "family", "email", "secondary_email", "username")
+    cache_models = (models.Person,)
 
-        if self.term:
-            filters = [
-                Q(personal__icontains=self.term),
-                Q(family__icontains=self.term),
-                Q(email__icontains=self.term),
-                Q(secondary_email__icontains=self.term),
-                Q(username__icontains=self.term),
-            ]
-
-            # split query into first and last names
-            tokens = re.split(r"\s+", self.term)
-            if len(tokens) == 2:
-                name1, name2 = tokens
-                complex_q = (
-                    Q(personal__icontains=name1) & Q(family__icontains=name2)
-                ) | (Q(personal__icontains=name2) & Q(family__icontains=name1))
-                filters.append(complex_q)
-
-            # this is brilliant: it applies OR to all search filters
-            results = results.filter(reduce(operator.or_, filters))
+    def get_search_q(self, term):
+        q = super().get_search_q(term)
 
-        return results
+        # split query into first and last names
+        tokens = re.split(r"\s+", term)
+        if len(tokens) == 2:
+            name1, name2 = tokens
+            q |= (
+                self.fields_q(["personal"], name1) & self.fields_q(["family"], name2)
+            ) | (self.fields_q(["personal"], name2) & self.fields_q(["family"], name1))
+
+        return q
+
+    def get_queryset(self):
+        return self.search(models.Person.objects.all())
 
 
-class AdminLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
+class AdminLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
     """The same as PersonLookup, but allows only to select administrators.
 
     Administrator is anyone with superuser power or in "administrators" group.
     """
 
+    search_fields = ("personal", "family", "email", "secondary_email", "username")
+    cache_models = (models.Person, models.Person.groups.through)
+
     def get_queryset(self):
         admin_group = Group.objects.get(name="administrators")
         results = models.Person.objects.filter(
             Q(is_superuser=True) | Q(groups__in=[admin_group])
         )
+        return self.search(results)
 
-        if self.term:
-            results = results.filter(
-                Q(personal__icontains=self.term)
-                | Q(family__icontains=self.term)
-                | Q(email__icontains=self.term)
-                | Q(secondary_email__icontains=self.term)
-                | Q(username__icontains=self.term)
-            )
 
-        return results
+class AirportLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    search_fields = ("iata", "fullname")
+    cache_models = (models.Airport,)
 
-
-class AirportLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
     def get_queryset(self):
-        results = models.Airport.objects.all()
+        return self.search(models.Airport.objects.all())
 
-        if self.term:
-            results = results.filter(
-                Q(iata__icontains=self.term) | Q(fullname__icontains=self.term)
-            )
 
-        return results
+class LanguageLookupView(LoginNotRequiredMixin, ExtensibleAutoResponseView):
+    search_fields = ("name", "subtag")
+    cache_models = (models.Language, models.Person.languages.through)
 
-
-class LanguageLookupView(LoginNotRequiredMixin, AutoResponseView):
     def dispatch(self, request, *args, **kwargs):
         self.subtag = "subtag" in request.GET.keys()
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        results = models.Language.objects.all()
-
-        if self.term:
-            results = results.filter(
-                Q(name__icontains=self.term) | Q(subtag__icontains=self.term)
-            )
+        results = self.search(models.Language.objects.all())
 
-            if self.subtag:
-                return results.filter(subtag__iexact=self.term)
+        if self.term and self.subtag:
+            return results.filter(subtag__iexact=self.term)
 
         results = results.annotate(person_count=Count("person")).order_by(
             "-person_count"
@@ -265,21 +345,21 @@ class LanguageLookupView(LoginNotRequiredMixin, AutoResponseView):
         return results
 
 
-class KnowledgeDomainLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
+class KnowledgeDomainLookupView(
+    OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView
+):
+    search_fields = ("name", "subtag")
+    cache_models = (models.KnowledgeDomain, models.Person.domains.through)
+
     def dispatch(self, request, *args, **kwargs):
         self.subtag = "subtag" in request.GET.keys()
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        results = models.KnowledgeDomain.objects.all()
+        results = self.search(models.KnowledgeDomain.objects.all())
 
-        if self.term:
-            results = results.filter(
-                Q(name__icontains=self.term) | Q(subtag__icontains=self.term)
-            )
-
-            if self.subtag:
-                return results.filter(subtag__iexact=self.term)
+        if self.term and self.subtag:
+            return results.filter(subtag__iexact=self.term)
 
         results = results.annotate(person_count=Count("person")).order_by(
             "-person_count"
@@ -288,54 +368,48 @@ class KnowledgeDomainLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
         return results
 
 
-class TrainingRequestLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
-    """The same as PersonLookup, but allows only to select administrators.
+class TrainingRequestLookupView(
+    OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView
+):
+    search_fields = ("personal", "family", "email", "secondary_email")
+    cache_models = (models.TrainingRequest,)
+
+    def get_search_q(self, term):
+        q = super().get_search_q(term)
+
+        # search for name if two words provided
+        tok = re.split(r"\s+", term)
+        if len(tok) == 2:
+            q |= (
+                self.fields_q(["personal"], tok[0]) & self.fields_q(["family"], tok[1])
+            ) | (
+                self.fields_q(["personal"], tok[1]) & self.fields_q(["family"], tok[0])
+            )
 
-    Administrator is anyone with superuser power or in "administrators" group.
-    """
+        return q
 
     def get_queryset(self):
-        results = models.TrainingRequest.objects.all()
+        return self.search(models.TrainingRequest.objects.all())
 
-        if self.term:
-            # search for name if two words provided
-            tok = re.split(r"\s+", self.term)
-            if len(tok) == 2:
-                name_q = Q(personal__icontains=tok[0], family__icontains=tok[1]) | Q(
-                    personal__icontains=tok[1], family__icontains=tok[0]
-                )
-            else:
-                # empty Q
-                name_q = Q(id=0)
-
-            results = results.filter(
-                Q(personal__icontains=self.term)
-                | Q(family__icontains=self.term)
-                | Q(email__icontains=self.term)
-                | Q(secondary_email__icontains=self.term)
-                | name_q
-            )
 
-        return results
+class AwardLookupView(OnlyForAdminsNoRedirectMixin, ExtensibleAutoResponseView):
+    cache_models = (models.Award, models.Person, models.Badge)
 
+    def get_search_q(self, term):
+        # subqueries instead of joins, so that indexes of each table are used
+        persons = models.Person.objects.filter(
+            self.fields_q(["personal", "middle", "family", "email"], term)
+        )
+        badges = models.Badge.objects.filter(self.fields_q(["name"], term))
+        return Q(person__in=persons) | Q(badge__in=badges)
 
-class AwardLookupView(OnlyForAdminsNoRedirectMixin, AutoResponseView):
     def get_queryset(self):
         results = models.Award.objects.all()
 
         if badge := self.request.GET.get("badge"):
             results = results.filter(badge__pk=badge)
 
-        if self.term:
-            results = results.filter(
-                Q(person__personal__icontains=self.term)
-                | Q(person__middle__icontains=self.term)
-                | Q(person__family__icontains=self.term)
-                | Q(person__email__icontains=self.term)
-                | Q(badge__name__icontains=self.term)
-            )
-
-        return results
+        return self.search(results)
 
 
 class GenericObjectLookupView(
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from workshops.models import Person
+
+
+class RefreshSummariesCommand(BaseCommand):
+    """Base of commands recomputing precomputed summaries (models with
+    `SummaryQuerySet` managers)."""
+
+    # summary models refreshed by the command, in this order
+    summary_models = ()
+
+    def get_ids(self, options):
+        """IDs of summarized objects to refresh; `None` refreshes all."""
+        return None
+
+    def handle(self, *args, **options):
+        """Main entry point."""
+
+        ids = self.get_ids(options)
+        for model in self.summary_models:
+            model.objects.refresh(ids)
+            self.stdout.write(
+                "{} {} summaries up to date.".format(
+                    model.objects.count(), model.__name__
+                )
+            )
+
+
+class RefreshPersonSummariesCommand(RefreshSummariesCommand):
+    """Base of commands recomputing per-person summaries of given Persons (or
+    all Persons)."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "username", nargs="*", type=str, help="Username in AMY database"
+        )
+
+    def get_ids(self, options):
+        usernames = options["username"]
+        if usernames:
+            return Person.objects.filter(username__in=usernames).values_list(
+                "pk", flat=True
+            )
+        return None
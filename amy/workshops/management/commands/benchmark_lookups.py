@@ -0,0 +1,174 @@
+from random import Random, choice
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django_countries import countries as Countries
+from faker import Faker
+
+from workshops import lookups
+from workshops.fields import ModelSelect2Widget
+from workshops.models import Award, Membership, Organization, Person, TrainingRequest
+from workshops.util import normalize_name
+
+BENCHMARKED_LOOKUPS = {
+    "person-lookup": (lookups.PersonLookupView, Person),
+    "trainingrequest-lookup": (lookups.TrainingRequestLookupView, TrainingRequest),
+    "award-lookup": (lookups.AwardLookupView, Award),
+    "organization-lookup": (lookups.OrganizationLookupView, Organization),
+    "membership-lookup": (lookups.MembershipLookupView, Membership),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure response times of Select2 lookup views, with and without "
+        "results cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fake-database",
+            action="store_true",
+            default=False,
+            help="Populate the database with `fake_database` command first.",
+        )
+        parser.add_argument(
+            "--seed",
+            action="store",
+            default=None,
+            help="Seed for generating fake data.",
+        )
+        parser.add_argument(
+            "--persons",
+            type=int,
+            default=0,
+            help="Number of additional fake persons to generate.",
+        )
+        parser.add_argument(
+            "--terms",
+            nargs="+",
+            default=None,
+            help="Searched terms. Defaults to prefixes of existing family names.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="How many times each lookup is repeated.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=50,
+            help="Response time (in ms) above which lookup is reported as slow.",
+        )
+
+    def fake_persons(self, count, seed=None):
+        """Quickly add many persons with random names."""
+        faker = Faker()
+        if seed is not None:
+            faker.seed_instance(seed)
+
+        self.stdout.write("Generating {} fake persons...".format(count))
+        start = Person.objects.count()
+        persons = []
+        for i in range(start, start + count):
+            personal = faker.first_name()
+            family = faker.last_name()
+            username = "{}_{}_{}".format(
+                normalize_name(family), normalize_name(personal), i
+            )
+            persons.append(
+                Person(
+                    personal=personal,
+                    family=family,
+                    email="{}@{}".format(username, faker.free_email_domain()),
+                    username=username,
+                    github=None,
+                    country=choice(Countries)[0],
+                )
+            )
+
+        with transaction.atomic():
+            Person.objects.bulk_create(persons, batch_size=1000)
+
+    def default_terms(self, seed=None):
+        """Prefixes (1-4 characters long) of up to 10 random family names."""
+        families = list(
+            Person.objects.exclude(family="")
+            .values_list("family", flat=True)
+            .distinct()[:1000]
+        )
+        terms = []
+        for family in Random(seed).sample(families, min(10, len(families))):
+            terms.extend(family[:length] for length in range(1, 5))
+        return sorted(set(terms))
+
+    def setUpView(self, view_class, model, url_name, term):
+        request = RequestFactory().get("/", {"term": term})
+        view = view_class(request=request, args=(), kwargs={})
+        widget = ModelSelect2Widget(model=model, data_view=url_name)
+        view.get_widget_or_404 = lambda: widget
+        return view
+
+    def measure(self, func, repeat):
+        """Return response times (in ms) of `repeat` calls of `func`."""
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append((time.perf_counter() - start) * 1000)
+        return times
+
+    def benchmark(self, url_name, terms, repeat):
+        view_class, model = BENCHMARKED_LOOKUPS[url_name]
+        cold, cached = [], []
+
+        for term in terms:
+            view = self.setUpView(view_class, model, url_name, term)
+            view.widget = view.get_widget_or_404()
+            view.term = term
+            cold += self.measure(view.get_results, repeat)
+
+            view.get(view.request)  # populate cache
+            cached += self.measure(lambda: view.get(view.request), repeat)
+
+        return cold, cached
+
+    def handle(self, *args, **options):
+        if options["fake_database"]:
+            call_command("fake_database", seed=options["seed"])
+        if options["persons"]:
+            self.fake_persons(options["persons"], seed=options["seed"])
+
+        terms = options["terms"] or self.default_terms(seed=options["seed"])
+        repeat = options["repeat"]
+        threshold = options["threshold"]
+
+        self.stdout.write(
+            "{} persons, {} terms, {} repeats".format(
+                Person.objects.count(), len(terms), repeat
+            )
+        )
+        self.stdout.write(
+            "{:<24} {:>12} {:>12} {:>12}".format(
+                "lookup", "median [ms]", "p95 [ms]", "cached [ms]"
+            )
+        )
+        for url_name in BENCHMARKED_LOOKUPS:
+            cold, cached = self.benchmark(url_name, terms, repeat)
+            median = statistics.median(cold)
+            p95 = statistics.quantiles(cold, n=20)[-1] if len(cold) > 1 else median
+            self.stdout.write(
+                "{:<24} {:>12.1f} {:>12.1f} {:>12.1f}{}".format(
+                    url_name,
+                    median,
+                    p95,
+                    statistics.median(cached),
+                    "  SLOW" if median > threshold else "",
+                )
+            )
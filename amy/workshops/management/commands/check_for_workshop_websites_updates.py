@@ -1,23 +1,37 @@
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import datetime
 from functools import partial
 import json
 import socket
 import sys
+import threading
 
 from django.core.management.base import BaseCommand
-from github import Github
-from github.GithubException import GithubException
+from django.db import transaction
 import requests
 from rest_framework.utils.encoders import JSONEncoder
 
+from workshops.github_heads import GithubHeadsResolver
+from workshops.metadata_cache import cache_workshop_metadata
 from workshops.models import Event
 from workshops.util import (
     WrongWorkshopURL,
-    fetch_workshop_metadata,
+    fetch_workshop_metadata_if_modified,
     parse_workshop_metadata,
 )
 
+# Event fields updated by this command; they're saved in bulk after all events
+# were checked.
+UPDATED_FIELDS = (
+    "repository_last_commit_hash",
+    "repository_metadata",
+    "metadata_all_changes",
+    "metadata_changed",
+    "metadata_etag",
+    "metadata_last_modified",
+)
+
 
 def datetime_match(string):
     """Convert string date/datetime/time to date/datetime/time."""
@@ -79,6 +93,12 @@ def datetime_decode(obj):
 class Command(BaseCommand):
     help = "Check if events have had their metadata updated."
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token = None
+        # HTTP session is kept per worker thread
+        self.local = threading.local()
+
     def add_arguments(self, parser):
         parser.add_argument(
             "-t",
@@ -103,6 +123,17 @@ class Command(BaseCommand):
             help="Age (in days) of the oldest events that can be checked.  "
             "Default: 180",
         )
+        parser.add_argument(
+            "--concurrency",
+            default=8,
+            type=int,
+            help="Number of events checked in parallel.  Default: 8",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Check events, but don't save any changes.",
+        )
 
     def get_events(self, cutoff_days=180):
         """Get all active events.
@@ -127,12 +158,65 @@ class Command(BaseCommand):
             return groups["name"], groups["repo"]
         raise WrongWorkshopURL("URL doesn't match Github repo format.")
 
-    def get_event_metadata(self, event_url):
-        """Get metadata from event (location, instructors, helpers, etc.)."""
-        metadata = fetch_workshop_metadata(event_url)
+    def get_heads_resolver(self):
+        """Get resolver of repositories' `gh-pages` heads."""
+        return GithubHeadsResolver(self.token, branch="gh-pages")
+
+    def resolve_heads(self, events):
+        """Resolve `gh-pages` heads of all events' repositories in batches.
+
+        Returns dict of event -> head commit SHA; events with wrong URL or
+        missing repository are reported and skipped."""
+        repositories = {}
+        for event in events:
+            try:
+                repositories[event] = self.parse_github_url(event.repository_url)
+            except WrongWorkshopURL:
+                print("Wrong URL for {}".format(event.slug), file=sys.stderr)
+
+        heads = self.get_heads_resolver().resolve(repositories.values())
+
+        events_heads = {}
+        for event, repository in repositories.items():
+            if repository in heads:
+                events_heads[event] = heads[repository]
+            else:
+                print(
+                    "GitHub error when accessing {} repo".format(event.slug),
+                    file=sys.stderr,
+                )
+        return events_heads
+
+    def get_session(self):
+        """Get HTTP session local to the current thread, so that connections to
+        the same host (e.g. `*.github.io`) are reused."""
+        if getattr(self.local, "session", None) is None:
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def get_event_metadata_if_modified(self, event):
+        """Get metadata from event only if event's website changed since last
+        check.  Returns `None` for unchanged websites.
+
+        Event's HTTP validators are updated, but not saved."""
+        result = fetch_workshop_metadata_if_modified(
+            event.url,
+            etag=event.metadata_etag,
+            last_modified=event.metadata_last_modified,
+            session=self.get_session(),
+        )
+        event.metadata_etag = result.etag
+        event.metadata_last_modified = result.last_modified
+
+        if result.metadata is None:
+            return None
+        # changes are likely to be reviewed soon; reviewing revalidates the
+        # metadata, which then costs only a "304 Not Modified" response
+        cache_workshop_metadata(
+            event.url, result.metadata, result.etag, result.last_modified
+        )
         # normalize the metadata
-        metadata = parse_workshop_metadata(metadata)
-        return metadata
+        return parse_workshop_metadata(result.metadata)
 
     def empty_metadata(self):
         """Prepare basic, empty metadata."""
@@ -148,81 +232,162 @@ class Command(BaseCommand):
         # convert strings to datetimes (if they match format)
         return datetime_decode(objs)
 
-    def load_from_github(self, github, repo_url, default_branch="gh-pages"):
-        """Fetch repository data from GitHub API."""
-        owner, repo_name = self.parse_github_url(repo_url)
-        repo = github.get_repo("{}/{}".format(owner, repo_name))
-        branch = repo.get_branch("gh-pages")
-        return branch
+    def detect_changes(self, commit_sha, event, save_metadata=False, commit=True):
+        """Detect changes made to event's metadata.
 
-    def detect_changes(self, branch, event, save_metadata=False):
-        """Detect changes made to event's metadata."""
+        With `commit=False` the event is updated, but not saved."""
         changes = []
 
         # compare commit hashes
-        if branch.commit.sha != event.repository_last_commit_hash:
+        if commit_sha != event.repository_last_commit_hash:
             # Hashes differ? Update commit hash and compare stored metadata
-            event.repository_last_commit_hash = branch.commit.sha
+            event.repository_last_commit_hash = commit_sha
 
-            metadata_new = self.get_event_metadata(event.url)
+            metadata_new = self.get_event_metadata_if_modified(event)
 
-            try:
-                metadata_old = self.deserialize(event.repository_metadata)
-            except json.decoder.JSONDecodeError:
-                # this means that the value in DB is pretty much useless
-                # so let's set it to the default value
-                metadata_old = self.empty_metadata()
-
-            metadata_to_check = (
-                ("instructors", "Instructors changed"),
-                ("helpers", "Helpers changed"),
-                ("start", "Start date changed"),
-                ("end", "End date changed"),
-                ("country", "Country changed"),
-                ("venue", "Venue changed"),
-                ("address", "Address changed"),
-                ("latitude", "Latitude changed"),
-                ("longitude", "Longitude changed"),
-                ("contact", "Contact details changed"),
-                ("reg_key", "Eventbrite key changed"),
-            )
-
-            changed = False
-            # look for changed metadata
-            for key, reason in metadata_to_check:
-                if metadata_new[key] != metadata_old[key]:
-                    changes.append(reason)
-                    changed = True
-
-            if changed:
-                if save_metadata:
-                    # we may not want to update the metadata
-                    event.repository_metadata = self.serialize(metadata_new)
-
-                event.metadata_all_changes = "\n".join(changes)
-                event.metadata_changed = True
+            if metadata_new is not None:
+                changes = self.compare_metadata(event, metadata_new, save_metadata)
 
-            event.save()
+            if commit:
+                event.save()
+
+        return changes
+
+    def compare_metadata(self, event, metadata_new, save_metadata=False):
+        """Compare new metadata with metadata stored in the event, and mark
+        the event as changed if needed."""
+        changes = []
+
+        try:
+            metadata_old = self.deserialize(event.repository_metadata)
+        except json.decoder.JSONDecodeError:
+            # this means that the value in DB is pretty much useless
+            # so let's set it to the default value
+            metadata_old = self.empty_metadata()
+
+        metadata_to_check = (
+            ("instructors", "Instructors changed"),
+            ("helpers", "Helpers changed"),
+            ("start", "Start date changed"),
+            ("end", "End date changed"),
+            ("country", "Country changed"),
+            ("venue", "Venue changed"),
+            ("address", "Address changed"),
+            ("latitude", "Latitude changed"),
+            ("longitude", "Longitude changed"),
+            ("contact", "Contact details changed"),
+            ("reg_key", "Eventbrite key changed"),
+        )
+
+        # look for changed metadata
+        for key, reason in metadata_to_check:
+            if metadata_new[key] != metadata_old[key]:
+                changes.append(reason)
+
+        if changes:
+            if save_metadata:
+                # we may not want to update the metadata
+                event.repository_metadata = self.serialize(metadata_new)
+
+            event.metadata_all_changes = "\n".join(changes)
+            event.metadata_changed = True
 
         return changes
 
-    def init(self, branch, event):
-        """Load initial data into event's repository and metadata information."""
-        event.repository_last_commit_hash = branch.commit.sha
-        metadata = self.get_event_metadata(event.url)
+    def init(self, commit_sha, event, commit=True):
+        """Load initial data into event's repository and metadata information.
+
+        With `commit=False` the event is updated, but not saved."""
+        event.repository_last_commit_hash = commit_sha
+        # validators are dropped, so that the website is downloaded in full
+        event.metadata_etag = ""
+        event.metadata_last_modified = ""
+        metadata = self.get_event_metadata_if_modified(event)
         event.repository_metadata = self.serialize(metadata)
         event.metadata_all_changes = ""
         event.metadata_changed = False
-        event.save()
+        if commit:
+            event.save()
+
+    def check_event(self, event, commit_sha, initial_run=False):
+        """Check single event; this runs in a worker thread, so it must not
+        touch the database.
+
+        Returns a list of detected changes."""
+        if initial_run:
+            self.init(commit_sha, event, commit=False)
+            return []
+
+        return self.detect_changes(commit_sha, event, commit=False)
+
+    def check_events(self, events, initial_run=False, concurrency=8):
+        """Check events in a pool of worker threads.  Only events with new
+        commits in their repositories are checked, unless it's an initial run.
+
+        Returns a tuple: dict of events with changes (by slug), and a list of
+        events that need saving."""
+        events_changes = dict()
+        events_to_save = []
+
+        heads = self.resolve_heads(events)
+
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = {
+                executor.submit(self.check_event, event, sha, initial_run): event
+                for event, sha in heads.items()
+                if initial_run or sha != event.repository_last_commit_hash
+            }
+
+            for future in as_completed(futures):
+                event = futures[future]
+                try:
+                    changes = future.result()
+
+                except socket.timeout:
+                    print(
+                        "Timeout when accessing {} repo".format(event.slug),
+                        file=sys.stderr,
+                    )
+
+                except WrongWorkshopURL:
+                    print("Wrong URL for {}".format(event.slug), file=sys.stderr)
+
+                except requests.exceptions.RequestException:
+                    print(
+                        "Network error when accessing {}".format(event.slug),
+                        file=sys.stderr,
+                    )
+
+                except Exception as e:
+                    print(
+                        "Unknown error ({}): {}".format(event.slug, e),
+                        file=sys.stderr,
+                    )
+
+                else:
+                    events_to_save.append(event)
+
+                    if initial_run:
+                        print("Initialized {}".format(event.slug))
+                    elif changes:
+                        events_changes[event.slug] = changes
+                        print("Detected changes in {}".format(event.slug))
+
+        return events_changes, events_to_save
+
+    def save_events(self, events):
+        """Save all updated events at once."""
+        with transaction.atomic():
+            Event.objects.bulk_update(events, UPDATED_FIELDS, batch_size=100)
 
     def handle(self, *args, **options):
         """Run."""
-        token = options["token"]
+        self.token = options["token"]
         initial_run = options["init"]
         slug = options["slug"]
         cutoff_days = options["cutoff_days"]
-
-        g = Github(token)
+        concurrency = options["concurrency"]
+        dry_run = options["dry_run"]
 
         # get all events
         events = self.get_events(cutoff_days)
@@ -230,43 +395,12 @@ class Command(BaseCommand):
         if slug:
             events = events.filter(slug=slug)
 
-        # dict of events with changes that will be updated in
-        # the separate loop
-        events_for_update = dict()
-
         # go through all events
-        for event in events:
-            try:
-                if initial_run:
-                    branch = self.load_from_github(g, event.repository_url)
-                    self.init(branch, event)
-                    print("Initialized {}".format(event.slug))
-                else:
-                    branch = self.load_from_github(g, event.repository_url)
-                    changes = self.detect_changes(branch, event)
-                    if changes:
-                        events_for_update[event.slug] = changes
-                        print("Detected changes in {}".format(event.slug))
-
-            except GithubException:
-                print(
-                    "GitHub error when accessing {} repo".format(event.slug),
-                    file=sys.stderr,
-                )
-
-            except socket.timeout:
-                print(
-                    "Timeout when accessing {} repo".format(event.slug), file=sys.stderr
-                )
-
-            except WrongWorkshopURL:
-                print("Wrong URL for {}".format(event.slug), file=sys.stderr)
-
-            except requests.exceptions.RequestException:
-                print(
-                    "Network error when accessing {}".format(event.slug),
-                    file=sys.stderr,
-                )
+        _, events_to_save = self.check_events(
+            list(events), initial_run=initial_run, concurrency=concurrency
+        )
 
-            except Exception as e:
-                print("Unknown error ({}): {}".format(event.slug, e), file=sys.stderr)
+        if dry_run:
+            print("Dry run: {} events not saved".format(len(events_to_save)))
+        else:
+            self.save_events(events_to_save)
@@ -28,6 +28,7 @@ from workshops.models import (
     Curriculum,
     Event,
     InfoSource,
+    InstructorEligibility,
     KnowledgeDomain,
     Language,
     Lesson,
@@ -439,6 +440,7 @@ class Command(BaseCommand):
                 date = self.faker.date_time_between(start_date="-5y").date()
                 awards.append(Award(person=person, badge=badge, awarded=date))
             Award.objects.bulk_create(awards)
+            InstructorEligibility.objects.refresh([person.pk])
 
             if randbool(0.75):
                 # Add one or more qualifications
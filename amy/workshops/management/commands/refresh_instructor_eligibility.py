@@ -0,0 +1,12 @@
+from workshops.management.commands._refresh_summaries import (
+    RefreshPersonSummariesCommand,
+)
+from workshops.models import InstructorEligibility
+
+
+class Command(RefreshPersonSummariesCommand):
+    help = (
+        "Recomputes precomputed instructor eligibility of given Persons "
+        "(or all Persons), e.g. after bulk changes of training progress or awards."
+    )
+    summary_models = (InstructorEligibility,)
@@ -0,0 +1,10 @@
+from workshops.management.commands._refresh_summaries import RefreshSummariesCommand
+from workshops.models import EventIssues, PersonIssues
+
+
+class Command(RefreshSummariesCommand):
+    help = (
+        "Recomputes precomputed issues of all Events and Persons, e.g. after "
+        "bulk changes of events, tasks or awards."
+    )
+    summary_models = (EventIssues, PersonIssues)
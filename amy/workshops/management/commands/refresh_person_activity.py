@@ -0,0 +1,12 @@
+from workshops.management.commands._refresh_summaries import (
+    RefreshPersonSummariesCommand,
+)
+from workshops.models import PersonActivity
+
+
+class Command(RefreshPersonSummariesCommand):
+    help = (
+        "Recomputes precomputed numbers of tasks of given Persons "
+        "(or all Persons), e.g. after bulk changes of tasks or awards."
+    )
+    summary_models = (PersonActivity,)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from workshops.models import TrainingRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculates automatic score of all training requests (or requests with "
+        "given IDs), e.g. after a change of the scoring rubric."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "request_id", nargs="*", type=int, help="Training request ID"
+        )
+
+    def handle(self, *args, **options):
+        """Main entry point."""
+
+        requests = TrainingRequest.objects.all()
+        if options["request_id"]:
+            requests = requests.filter(pk__in=options["request_id"])
+
+        start = time.perf_counter()
+        count = requests.update_score_auto()
+        self.stdout.write(
+            "Rescored {} training requests in {:.2f} s.".format(
+                count, time.perf_counter() - start
+            )
+        )
@@ -0,0 +1,118 @@
+from hashlib import sha1
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from workshops.util import fetch_workshop_metadata, fetch_workshop_metadata_if_modified
+
+# a website is fetched in up to two HTTP requests (the page and, if it has no
+# metadata, `index.html` from its repository), each bounded by the fetch
+# timeout; other requests wait this many seconds longer (and the lock expires
+# after that), before fetching the website on their own
+FETCH_LOCK_MARGIN = 2
+# how often (in seconds) waiting requests check if the website was fetched
+FETCH_POLL_INTERVAL = 0.1
+
+
+def metadata_cache():
+    return caches[settings.WORKSHOP_METADATA_CACHE_BACKEND]
+
+
+def normalize_url(url):
+    """Normalize website URL, so that different spellings of the same address
+    share the cached metadata.
+
+    Workshop websites are served from directories, so a trailing slash doesn't
+    change the address (e.g. `Event.website_url` always has one)."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), path, parts.query, "")
+    )
+
+
+def metadata_cache_key(url):
+    # databases (e.g. of parallel test runs) may share the cache
+    digest = sha1(normalize_url(url).encode("utf-8")).hexdigest()
+    return "workshop-metadata:{}:{}".format(connection.settings_dict["NAME"], digest)
+
+
+def cache_workshop_metadata(url, metadata, etag="", last_modified=""):
+    """Store metadata fetched from the website, along with HTTP validators of
+    the response."""
+    if not settings.WORKSHOP_METADATA_CACHE_TIMEOUT:
+        return
+    entry = dict(
+        metadata=metadata,
+        etag=etag,
+        last_modified=last_modified,
+        fetched_at=time.time(),
+    )
+    metadata_cache().set(
+        metadata_cache_key(url),
+        entry,
+        timeout=settings.WORKSHOP_METADATA_CACHE_TIMEOUT,
+    )
+
+
+def fetch_workshop_metadata_cached(
+    event_url, timeout=5, session=None, revalidate=False
+):
+    """Cached version of `fetch_workshop_metadata`.
+
+    Metadata are reused for `WORKSHOP_METADATA_CACHE_TIMEOUT` seconds.  With
+    `revalidate=True` the website is always requested, but with cached HTTP
+    validators, so that an unchanged website costs a "304 Not Modified" response.
+
+    Only one request fetches given website at a time; others wait for its result
+    (for up to `2 * timeout + FETCH_LOCK_MARGIN` seconds) instead of fetching it
+    again."""
+    if not settings.WORKSHOP_METADATA_CACHE_TIMEOUT:
+        return fetch_workshop_metadata(event_url, timeout=timeout, session=session)
+
+    cache = metadata_cache()
+    key = metadata_cache_key(event_url)
+    lock_key = "{}:lock".format(key)
+    lock_timeout = int(2 * timeout) + FETCH_LOCK_MARGIN
+    started = time.time()
+
+    def usable(entry):
+        # with `revalidate=True` only metadata fetched in the meantime are usable
+        return entry is not None and (not revalidate or entry["fetched_at"] >= started)
+
+    entry = cache.get(key)
+    if usable(entry):
+        return entry["metadata"]
+
+    locked = cache.add(lock_key, 1, timeout=lock_timeout)
+    while not locked and time.time() < started + lock_timeout:
+        # the website is being fetched by someone else
+        time.sleep(FETCH_POLL_INTERVAL)
+        entry = cache.get(key, entry)
+        if usable(entry):
+            return entry["metadata"]
+        # the other fetch could have failed
+        locked = cache.add(lock_key, 1, timeout=lock_timeout)
+
+    try:
+        result = fetch_workshop_metadata_if_modified(
+            event_url,
+            etag=entry["etag"] if entry else "",
+            last_modified=entry["last_modified"] if entry else "",
+            timeout=timeout,
+            session=session,
+        )
+        if result.metadata is None:
+            # not modified
+            metadata = entry["metadata"]
+        else:
+            metadata = result.metadata
+        cache_workshop_metadata(event_url, metadata, result.etag, result.last_modified)
+        return metadata
+
+    finally:
+        if locked:
+            cache.delete(lock_key)
@@ -0,0 +1,58 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Columns searched in dashboard search.  Django translates `icontains` lookup into
+# `UPPER("column"::text) LIKE UPPER(%s)`, so indexes are built on the same
+# expression.
+SEARCHED_COLUMNS = {
+    "workshops_organization": ["domain", "fullname"],
+    "workshops_membership": ["name", "registration_code"],
+    "workshops_event": ["slug", "url", "contact", "venue", "address"],
+    "workshops_person": ["personal", "family", "email", "secondary_email", "github"],
+    "workshops_airport": ["iata", "fullname"],
+    "workshops_trainingrequest": [
+        "group_name",
+        "family",
+        "email",
+        "github",
+        "affiliation",
+        "location",
+        "user_notes",
+    ],
+    "django_comments": ["comment", "user_name", "user_email"],
+}
+
+
+def index_name(table, column):
+    return "{}_{}_search_trgm".format(table, column)
+
+
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS "{}" ON "{}" '
+    'USING gin (UPPER("{}"::text) gin_trgm_ops);'
+)
+
+CREATE_INDEXES = [
+    CREATE_INDEX.format(index_name(table, column), table, column)
+    for table, columns in SEARCHED_COLUMNS.items()
+    for column in columns
+]
+
+DROP_INDEXES = [
+    'DROP INDEX IF EXISTS "{}";'.format(index_name(table, column))
+    for table, columns in SEARCHED_COLUMNS.items()
+    for column in columns
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_comments', '0004_add_object_pk_is_removed_index'),
+        ('workshops', '0253_event_metadata_validators'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(CREATE_INDEXES, DROP_INDEXES),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Columns searched in lookup views with `icontains` (trigram indexes; some of
+# them were already created for dashboard search in migration 0254).
+TRIGRAM_SEARCHED_COLUMNS = {
+    "workshops_person": ["middle", "username"],
+    "workshops_trainingrequest": ["personal", "secondary_email"],
+}
+
+CREATE_TRIGRAM_INDEX = (
+    'CREATE INDEX IF NOT EXISTS "{}_{}_search_trgm" ON "{}" '
+    'USING gin (UPPER("{}"::text) gin_trgm_ops);'
+)
+
+
+def create_indexes(sql, searched_columns):
+    return [
+        sql.format(table, column, table, column)
+        for table, columns in searched_columns.items()
+        for column in columns
+    ]
+
+
+def drop_indexes(suffix, searched_columns):
+    return [
+        'DROP INDEX IF EXISTS "{}_{}_{}";'.format(table, column, suffix)
+        for table, columns in searched_columns.items()
+        for column in columns
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0254_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            create_indexes(CREATE_TRIGRAM_INDEX, TRIGRAM_SEARCHED_COLUMNS),
+            drop_indexes("search_trgm", TRIGRAM_SEARCHED_COLUMNS),
+        ),
+    ]
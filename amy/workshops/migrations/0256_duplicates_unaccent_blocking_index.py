@@ -0,0 +1,25 @@
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+# Blocking keys used when looking for persons with similar names (see
+# `reports.duplicates.name_blocks`): only persons with the same first letters of
+# family and personal names are compared with each other.
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS "workshops_person_name_blocks" '
+    'ON "workshops_person" '
+    '(UPPER(SUBSTRING("family", 1, 3)), UPPER(SUBSTRING("personal", 1, 1)));'
+)
+
+DROP_INDEX = 'DROP INDEX IF EXISTS "workshops_person_name_blocks";'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0255_lookup_search_indexes'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_INDEX, DROP_INDEX),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Initial summaries, computed the same way as
+# `InstructorEligibility.objects.refresh()` does.
+POPULATE = """
+WITH progress AS (
+    SELECT
+        p.trainee_id AS person_id,
+        COUNT(*) FILTER (WHERE r.name = 'Training') AS passed_training,
+        COUNT(*) FILTER (WHERE r.name = 'SWC Homework') AS passed_swc_homework,
+        COUNT(*) FILTER (WHERE r.name = 'DC Homework') AS passed_dc_homework,
+        COUNT(*) FILTER (WHERE r.name = 'LC Homework') AS passed_lc_homework,
+        COUNT(*) FILTER (WHERE r.name = 'Discussion') AS passed_discussion,
+        COUNT(*) FILTER (WHERE r.name = 'SWC Demo') AS passed_swc_demo,
+        COUNT(*) FILTER (WHERE r.name = 'DC Demo') AS passed_dc_demo,
+        COUNT(*) FILTER (WHERE r.name = 'LC Demo') AS passed_lc_demo,
+        COUNT(*) FILTER (
+            WHERE r.name IN ('SWC Homework', 'DC Homework', 'LC Homework')
+        ) AS passed_homework,
+        COUNT(*) FILTER (
+            WHERE r.name IN ('SWC Demo', 'DC Demo', 'LC Demo')
+        ) AS passed_demo
+    FROM workshops_trainingprogress p
+    JOIN workshops_trainingrequirement r ON r.id = p.requirement_id
+    WHERE p.state = 'p' AND NOT p.discarded
+    GROUP BY p.trainee_id
+), badges AS (
+    SELECT
+        a.person_id,
+        COUNT(*) FILTER (WHERE b.name = 'swc-instructor') AS is_swc_instructor,
+        COUNT(*) FILTER (WHERE b.name = 'dc-instructor') AS is_dc_instructor,
+        COUNT(*) FILTER (WHERE b.name = 'lc-instructor') AS is_lc_instructor,
+        COUNT(*) FILTER (
+            WHERE b.name IN ('swc-instructor', 'dc-instructor', 'lc-instructor')
+        ) AS is_instructor
+    FROM workshops_award a
+    JOIN workshops_badge b ON b.id = a.badge_id
+    GROUP BY a.person_id
+)
+INSERT INTO workshops_instructoreligibility (
+    person_id,
+    passed_training, passed_swc_homework, passed_dc_homework, passed_lc_homework,
+    passed_discussion, passed_swc_demo, passed_dc_demo, passed_lc_demo,
+    passed_homework, passed_demo, instructor_eligible,
+    is_swc_instructor, is_dc_instructor, is_lc_instructor, is_instructor
+)
+SELECT
+    COALESCE(progress.person_id, badges.person_id),
+    COALESCE(passed_training, 0),
+    COALESCE(passed_swc_homework, 0),
+    COALESCE(passed_dc_homework, 0),
+    COALESCE(passed_lc_homework, 0),
+    COALESCE(passed_discussion, 0),
+    COALESCE(passed_swc_demo, 0),
+    COALESCE(passed_dc_demo, 0),
+    COALESCE(passed_lc_demo, 0),
+    COALESCE(passed_homework, 0),
+    COALESCE(passed_demo, 0),
+    COALESCE(
+        passed_training * passed_discussion * passed_homework * passed_demo, 0
+    ),
+    COALESCE(is_swc_instructor, 0),
+    COALESCE(is_dc_instructor, 0),
+    COALESCE(is_lc_instructor, 0),
+    COALESCE(is_instructor, 0)
+FROM progress
+FULL OUTER JOIN badges ON badges.person_id = progress.person_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0256_duplicates_unaccent_blocking_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstructorEligibility',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='instructor_eligibility', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('passed_training', models.PositiveIntegerField(default=0)),
+                ('passed_swc_homework', models.PositiveIntegerField(default=0)),
+                ('passed_dc_homework', models.PositiveIntegerField(default=0)),
+                ('passed_lc_homework', models.PositiveIntegerField(default=0)),
+                ('passed_discussion', models.PositiveIntegerField(default=0)),
+                ('passed_swc_demo', models.PositiveIntegerField(default=0)),
+                ('passed_dc_demo', models.PositiveIntegerField(default=0)),
+                ('passed_lc_demo', models.PositiveIntegerField(default=0)),
+                ('passed_homework', models.PositiveIntegerField(default=0)),
+                ('passed_demo', models.PositiveIntegerField(default=0)),
+                ('instructor_eligible', models.PositiveIntegerField(default=0)),
+                ('is_swc_instructor', models.PositiveIntegerField(default=0)),
+                ('is_dc_instructor', models.PositiveIntegerField(default=0)),
+                ('is_lc_instructor', models.PositiveIntegerField(default=0)),
+                ('is_instructor', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(POPULATE, migrations.RunSQL.noop),
+    ]
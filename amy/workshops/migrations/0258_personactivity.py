@@ -0,0 +1,91 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Initial summaries, computed the same way as `PersonActivity.objects.refresh()`
+# does.
+POPULATE = """
+WITH tasks AS (
+    SELECT
+        t.person_id,
+        COUNT(*) FILTER (WHERE r.name = 'instructor') AS num_taught,
+        COUNT(*) FILTER (
+            WHERE r.name = 'supporting-instructor'
+        ) AS num_supporting,
+        COUNT(*) FILTER (WHERE r.name = 'helper') AS num_helper,
+        COUNT(*) FILTER (WHERE r.name = 'learner') AS num_learner,
+        COUNT(*) FILTER (WHERE r.name = 'organizer') AS num_organizer,
+        COUNT(*) FILTER (
+            WHERE r.name = 'learner'
+            AND EXISTS (
+                SELECT 1 FROM workshops_event_tags et
+                JOIN workshops_tag tg ON tg.id = et.tag_id
+                WHERE et.event_id = t.event_id AND tg.name = 'TTT'
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM workshops_event_tags et
+                JOIN workshops_tag tg ON tg.id = et.tag_id
+                WHERE et.event_id = t.event_id AND tg.name = 'stalled'
+            )
+        ) AS is_trainee
+    FROM workshops_task t
+    JOIN workshops_role r ON r.id = t.role_id
+    GROUP BY t.person_id
+), badges AS (
+    SELECT
+        a.person_id,
+        COUNT(*) FILTER (WHERE b.name = 'trainer') AS is_trainer,
+        COUNT(*) FILTER (
+            WHERE b.name IN (
+                'swc-instructor', 'dc-instructor', 'lc-instructor', 'trainer'
+            )
+        ) AS num_important_badges
+    FROM workshops_award a
+    JOIN workshops_badge b ON b.id = a.badge_id
+    GROUP BY a.person_id
+)
+INSERT INTO workshops_personactivity (
+    person_id,
+    num_taught, num_supporting, num_helper, num_learner, num_organizer,
+    is_trainee, is_trainer
+)
+SELECT
+    COALESCE(tasks.person_id, badges.person_id),
+    COALESCE(num_taught, 0),
+    COALESCE(num_supporting, 0),
+    COALESCE(num_helper, 0),
+    COALESCE(num_learner, 0),
+    COALESCE(num_organizer, 0),
+    CASE WHEN COALESCE(num_important_badges, 0) > 0 THEN 0
+         ELSE COALESCE(is_trainee, 0) END,
+    COALESCE(is_trainer, 0)
+FROM tasks
+FULL OUTER JOIN badges ON badges.person_id = tasks.person_id
+WHERE tasks.person_id IS NOT NULL OR badges.is_trainer > 0;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0257_instructoreligibility'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonActivity',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('num_taught', models.PositiveIntegerField(default=0)),
+                ('num_supporting', models.PositiveIntegerField(default=0)),
+                ('num_helper', models.PositiveIntegerField(default=0)),
+                ('num_learner', models.PositiveIntegerField(default=0)),
+                ('num_organizer', models.PositiveIntegerField(default=0)),
+                ('is_trainee', models.PositiveIntegerField(default=0)),
+                ('is_trainer', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(POPULATE, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 2.2.28 on 2026-10-19 00:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Initial issues, computed the same way as `EventIssues.objects.refresh()` and
+# `PersonIssues.objects.refresh()` do.
+POPULATE_EVENT_ISSUES = """
+INSERT INTO workshops_eventissues (
+    event_id, num_instructors, missing_attendance, missing_location, bad_dates
+)
+SELECT * FROM (
+    SELECT
+        e.id,
+        COUNT(t.id) FILTER (WHERE r.name = 'instructor') AS num_instructors,
+        COALESCE(
+            GREATEST(
+                e.manual_attendance,
+                COUNT(t.id) FILTER (WHERE r.name = 'learner')
+            ),
+            0
+        ) = 0 AS missing_attendance,
+        (
+            e.country IS NULL
+            OR e.venue IS NULL OR e.venue = ''
+            OR e.address IS NULL OR e.address = ''
+            OR e.latitude IS NULL OR e.longitude IS NULL
+        ) AS missing_location,
+        COALESCE(e.start > e."end", FALSE) AS bad_dates
+    FROM workshops_event e
+    LEFT JOIN workshops_task t ON t.event_id = e.id
+    LEFT JOIN workshops_role r ON r.id = t.role_id
+    WHERE NOT e.completed AND NOT EXISTS (
+        SELECT 1 FROM workshops_event_tags et
+        JOIN workshops_tag tg ON tg.id = et.tag_id
+        WHERE et.event_id = e.id
+        AND tg.name IN ('stalled', 'cancelled', 'unresponsive')
+    )
+    GROUP BY e.id
+) issues
+WHERE num_instructors = 0 OR missing_attendance OR missing_location OR bad_dates;
+"""
+
+POPULATE_PERSON_ISSUES = """
+WITH instructors AS (
+    SELECT DISTINCT a.person_id
+    FROM workshops_award a
+    JOIN workshops_badge b ON b.id = a.badge_id
+    WHERE b.name IN ('swc-instructor', 'dc-instructor', 'lc-instructor')
+), trainees AS (
+    SELECT
+        t.person_id,
+        BOOL_OR(NOT stalled.exists) AS pending,
+        BOOL_OR(stalled.exists) AS stalled
+    FROM workshops_task t
+    JOIN workshops_role r ON r.id = t.role_id
+    CROSS JOIN LATERAL (
+        SELECT EXISTS (
+            SELECT 1 FROM workshops_event_tags et
+            JOIN workshops_tag tg ON tg.id = et.tag_id
+            WHERE et.event_id = t.event_id AND tg.name = 'stalled'
+        ) AS exists
+    ) stalled
+    WHERE r.name = 'learner'
+    AND EXISTS (
+        SELECT 1 FROM workshops_event_tags et
+        JOIN workshops_tag tg ON tg.id = et.tag_id
+        WHERE et.event_id = t.event_id AND tg.name = 'TTT'
+    )
+    AND t.person_id NOT IN (SELECT person_id FROM instructors)
+    GROUP BY t.person_id
+)
+INSERT INTO workshops_personissues (
+    person_id, missing_airport, pending_trainee, stalled_trainee
+)
+SELECT
+    p.id,
+    instructors.person_id IS NOT NULL AND p.airport_id IS NULL,
+    COALESCE(trainees.pending, FALSE),
+    COALESCE(trainees.stalled AND NOT trainees.pending, FALSE)
+FROM workshops_person p
+LEFT JOIN instructors ON instructors.person_id = p.id
+LEFT JOIN trainees ON trainees.person_id = p.id
+WHERE (instructors.person_id IS NOT NULL AND p.airport_id IS NULL)
+OR trainees.person_id IS NOT NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0259_airport_location_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventIssues',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='issues', serialize=False, to='workshops.Event')),
+                ('num_instructors', models.PositiveIntegerField(default=0)),
+                ('missing_attendance', models.BooleanField(default=False)),
+                ('missing_location', models.BooleanField(default=False)),
+                ('bad_dates', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PersonIssues',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='issues', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('missing_airport', models.BooleanField(default=False)),
+                ('pending_trainee', models.BooleanField(default=False)),
+                ('stalled_trainee', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RunSQL(POPULATE_EVENT_ISSUES, migrations.RunSQL.noop),
+        migrations.RunSQL(POPULATE_PERSON_ISSUES, migrations.RunSQL.noop),
+    ]
@@ -1,4 +1,5 @@
 import datetime
+import math
 import re
 from urllib.parse import quote
 
@@ -14,14 +15,27 @@ from django.db import models, transaction
 from django.db.models import (
     Case,
     Count,
+    ExpressionWrapper,
     F,
     IntegerField,
+    OuterRef,
     PositiveIntegerField,
     Q,
-    Sum,
+    Subquery,
+    Value,
     When,
 )
-from django.db.models.functions import Greatest
+from django.db.models.functions import (
+    ASin,
+    Coalesce,
+    Cos,
+    Greatest,
+    Least,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
+)
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
 from django.utils.functional import cached_property
@@ -127,6 +141,86 @@ class Member(models.Model):
         ]
 
 
+class MembershipQuerySet(models.query.QuerySet):
+    @staticmethod
+    def _workshops_queryset(membership):
+        """Events of the membership that weren't cancelled nor stalled.
+
+        `membership` can be an instance or `OuterRef` to the membership."""
+        cancelled = Q(tags__name="cancelled") | Q(tags__name="stalled")
+        return Event.objects.filter(membership=membership).exclude(cancelled)
+
+    @classmethod
+    def _workshops_without_admin_fee_queryset(cls, membership):
+        """Centrally-organised events of the membership."""
+        return (
+            cls._workshops_queryset(membership)
+            .filter(administrator__in=Organization.objects.administrators())
+            .exclude(administrator__domain="self-organized")
+        )
+
+    @classmethod
+    def _self_organized_workshops_queryset(cls, membership):
+        """Self-organised events of the membership."""
+        self_organized = Q(administrator=None) | Q(
+            administrator__domain="self-organized"
+        )
+        return cls._workshops_queryset(membership).filter(self_organized)
+
+    @staticmethod
+    def _instructor_training_seats_queryset(membership, public):
+        """Learner tasks using the membership's (public or in-house) seats."""
+        return Task.objects.filter(
+            seat_membership=membership, role__name="learner", seat_public=public
+        )
+
+    @staticmethod
+    def _count(queryset, field):
+        """Count rows of the queryset in a subquery grouped by `field`."""
+        subquery = (
+            queryset.order_by()
+            .values(field)
+            .annotate(count=Count("pk", distinct=True))
+            .values("count")
+        )
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+    def with_usage(self):
+        """Annotate memberships with counters of used workshops and instructor
+        training seats.
+
+        All counters are computed within the same query, and are used by
+        `Membership` properties (e.g. `workshops_without_admin_fee_completed`)
+        instead of running a separate COUNT query for each property."""
+        membership = OuterRef("pk")
+        today = datetime.date.today()
+        no_fee = self._workshops_without_admin_fee_queryset(membership)
+        self_organized = self._self_organized_workshops_queryset(membership)
+        public_seats = self._instructor_training_seats_queryset(membership, True)
+        inhouse_seats = self._instructor_training_seats_queryset(membership, False)
+
+        return self.annotate(
+            workshops_without_admin_fee_completed_count=self._count(
+                no_fee.filter(start__lt=today), "membership"
+            ),
+            workshops_without_admin_fee_planned_count=self._count(
+                no_fee.filter(start__gte=today), "membership"
+            ),
+            self_organized_workshops_completed_count=self._count(
+                self_organized.filter(start__lt=today), "membership"
+            ),
+            self_organized_workshops_planned_count=self._count(
+                self_organized.filter(start__gte=today), "membership"
+            ),
+            public_instructor_training_seats_utilized_count=self._count(
+                public_seats, "seat_membership"
+            ),
+            inhouse_instructor_training_seats_utilized_count=self._count(
+                inhouse_seats, "seat_membership"
+            ),
+        )
+
+
 @reversion.register
 class Membership(models.Model):
     """Represent a details of Organization's membership."""
@@ -298,6 +392,8 @@ class Membership(models.Model):
         null=True,
     )
 
+    objects = MembershipQuerySet.as_manager()
+
     def __str__(self):
         from workshops.util import human_daterange
 
@@ -312,19 +408,22 @@ class Membership(models.Model):
     def get_absolute_url(self):
         return reverse("membership_details", args=[self.id])
 
+    def _usage_count(self, name, queryset):
+        """Return counter annotated by `MembershipQuerySet.with_usage()`, or count
+        results of the queryset if the counter isn't available."""
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            return queryset().count()
+
     def _base_queryset(self):
         """Provide universal queryset for looking up workshops for this membership."""
-        cancelled = Q(tags__name="cancelled") | Q(tags__name="stalled")
-        return Event.objects.filter(membership=self).exclude(cancelled).distinct()
+        return MembershipQuerySet._workshops_queryset(self).distinct()
 
     def _workshops_without_admin_fee_queryset(self):
         """Provide universal queryset for looking up centrally-organised workshops for
         this membership."""
-        return (
-            self._base_queryset()
-            .filter(administrator__in=Organization.objects.administrators())
-            .exclude(administrator__domain="self-organized")
-        )
+        return MembershipQuerySet._workshops_without_admin_fee_queryset(self).distinct()
 
     def _workshops_without_admin_fee_completed_queryset(self):
         return self._workshops_without_admin_fee_queryset().filter(
@@ -371,7 +470,10 @@ class Membership(models.Model):
 
         Excess is counted towards discounted-fee completed workshops."""
         return min(
-            self._workshops_without_admin_fee_completed_queryset().count(),
+            self._usage_count(
+                "workshops_without_admin_fee_completed_count",
+                self._workshops_without_admin_fee_completed_queryset,
+            ),
             self.workshops_without_admin_fee_available,
         )
 
@@ -384,7 +486,10 @@ class Membership(models.Model):
 
         Excess is counted towards discounted-fee planned workshops."""
         return min(
-            self._workshops_without_admin_fee_planned_queryset().count(),
+            self._usage_count(
+                "workshops_without_admin_fee_planned_count",
+                self._workshops_without_admin_fee_planned_queryset,
+            ),
             self.workshops_without_admin_fee_available
             - self.workshops_without_admin_fee_completed,
         )
@@ -404,7 +509,10 @@ class Membership(models.Model):
         """Any centrally-organised workshops exceeding the workshops without fee allowed
         number - already completed."""
         return max(
-            self._workshops_without_admin_fee_completed_queryset().count()
+            self._usage_count(
+                "workshops_without_admin_fee_completed_count",
+                self._workshops_without_admin_fee_completed_queryset,
+            )
             - self.workshops_without_admin_fee_available,
             0,
         )
@@ -414,7 +522,10 @@ class Membership(models.Model):
         """Any centrally-organised workshops exceeding the workshops without fee allowed
         number - to happen in future."""
         return max(
-            self._workshops_without_admin_fee_planned_queryset().count()
+            self._usage_count(
+                "workshops_without_admin_fee_planned_count",
+                self._workshops_without_admin_fee_planned_queryset,
+            )
             - self.workshops_without_admin_fee_available,
             0,
         )
@@ -422,29 +533,34 @@ class Membership(models.Model):
     def _self_organized_workshops_queryset(self):
         """Provide universal queryset for looking up self-organised events for this
         membership."""
-        self_organized = Q(administrator=None) | Q(
-            administrator__domain="self-organized"
+        return MembershipQuerySet._self_organized_workshops_queryset(self).distinct()
+
+    def _self_organized_workshops_completed_queryset(self):
+        return self._self_organized_workshops_queryset().filter(
+            start__lt=datetime.date.today()
+        )
+
+    def _self_organized_workshops_planned_queryset(self):
+        return self._self_organized_workshops_queryset().filter(
+            start__gte=datetime.date.today()
         )
-        return self._base_queryset().filter(self_organized)
 
     @cached_property
     def self_organized_workshops_completed(self):
         """Count self-organized workshops hosted the year agreement started (completed,
         ie. in past)."""
-        return (
-            self._self_organized_workshops_queryset()
-            .filter(start__lt=datetime.date.today())
-            .count()
+        return self._usage_count(
+            "self_organized_workshops_completed_count",
+            self._self_organized_workshops_completed_queryset,
         )
 
     @cached_property
     def self_organized_workshops_planned(self):
         """Count self-organized workshops hosted the year agreement started (planned,
         ie. in future)."""
-        return (
-            self._self_organized_workshops_queryset()
-            .filter(start__gte=datetime.date.today())
-            .count()
+        return self._usage_count(
+            "self_organized_workshops_planned_count",
+            self._self_organized_workshops_planned_queryset,
         )
 
     @property
@@ -462,7 +578,10 @@ class Membership(models.Model):
     @cached_property
     def public_instructor_training_seats_utilized(self):
         """Count number of learner tasks that point to this membership."""
-        return self.task_set.filter(role__name="learner", seat_public=True).count()
+        return self._usage_count(
+            "public_instructor_training_seats_utilized_count",
+            lambda: MembershipQuerySet._instructor_training_seats_queryset(self, True),
+        )
 
     @property
     def public_instructor_training_seats_remaining(self):
@@ -487,7 +606,10 @@ class Membership(models.Model):
     @cached_property
     def inhouse_instructor_training_seats_utilized(self):
         """Count number of learner tasks that point to this membership."""
-        return self.task_set.filter(role__name="learner", seat_public=False).count()
+        return self._usage_count(
+            "inhouse_instructor_training_seats_utilized_count",
+            lambda: MembershipQuerySet._instructor_training_seats_queryset(self, False),
+        )
 
     @property
     def inhouse_instructor_training_seats_remaining(self):
@@ -501,6 +623,84 @@ class Membership(models.Model):
 # ------------------------------------------------------------
 
 
+class AirportQuerySet(models.query.QuerySet):
+    # mean Earth radius
+    EARTH_RADIUS_KM = 6371.0
+
+    def distance_expression(self, latitude, longitude, path=""):
+        """Great-circle distance (in km) between given point and airport at `path`
+        (e.g. `"airport__"`), calculated with the haversine formula."""
+        lat = math.radians(latitude)
+        lng = math.radians(longitude)
+        airport_lat = Radians("{}latitude".format(path))
+        airport_lng = Radians("{}longitude".format(path))
+        haversine = Power(Sin((airport_lat - lat) / 2), 2) + math.cos(lat) * Cos(
+            airport_lat
+        ) * Power(Sin((airport_lng - lng) / 2), 2)
+        # rounding errors can make haversine of antipodes slightly greater than 1
+        return ExpressionWrapper(
+            2 * self.EARTH_RADIUS_KM * ASin(Sqrt(Least(haversine, Value(1.0)))),
+            output_field=models.FloatField(),
+        )
+
+    def bounding_box(self, latitude, longitude, distance):
+        """Condition for airports in the smallest latitude/longitude
+        box containing every point within `distance` km from given point.
+
+        The box wraps around the antimeridian, and spans all longitudes when
+        it reaches a pole."""
+        angle = math.degrees(distance / self.EARTH_RADIUS_KM)
+        min_lat, max_lat = latitude - angle, latitude + angle
+        box = Q(latitude__range=(max(min_lat, -90), min(max_lat, 90)))
+        if min_lat <= -90 or max_lat >= 90:
+            return box
+
+        # http://janmatuschek.de/LatitudeLongitudeBoundingCoordinates
+        ratio = math.sin(math.radians(angle)) / math.cos(math.radians(latitude))
+        if ratio >= 1:
+            return box
+        delta = math.degrees(math.asin(ratio))
+        min_lng, max_lng = longitude - delta, longitude + delta
+        if min_lng < -180:
+            return box & (Q(longitude__gte=min_lng + 360) | Q(longitude__lte=max_lng))
+        if max_lng > 180:
+            return box & (Q(longitude__gte=min_lng) | Q(longitude__lte=max_lng - 360))
+        return box & Q(longitude__range=(min_lng, max_lng))
+
+    def annotate_with_distance(self, latitude, longitude):
+        """Annotate with great-circle distance (in km) from given point."""
+        return self.annotate(distance=self.distance_expression(latitude, longitude))
+
+    def within_distance(self, latitude, longitude, distance):
+        """Airports at most `distance` km from given point, annotated with
+        their distance.
+
+        Only airports in the bounding box (found with an index) have their
+        distance calculated."""
+        return (
+            self.filter(self.bounding_box(latitude, longitude, distance))
+            .annotate_with_distance(latitude, longitude)
+            .filter(distance__lte=distance)
+        )
+
+    def nearest(self, latitude, longitude, count, distance=500):
+        """At most `count` airports nearest to given point, ordered by distance.
+
+        Airports are searched for within a growing distance, so that only
+        airports in the neighbourhood are sorted."""
+        # half of the Earth's circumference
+        max_distance = math.pi * self.EARTH_RADIUS_KM
+        while True:
+            airports = list(
+                self.within_distance(latitude, longitude, distance).order_by(
+                    "distance", "iata"
+                )[:count]
+            )
+            if len(airports) >= count or distance >= max_distance:
+                return airports
+            distance *= 2
+
+
 @reversion.register
 class Airport(models.Model):
     """Represent an airport (used to locate instructors)."""
@@ -518,6 +718,8 @@ class Airport(models.Model):
     latitude = models.FloatField()
     longitude = models.FloatField()
 
+    objects = AirportQuerySet.as_manager()
+
     def __str__(self):
         return "{0}: {1}".format(self.iata, self.fullname)
 
@@ -526,6 +728,10 @@ class Airport(models.Model):
 
     class Meta:
         ordering = ("iata",)
+        indexes = [
+            # bounding box of `AirportQuerySet.within_distance()`
+            models.Index(fields=["latitude", "longitude"]),
+        ]
 
 
 # ------------------------------------------------------------
@@ -581,68 +787,26 @@ class PersonManager(BaseUserManager):
             return super().get_by_natural_key(username)
 
     def annotate_with_instructor_eligibility(self):
-        def passed(requirement):
-            return Sum(
-                Case(
-                    When(
-                        trainingprogress__requirement__name=requirement,
-                        trainingprogress__state="p",
-                        trainingprogress__discarded=False,
-                        then=1,
-                    ),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            )
-
-        def passed_either(req_a, req_b, req_c):
-            return Sum(
-                Case(
-                    When(
-                        trainingprogress__requirement__name=req_a,
-                        trainingprogress__state="p",
-                        trainingprogress__discarded=False,
-                        then=1,
-                    ),
-                    When(
-                        trainingprogress__requirement__name=req_b,
-                        trainingprogress__state="p",
-                        trainingprogress__discarded=False,
-                        then=1,
-                    ),
-                    When(
-                        trainingprogress__requirement__name=req_c,
-                        trainingprogress__state="p",
-                        trainingprogress__discarded=False,
-                        then=1,
-                    ),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            )
+        """Annotate with numbers of passed training requirements and instructor
+        badges, read from precomputed `InstructorEligibility`."""
+        fields = (
+            InstructorEligibility.PROGRESS_FIELDS + InstructorEligibility.BADGE_FIELDS
+        )
+        return self.annotate(
+            **{
+                field: Coalesce("instructor_eligibility__{}".format(field), 0)
+                for field in fields
+            }
+        )
 
+    def annotate_with_activity(self, *fields):
+        """Annotate with numbers of tasks in each role (or only given `fields`),
+        read from precomputed `PersonActivity`."""
         return self.annotate(
-            passed_training=passed("Training"),
-            passed_swc_homework=passed("SWC Homework"),
-            passed_dc_homework=passed("DC Homework"),
-            passed_lc_homework=passed("LC Homework"),
-            passed_discussion=passed("Discussion"),
-            passed_swc_demo=passed("SWC Demo"),
-            passed_dc_demo=passed("DC Demo"),
-            passed_lc_demo=passed("LC Demo"),
-            passed_homework=passed_either("SWC Homework", "DC Homework", "LC Homework"),
-            passed_demo=passed_either("SWC Demo", "DC Demo", "LC Demo"),
-        ).annotate(
-            # We're using Maths to calculate "binary" score for a person to
-            # be instructor badge eligible. Legend:
-            # * means "AND"
-            # + means "OR"
-            instructor_eligible=(
-                F("passed_training")
-                * F("passed_discussion")
-                * F("passed_homework")
-                * F("passed_demo")
-            )
+            **{
+                field: Coalesce("activity__{}".format(field), 0)
+                for field in fields or PersonActivity.FIELDS
+            }
         )
 
     def duplication_review_expired(self):
@@ -971,8 +1135,15 @@ class Person(
             if github_username_has_changed:
                 UserSocialAuth.objects.filter(user=self).delete()
 
-        # save empty string as NULL to the database - otherwise there are
-        # issues with UNIQUE constraint failing
+        self.normalize_fields()
+        super().save(*args, **kwargs)
+
+    def normalize_fields(self):
+        """Strip names and email, and save empty strings as NULL to the
+        database - otherwise there are issues with UNIQUE constraint failing.
+
+        Called by `save()`; must be called for persons saved in other ways
+        (e.g. `bulk_create()`)."""
         self.personal = self.personal.strip()
         if self.family is not None:
             self.family = self.family.strip()
@@ -981,7 +1152,6 @@ class Person(
         self.airport = self.airport or None
         self.github = self.github or None
         self.twitter = self.twitter or None
-        super().save(*args, **kwargs)
 
     def archive(self) -> None:
         """
@@ -1427,6 +1597,19 @@ class Event(AssignmentMixin, RQJobsMixin, models.Model):
     metadata_changed = models.BooleanField(
         default=False, help_text="Indicate if metadata changed since last check"
     )
+    # HTTP validators of event's website, used for conditional requests
+    metadata_etag = models.CharField(
+        max_length=STR_LONGEST,
+        blank=True,
+        default="",
+        help_text="ETag header of event's website from last metadata check",
+    )
+    metadata_last_modified = models.CharField(
+        max_length=STR_MED,
+        blank=True,
+        default="",
+        help_text="Last-Modified header of event's website from last metadata check",
+    )
 
     # defines if people not associated with specific member sites can take part
     # in TTT event
@@ -1727,8 +1910,13 @@ class Task(RQJobsMixin, models.Model):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        # Trigger an update of the attendance field
-        self.event.save()
+        # Trigger an update of the attendance field; event's issues were
+        # already refreshed because of the task
+        self.event._saved_for_task = True
+        try:
+            self.event.save()
+        finally:
+            self.event._saved_for_task = False
 
 
 # ------------------------------------------------------------
@@ -1844,7 +2032,75 @@ class KnowledgeDomain(models.Model):
 # ------------------------------------------------------------
 
 
-class TrainingRequestManager(models.Manager):
+class TrainingRequestQuerySet(models.query.QuerySet):
+    def _score_auto_m2m_count(self, field, **filters):
+        """Number of related objects of many-to-many `field`, as a subquery."""
+        through = self.model._meta.get_field(field).remote_field.through
+        count = (
+            through.objects.filter(trainingrequest=OuterRef("pk"), **filters)
+            .order_by()
+            .values("trainingrequest")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(count, output_field=IntegerField()), 0)
+
+    def score_auto_fields_expression(self):
+        """Part of automatic score depending only on the request's own fields.
+
+        SQL equivalent of `TrainingRequest.score_auto_from_fields()`."""
+        model = self.model
+
+        def point(condition):
+            return Case(
+                When(condition, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+
+        return (
+            point(
+                ~Q(country="") & ~Q(country__in=model.SCORE_AUTO_NOT_SCORING_COUNTRIES)
+            )
+            + point(Q(underresourced=True))
+            + point(Q(underrepresented="yes"))
+            + point(Q(previous_training__in=model.SCORE_AUTO_PREVIOUS_TRAINING))
+            + point(Q(previous_experience__in=model.SCORE_AUTO_PREVIOUS_EXPERIENCE))
+            + point(
+                Q(
+                    programming_language_usage_frequency__in=(
+                        model.SCORE_AUTO_PROGRAMMING_LANGUAGE_USAGE_FREQUENCY
+                    )
+                )
+            )
+        )
+
+    def score_auto_m2m_expression(self):
+        """Part of automatic score depending on `domains` and
+        `previous_involvement`."""
+        model = self.model
+        return Least(
+            self._score_auto_m2m_count(
+                "domains", knowledgedomain__name__in=model.SCORE_AUTO_DOMAINS
+            ),
+            1,
+        ) + Least(
+            self._score_auto_m2m_count("previous_involvement"),
+            model.SCORE_AUTO_MAX_PREVIOUS_INVOLVEMENT,
+        )
+
+    def score_auto_expression(self):
+        """Automatic score calculated in the database, see
+        `TrainingRequest.recalculate_score_auto()`."""
+        return self.score_auto_fields_expression() + self.score_auto_m2m_expression()
+
+    def update_score_auto(self):
+        """Recalculate automatic score of all requests with a single `UPDATE`.
+        Return number of updated requests."""
+        return self.update(score_auto=self.score_auto_expression())
+
+
+class TrainingRequestManager(models.Manager.from_queryset(TrainingRequestQuerySet)):
     def get_queryset(self):
         """Enhance default TrainingRequest queryset with auto-computed
         fields."""
@@ -1882,6 +2138,66 @@ class TrainingRequest(
         "score_notes",
     )
 
+    # Automatic score rubric, see `recalculate_score_auto()`.
+    # Location based points (country not on the list of countries) according to
+    # https://github.com/swcarpentry/amy/issues/1327#issuecomment-422539917
+    # and
+    # https://github.com/swcarpentry/amy/issues/1327#issuecomment-423292177
+    SCORE_AUTO_NOT_SCORING_COUNTRIES = [
+        "US",
+        "CA",
+        "NZ",
+        "GB",
+        "AU",
+        "AT",
+        "BE",
+        "CY",
+        "CZ",
+        "DK",
+        "EE",
+        "FI",
+        "FR",
+        "DE",
+        "GR",
+        "HU",
+        "IE",
+        "IT",
+        "LV",
+        "LT",
+        "LU",
+        "MT",
+        "NL",
+        "PL",
+        "PT",
+        "RO",
+        "SK",
+        "SI",
+        "ES",
+        "SE",
+        "CH",
+        "IS",
+        "NO",
+    ]
+    # economics or social sciences, arts, humanities, library science, or
+    # chemistry
+    SCORE_AUTO_DOMAINS = [
+        "Humanities",
+        "Library and information science",
+        "Economics/business",
+        "Social sciences",
+        "Chemistry",
+    ]
+    # +1 for each previous involvement with The Carpentries (max. 3)
+    SCORE_AUTO_MAX_PREVIOUS_INVOLVEMENT = 3
+    # previous training in teaching: "a certification or short course"
+    # or "a full degree"
+    SCORE_AUTO_PREVIOUS_TRAINING = ["course", "full"]
+    # previous experience in teaching: "TA for full course"
+    # or "primary instructor for full course"
+    SCORE_AUTO_PREVIOUS_EXPERIENCE = ["ta", "courses"]
+    # using tools "every day" or "a few times a week"
+    SCORE_AUTO_PROGRAMMING_LANGUAGE_USAGE_FREQUENCY = ["daily", "weekly"]
+
     person = models.ForeignKey(
         Person,
         null=True,
@@ -2233,116 +2549,79 @@ class TrainingRequest(
                 }
             )
 
-    def recalculate_score_auto(self):
-        """Calculate automatic score according to the rubric:
-        https://github.com/carpentries/instructor-training/blob/gh-pages/files/rubric.md
-        """
+    def score_auto_from_fields(self):
+        """Part of automatic score depending only on the request's own fields,
+        calculated without any queries."""
         score = 0
 
-        # location based points (country not on the list of countries)
-        # according to
-        # https://github.com/swcarpentry/amy/issues/1327#issuecomment-422539917
-        # and
-        # https://github.com/swcarpentry/amy/issues/1327#issuecomment-423292177
-        not_scoring_countries = [
-            "US",
-            "CA",
-            "NZ",
-            "GB",
-            "AU",
-            "AT",
-            "BE",
-            "CY",
-            "CZ",
-            "DK",
-            "EE",
-            "FI",
-            "FR",
-            "DE",
-            "GR",
-            "HU",
-            "IE",
-            "IT",
-            "LV",
-            "LT",
-            "LU",
-            "MT",
-            "NL",
-            "PL",
-            "PT",
-            "RO",
-            "SK",
-            "SI",
-            "ES",
-            "SE",
-            "CH",
-            "IS",
-            "NO",
-        ]
-        if self.country and self.country.code not in not_scoring_countries:
+        if (
+            self.country
+            and self.country.code not in self.SCORE_AUTO_NOT_SCORING_COUNTRIES
+        ):
             score += 1
 
         if self.underresourced:
             score += 1
 
-        # economics or social sciences, arts, humanities, library science, or
-        # chemistry
-        scoring_domains = [
-            "Humanities",
-            "Library and information science",
-            "Economics/business",
-            "Social sciences",
-            "Chemistry",
-        ]
-        for domain in self.domains.all():
-            if domain.name in scoring_domains:
-                score += 1
-                break
-
         # Changed in https://github.com/swcarpentry/amy/issues/1468:
         # +1 for underrepresented minority in research and/or computing
         if self.underrepresented == "yes":
             score += 1
 
-        # +1 for each previous involvement with The Carpentries (max. 3)
-        prev_inv_count = len(self.previous_involvement.all())
-        score += prev_inv_count if prev_inv_count <= 3 else 3
-
-        # previous training in teaching: "a certification or short course"
-        # or "a full degree"
-        if self.previous_training in ["course", "full"]:
+        if self.previous_training in self.SCORE_AUTO_PREVIOUS_TRAINING:
             score += 1
 
-        # previous experience in teaching: "TA for full course"
-        # or "primary instructor for full course"
-        if self.previous_experience in ["ta", "courses"]:
+        if self.previous_experience in self.SCORE_AUTO_PREVIOUS_EXPERIENCE:
             score += 1
 
-        # using tools "every day" or "a few times a week"
-        if self.programming_language_usage_frequency in ["daily", "weekly"]:
+        if (
+            self.programming_language_usage_frequency
+            in self.SCORE_AUTO_PROGRAMMING_LANGUAGE_USAGE_FREQUENCY
+        ):
             score += 1
 
         return score
 
-    def save(self, *args, **kwargs):
-        """Run recalculation upon save."""
-        inserted = False
+    def recalculate_score_auto(self):
+        """Calculate automatic score according to the rubric:
+        https://github.com/carpentries/instructor-training/blob/gh-pages/files/rubric.md
 
-        # save first so that there's an ID present
-        if not self.pk:
-            super().save(*args, **kwargs)
-            inserted = True
+        The same score is calculated for whole querysets in the database by
+        `TrainingRequestQuerySet.update_score_auto()`.
+        """
+        score = self.score_auto_from_fields()
 
-        score = self.recalculate_score_auto()
+        # +1 for any of the scoring domains
+        for domain in self.domains.all():
+            if domain.name in self.SCORE_AUTO_DOMAINS:
+                score += 1
+                break
 
-        if self.pk and score != self.score_auto:
-            self.score_auto = score
+        # +1 for each previous involvement with The Carpentries (max. 3)
+        score += min(
+            len(self.previous_involvement.all()),
+            self.SCORE_AUTO_MAX_PREVIOUS_INVOLVEMENT,
+        )
+
+        return score
 
-        # we cannot force insert for the second time - this time it should
-        # be an UPDATE query
-        if inserted and "force_insert" in kwargs:
-            kwargs.pop("force_insert")
+    def save(self, *args, **kwargs):
+        """Recalculate automatic score upon save.
 
+        Score for `domains` and `previous_involvement` is kept up to date in the
+        database by `m2m_changed` signal receiver, so only that part is fetched
+        (with a single query).  New requests don't have any related objects yet,
+        and are saved with a single INSERT."""
+        score = self.score_auto_from_fields()
+        if self.pk:
+            score += (
+                TrainingRequest.objects.filter(pk=self.pk)
+                .annotate(score_m2m=TrainingRequest.objects.score_auto_m2m_expression())
+                .values_list("score_m2m", flat=True)
+                .first()
+                or 0
+            )
+        self.score_auto = score
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -2454,6 +2733,441 @@ class TrainingProgress(CreatedUpdatedMixin, models.Model):
 # ------------------------------------------------------------
 
 
+class SummaryQuerySet(models.query.QuerySet):
+    """Base queryset of precomputed summaries, which have a one-to-one primary
+    key to the summarized object (e.g. person or event).
+
+    Subclasses implement `compute_batch()`, and may limit objects refreshed by
+    default by overriding `all_ids()`."""
+
+    # number of objects recomputed in a single batch
+    REFRESH_BATCH_SIZE = 1000
+
+    def all_ids(self):
+        """IDs of all objects which may need a summary."""
+        return self.model._meta.pk.related_model.objects.values_list("pk", flat=True)
+
+    def compute_batch(self, ids):
+        """Return new, unsaved summaries of objects with given IDs; objects
+        without a summary won't have one after the refresh."""
+        raise NotImplementedError
+
+    def refresh(self, ids=None):
+        """Recompute summaries of objects with given IDs (or all objects)."""
+        if ids is None:
+            ids = self.all_ids()
+        ids = sorted(set(ids))
+
+        for start in range(0, len(ids), self.REFRESH_BATCH_SIZE):
+            end = start + self.REFRESH_BATCH_SIZE
+            batch = ids[start:end]
+            summaries = self.compute_batch(batch)
+            with transaction.atomic():
+                self.filter(pk__in=batch).delete()
+                self.bulk_create(summaries)
+
+
+class InstructorEligibilityQuerySet(SummaryQuerySet):
+    def all_ids(self):
+        # persons without any progress, award or summary can be skipped
+        return (
+            TrainingProgress.objects.values_list("trainee", flat=True)
+            .union(Award.objects.values_list("person", flat=True))
+            .union(self.values_list("person", flat=True))
+        )
+
+    def compute_batch(self, person_ids):
+        """Only persons with any passed training progress or badge awarded get
+        a summary."""
+
+        def passed(*requirements):
+            return Count("pk", filter=Q(requirement__name__in=requirements))
+
+        def has_badge(*badges):
+            return Count("pk", filter=Q(badge__name__in=badges))
+
+        progress = (
+            TrainingProgress.objects.filter(
+                trainee__in=person_ids, state="p", discarded=False
+            )
+            .order_by()
+            .values("trainee")
+            .annotate(
+                passed_training=passed("Training"),
+                passed_swc_homework=passed("SWC Homework"),
+                passed_dc_homework=passed("DC Homework"),
+                passed_lc_homework=passed("LC Homework"),
+                passed_discussion=passed("Discussion"),
+                passed_swc_demo=passed("SWC Demo"),
+                passed_dc_demo=passed("DC Demo"),
+                passed_lc_demo=passed("LC Demo"),
+                passed_homework=passed("SWC Homework", "DC Homework", "LC Homework"),
+                passed_demo=passed("SWC Demo", "DC Demo", "LC Demo"),
+            )
+        )
+        badges = (
+            Award.objects.filter(person__in=person_ids)
+            .order_by()
+            .values("person")
+            .annotate(
+                is_swc_instructor=has_badge("swc-instructor"),
+                is_dc_instructor=has_badge("dc-instructor"),
+                is_lc_instructor=has_badge("lc-instructor"),
+                is_instructor=has_badge(*Badge.INSTRUCTOR_BADGES),
+            )
+        )
+
+        summaries = {}
+        for row in progress:
+            person_id = row.pop("trainee")
+            summaries[person_id] = self.model(person_id=person_id, **row)
+        for row in badges:
+            person_id = row.pop("person")
+            summary = summaries.setdefault(person_id, self.model(person_id=person_id))
+            for field, value in row.items():
+                setattr(summary, field, value)
+
+        for summary in summaries.values():
+            # We're using Maths to calculate "binary" score for a person to
+            # be instructor badge eligible. Legend:
+            # * means "AND"
+            # + means "OR"
+            summary.instructor_eligible = (
+                summary.passed_training
+                * summary.passed_discussion
+                * summary.passed_homework
+                * summary.passed_demo
+            )
+
+        return summaries.values()
+
+
+class InstructorEligibility(models.Model):
+    """Precomputed per-person numbers of passed training requirements and
+    instructor badges.
+
+    Kept up to date by signal receivers whenever `TrainingProgress` or `Award`
+    changes; use `InstructorEligibility.objects.refresh()` after bulk updates."""
+
+    person = models.OneToOneField(
+        Person,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="instructor_eligibility",
+    )
+
+    passed_training = models.PositiveIntegerField(default=0)
+    passed_swc_homework = models.PositiveIntegerField(default=0)
+    passed_dc_homework = models.PositiveIntegerField(default=0)
+    passed_lc_homework = models.PositiveIntegerField(default=0)
+    passed_discussion = models.PositiveIntegerField(default=0)
+    passed_swc_demo = models.PositiveIntegerField(default=0)
+    passed_dc_demo = models.PositiveIntegerField(default=0)
+    passed_lc_demo = models.PositiveIntegerField(default=0)
+    passed_homework = models.PositiveIntegerField(default=0)
+    passed_demo = models.PositiveIntegerField(default=0)
+    instructor_eligible = models.PositiveIntegerField(default=0)
+
+    is_swc_instructor = models.PositiveIntegerField(default=0)
+    is_dc_instructor = models.PositiveIntegerField(default=0)
+    is_lc_instructor = models.PositiveIntegerField(default=0)
+    is_instructor = models.PositiveIntegerField(default=0)
+
+    objects = InstructorEligibilityQuerySet.as_manager()
+
+    PROGRESS_FIELDS = (
+        "passed_training",
+        "passed_swc_homework",
+        "passed_dc_homework",
+        "passed_lc_homework",
+        "passed_discussion",
+        "passed_swc_demo",
+        "passed_dc_demo",
+        "passed_lc_demo",
+        "passed_homework",
+        "passed_demo",
+        "instructor_eligible",
+    )
+    BADGE_FIELDS = (
+        "is_swc_instructor",
+        "is_dc_instructor",
+        "is_lc_instructor",
+        "is_instructor",
+    )
+
+    def __str__(self):
+        return "Instructor eligibility of {}".format(self.person)
+
+
+class PersonActivityQuerySet(SummaryQuerySet):
+    def all_ids(self):
+        # persons without any task, award or summary can be skipped
+        return (
+            Task.objects.values_list("person", flat=True)
+            .union(Award.objects.values_list("person", flat=True))
+            .union(self.values_list("person", flat=True))
+        )
+
+    def compute_batch(self, person_ids):
+        """Only persons with any task or trainer badge awarded get a
+        summary."""
+
+        def role_count(name):
+            return Count("pk", filter=Q(role__name=name))
+
+        # learner tasks at TTT events which didn't stall
+        trainee_tasks = Task.objects.filter(
+            person__in=person_ids, role__name="learner", event__tags__name="TTT"
+        ).exclude(event__tags__name="stalled")
+
+        tasks = (
+            Task.objects.filter(person__in=person_ids)
+            .order_by()
+            .values("person")
+            .annotate(
+                num_taught=role_count("instructor"),
+                num_supporting=role_count("supporting-instructor"),
+                num_helper=role_count("helper"),
+                num_learner=role_count("learner"),
+                num_organizer=role_count("organizer"),
+                is_trainee=Count("pk", filter=Q(pk__in=trainee_tasks.values("pk"))),
+            )
+        )
+        badges = (
+            Award.objects.filter(person__in=person_ids)
+            .order_by()
+            .values("person")
+            .annotate(
+                is_trainer=Count("pk", filter=Q(badge__name="trainer")),
+                num_important_badges=Count(
+                    "pk", filter=Q(badge__name__in=Badge.IMPORTANT_BADGES)
+                ),
+            )
+        )
+
+        summaries = {}
+        for row in tasks:
+            person_id = row.pop("person")
+            summaries[person_id] = self.model(person_id=person_id, **row)
+        for row in badges:
+            person_id = row["person"]
+            # trainees are only persons who aren't instructors or trainers yet
+            if row["num_important_badges"] and person_id in summaries:
+                summaries[person_id].is_trainee = 0
+            if row["is_trainer"]:
+                summary = summaries.setdefault(
+                    person_id, self.model(person_id=person_id)
+                )
+                summary.is_trainer = row["is_trainer"]
+
+        return summaries.values()
+
+
+class PersonActivity(models.Model):
+    """Precomputed per-person numbers of tasks in each role, and trainee and
+    trainer status.
+
+    Kept up to date by signal receivers whenever `Task` or `Award` changes; use
+    `PersonActivity.objects.refresh()` after bulk updates."""
+
+    person = models.OneToOneField(
+        Person,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="activity",
+    )
+
+    num_taught = models.PositiveIntegerField(default=0)
+    num_supporting = models.PositiveIntegerField(default=0)
+    num_helper = models.PositiveIntegerField(default=0)
+    num_learner = models.PositiveIntegerField(default=0)
+    num_organizer = models.PositiveIntegerField(default=0)
+    # number of learner tasks at TTT events that didn't stall; always 0 for
+    # persons with any of `Badge.IMPORTANT_BADGES`
+    is_trainee = models.PositiveIntegerField(default=0)
+    is_trainer = models.PositiveIntegerField(default=0)
+
+    objects = PersonActivityQuerySet.as_manager()
+
+    FIELDS = (
+        "num_taught",
+        "num_supporting",
+        "num_helper",
+        "num_learner",
+        "num_organizer",
+        "is_trainee",
+        "is_trainer",
+    )
+
+    def __str__(self):
+        return "Activity of {}".format(self.person)
+
+
+class EventIssuesQuerySet(SummaryQuerySet):
+    def compute_batch(self, event_ids):
+        """Only active events with any issue get a row."""
+        events = (
+            Event.objects.filter(pk__in=event_ids)
+            .active()
+            .annotate(
+                num_instructors=Count("task", filter=Q(task__role__name="instructor"))
+            )
+            .attendance()
+            .order_by()
+            .values(
+                "pk",
+                "num_instructors",
+                "attendance",
+                "start",
+                "end",
+                *self.model.LOCATION_FIELDS,
+            )
+        )
+
+        issues = []
+        for row in events:
+            issue = self.model(
+                event_id=row["pk"],
+                num_instructors=row["num_instructors"],
+                missing_attendance=not row["attendance"],
+                missing_location=any(
+                    row[field] is None for field in self.model.LOCATION_FIELDS
+                )
+                or any(row[field] == "" for field in self.model.TEXT_LOCATION_FIELDS),
+                bad_dates=bool(
+                    row["start"] and row["end"] and row["start"] > row["end"]
+                ),
+            )
+            if issue.has_issues:
+                issues.append(issue)
+
+        return issues
+
+
+class EventIssues(models.Model):
+    """Precomputed issues of active events which need attention of admins
+    (see `reports.views.workshop_issues`).
+
+    Kept up to date by signal receivers whenever `Event` or its tasks change;
+    use `EventIssues.objects.refresh()` after bulk updates."""
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="issues",
+    )
+
+    num_instructors = models.PositiveIntegerField(default=0)
+    missing_attendance = models.BooleanField(default=False)
+    missing_location = models.BooleanField(default=False)
+    bad_dates = models.BooleanField(default=False)
+
+    objects = EventIssuesQuerySet.as_manager()
+
+    FIELDS = ("num_instructors", "missing_attendance", "missing_location", "bad_dates")
+    LOCATION_FIELDS = ("country", "venue", "address", "latitude", "longitude")
+    # location fields which are missing when empty, too (empty country isn't)
+    TEXT_LOCATION_FIELDS = ("venue", "address")
+
+    def __str__(self):
+        return "Issues of {}".format(self.event)
+
+    @property
+    def has_issues(self):
+        return (
+            self.num_instructors == 0
+            or self.missing_attendance
+            or self.missing_location
+            or self.bad_dates
+        )
+
+
+class PersonIssuesQuerySet(SummaryQuerySet):
+    def all_ids(self):
+        # persons without any award, task or issues can be skipped
+        return (
+            Award.objects.values_list("person", flat=True)
+            .union(Task.objects.values_list("person", flat=True))
+            .union(self.values_list("person", flat=True))
+        )
+
+    def compute_batch(self, person_ids):
+        """Only persons with any issue get a row."""
+        instructors = set(
+            Award.objects.filter(
+                person__in=person_ids, badge__name__in=Badge.INSTRUCTOR_BADGES
+            ).values_list("person", flat=True)
+        )
+        missing_airport = set(
+            Person.objects.filter(pk__in=instructors, airport=None).values_list(
+                "pk", flat=True
+            )
+        )
+
+        # everyone who's been in instructor training but doesn't yet have a badge
+        training_tasks = (
+            Task.objects.filter(
+                person__in=person_ids, role__name="learner", event__tags__name="TTT"
+            )
+            .exclude(person__in=instructors)
+            .order_by()
+        )
+        pending = set(
+            training_tasks.exclude(event__tags__name="stalled").values_list(
+                "person", flat=True
+            )
+        )
+        stalled = (
+            set(
+                training_tasks.filter(event__tags__name="stalled").values_list(
+                    "person", flat=True
+                )
+            )
+            - pending
+        )
+
+        return [
+            self.model(
+                person_id=person_id,
+                missing_airport=person_id in missing_airport,
+                pending_trainee=person_id in pending,
+                stalled_trainee=person_id in stalled,
+            )
+            for person_id in sorted(missing_airport | pending | stalled)
+        ]
+
+
+class PersonIssues(models.Model):
+    """Precomputed issues of instructors and trainees which need attention of
+    admins (see `reports.views.instructor_issues`).
+
+    Kept up to date by signal receivers whenever `Person`, `Award` or `Task`
+    changes; use `PersonIssues.objects.refresh()` after bulk updates."""
+
+    person = models.OneToOneField(
+        Person,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="issues",
+    )
+
+    # instructor without an airport
+    missing_airport = models.BooleanField(default=False)
+    # learner at an instructor training, without an instructor badge
+    pending_trainee = models.BooleanField(default=False)
+    # learner only at stalled instructor trainings, without an instructor badge
+    stalled_trainee = models.BooleanField(default=False)
+
+    objects = PersonIssuesQuerySet.as_manager()
+
+    def __str__(self):
+        return "Issues of {}".format(self.person)
+
+
+# ------------------------------------------------------------
+
+
 class CurriculumManager(models.Manager):
     def default_order(
         self,
@@ -1,8 +1,40 @@
 import logging
 
 from django.contrib.auth.signals import user_login_failed
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.http.request import HttpRequest
+import django_rq
+
+from workshops.jobs import (
+    refresh_badge_summaries_job,
+    refresh_requirement_summaries_job,
+    refresh_role_summaries_job,
+    refresh_tag_summaries_job,
+)
+from workshops.lookups import LOOKUP_CACHED_MODELS, bump_lookup_cache_version
+from workshops.models import (
+    Award,
+    Badge,
+    Event,
+    EventIssues,
+    InstructorEligibility,
+    Person,
+    PersonActivity,
+    PersonIssues,
+    Role,
+    Tag,
+    Task,
+    TrainingProgress,
+    TrainingRequirement,
+)
+from workshops.util import (
+    PAGINATOR_COUNT_CACHED_MODELS,
+    bump_paginator_count_cache_version,
+    refresh_summaries_on_commit,
+    summary_refresh_is_suspended,
+)
 
 # AMY server logger
 logger = logging.getLogger("amy.server_logs")
@@ -16,3 +48,172 @@ def log_user_login_failed(sender, **kwargs):
     ip = request.META.get("REMOTE_ADDR") or "UNKNOWN"
     msg = f"Login failure from IP {ip}"
     logger.error(msg)
+
+
+# invalidate cached results of lookup views when any of searched models change
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def invalidate_lookup_cache(sender, **kwargs):
+    if sender in LOOKUP_CACHED_MODELS:
+        bump_lookup_cache_version(sender)
+
+
+# invalidate cached counts of objects paginated in list views
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_paginator_count_cache(sender, **kwargs):
+    if sender in PAGINATOR_COUNT_CACHED_MODELS:
+        bump_paginator_count_cache_version(sender)
+
+
+# models affecting `InstructorEligibility`, with their field pointing to person
+INSTRUCTOR_ELIGIBILITY_SOURCES = {
+    TrainingProgress: "trainee_id",
+    Award: "person_id",
+}
+
+
+# models affecting `PersonActivity`, with their field pointing to person
+PERSON_ACTIVITY_SOURCES = {
+    Task: "person_id",
+    Award: "person_id",
+}
+
+
+# remember previous person, so that their eligibility and activity are refreshed
+# too when progress or award is reassigned to someone else
+@receiver(pre_save, sender=TrainingProgress)
+@receiver(pre_save, sender=Award)
+def remember_instructor_eligibility_person(sender, instance, raw=False, **kwargs):
+    field = INSTRUCTOR_ELIGIBILITY_SOURCES[sender]
+    instance._previous_person_id = None
+    if not raw and instance.pk:
+        instance._previous_person_id = (
+            sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+        )
+
+
+@receiver(post_save, sender=TrainingProgress)
+@receiver(post_delete, sender=TrainingProgress)
+@receiver(post_save, sender=Award)
+@receiver(post_delete, sender=Award)
+def refresh_instructor_eligibility(sender, instance, raw=False, **kwargs):
+    if raw or summary_refresh_is_suspended():
+        return
+    person_ids = {getattr(instance, INSTRUCTOR_ELIGIBILITY_SOURCES[sender])}
+    previous_person_id = getattr(instance, "_previous_person_id", None)
+    if previous_person_id:
+        person_ids.add(previous_person_id)
+    refresh_summaries_on_commit(InstructorEligibility, person_ids)
+
+
+def enqueue_on_commit(job, *args):
+    # the job can only see changes once they're committed
+    transaction.on_commit(lambda: django_rq.get_queue("default").enqueue(job, *args))
+
+
+# requirements, badges, roles and tags are matched by name, so renaming them
+# affects many persons and events; these are refreshed in Redis Queue jobs
+@receiver(post_save, sender=TrainingRequirement)
+def refresh_requirement_summaries(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        enqueue_on_commit(refresh_requirement_summaries_job, instance.pk)
+
+
+@receiver(post_save, sender=Badge)
+def refresh_badge_summaries(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        enqueue_on_commit(refresh_badge_summaries_job, instance.pk)
+
+
+@receiver(post_save, sender=Role)
+def refresh_role_summaries(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        enqueue_on_commit(refresh_role_summaries_job, instance.pk)
+
+
+@receiver(post_save, sender=Tag)
+def refresh_tag_summaries(sender, instance, raw=False, created=False, **kwargs):
+    if not raw and not created:
+        enqueue_on_commit(refresh_tag_summaries_job, instance.pk)
+
+
+def refresh_person_summaries_on_commit(person_ids):
+    person_ids = set(person_ids)
+    refresh_summaries_on_commit(PersonActivity, person_ids)
+    refresh_summaries_on_commit(PersonIssues, person_ids)
+
+
+# remember previous person and event, so that their summaries are refreshed too
+# when task is reassigned to someone else or moved to another event
+@receiver(pre_save, sender=Task)
+def remember_task_person_and_event(sender, instance, raw=False, **kwargs):
+    instance._previous_person_id = None
+    instance._previous_event_id = None
+    if not raw and instance.pk:
+        previous = (
+            Task.objects.filter(pk=instance.pk)
+            .values_list("person_id", "event_id")
+            .first()
+        )
+        if previous:
+            instance._previous_person_id, instance._previous_event_id = previous
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Award)
+@receiver(post_delete, sender=Award)
+def refresh_task_and_award_summaries(sender, instance, raw=False, **kwargs):
+    if raw or summary_refresh_is_suspended():
+        return
+    person_ids = {getattr(instance, PERSON_ACTIVITY_SOURCES[sender])}
+    previous_person_id = getattr(instance, "_previous_person_id", None)
+    if previous_person_id:
+        person_ids.add(previous_person_id)
+    refresh_person_summaries_on_commit(person_ids)
+
+    if sender is Task:
+        event_ids = {instance.event_id}
+        previous_event_id = getattr(instance, "_previous_event_id", None)
+        if previous_event_id:
+            event_ids.add(previous_event_id)
+        refresh_summaries_on_commit(EventIssues, event_ids)
+
+
+@receiver(post_save, sender=Event)
+def refresh_event_issues(sender, instance, raw=False, **kwargs):
+    # events are saved along with their tasks, whose receiver refreshes them
+    if not raw and not getattr(instance, "_saved_for_task", False):
+        refresh_summaries_on_commit(EventIssues, [instance.pk])
+
+
+@receiver(post_save, sender=Person)
+def refresh_person_issues(sender, instance, raw=False, update_fields=None, **kwargs):
+    # e.g. logging in only updates `last_login`
+    if not raw and (update_fields is None or "airport" in update_fields):
+        refresh_summaries_on_commit(PersonIssues, [instance.pk])
+
+
+# activity, trainee status and issues depend on tags of the event
+@receiver(m2m_changed, sender=Event.tags.through)
+def refresh_event_tags_summaries(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        event_ids = [instance.pk]
+    elif reverse and action in ("post_add", "post_remove"):
+        event_ids = pk_set
+    elif reverse and action == "pre_clear":
+        # events of the tag are unknown after it's cleared
+        instance._cleared_event_ids = set(
+            instance.event_set.values_list("pk", flat=True)
+        )
+        return
+    elif reverse and action == "post_clear":
+        event_ids = getattr(instance, "_cleared_event_ids", set())
+    else:
+        return
+    refresh_summaries_on_commit(EventIssues, event_ids)
+    refresh_person_summaries_on_commit(
+        Task.objects.filter(event__in=event_ids).values_list("person_id", flat=True)
+    )
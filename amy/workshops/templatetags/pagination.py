@@ -4,14 +4,14 @@ register = template.Library()
 
 
 @register.inclusion_tag("pagination.html", takes_context=True)
-def pagination(context, objects):
+def pagination(context, objects, page_param="page"):
     # needed in set_page_query that's only called from 'pagination.html'
     request = context["request"]
-    return {"objects": objects, "request": request}
+    return {"objects": objects, "request": request, "page_param": page_param}
 
 
 @register.simple_tag(takes_context=True)
 def set_page_query(context, page):
     query = context["request"].GET.copy()
-    query["page"] = str(page)
+    query[context.get("page_param", "page")] = str(page)
     return query.urlencode()
@@ -1,5 +1,6 @@
 import datetime
 from typing import Iterable, Optional
+from unittest.mock import patch
 
 from django.contrib.auth.models import Group, Permission
 from django.contrib.sites.models import Site
@@ -63,8 +64,32 @@ class SuperuserMixin:
         self.client.login(username=self.admin.username, password=self.admin_password)
 
 
+class RefreshSummariesMixin:
+    """Precomputed summaries are refreshed when the transaction commits, which
+    never happens in test cases (they run in a transaction); this mixin makes
+    signal receivers refresh them right away instead."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._summaries_patcher = patch(
+            "workshops.receivers.refresh_summaries_on_commit",
+            lambda model, ids: model.objects.refresh(ids),
+        )
+        cls._summaries_patcher.start()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._summaries_patcher.stop()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._summaries_patcher.stop()
+
+
 class TestBase(
-    SuperuserMixin, WebTest
+    RefreshSummariesMixin, SuperuserMixin, WebTest
 ):  # Support for functional tests (django-webtest)
     """Base class for AMY test cases."""
 
@@ -84,3 +84,48 @@ class TestAirport(TestBase):
         See #1193."""
         first_airport = Airport.objects.all()[0]
         assert first_airport.iata == "AAA"
+
+
+class TestAirportDistance(TestBase):
+    def setUp(self):
+        self.airports = {
+            (lat, lng): Airport.objects.create(
+                iata="{}x{}".format(lat, lng),
+                fullname="Airport {}x{}".format(lat, lng),
+                latitude=lat,
+                longitude=lng,
+            )
+            for lat, lng in [(0, 179), (0, -179), (0, 170), (89, 0), (89, 180), (0, 0)]
+        }
+
+    def within_distance(self, lat, lng, distance):
+        return {
+            (airport.latitude, airport.longitude)
+            for airport in Airport.objects.within_distance(lat, lng, distance)
+        }
+
+    def test_distance(self):
+        airport = Airport.objects.annotate_with_distance(0, 1).get(iata="0x0")
+        # one degree of a great circle
+        self.assertAlmostEqual(airport.distance, 111.19, places=2)
+
+    def test_within_distance_across_antimeridian(self):
+        self.assertEqual(self.within_distance(0, 180, 200), {(0, 179), (0, -179)})
+        self.assertEqual(
+            self.within_distance(0, -178, 1400), {(0, 179), (0, -179), (0, 170)}
+        )
+
+    def test_within_distance_around_pole(self):
+        self.assertEqual(self.within_distance(90, 0, 200), {(89, 0), (89, 180)})
+        # 2 degrees apart through the pole, not 180 degrees along the parallel
+        self.assertEqual(self.within_distance(89, 180, 300), {(89, 0), (89, 180)})
+
+    def test_nearest(self):
+        nearest = Airport.objects.nearest(0, -178, 3, distance=100)
+        self.assertEqual(
+            [airport.iata for airport in nearest], ["0x-179", "0x179", "0x170"]
+        )
+        # all airports when there aren't enough of them
+        self.assertEqual(
+            len(Airport.objects.nearest(0, 0, 100)), Airport.objects.count()
+        )
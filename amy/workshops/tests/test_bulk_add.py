@@ -4,25 +4,32 @@ from datetime import date, timedelta
 from io import StringIO
 
 from django.contrib.sessions.serializers import JSONSerializer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from autoemails.models import EmailTemplate, RQJob, Trigger
 from autoemails.tests.base import FakeRedisTestCaseMixin
+from consents.models import Term
 from workshops.models import Event, Organization, Person, Role, Tag, Task
 from workshops.tests.base import TestBase
-from workshops.util import upload_person_task_csv, verify_upload_person_task
+from workshops.util import (
+    create_uploaded_persons_tasks,
+    upload_person_task_csv,
+    verify_upload_person_task,
+)
 import workshops.views
 
 
 class UploadPersonTaskCSVTestCase(TestBase):
     def compute_from_string(self, csv_str):
-        """ wrap up buffering the raw string & parsing """
+        """wrap up buffering the raw string & parsing"""
         csv_buf = StringIO(csv_str)
         # compute and return
         return upload_person_task_csv(csv_buf)
 
     def test_basic_parsing(self):
-        """ See Person.PERSON_UPLOAD_FIELDS for field ordering """
+        """See Person.PERSON_UPLOAD_FIELDS for field ordering"""
         csv = """personal,family,email
 john,doe,johndoe@email.com
 jane,doe,janedoe@email.com"""
@@ -35,14 +42,14 @@ jane,doe,janedoe@email.com"""
         self.assertTrue(set(person.keys()).issuperset(set(Person.PERSON_UPLOAD_FIELDS)))
 
     def test_csv_without_required_field(self):
-        """ All fields in Person.PERSON_UPLOAD_FIELDS must be in csv """
+        """All fields in Person.PERSON_UPLOAD_FIELDS must be in csv"""
         bad_csv = """personal,family
 john,doe"""
         person_tasks, empty_fields = self.compute_from_string(bad_csv)
         self.assertTrue("email" in empty_fields)
 
     def test_csv_with_mislabeled_field(self):
-        """ It pays to be strict """
+        """It pays to be strict"""
         bad_csv = """personal,family,emailaddress
 john,doe,john@doe.com"""
         person_tasks, empty_fields = self.compute_from_string(bad_csv)
@@ -58,7 +65,7 @@ john,doe,john@doe.com
         self.assertEqual(person["personal"], "john")
 
     def test_empty_field(self):
-        """ Ensure we don't mis-order fields given blank data """
+        """Ensure we don't mis-order fields given blank data"""
         csv = """personal,family,email
 john,,johndoe@email.com"""
         person_tasks, _ = self.compute_from_string(csv)
@@ -290,12 +297,23 @@ class VerifyUploadPersonTask(CSVBulkUploadTestBase):
         self.assertEqual(data[0]["similar_persons"][0][0], self.harry.pk)
         self.assertEqual(data[1]["similar_persons"][0][0], self.ron.pk)
 
+    def test_new_person_verified_on_first_pass(self):
+        """Ensure rows of new persons, which come without usernames, pass
+        verification and get usernames generated."""
+        data = self.make_data()
+        self.assertEqual(data[0]["username"], "")
+        has_errors = verify_upload_person_task(data)
+        self.assertFalse(has_errors)
+        self.assertEqual(data[0]["errors"], [])
+        self.assertTrue(data[0]["username"])
+
     def test_duplicate_errors(self):
         """Ensure errors about duplicate person in the database are present."""
         data = self.make_data()
         data[0]["personal"] = "Harry"
         data[0]["family"] = "Potter"
         data[0]["email"] = "harry@hogwarts.edu"
+        data[0]["username"] = "potter_harry"
         verify_upload_person_task(data)
         self.assertEqual(len(data[0]["errors"]), 2)
         self.assertIn(
@@ -304,6 +322,71 @@ class VerifyUploadPersonTask(CSVBulkUploadTestBase):
         self.assertIn("Person with this username already exists.", data[0]["errors"])
 
 
+class BulkUploadQueriesTestCase(CSVBulkUploadTestBase):
+    """Ensure the number of queries doesn't depend on the number of rows."""
+
+    def make_rows(self, count, start=0):
+        csv_str = "personal,family,email,event,role\n" + "".join(
+            "Person,No{0},person{0}@example.org,foobar,learner\n".format(i)
+            for i in range(start, start + count)
+        )
+        data, _ = upload_person_task_csv(StringIO(csv_str))
+        return data
+
+    def count_queries(self, func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            func(*args, **kwargs)
+        return len(queries)
+
+    def test_verify_queries(self):
+        self.assertEqual(
+            self.count_queries(verify_upload_person_task, self.make_rows(2)),
+            self.count_queries(verify_upload_person_task, self.make_rows(20, start=2)),
+        )
+
+    def test_create_queries(self):
+        small, large = self.make_rows(2), self.make_rows(20, start=2)
+        large[0]["family"] = large[1]["family"] = "Twin"
+        for data in (small, large):
+            # the first verification generates usernames, like the upload view
+            verify_upload_person_task(data)
+            self.assertFalse(verify_upload_person_task(data))
+        # usernames must be unique within the upload
+        self.assertNotEqual(large[0]["username"], large[1]["username"])
+
+        small_queries = self.count_queries(create_uploaded_persons_tasks, small)
+        large_queries = self.count_queries(create_uploaded_persons_tasks, large)
+        self.assertEqual(small_queries, large_queries)
+
+        persons = Person.objects.filter(
+            email__startswith="person", email__endswith="@example.org"
+        )
+        self.assertEqual(persons.count(), 22)
+        self.assertEqual(
+            Task.objects.filter(person__in=persons, role__name="learner").count(), 22
+        )
+        # persons get unset consents like when they're saved one by one
+        for person in persons:
+            self.assertEqual(person.consent_set.count(), Term.objects.count(), person)
+
+    def test_create_repeated_task_once(self):
+        data = self.make_rows(1)
+        data.append(dict(data[0]))
+        data[1]["personal"] = data[1]["email"] = ""
+        verify_upload_person_task(data, match=True)
+        # second row is matched with the same person, once created
+        person = Person.objects.create(
+            personal="Person", family="No0", email="person0@example.org"
+        )
+        for row in data:
+            row.update(person_exists=True, existing_person_id=person.pk, errors=[])
+
+        _, tasks = create_uploaded_persons_tasks(data)
+
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(Task.objects.filter(person=person).count(), 1)
+
+
 class BulkUploadUsersViewTestCase(CSVBulkUploadTestBase):
     def setUp(self):
         super().setUp()
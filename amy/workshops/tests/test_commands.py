@@ -3,14 +3,22 @@
 These commands are run via `./manage.py command`."""
 
 from datetime import date, datetime, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import StringIO
+import threading
+import time as time_module
 import unittest
 from unittest.mock import MagicMock
 
+from django.core.cache.backends.locmem import LocMemCache
 from django.core.management import call_command
 from faker import Faker
 import requests_mock
 
+from workshops.github_heads import GithubHeadsResolver
+from workshops.management.commands.benchmark_lookups import (
+    Command as BenchmarkLookupsCommand,
+)
 from workshops.management.commands.check_for_workshop_websites_updates import (
     Command as WebsiteUpdatesCommand,
 )
@@ -23,7 +31,7 @@ from workshops.management.commands.fake_database import Command as FakeDatabaseC
 from workshops.management.commands.instructors_activity import (
     Command as InstructorsActivityCommand,
 )
-from workshops.models import Badge, Event, Organization, Role, Task
+from workshops.models import Badge, Event, Organization, Person, Role, Task
 from workshops.tests.base import TestBase
 
 
@@ -139,6 +147,31 @@ class TestInstructorsActivityCommand(TestBase):
         self.assertEqual(set(persons), set(expecting_persons))
 
 
+class TestBenchmarkLookupsCommand(TestBase):
+    def setUp(self):
+        super().setUp()
+        self.cmd = BenchmarkLookupsCommand()
+
+    def test_fake_persons(self):
+        count = Person.objects.count()
+        self.cmd.fake_persons(20, seed=1)
+        self.assertEqual(Person.objects.count(), count + 20)
+
+    def test_default_terms(self):
+        terms = self.cmd.default_terms(seed=1)
+        self.assertTrue(terms)
+        self.assertTrue(all(1 <= len(term) <= 4 for term in terms))
+
+    def test_running(self):
+        out = StringIO()
+        call_command(
+            "benchmark_lookups", persons=10, repeat=1, terms=["a", "abc"], stdout=out
+        )
+        output = out.getvalue()
+        for lookup in ["person-lookup", "award-lookup", "membership-lookup"]:
+            self.assertIn(lookup, output)
+
+
 class TestWebsiteUpdatesCommand(TestBase):
     maxDiff = None
 
@@ -253,16 +286,18 @@ class TestWebsiteUpdatesCommand(TestBase):
 
     @requests_mock.Mocker()
     def test_getting_event_metadata(self, mock):
-        """Ensure metadata are fetched and normalized by `get_event_metadata`."""
+        """Ensure metadata are fetched and normalized by
+        `get_event_metadata_if_modified`."""
         # underlying `fetch_event_metadata` and `parse_metadata_from_event_website`
         # are tested in great detail in `test_util.py`, so here's just a short
         # test
         website_url = "https://github.com/swcarpentry/workshop-template"
         mock_text = self.mocked_event_page
         mock.get(website_url, text=mock_text, status_code=200)
-        # mock placed, let's test `get_event_metadata`
+        # mock placed, let's test `get_event_metadata_if_modified`
 
-        metadata = self.cmd.get_event_metadata(website_url)
+        event = Event(url=website_url)
+        metadata = self.cmd.get_event_metadata_if_modified(event)
         self.assertEqual(metadata, self.expected_metadata_parsed)
 
     def test_deserialization_of_string(self):
@@ -318,11 +353,69 @@ class TestWebsiteUpdatesCommand(TestBase):
         deserialized_data = self.cmd.deserialize(serialized_json)
         self.assertEqual(deserialized_data, self.expected_metadata_parsed)
 
-    @unittest.skip("Don't know how to test it")
-    def test_loading_from_github(self):
-        """Not sure how to test it, so for now leaving this blank."""
-        # TODO: mock up github response?
-        pass
+    @requests_mock.Mocker()
+    def test_resolving_heads(self, mock):
+        """Ensure repository heads are resolved for events with correct URLs."""
+        e1 = Event.objects.create(
+            slug="event-1",
+            host=Organization.objects.first(),
+            url="https://swcarpentry.github.io/workshop-template/",
+        )
+        e2 = Event.objects.create(
+            slug="event-2",
+            host=Organization.objects.first(),
+            url="https://github.com/swcarpentry/missing-repository",
+        )
+        e3 = Event.objects.create(
+            slug="event-3",
+            host=Organization.objects.first(),
+            url="https://example.org/workshop/",
+        )
+        mock.post(
+            "https://api.github.com/graphql",
+            json={
+                "data": {
+                    "r0": {"ref": {"target": {"oid": "abcdef"}}},
+                    "r1": None,
+                },
+            },
+        )
+        self.cmd.token = "token"
+        self.cmd.get_heads_resolver = MagicMock(
+            return_value=GithubHeadsResolver(
+                "token", cache=LocMemCache("test-resolving-heads", {})
+            )
+        )
+
+        heads = self.cmd.resolve_heads([e1, e2, e3])
+
+        self.assertEqual(heads, {e1: "abcdef"})
+        self.assertEqual(mock.call_count, 1)
+
+    @requests_mock.Mocker()
+    def test_only_moved_heads_are_checked(self, mock):
+        """Ensure websites are fetched only for events with new commits."""
+        e1 = Event.objects.create(
+            slug="event-moved",
+            host=Organization.objects.first(),
+            url="https://swcarpentry.github.io/workshop-moved/",
+            repository_last_commit_hash="old",
+        )
+        e2 = Event.objects.create(
+            slug="event-not-moved",
+            host=Organization.objects.first(),
+            url="https://swcarpentry.github.io/workshop-not-moved/",
+            repository_last_commit_hash="old",
+        )
+        self.cmd.resolve_heads = MagicMock(return_value={e1: "new", e2: "old"})
+        mock.get(e1.url, text=self.mocked_event_page)
+
+        changes, events_to_save = self.cmd.check_events([e1, e2])
+
+        self.assertEqual(events_to_save, [e1])
+        self.assertEqual(e1.repository_last_commit_hash, "new")
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(mock.last_request.url, e1.url)
 
     @requests_mock.Mocker()
     def test_detecting_changes(self, mock):
@@ -337,16 +430,11 @@ class TestWebsiteUpdatesCommand(TestBase):
             metadata_changed=False,
         )
 
-        branch = MagicMock()
-        branch.commit = MagicMock()
-        branch.commit.sha = hash_
-
-        changes = self.cmd.detect_changes(branch, e)
+        changes = self.cmd.detect_changes(hash_, e)
         self.assertEqual(changes, [])
 
         # more real example: hash changed
         hash_ = "zyxwvutsrqponmlkjihgfedcba"
-        branch.commit.sha = hash_
         mock_text = self.mocked_event_page
         mock.get(e.url, text=mock_text, status_code=200)
         metadata = self.cmd.empty_metadata()
@@ -356,7 +444,7 @@ class TestWebsiteUpdatesCommand(TestBase):
         e.repository_metadata = self.cmd.serialize(metadata)
         e.save()
 
-        changes = self.cmd.detect_changes(branch, e)
+        changes = self.cmd.detect_changes(hash_, e)
         expected = [
             "Helpers changed",
             "Start date changed",
@@ -383,13 +471,10 @@ class TestWebsiteUpdatesCommand(TestBase):
         )
 
         hash_ = "abcdefghijklmnopqrstuvwxyz"
-        branch = MagicMock()
-        branch.commit = MagicMock()
-        branch.commit.sha = hash_
         mock_text = self.mocked_event_page
         mock.get(e.url, text=mock_text, status_code=200)
 
-        self.cmd.init(branch, e)
+        self.cmd.init(hash_, e)
 
         e.refresh_from_db()
         # metadata updated
@@ -401,7 +486,204 @@ class TestWebsiteUpdatesCommand(TestBase):
         self.assertEqual(e.metadata_all_changes, "")
         self.assertEqual(e.metadata_changed, False)
 
+    @requests_mock.Mocker()
+    def test_detecting_changes_not_modified(self, mock):
+        """Make sure website isn't downloaded again if it hasn't changed."""
+        e = Event.objects.create(
+            slug="not-modified",
+            host=Organization.objects.first(),
+            url="https://swcarpentry.github.io/workshop-template/",
+            repository_last_commit_hash="abcdefghijklmnopqrstuvwxyz",
+            repository_metadata="",
+            metadata_changed=False,
+            metadata_etag='"1234"',
+            metadata_last_modified="Mon, 13 Jul 2015 10:00:00 GMT",
+        )
+        mock.get(
+            e.url,
+            request_headers={"If-None-Match": '"1234"'},
+            status_code=304,
+        )
+
+        changes = self.cmd.detect_changes("zyxwvutsrqponmlkjihgfedcba", e)
+
+        self.assertEqual(changes, [])
+        self.assertEqual(
+            mock.last_request.headers["If-Modified-Since"],
+            "Mon, 13 Jul 2015 10:00:00 GMT",
+        )
+        e.refresh_from_db()
+        self.assertEqual(e.repository_last_commit_hash, "zyxwvutsrqponmlkjihgfedcba")
+        self.assertEqual(e.metadata_etag, '"1234"')
+        self.assertFalse(e.metadata_changed)
+
+    @requests_mock.Mocker()
+    def test_detecting_changes_stores_validators(self, mock):
+        """Make sure HTTP validators are stored when website is downloaded."""
+        e = Event.objects.create(
+            slug="with-validators",
+            host=Organization.objects.first(),
+            url="https://swcarpentry.github.io/workshop-template/",
+            repository_last_commit_hash="abcdefghijklmnopqrstuvwxyz",
+        )
+        mock.get(
+            e.url,
+            text=self.mocked_event_page,
+            headers={
+                "ETag": '"1234"',
+                "Last-Modified": "Mon, 13 Jul 2015 10:00:00 GMT",
+            },
+        )
+
+        self.cmd.detect_changes("zyxwvutsrqponmlkjihgfedcba", e, commit=False)
+
+        self.assertEqual(e.metadata_etag, '"1234"')
+        self.assertEqual(e.metadata_last_modified, "Mon, 13 Jul 2015 10:00:00 GMT")
+        self.assertNotIn("If-None-Match", mock.last_request.headers)
+
     @unittest.skip("This command requires internet connection")
     def test_running(self):
         """Test running whole command."""
         call_command("check_for_workshop_websites_updates")
+
+
+STUB_EVENT_PAGE = """
+<html><head>
+<meta name="slug" content="2015-07-13-test" />
+<meta name="startdate" content="2015-07-13" />
+<meta name="enddate" content="2015-07-14" />
+<meta name="instructor" content="Hermione Granger|Ron Weasley" />
+</head>
+<body>
+<h1>test</h1>
+</body></html>
+"""
+
+
+class StubWebsiteHandler(BaseHTTPRequestHandler):
+    """Serve the same workshop website under any path; support conditional
+    requests with ETag."""
+
+    page = ""
+    etag = '"v1"'
+    delay = 0.0
+
+    def do_GET(self):
+        time_module.sleep(self.delay)
+        with self.server.lock:
+            self.server.requests.append(self.path)
+
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = self.page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGithubCommand(WebsiteUpdatesCommand):
+    """Command with GitHub API replaced: every repository has the same head."""
+
+    sha = "0" * 40
+
+    def resolve_heads(self, events):
+        return {event: self.sha for event in events}
+
+
+class TestWebsiteUpdatesPipeline(TestBase):
+    """Benchmark-like tests for the concurrent pipeline, run against a local stub
+    HTTP server."""
+
+    def setUp(self):
+        super().setUp()
+        self.handler = type(
+            "Handler",
+            (StubWebsiteHandler,),
+            {"page": STUB_EVENT_PAGE, "delay": 0.1},
+        )
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host, port = self.server.server_address
+        self.events = [
+            Event.objects.create(
+                slug="stub-event-{}".format(i),
+                host=self.org_alpha,
+                url="http://{}:{}/stub-event-{}/".format(host, port, i),
+            )
+            for i in range(8)
+        ]
+        self.cmd = StubGithubCommand()
+        self.cmd.stdout = StringIO()
+
+    def run_pipeline(self, concurrency, initial_run=False):
+        start = time_module.perf_counter()
+        changes, events_to_save = self.cmd.check_events(
+            list(Event.objects.filter(slug__startswith="stub-event-")),
+            initial_run=initial_run,
+            concurrency=concurrency,
+        )
+        self.cmd.save_events(events_to_save)
+        return changes, events_to_save, time_module.perf_counter() - start
+
+    def test_concurrent_run_is_faster(self):
+        """Ensure websites are fetched in parallel."""
+        _, _, sequential = self.run_pipeline(concurrency=1, initial_run=True)
+        _, _, concurrent = self.run_pipeline(concurrency=8, initial_run=True)
+
+        # 8 requests, each taking 100ms
+        self.assertGreater(sequential, 0.8)
+        self.assertLess(concurrent, sequential / 2)
+
+    def test_unchanged_websites_return_not_modified(self):
+        """Ensure second run sends validators and gets only 304 responses."""
+        _, events_to_save, _ = self.run_pipeline(concurrency=4, initial_run=True)
+        self.assertEqual(len(events_to_save), 8)
+        self.assertEqual(
+            set(
+                Event.objects.filter(slug__startswith="stub-event-").values_list(
+                    "metadata_etag", flat=True
+                )
+            ),
+            {'"v1"'},
+        )
+
+        # new commit in every repository, but websites didn't change
+        self.cmd.sha = "1" * 40
+        self.server.requests.clear()
+        changes, events_to_save, _ = self.run_pipeline(concurrency=4)
+
+        self.assertEqual(changes, {})
+        self.assertEqual(len(events_to_save), 8)
+        self.assertEqual(len(self.server.requests), 8)
+        self.assertEqual(
+            set(
+                Event.objects.filter(slug__startswith="stub-event-").values_list(
+                    "repository_last_commit_hash", flat=True
+                )
+            ),
+            {"1" * 40},
+        )
+
+    def test_dry_run(self):
+        """Ensure nothing is saved in dry-run mode."""
+        self.cmd.check_events = MagicMock(return_value=({}, self.events))
+        self.cmd.save_events = MagicMock()
+
+        call_command(self.cmd, token="token", dry_run=True)
+
+        self.cmd.save_events.assert_not_called()
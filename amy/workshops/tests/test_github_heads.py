@@ -0,0 +1,160 @@
+import re
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+import requests_mock
+
+from workshops.github_heads import (
+    GITHUB_GRAPHQL_URL,
+    GithubHeadsError,
+    GithubHeadsResolver,
+)
+
+
+class FakeGithubGraphQL:
+    """Minimal fake of GitHub GraphQL API: answers aliased `repository` queries
+    with heads from `self.heads`."""
+
+    ALIAS_REGEX = re.compile(r"(?P<alias>r\d+): repository\(")
+
+    def __init__(self, heads):
+        self.heads = heads
+        self.queries = []
+
+    def __call__(self, request, context):
+        body = request.json()
+        self.queries.append(body)
+        variables = body["variables"]
+        branch = variables["branch"]
+
+        data = {}
+        for alias in self.ALIAS_REGEX.findall(body["query"]):
+            i = alias[1:]
+            # GitHub owners and repository names are case-insensitive
+            repository = (variables["owner" + i].lower(), variables["name" + i].lower())
+            try:
+                oid = self.heads[repository][branch]
+                data[alias] = {"ref": {"target": {"oid": oid}}}
+            except KeyError:
+                data[alias] = None
+        return {"data": data}
+
+
+class TestGithubHeadsResolver(TestCase):
+    def setUp(self):
+        self.fake = FakeGithubGraphQL(
+            {
+                ("carpentries", "workshop-{}".format(i)): {
+                    "refs/heads/gh-pages": "{:040d}".format(i),
+                }
+                for i in range(120)
+            }
+        )
+        self.cache = LocMemCache("test-github-heads", {})
+        self.cache.clear()
+        self.resolver = GithubHeadsResolver("token", chunk_size=50, cache=self.cache)
+
+    @requests_mock.Mocker()
+    def test_resolving_in_chunks(self, mock):
+        """Ensure repositories are resolved with one query per chunk."""
+        mock.post(GITHUB_GRAPHQL_URL, json=self.fake)
+        repositories = [("carpentries", "workshop-{}".format(i)) for i in range(120)]
+
+        heads = self.resolver.resolve(repositories)
+
+        self.assertEqual(len(heads), 120)
+        self.assertEqual(
+            heads[("carpentries", "workshop-7")],
+            "0000000000000000000000000000000000000007",
+        )
+        self.assertEqual(len(self.fake.queries), 3)
+        self.assertEqual(mock.last_request.headers["Authorization"], "bearer token")
+
+    @requests_mock.Mocker()
+    def test_duplicated_repositories_resolved_once(self, mock):
+        """Ensure repositories shared by many events are resolved only once."""
+        mock.post(GITHUB_GRAPHQL_URL, json=self.fake)
+        repositories = [("carpentries", "workshop-1")] * 5
+
+        heads = self.resolver.resolve(repositories)
+
+        self.assertEqual(list(heads.keys()), [("carpentries", "workshop-1")])
+        self.assertEqual(len(self.fake.queries), 1)
+        self.assertIn("owner0", self.fake.queries[0]["variables"])
+        self.assertNotIn("owner1", self.fake.queries[0]["variables"])
+
+    @requests_mock.Mocker()
+    def test_results_cached(self, mock):
+        """Ensure already resolved repositories are taken from cache."""
+        mock.post(GITHUB_GRAPHQL_URL, json=self.fake)
+
+        self.resolver.resolve([("carpentries", "workshop-1")])
+        heads = self.resolver.resolve(
+            [("carpentries", "workshop-1"), ("Carpentries", "workshop-2")]
+        )
+
+        self.assertEqual(len(heads), 2)
+        self.assertEqual(len(self.fake.queries), 2)
+        # only the missing repository was queried the second time
+        self.assertEqual(
+            self.fake.queries[1]["variables"],
+            {
+                "branch": "refs/heads/gh-pages",
+                "owner0": "Carpentries",
+                "name0": "workshop-2",
+            },
+        )
+
+    @requests_mock.Mocker()
+    def test_missing_repositories_skipped(self, mock):
+        """Ensure missing repositories or branches are left out of results."""
+        mock.post(GITHUB_GRAPHQL_URL, json=self.fake)
+
+        heads = self.resolver.resolve(
+            [("carpentries", "workshop-1"), ("carpentries", "missing")]
+        )
+
+        self.assertEqual(list(heads.keys()), [("carpentries", "workshop-1")])
+        self.assertIsNone(self.cache.get(self.resolver.cache_key(("a", "missing"))))
+
+    @requests_mock.Mocker()
+    def test_invalid_response(self, mock):
+        """Ensure response without data raises an error."""
+        mock.post(GITHUB_GRAPHQL_URL, json={"errors": [{"message": "Bad query"}]})
+
+        with self.assertRaises(GithubHeadsError):
+            self.resolver.fetch([("carpentries", "workshop-1")])
+
+    @requests_mock.Mocker()
+    def test_failed_chunk_skipped(self, mock):
+        """Ensure repositories from a chunk that failed to resolve are left out
+        of results, and other chunks are still resolved."""
+        mock.post(
+            GITHUB_GRAPHQL_URL,
+            [
+                {"status_code": 502},
+                {"json": {"errors": [{"message": "Bad query"}]}},
+                {"json": self.fake},
+            ],
+        )
+        repositories = [("carpentries", "workshop-{}".format(i)) for i in range(120)]
+
+        heads = self.resolver.resolve(repositories)
+
+        self.assertEqual(set(heads.keys()), set(repositories[100:]))
+        self.assertIsNone(self.cache.get(self.resolver.cache_key(repositories[0])))
+
+    @requests_mock.Mocker()
+    def test_failed_chunk_logged(self, mock):
+        """Ensure only repositories from the failed chunk are reported."""
+        mock.post(
+            GITHUB_GRAPHQL_URL,
+            [{"json": self.fake}, {"json": self.fake}, {"status_code": 502}],
+        )
+        repositories = [("carpentries", "workshop-{}".format(i)) for i in range(120)]
+
+        with self.assertLogs("amy.server_logs", level="WARNING") as logs:
+            self.resolver.resolve(repositories)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Failed to resolve heads of 20 repositories", logs.output[0])
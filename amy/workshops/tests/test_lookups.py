@@ -1,14 +1,30 @@
+import json
 from typing import Optional
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.handlers.wsgi import WSGIRequest
 from django.db.models import Q
 from django.http.response import Http404
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
 from django.urls import reverse
 
-from workshops.lookups import AwardLookupView, GenericObjectLookupView, urlpatterns
-from workshops.models import Award, Badge, Lesson, Person
+from workshops.fields import ModelSelect2Widget
+from workshops.lookups import (
+    AwardLookupView,
+    GenericObjectLookupView,
+    MembershipLookupView,
+    PersonLookupView,
+    urlpatterns,
+)
+from workshops.models import (
+    Award,
+    Badge,
+    Lesson,
+    Member,
+    MemberRole,
+    Membership,
+    Person,
+)
 from workshops.tests.base import (
     TestBase,
     TestViewPermissionsMixin,
@@ -105,6 +121,130 @@ class TestAwardLookupView(TestBase):
         )
 
 
+class TestLookupEngine(TestBase):
+    def setUpView(self, view_class, model, term="", page=None):
+        params = {"term": term}
+        if page is not None:
+            params["page"] = page
+        request = RequestFactory().get("/", params)
+        view = view_class(request=request, args=(), kwargs={})
+        widget = ModelSelect2Widget(model=model, data_view="test-lookup")
+        view.get_widget_or_404 = lambda: widget
+        return view
+
+    def get_results(self, view_class, model, term="", page=None):
+        view = self.setUpView(view_class, model, term=term, page=page)
+        response = view.get(view.request)
+        return json.loads(response.content.decode("utf-8"))
+
+    def test_results_limited_to_single_page(self):
+        # Arrange
+        Person.objects.bulk_create(
+            Person(
+                personal="Lookup",
+                family=f"Person{i:02d}",
+                username=f"lookup_person{i}",
+                email=f"lookup.person{i}@example.org",
+                github=None,
+            )
+            for i in range(30)
+        )
+        # Act
+        first = self.get_results(PersonLookupView, Person, term="lookup")
+        second = self.get_results(PersonLookupView, Person, term="lookup", page=2)
+        # Assert
+        self.assertEqual(len(first["results"]), 25)
+        self.assertTrue(first["more"])
+        self.assertEqual(len(second["results"]), 5)
+        self.assertFalse(second["more"])
+
+    def test_invalid_page(self):
+        view = self.setUpView(PersonLookupView, Person, page="invalid")
+        with self.assertRaises(Http404):
+            view.get(view.request)
+
+    def test_results_are_cached(self):
+        # Arrange
+        self._setUpUsersAndLogin()
+        self.get_results(PersonLookupView, Person, term="granger")
+        # Act
+        with self.assertNumQueries(0):
+            results = self.get_results(PersonLookupView, Person, term="Granger")
+        # Assert
+        self.assertEqual(
+            [result["id"] for result in results["results"]], [self.hermione.pk]
+        )
+
+    @override_settings(LOOKUP_CACHE_TIMEOUT=0)
+    def test_results_not_cached_when_disabled(self):
+        self._setUpUsersAndLogin()
+        self.get_results(PersonLookupView, Person, term="granger")
+        with self.assertNumQueries(1):
+            self.get_results(PersonLookupView, Person, term="granger")
+
+    def test_cache_invalidated_on_save(self):
+        # Arrange
+        self._setUpUsersAndLogin()
+        results = self.get_results(PersonLookupView, Person, term="granger")
+        self.assertEqual(len(results["results"]), 1)
+        # Act
+        Person.objects.create(
+            personal="Nobody", family="Granger", email="nobody@granger.org"
+        )
+        # Assert
+        results = self.get_results(PersonLookupView, Person, term="granger")
+        self.assertEqual(len(results["results"]), 2)
+
+    def test_short_terms_match_anywhere(self):
+        self._setUpUsersAndLogin()
+        prefix = self.get_results(PersonLookupView, Person, term="gr")
+        infix = self.get_results(PersonLookupView, Person, term="ng")
+        self.assertIn(self.hermione.pk, [r["id"] for r in prefix["results"]])
+        self.assertIn(self.hermione.pk, [r["id"] for r in infix["results"]])
+
+    def test_person_lookup_by_personal_and_family_name(self):
+        self._setUpUsersAndLogin()
+        view = self.setUpView(PersonLookupView, Person, term="Granger Hermione")
+        view.term = "Granger Hermione"
+        self.assertEqual(list(view.get_queryset()), [self.hermione])
+
+    def test_membership_lookup_by_organization(self):
+        # Arrange
+        membership = Membership.objects.create(
+            name="Alpha Membership",
+            variant="partner",
+            agreement_start="2021-01-01",
+            agreement_end="2022-01-01",
+            contribution_type="financial",
+        )
+        role = MemberRole.objects.first()
+        # two roles of the same organization used to yield duplicated results
+        for member_role in [role, MemberRole.objects.exclude(pk=role.pk).first()]:
+            Member.objects.create(
+                membership=membership, organization=self.org_alpha, role=member_role
+            )
+        view = self.setUpView(MembershipLookupView, Membership, term="alpha.edu")
+        view.term = "alpha.edu"
+        # Act
+        results = list(view.get_queryset())
+        # Assert
+        self.assertEqual(results, [membership])
+
+    def test_membership_lookup_by_agreement_date(self):
+        # Arrange
+        membership = Membership.objects.create(
+            name="Beta Membership",
+            variant="partner",
+            agreement_start="2021-01-01",
+            agreement_end="2022-01-01",
+            contribution_type="financial",
+        )
+        view = self.setUpView(MembershipLookupView, Membership, term="2021-06-01")
+        view.term = "2021-06-01"
+        # Act & Assert
+        self.assertIn(membership, view.get_queryset())
+
+
 class TestGenericObjectLookupView(TestBase):
     def setUpRequest(self, path: str) -> WSGIRequest:
         return RequestFactory().get(path)
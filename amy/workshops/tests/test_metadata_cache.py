@@ -0,0 +1,179 @@
+import itertools
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+import requests
+import requests_mock
+
+from workshops.metadata_cache import (
+    fetch_workshop_metadata_cached,
+    metadata_cache,
+    metadata_cache_key,
+    normalize_url,
+)
+from workshops.models import Event, Organization
+from workshops.tests.base import TestBase
+
+WEBSITE_URL = "https://carpentries.github.io/2015-07-13-test/"
+WEBSITE_CONTENT = """
+<html><head>
+<meta name="slug" content="2015-07-13-test" />
+<meta name="startdate" content="2015-07-13" />
+<meta name="enddate" content="2015-07-14" />
+</head><body></body></html>
+"""
+EXPECTED_METADATA = {
+    "slug": "2015-07-13-test",
+    "startdate": "2015-07-13",
+    "enddate": "2015-07-14",
+}
+
+
+class TestWorkshopMetadataCache(TestCase):
+    def setUp(self):
+        self.cache = metadata_cache()
+        self.key = metadata_cache_key(WEBSITE_URL)
+        self.cache.delete_many([self.key, "{}:lock".format(self.key)])
+
+    def tearDown(self):
+        self.cache.delete_many([self.key, "{}:lock".format(self.key)])
+        super().tearDown()
+
+    def test_normalize_url(self):
+        self.assertEqual(
+            normalize_url(" HTTPS://Carpentries.GitHub.io/2015-07-13-test#schedule "),
+            "https://carpentries.github.io/2015-07-13-test",
+        )
+        self.assertEqual(normalize_url("https://example.org"), "https://example.org/")
+        self.assertEqual(
+            metadata_cache_key("https://carpentries.github.io/2015-07-13-test"),
+            self.key,
+        )
+
+    @requests_mock.Mocker()
+    def test_website_fetched_once(self, mock):
+        """Ensure subsequent fetches of the same website reuse metadata."""
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT)
+
+        metadata1 = fetch_workshop_metadata_cached(WEBSITE_URL)
+        metadata2 = fetch_workshop_metadata_cached(
+            "https://carpentries.github.io/2015-07-13-test"
+        )
+
+        self.assertEqual(metadata1, EXPECTED_METADATA)
+        self.assertEqual(metadata2, EXPECTED_METADATA)
+        self.assertEqual(mock.call_count, 1)
+
+    @requests_mock.Mocker()
+    def test_revalidation(self, mock):
+        """Ensure cached HTTP validators are sent when revalidating metadata."""
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT, headers={"ETag": '"v1"'})
+        fetch_workshop_metadata_cached(WEBSITE_URL)
+
+        mock.get(WEBSITE_URL, status_code=304)
+        metadata = fetch_workshop_metadata_cached(WEBSITE_URL, revalidate=True)
+
+        self.assertEqual(metadata, EXPECTED_METADATA)
+        self.assertEqual(mock.call_count, 2)
+        self.assertEqual(mock.last_request.headers["If-None-Match"], '"v1"')
+
+    @requests_mock.Mocker()
+    def test_waiting_for_concurrent_fetch(self, mock):
+        """Ensure website being fetched by someone else isn't fetched again."""
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT)
+        self.cache.add("{}:lock".format(self.key), 1)
+
+        def concurrent_fetch_finished(seconds):
+            self.cache.set(
+                self.key,
+                dict(
+                    metadata=EXPECTED_METADATA,
+                    etag="",
+                    last_modified="",
+                    fetched_at=0,
+                ),
+            )
+
+        with patch("workshops.metadata_cache.time.sleep") as sleep:
+            sleep.side_effect = concurrent_fetch_finished
+            metadata = fetch_workshop_metadata_cached(WEBSITE_URL)
+
+        self.assertEqual(metadata, EXPECTED_METADATA)
+        self.assertEqual(mock.call_count, 0)
+
+    @requests_mock.Mocker()
+    def test_waiting_bounded_by_fetch_timeout(self, mock):
+        """Ensure website locked by a crashed fetch is fetched again once the
+        other fetch would have timed out."""
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT)
+        self.cache.add("{}:lock".format(self.key), 1)
+
+        with patch("workshops.metadata_cache.time") as mock_time:
+            # every check of the clock takes a second
+            mock_time.time.side_effect = itertools.count()
+            metadata = fetch_workshop_metadata_cached(WEBSITE_URL, timeout=1)
+
+        self.assertEqual(metadata, EXPECTED_METADATA)
+        self.assertEqual(mock.call_count, 1)
+        # waited for 2 * 1s + FETCH_LOCK_MARGIN
+        self.assertLessEqual(mock_time.sleep.call_count, 4)
+
+    @requests_mock.Mocker()
+    def test_failed_fetch(self, mock):
+        """Ensure errors aren't cached and don't block other fetches."""
+        mock.get(WEBSITE_URL, status_code=500)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            fetch_workshop_metadata_cached(WEBSITE_URL)
+        self.assertIsNone(self.cache.get("{}:lock".format(self.key)))
+
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT)
+        self.assertEqual(fetch_workshop_metadata_cached(WEBSITE_URL), EXPECTED_METADATA)
+
+    @override_settings(WORKSHOP_METADATA_CACHE_TIMEOUT=0)
+    @requests_mock.Mocker()
+    def test_cache_disabled(self, mock):
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT)
+
+        fetch_workshop_metadata_cached(WEBSITE_URL)
+        fetch_workshop_metadata_cached(WEBSITE_URL)
+
+        self.assertEqual(mock.call_count, 2)
+        self.assertIsNone(self.cache.get(self.key))
+
+
+class TestValidateEventRevalidatesMetadata(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._setUpUsersAndLogin()
+        self.event = Event.objects.create(
+            slug="2015-07-13-test",
+            host=Organization.objects.first(),
+            url=WEBSITE_URL,
+        )
+        self.cache = metadata_cache()
+        self.key = metadata_cache_key(WEBSITE_URL)
+        self.cache.delete(self.key)
+
+    def tearDown(self):
+        self.cache.delete(self.key)
+        super().tearDown()
+
+    @requests_mock.Mocker()
+    def test_fixed_website_validated_again(self, mock):
+        """Ensure validating the event again shows the current state of its
+        website, even if its metadata are cached."""
+        url = reverse("validate_event", args=[self.event.slug])
+        broken_content = WEBSITE_CONTENT.replace("2015-07-13-test", "wrong")
+        mock.get(WEBSITE_URL, text=broken_content, headers={"ETag": '"v1"'})
+        rv = self.client.get(url)
+        self.assertTrue(
+            [error for error in rv.context["error_messages"] if "wrong" in error]
+        )
+
+        mock.get(WEBSITE_URL, text=WEBSITE_CONTENT, headers={"ETag": '"v2"'})
+        rv = self.client.get(url)
+        self.assertFalse(
+            [error for error in rv.context["error_messages"] if "wrong" in error]
+        )
+        self.assertEqual(mock.last_request.headers["If-None-Match"], '"v1"')
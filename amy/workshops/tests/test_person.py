@@ -1,10 +1,13 @@
 from datetime import date, datetime, timezone
-from unittest.mock import patch
+from io import StringIO
+from unittest.mock import ANY, patch
 from urllib.parse import urlencode
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
 from django.core.validators import ValidationError
+from django.test import TestCase
 from django.urls import reverse
 from django_comments.models import Comment
 from reversion.models import Version
@@ -16,15 +19,20 @@ from webtest.forms import Upload
 from consents.models import Consent, Term
 from workshops.filters import filter_taught_workshops
 from workshops.forms import PersonForm, PersonsMergeForm
+from workshops.jobs import refresh_badge_summaries_job, refresh_role_summaries_job
 from workshops.mixins import GenderMixin
 from workshops.models import (
     Award,
     Badge,
     Event,
+    EventIssues,
+    EventIssuesQuerySet,
+    InstructorEligibility,
     KnowledgeDomain,
     Language,
     Organization,
     Person,
+    PersonActivity,
     Qualification,
     Role,
     Tag,
@@ -33,6 +41,7 @@ from workshops.models import (
     TrainingRequirement,
 )
 from workshops.tests.base import TestBase
+from workshops.util import refresh_pending_summaries, summary_refresh_suspended
 
 
 @patch("workshops.github_auth.github_username_to_uid", lambda username: None)
@@ -542,6 +551,45 @@ class TestPerson(TestBase):
         self.assertIn(comment, Comment.objects.for_model(obj))
 
 
+class TestAllPersonsKeysetPagination(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._setUpUsersAndLogin()
+        self.url = reverse("all_persons")
+
+    def test_pages_follow_cursors(self):
+        expected = list(Person.objects.order_by("family", "personal", "pk"))
+        seen = []
+        cursor = ""
+        while True:
+            rv = self.client.get(self.url, {"items_per_page": 3, "page": cursor})
+            page = rv.context["all_persons"]
+            seen.extend(page)
+            if not page.has_next():
+                break
+            self.assertContains(rv, "page={}".format(page.next_cursor))
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+
+    def test_ordering_by_last_name(self):
+        expected = list(Person.objects.order_by("-family", "-middle", "-personal"))
+        rv = self.client.get(self.url, {"items_per_page": 3, "order_by": "-lastname"})
+        page = rv.context["all_persons"]
+        rv = self.client.get(
+            self.url,
+            {"items_per_page": 3, "order_by": "-lastname", "page": page.next_cursor},
+        )
+        self.assertEqual(list(rv.context["all_persons"]), expected[3:6])
+
+    def test_invalid_cursor_returns_first_page(self):
+        rv = self.client.get(self.url, {"items_per_page": 3, "page": "2"})
+        page = rv.context["all_persons"]
+        self.assertEqual(
+            list(page), list(Person.objects.order_by("family", "personal", "pk")[:3])
+        )
+        self.assertFalse(page.has_previous())
+
+
 class TestPersonPassword(TestBase):
     """Separate tests for testing password setting.
 
@@ -1339,6 +1387,266 @@ class TestGetMissingDCInstructorRequirements(TestBase):
         )
 
 
+class TestInstructorEligibility(TestBase):
+    """Precomputed eligibility is refreshed when progress or awards change."""
+
+    def setUp(self):
+        self._setUpBadges()
+        self.person = Person.objects.create(username="person")
+        self.other = Person.objects.create(username="other", email="o@example.org")
+        self.training = TrainingRequirement.objects.get(name="Training")
+        self.discussion = TrainingRequirement.objects.get(name="Discussion")
+        self.lc_homework = TrainingRequirement.objects.get(name="LC Homework")
+        self.lc_demo = TrainingRequirement.objects.get(name="LC Demo")
+
+    def eligibility(self, person):
+        return Person.objects.annotate_with_instructor_eligibility().get(pk=person.pk)
+
+    def test_no_progress(self):
+        person = self.eligibility(self.person)
+        self.assertEqual(person.passed_training, 0)
+        self.assertEqual(person.instructor_eligible, 0)
+        self.assertEqual(person.is_instructor, 0)
+        self.assertFalse(InstructorEligibility.objects.exists())
+
+    def test_progress_changes(self):
+        for requirement in [self.training, self.discussion, self.lc_homework]:
+            TrainingProgress.objects.create(
+                trainee=self.person, state="p", requirement=requirement
+            )
+        demo = TrainingProgress.objects.create(
+            trainee=self.person, state="n", requirement=self.lc_demo
+        )
+        self.assertEqual(self.eligibility(self.person).passed_demo, 0)
+        self.assertEqual(self.eligibility(self.person).instructor_eligible, 0)
+
+        demo.state = "p"
+        demo.save()
+        person = self.eligibility(self.person)
+        self.assertEqual(person.passed_lc_demo, 1)
+        self.assertEqual(person.passed_demo, 1)
+        self.assertEqual(person.instructor_eligible, 1)
+
+        demo.discarded = True
+        demo.save()
+        self.assertEqual(self.eligibility(self.person).instructor_eligible, 0)
+
+        demo.delete()
+        person = self.eligibility(self.person)
+        self.assertEqual(person.passed_lc_demo, 0)
+        self.assertEqual(person.passed_training, 1)
+
+    def test_progress_reassigned(self):
+        progress = TrainingProgress.objects.create(
+            trainee=self.person, state="p", requirement=self.training
+        )
+        progress.trainee = self.other
+        progress.save()
+        self.assertEqual(self.eligibility(self.person).passed_training, 0)
+        self.assertEqual(self.eligibility(self.other).passed_training, 1)
+
+    def test_award_changes(self):
+        award = Award.objects.create(person=self.person, badge=self.lc_instructor)
+        person = self.eligibility(self.person)
+        self.assertEqual(person.is_lc_instructor, 1)
+        self.assertEqual(person.is_instructor, 1)
+
+        award.delete()
+        person = self.eligibility(self.person)
+        self.assertEqual(person.is_lc_instructor, 0)
+        self.assertEqual(person.is_instructor, 0)
+
+    def test_refresh_suspended(self):
+        with summary_refresh_suspended():
+            Award.objects.create(person=self.person, badge=self.lc_instructor)
+            TrainingProgress.objects.create(
+                trainee=self.person, state="p", requirement=self.training
+            )
+        self.assertFalse(InstructorEligibility.objects.exists())
+
+    @patch("workshops.receivers.transaction.on_commit", lambda func: func())
+    @patch("workshops.receivers.django_rq.get_queue")
+    def test_badge_renamed(self, mock_get_queue):
+        Award.objects.create(person=self.person, badge=self.swc_instructor)
+        self.swc_instructor.name = "swc-instructor-old"
+        self.swc_instructor.save()
+        mock_get_queue().enqueue.assert_called_once_with(
+            refresh_badge_summaries_job, self.swc_instructor.pk
+        )
+
+        refresh_badge_summaries_job(self.swc_instructor.pk)
+        self.assertEqual(self.eligibility(self.person).is_swc_instructor, 0)
+
+    def test_no_aggregation(self):
+        """Eligibility is read with a join, without grouping."""
+        query = str(Person.objects.annotate_with_instructor_eligibility().query)
+        self.assertNotIn("GROUP BY", query)
+
+    def test_refresh_command(self):
+        TrainingProgress.objects.bulk_create(
+            [
+                TrainingProgress(
+                    trainee=self.person, state="p", requirement=self.training
+                ),
+                TrainingProgress(
+                    trainee=self.other, state="p", requirement=self.training
+                ),
+            ]
+        )
+        self.assertEqual(self.eligibility(self.person).passed_training, 0)
+
+        call_command("refresh_instructor_eligibility", "person", stdout=StringIO())
+        self.assertEqual(self.eligibility(self.person).passed_training, 1)
+        self.assertEqual(self.eligibility(self.other).passed_training, 0)
+
+        call_command("refresh_instructor_eligibility", stdout=StringIO())
+        self.assertEqual(self.eligibility(self.other).passed_training, 1)
+
+
+class TestPersonActivity(TestBase):
+    """Precomputed activity is refreshed when tasks, awards or event tags
+    change."""
+
+    def setUp(self):
+        self._setUpBadges()
+        self._setUpTags()
+        self._setUpRoles()
+        self.person = Person.objects.create(username="person")
+        self.other = Person.objects.create(username="other", email="o@example.org")
+        host = Organization.objects.create(domain="example.com", fullname="Host")
+        self.event = Event.objects.create(slug="event", host=host)
+        self.ttt = Event.objects.create(slug="ttt-event", host=host)
+        self.ttt.tags.add(Tag.objects.get(name="TTT"))
+        self.instructor = Role.objects.get(name="instructor")
+        self.learner = Role.objects.get(name="learner")
+
+    def activity(self, person):
+        return Person.objects.annotate_with_activity().get(pk=person.pk)
+
+    def test_no_tasks(self):
+        person = self.activity(self.person)
+        self.assertEqual(person.num_taught, 0)
+        self.assertEqual(person.is_trainee, 0)
+        self.assertFalse(PersonActivity.objects.exists())
+
+    def test_task_changes(self):
+        task = Task.objects.create(
+            person=self.person, event=self.event, role=self.instructor
+        )
+        self.assertEqual(self.activity(self.person).num_taught, 1)
+
+        task.role = Role.objects.get(name="helper")
+        task.save()
+        person = self.activity(self.person)
+        self.assertEqual(person.num_taught, 0)
+        self.assertEqual(person.num_helper, 1)
+
+        task.person = self.other
+        task.save()
+        self.assertEqual(self.activity(self.person).num_helper, 0)
+        self.assertEqual(self.activity(self.other).num_helper, 1)
+
+        task.delete()
+        self.assertEqual(self.activity(self.other).num_helper, 0)
+        self.assertFalse(PersonActivity.objects.exists())
+
+    def test_trainee(self):
+        Task.objects.create(person=self.person, event=self.ttt, role=self.learner)
+        person = self.activity(self.person)
+        self.assertEqual(person.num_learner, 1)
+        self.assertEqual(person.is_trainee, 1)
+
+        self.ttt.tags.add(Tag.objects.get(name="stalled"))
+        self.assertEqual(self.activity(self.person).is_trainee, 0)
+        self.ttt.tags.clear()
+        self.assertEqual(self.activity(self.person).is_trainee, 0)
+        Tag.objects.get(name="TTT").event_set.add(self.ttt)
+        self.assertEqual(self.activity(self.person).is_trainee, 1)
+
+        # instructors and trainers aren't trainees anymore
+        award = Award.objects.create(person=self.person, badge=self.lc_instructor)
+        self.assertEqual(self.activity(self.person).is_trainee, 0)
+        award.delete()
+        self.assertEqual(self.activity(self.person).is_trainee, 1)
+
+    def test_trainer(self):
+        trainer = Badge.objects.get(name="trainer")
+        award = Award.objects.create(person=self.person, badge=trainer)
+        person = self.activity(self.person)
+        self.assertEqual(person.is_trainer, 1)
+        self.assertEqual(person.num_taught, 0)
+
+        award.delete()
+        self.assertEqual(self.activity(self.person).is_trainer, 0)
+
+    def test_no_aggregation(self):
+        """Activity is read with a join, without grouping."""
+        query = str(Person.objects.annotate_with_activity().query)
+        self.assertNotIn("GROUP BY", query)
+
+    def test_refresh_command(self):
+        Task.objects.bulk_create(
+            [
+                Task(person=self.person, event=self.event, role=self.instructor),
+                Task(person=self.other, event=self.event, role=self.instructor),
+            ]
+        )
+        self.assertEqual(self.activity(self.person).num_taught, 0)
+
+        call_command("refresh_person_activity", "person", stdout=StringIO())
+        self.assertEqual(self.activity(self.person).num_taught, 1)
+        self.assertEqual(self.activity(self.other).num_taught, 0)
+
+        call_command("refresh_person_activity", stdout=StringIO())
+        self.assertEqual(self.activity(self.other).num_taught, 1)
+
+
+class TestSummariesRefreshedOnCommit(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create(username="person")
+        host = Organization.objects.create(domain="example.com", fullname="Host")
+        self.event = Event.objects.create(slug="event", host=host)
+        self.instructor = Role.objects.create(name="instructor")
+        # summaries left pending by other test cases (which never commit)
+        refresh_pending_summaries()
+
+    @patch("workshops.util.transaction.on_commit")
+    def test_refreshed_once(self, mock_on_commit):
+        task = Task.objects.create(
+            person=self.person, event=self.event, role=self.instructor
+        )
+        task.seat_public = False
+        task.save()
+        self.assertFalse(PersonActivity.objects.exists())
+
+        callbacks = {c.args[0] for c in mock_on_commit.call_args_list}
+        self.assertEqual(callbacks, {refresh_pending_summaries})
+        with patch.object(
+            EventIssuesQuerySet,
+            "refresh",
+            autospec=True,
+            side_effect=EventIssuesQuerySet.refresh,
+        ) as refresh:
+            refresh_pending_summaries()
+        refresh.assert_called_once_with(ANY, {self.event.pk})
+        self.assertEqual(Person.objects.annotate_with_activity().get().num_taught, 1)
+
+    @patch("workshops.receivers.transaction.on_commit", lambda func: func())
+    @patch("workshops.receivers.django_rq.get_queue")
+    def test_role_renamed(self, mock_get_queue):
+        Task.objects.create(person=self.person, event=self.event, role=self.instructor)
+        refresh_pending_summaries()
+        self.instructor.name = "instructor-old"
+        self.instructor.save()
+        mock_get_queue().enqueue.assert_called_once_with(
+            refresh_role_summaries_job, self.instructor.pk
+        )
+
+        refresh_role_summaries_job(self.instructor.pk)
+        self.assertEqual(Person.objects.annotate_with_activity().get().num_taught, 0)
+        self.assertEqual(EventIssues.objects.get().num_instructors, 0)
+
+
 class TestFilterTaughtWorkshops(TestBase):
     def setUp(self):
         self._setUpAirports()
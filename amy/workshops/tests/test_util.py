@@ -2,14 +2,19 @@
 import datetime
 from datetime import timedelta
 
+from django.db import connection
+from django.db.models.functions import Lower
 from django.http import Http404
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 import requests.exceptions
 import requests_mock
 
 from consents.models import Consent, Term
 from workshops.models import (
+    Airport,
     Award,
     Badge,
     Event,
@@ -23,17 +28,21 @@ from workshops.models import (
 from workshops.tests.base import TestBase
 from workshops.util import (
     InternalError,
+    KeysetPaginator,
     Paginator,
     archive_least_recent_active_consents,
     assign,
     create_username,
+    create_usernames,
     default_membership_cutoff,
     fetch_workshop_metadata,
     find_workshop_HTML_metadata,
     find_workshop_YAML_metadata,
     generate_url_to_event_index,
     get_members,
+    get_pagination_items,
     human_daterange,
+    iterate_in_chunks,
     match_notification_email,
     parse_workshop_metadata,
     reports_link,
@@ -885,6 +894,21 @@ class TestUsernameGeneration(TestBase):
         username = create_username(personal=None, family=None)
         self.assertEqual(username, "_")
 
+    def test_batch_usernames_unique(self):
+        """Ensure usernames generated in one batch don't repeat, and are found
+        with a single query."""
+        with self.assertNumQueries(1):
+            usernames = create_usernames(
+                [("Harry", "Potter"), ("Hermione", "Granger"), ("Harry", "Potter")]
+            )
+        self.assertEqual(
+            usernames, ["potter_harry_2", "granger_hermione", "potter_harry_3"]
+        )
+
+    def test_batch_usernames_empty(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(create_usernames([]), [])
+
 
 class TestPaginatorSections(TestBase):
     def make_paginator(self, num_pages, page_index=None):
@@ -1005,6 +1029,185 @@ class TestAssignUtil(TestBase):
                 self.assertEqual(self.event.assigned_to, None)
 
 
+class TestIterateInChunks(TestBase):
+    def test_chunks_preserve_ordering(self):
+        qs = Person.objects.order_by("-family", "pk")
+        chunks = list(iterate_in_chunks(qs, chunk_size=2))
+        self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+        self.assertEqual([p for chunk in chunks for p in chunk], list(qs))
+
+    def test_chunks_use_prefetch(self):
+        qs = Person.objects.order_by("pk").prefetch_related("award_set")
+        chunk_size = qs.count() // 2 + 1
+        with self.assertNumQueries(1 + 2 * 2):
+            chunks = iterate_in_chunks(qs, chunk_size=chunk_size)
+            awards = [
+                len(person.award_set.all()) for chunk in chunks for person in chunk
+            ]
+        self.assertEqual(sum(awards), Award.objects.count())
+
+    def test_empty_queryset(self):
+        self.assertEqual(list(iterate_in_chunks(Person.objects.none())), [])
+
+
+class TestKeysetPaginator(TestBase):
+    def walk(self, qs, per_page):
+        """Return pages visited by following next cursors, then previous ones."""
+        paginator = KeysetPaginator(qs, per_page)
+        forward = [paginator.page()]
+        while forward[-1].has_next():
+            forward.append(paginator.page(forward[-1].next_cursor))
+        backward = [forward[-1]]
+        while backward[-1].has_previous():
+            backward.append(paginator.page(backward[-1].previous_cursor))
+        return [list(page) for page in forward], [list(page) for page in backward]
+
+    def test_pages_follow_ordering(self):
+        Person.objects.filter(pk=self.hermione.pk).update(email=None)
+        Person.objects.filter(pk=self.ron.pk).update(
+            last_login=timezone.now() - timedelta(days=1)
+        )
+        Person.objects.filter(pk=self.harry.pk).update(last_login=timezone.now())
+        for ordering in [
+            ["family", "personal"],
+            ["email"],
+            ["-email"],
+            ["-last_login", "family"],
+            ["last_login", "-pk"],
+            ["airport__iata", "family"],
+        ]:
+            with self.subTest(ordering=ordering):
+                qs = Person.objects.order_by(*ordering)
+                forward, backward = self.walk(qs, 2)
+                if "-pk" not in ordering:
+                    # primary key is added to make the ordering unique
+                    qs = qs.order_by(*ordering, "pk")
+                self.assertEqual([p for page in forward for p in page], list(qs))
+                self.assertTrue(all(1 <= len(page) <= 2 for page in forward))
+                self.assertEqual(backward, forward[::-1])
+
+    def test_default_ordering(self):
+        qs = Person.objects.all()
+        forward, _ = self.walk(qs, 3)
+        self.assertEqual([p for page in forward for p in page], list(qs))
+
+    def test_values_queryset(self):
+        qs = Person.objects.order_by("family").values("pk", "family")
+        forward, _ = self.walk(qs, 2)
+        self.assertEqual([p for page in forward for p in page], list(qs))
+
+    def test_page_costs_single_query(self):
+        qs = Person.objects.order_by("family")
+        paginator = KeysetPaginator(qs, 2)
+        cursor = paginator.page(paginator.page().next_cursor).next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.page(cursor)
+        self.assertEqual(list(page), list(qs[4:6]))
+
+    def test_invalid_cursor(self):
+        qs = Person.objects.order_by("family")
+        paginator = KeysetPaginator(qs, 2)
+        other = KeysetPaginator(Person.objects.order_by("personal"), 2)
+        for cursor in ["invalid", "1", other.page().next_cursor]:
+            with self.subTest(cursor=cursor):
+                page = paginator.page(cursor)
+                self.assertEqual(list(page), list(qs[:2]))
+                self.assertFalse(page.has_previous())
+
+    def test_unsupported_ordering(self):
+        self.assertFalse(KeysetPaginator.supports(Person.objects.order_by("?")))
+        self.assertFalse(KeysetPaginator.supports(Person.objects.order_by("airport")))
+        self.assertFalse(
+            KeysetPaginator.supports(Person.objects.order_by(Lower("family")))
+        )
+        self.assertFalse(KeysetPaginator.supports(list(Person.objects.all())))
+
+    def test_count_approximate(self):
+        paginator = KeysetPaginator(Person.objects.all(), 2)
+        self.assertGreater(paginator.count, 0)
+
+    def test_get_pagination_items(self):
+        rf = RequestFactory()
+        qs = Person.objects.order_by("family")
+        page = get_pagination_items(rf.get("/", {"items_per_page": 2}), qs, keyset=True)
+        self.assertIsInstance(page.paginator, KeysetPaginator)
+        page = get_pagination_items(
+            rf.get("/", {"page": page.next_cursor, "items_per_page": 2}),
+            qs,
+            keyset=True,
+        )
+        self.assertEqual(list(page), list(qs[2:4]))
+
+        # fall back to page numbers
+        page = get_pagination_items(rf.get("/"), qs.order_by("?"), keyset=True)
+        self.assertNotIsInstance(page.paginator, KeysetPaginator)
+        page = get_pagination_items(
+            rf.get("/", {"items_per_page": "all"}), qs, keyset=True
+        )
+        self.assertEqual(list(page), list(qs))
+
+
+class TestPaginatorCountCache(TestBase):
+    def setUp(self):
+        super().setUp()
+        self._setUpUsersAndLogin()
+        self.url = reverse("all_airports")
+
+    def count_queries(self, params):
+        with CaptureQueriesContext(connection) as ctx:
+            rv = self.client.get(self.url, params)
+        counts = [q for q in ctx.captured_queries if "COUNT(" in q["sql"]]
+        return rv.context["all_airports"], len(counts)
+
+    def test_count_reused_between_pages(self):
+        # first request may count the objects
+        self.count_queries({"items_per_page": 1, "order_by": "iata"})
+        page, counts = self.count_queries(
+            {"items_per_page": 1, "order_by": "iata", "page": 2}
+        )
+        self.assertEqual(counts, 0)
+        self.assertEqual(page.paginator.count, Airport.objects.count())
+
+    def test_count_cached_per_filter(self):
+        self.count_queries({"items_per_page": 1})
+        _, counts = self.count_queries({"items_per_page": 1, "fullname": "Paris"})
+        self.assertEqual(counts, 1)
+
+    def test_count_invalidated_on_save(self):
+        page, _ = self.count_queries({"items_per_page": 1})
+        count = page.paginator.count
+        Airport.objects.create(
+            iata="XYZ", fullname="Test Airport", latitude=1, longitude=1
+        )
+        page, counts = self.count_queries({"items_per_page": 1})
+        self.assertEqual(counts, 1)
+        self.assertEqual(page.paginator.count, count + 1)
+
+    def test_stale_count_doesnt_hide_objects(self):
+        self.count_queries({"items_per_page": 100})
+        # `bulk_create()` doesn't send signals, so cached count isn't invalidated
+        Airport.objects.bulk_create(
+            [Airport(iata="XYZ", fullname="Test Airport", latitude=1, longitude=1)]
+        )
+        page, counts = self.count_queries({"items_per_page": 100})
+        self.assertEqual(counts, 0)
+        self.assertEqual(len(page), Airport.objects.count())
+
+    @override_settings(PAGINATOR_COUNT_CACHE_TIMEOUT=0)
+    def test_count_not_cached_when_disabled(self):
+        self.count_queries({"items_per_page": 1})
+        _, counts = self.count_queries({"items_per_page": 1, "page": 2})
+        self.assertEqual(counts, 1)
+
+    def test_hit_rate_logged(self):
+        with self.assertLogs("amy.paginator", level="INFO") as logs:
+            self.count_queries({"items_per_page": 1})
+            self.count_queries({"items_per_page": 1, "page": 2})
+        self.assertIn("Count cache miss", logs.output[0])
+        self.assertIn("Count cache hit", logs.output[-1])
+        self.assertIn("hit rate", logs.output[-1])
+
+
 class TestStr2Bool(TestBase):
     """Tests for ensuring str2bool works as expected."""
 
@@ -309,6 +309,34 @@ class TestLocateWorkshopStaff(TestBase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(list(response.context["persons"]), [self.blackwidow])
 
+    def test_match_by_distance(self):
+        """Ensure only people with airports within given distance are returned,
+        nearest first."""
+        response = self.client.get(
+            self.url,
+            {
+                "airport": self.airport_50_100.pk,
+                "distance": 1000,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        persons = list(response.context["persons"])
+        self.assertEqual(set(persons[:2]), {self.ron, self.ironman})
+        self.assertEqual(persons[2:], [self.spiderman])
+
+    def test_ordering_across_antimeridian(self):
+        """Ensure people are ordered by great-circle distance."""
+        self.airport_0_10.longitude = -170
+        self.airport_0_10.save()
+        self.spiderman.airport = self.airport_0_10
+        self.spiderman.save()
+
+        # 10 degrees away from spiderman's airport, 100 degrees from harry's
+        people = _workshop_staff_query(lat=0, lng=180)
+        self.assertEqual(people[0], self.spiderman)
+        people = _workshop_staff_query(lat=0, lng=180, distance=2000)
+        self.assertEqual(list(people), [self.spiderman])
+
     def test_form_logic(self):
         """Check if logic preventing searching from multiple fields,
         except lat+lng pair, and allowing searching from no location field,
@@ -319,6 +347,9 @@ class TestLocateWorkshopStaff(TestBase):
             (False, {"latitude": 1}),
             (False, {"longitude": 1, "country": ["BG"]}),
             (False, {"latitude": 1, "longitude": 2, "country": ["BG"]}),
+            (True, {"latitude": 1, "longitude": 2, "distance": 100}),
+            (False, {"distance": 100}),
+            (False, {"country": ["BG"], "distance": 100}),
             (
                 False,
                 {
@@ -423,7 +454,7 @@ class TestWorkshopStaffCSV(TestBase):
     def test_header_row(self):
         """Ensure header contains the data we want."""
         rv = self.client.get(self.url)
-        first_row = rv.content.decode("utf-8").splitlines()[0]
+        first_row = b"".join(rv.streaming_content).decode("utf-8").splitlines()[0]
         first_row_expected = (
             "Name,Email,Some badges,Has Trainer badge,Taught times,"
             "Is trainee,Airport,Country,Lessons,Affiliation"
@@ -434,7 +465,8 @@ class TestWorkshopStaffCSV(TestBase):
     def test_results(self):
         """Test for the workshop staff CSV output."""
         rv = self.client.get(self.url)
-        reader = csv.DictReader(io.StringIO(rv.content.decode("utf-8")))
+        content = b"".join(rv.streaming_content).decode("utf-8")
+        reader = csv.DictReader(io.StringIO(content))
         results = _workshop_staff_query()
         for row, expected in zip(reader, results):
             self.assertEqual(row["Name"], expected.full_name)
@@ -1,12 +1,17 @@
 # coding: utf-8
 from collections import defaultdict, namedtuple
+import collections.abc
+from contextlib import contextmanager
 import csv
 import datetime
-from functools import wraps
+from functools import reduce, wraps
 from hashlib import sha1
 from itertools import chain
+import json
 import logging
+import operator
 import re
+import threading
 from typing import Optional, Union
 
 from django.conf import settings
@@ -15,33 +20,44 @@ from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
 from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.core.paginator import Paginator as DjangoPaginator
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import ValidationError
-from django.db import IntegrityError, models, transaction
+from django.db import IntegrityError, connection, models, transaction
 from django.db.models import Q
-from django.http import Http404
+from django.db.models.constants import LOOKUP_SEP
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
-from django.utils.http import is_safe_url
+from django.utils.functional import cached_property
+from django.utils.http import is_safe_url, urlsafe_base64_decode, urlsafe_base64_encode
 from django_comments.models import Comment
 import django_rq
 import requests
+from reversion import revisions as reversion
 import yaml
 
-from autoemails.actions import NewInstructorAction, NewSupportingInstructorAction
+from autoemails.actions import TASK_ACTIONS, action_transitions
 from autoemails.base_views import ActionManageMixin
 from autoemails.models import Trigger
+from autoemails.snapshots import EventSnapshot
+from consents.cache import bump_consents_version
 from consents.models import Consent
 from dashboard.models import Criterium
 from workshops.models import STR_LONG, STR_MED, Badge, Event, Person, Role, Task
 
 logger = logging.getLogger("amy.signals")
+paginator_logger = logging.getLogger("amy.paginator")
 scheduler = django_rq.get_scheduler("default")
 
 ITEMS_PER_PAGE = 25
 
+# number of objects fetched from the database at once in streamed exports
+EXPORT_CHUNK_SIZE = 1000
+
 WORD_SPLIT = re.compile(r"""([\s<>"']+)""")
 SIMPLE_EMAIL = re.compile(r"^\S+@\S+\.\S+$")
 
@@ -114,15 +130,61 @@ def upload_person_task_csv(stream):
     return result, list(empty_fields)
 
 
+def _group_by_field(queryset, field, values):
+    """Fetch objects with `field` value in `values` (with one query) and return
+    them grouped by that value."""
+    groups = defaultdict(list)
+    values = {value for value in values if value}
+    if values:
+        for obj in queryset.filter(**{f"{field}__in": values}):
+            groups[getattr(obj, field)].append(obj)
+    return groups
+
+
+def _person_id_or_none(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
 def verify_upload_person_task(data, match=False):
     """
     Verify that uploaded data is correct.  Show errors by populating `errors`
     dictionary item.  This function changes `data` in place.
 
     If `match` provided, it will try to match with first similar person.
+
+    Events, roles, persons, tasks and usernames referenced by all rows are
+    fetched in batches (one query for each kind), so the number of queries
+    doesn't depend on the number of rows.
     """
 
-    errors_occur = False
+    events_by_slug = _group_by_field(
+        Event.objects.all(), "slug", (item.get("event") for item in data)
+    )
+    roles_by_name = _group_by_field(
+        Role.objects.all(), "name", (item.get("role") for item in data)
+    )
+    persons_by_email = _group_by_field(
+        Person.objects.all(), "email", (item.get("email") for item in data)
+    )
+    persons_by_id = Person.objects.in_bulk(
+        {
+            _person_id_or_none(item.get("existing_person_id"))
+            for item in data
+            if not match and item.get("existing_person_id")
+        }
+        - {None}
+    )
+    existing_usernames = set(
+        Person.objects.filter(
+            username__in={item.get("username") for item in data} - {None, ""}
+        ).values_list("username", flat=True)
+    )
+
+    # first pass: find existing objects for every row
+    rows = []
     for item in data:
         errors = []
         info = []
@@ -130,46 +192,42 @@ def verify_upload_person_task(data, match=False):
         event = item.get("event", None)
         existing_event = None
         if event:
-            try:
-                existing_event = Event.objects.get(slug=event)
-            except Event.DoesNotExist:
+            events = events_by_slug.get(event, [])
+            if not events:
                 errors.append('Event with slug "{0}" does not exist.'.format(event))
-            except Event.MultipleObjectsReturned:
+            elif len(events) > 1:
                 errors.append('More than one event named "{0}" exists.'.format(event))
+            else:
+                existing_event = events[0]
 
         role = item.get("role", None)
         existing_role = None
         if role:
-            try:
-                existing_role = Role.objects.get(name=role)
-            except Role.DoesNotExist:
+            roles = roles_by_name.get(role, [])
+            if not roles:
                 errors.append('Role with name "{0}" does not exist.'.format(role))
-            except Role.MultipleObjectsReturned:
+            elif len(roles) > 1:
                 errors.append('More than one role named "{0}" exists.'.format(role))
+            else:
+                existing_role = roles[0]
 
         # check if the user exists, and if so: check if existing user's
         # personal and family names are the same as uploaded
         email = item.get("email", "")
-        personal = item.get("personal", "")
-        family = item.get("family", "")
         person_id = item.get("existing_person_id", None)
         person = None
 
         # try to match with first similar person
         if match is True:
-            try:
-                person = Person.objects.get(email=email)
-            except (Person.DoesNotExist, Person.MultipleObjectsReturned):
-                person = None
-            else:
+            persons = persons_by_email.get(email, []) if email else []
+            if len(persons) == 1:
+                person = persons[0]
                 info.append("Existing record for person will be used.")
                 person_id = person.pk
 
         elif person_id:
-            try:
-                person = Person.objects.get(id=int(person_id))
-            except (ValueError, TypeError, Person.DoesNotExist):
-                person = None
+            person = persons_by_id.get(_person_id_or_none(person_id))
+            if person is None:
                 info.append(
                     "Could not match selected person. New record will " "be created."
                 )
@@ -177,19 +235,11 @@ def verify_upload_person_task(data, match=False):
                 info.append("Existing record for person will be used.")
 
         elif not person_id:
-            try:
-                Person.objects.get(email=email)
-            except (Person.DoesNotExist, Person.MultipleObjectsReturned):
-                pass
-            else:
+            if email and len(persons_by_email.get(email, [])) == 1:
                 errors.append("Person with this email address already exists.")
 
-            try:
-                if item.get("username"):
-                    Person.objects.get(username=item.get("username"))
-            except Person.DoesNotExist:
-                pass
-            else:
+            username = item.get("username")
+            if username and username in existing_usernames:
                 errors.append("Person with this username already exists.")
 
         if not email and not person:
@@ -197,44 +247,88 @@ def verify_upload_person_task(data, match=False):
 
         if person:
             # force details from existing record
-            item["personal"] = personal = person.personal
-            item["family"] = family = person.family
-            item["email"] = email = person.email
+            item["personal"] = person.personal
+            item["family"] = person.family
+            item["email"] = person.email
             item["username"] = person.username
             item["existing_person_id"] = person_id
             item["person_exists"] = True
         else:
-            # force a newly created username
-            if not item.get("username"):
-                item["username"] = create_username(personal, family)
             item["person_exists"] = False
-
             info.append("Person and task will be created.")
 
-        # let's check if there's someone else named this way
-        similar_persons = Person.objects.filter(
-            Q(personal=personal, family=family)
-            | Q(email=email) & ~Q(email="") & Q(email__isnull=False)
-        )
-        # need to cast to list, otherwise it won't JSON-ify
-        item["similar_persons"] = list(
-            zip(
-                similar_persons.values_list("id", flat=True),
-                map(lambda x: str(x), similar_persons),
+        rows.append((item, errors, info, existing_event, existing_role, person))
+
+    # force newly created usernames
+    new_username_items = [
+        item for item in data if not item["person_exists"] and not item.get("username")
+    ]
+    new_usernames = create_usernames(
+        [
+            (item.get("personal", ""), item.get("family", ""))
+            for item in new_username_items
+        ]
+    )
+    for item, username in zip(new_username_items, new_usernames):
+        item["username"] = username
+
+    # let's check if there's someone else named this way; persons with any of
+    # uploaded personal and family names are fetched, and exact pairs of names
+    # are matched below (it's much faster than a condition for every pair)
+    personals = {item.get("personal", "") for item in data}
+    families = {item.get("family", "") for item in data}
+    family_q = Q(family__in=families - {None})
+    if None in families:
+        family_q |= Q(family__isnull=True)
+    similar_emails = {item.get("email") for item in data} - {None, ""}
+    similar_persons = (
+        list(
+            Person.objects.filter(
+                Q(personal__in=personals - {None}) & family_q
+                | Q(email__in=similar_emails)
             )
         )
+        if data
+        else []
+    )
+
+    # check which tasks already exist
+    existing_tasks = set()
+    task_keys = [
+        (event, role, person)
+        for _, _, _, event, role, person in rows
+        if event and role and person
+    ]
+    if task_keys:
+        existing_tasks = set(
+            Task.objects.filter(
+                event__in={event for event, _, _ in task_keys},
+                role__in={role for _, role, _ in task_keys},
+                person__in={person for _, _, person in task_keys},
+            ).values_list("event_id", "role_id", "person_id")
+        )
+
+    errors_occur = False
+    for item, errors, info, existing_event, existing_role, person in rows:
+        personal = item.get("personal", "")
+        family = item.get("family", "")
+        email = item.get("email", "")
+
+        # need to cast to list, otherwise it won't JSON-ify
+        item["similar_persons"] = [
+            (p.id, str(p))
+            for p in similar_persons
+            if (p.personal == personal and p.family == family)
+            or (email and p.email == email)
+        ]
 
         if existing_event and person and existing_role:
             # person, their role and a corresponding event exist, so
             # let's check if the task exists
-            try:
-                Task.objects.get(
-                    event=existing_event, person=person, role=existing_role
-                )
-            except Task.DoesNotExist:
-                info.append("Task will be created.")
-            else:
+            if (existing_event.pk, existing_role.pk, person.pk) in existing_tasks:
                 info.append("Task already exists.")
+            else:
+                info.append("Task will be created.")
 
         # let's check what Person model validators want to say
         try:
@@ -246,10 +340,10 @@ def verify_upload_person_task(data, match=False):
             for k, v in e.message_dict.items():
                 errors.append("{}: {}".format(k, v))
 
-        if not role:
+        if not item.get("role", None):
             errors.append("Must have a role.")
 
-        if not event:
+        if not item.get("event", None):
             errors.append("Must have an event.")
 
         item["errors"] = errors
@@ -261,18 +355,120 @@ def verify_upload_person_task(data, match=False):
     return errors_occur
 
 
+def _get_one(objects_by_key, key, model):
+    """Return the only object from `_group_by_field` results for `key`, raising
+    the same exceptions as `QuerySet.get()` would."""
+    objects = objects_by_key.get(key, [])
+    if not objects:
+        raise model.DoesNotExist(
+            "%s matching query does not exist." % model._meta.object_name
+        )
+    if len(objects) > 1:
+        raise model.MultipleObjectsReturned(
+            "get() returned more than one %s -- it returned %s!"
+            % (model._meta.object_name, len(objects))
+        )
+    return objects[0]
+
+
+# set while receivers shouldn't refresh precomputed summaries (see
+# `summary_refresh_suspended`)
+_summary_refresh = threading.local()
+
+
+@contextmanager
+def summary_refresh_suspended():
+    """Don't refresh precomputed summaries in signal receivers of saved or
+    deleted objects.  Used when many objects are changed at once; the caller
+    must refresh summaries afterwards (e.g. with `refresh_task_summaries`)."""
+    previous = summary_refresh_is_suspended()
+    _summary_refresh.suspended = True
+    try:
+        yield
+    finally:
+        _summary_refresh.suspended = previous
+
+
+def summary_refresh_is_suspended():
+    return getattr(_summary_refresh, "suspended", False)
+
+
+def refresh_summaries_on_commit(model, ids):
+    """Refresh precomputed summaries (`model`) of objects with given IDs once the
+    current transaction commits, or right away outside of transactions.
+
+    IDs collected during a transaction (e.g. of a request) are refreshed
+    together, so objects changed many times are refreshed only once."""
+    pending = getattr(_summary_refresh, "pending", None)
+    if pending is None:
+        pending = _summary_refresh.pending = defaultdict(set)
+    pending[model].update(ids)
+    # registered every time: callbacks of rolled back savepoints are discarded,
+    # and the first callback run refreshes all pending summaries anyway
+    transaction.on_commit(refresh_pending_summaries)
+
+
+def refresh_pending_summaries():
+    """Refresh summaries collected by `refresh_summaries_on_commit`."""
+    pending = getattr(_summary_refresh, "pending", None)
+    _summary_refresh.pending = None
+    for model, ids in (pending or {}).items():
+        model.objects.refresh(ids)
+
+
+def refresh_task_summaries(person_ids, event_ids):
+    """Refresh precomputed activity and issues of given persons and events after
+    their tasks were changed without sending signals (e.g. `bulk_create()`)."""
+    from workshops.models import EventIssues, PersonActivity, PersonIssues
+
+    person_ids = set(person_ids)
+    PersonActivity.objects.refresh(person_ids)
+    PersonIssues.objects.refresh(person_ids)
+    EventIssues.objects.refresh(event_ids)
+
+
 def create_uploaded_persons_tasks(data, request=None):
     """
     Create persons and tasks from upload data.
-    """
 
+    All referenced objects are fetched in batches, and new persons and tasks are
+    inserted with `bulk_create()`, so the number of queries doesn't depend on
+    the number of rows.  Side effects of saving persons and tasks one by one
+    (unset consents, revisions, cache invalidation) are replicated for
+    the whole batch.
+    """
     # Quick sanity check.
     if any([row.get("errors") for row in data]):
         raise InternalError("Uploaded data contains errors, cancelling upload")
 
+    persons_by_id = _group_by_field(
+        Person.objects.all(),
+        "pk",
+        (
+            _person_id_or_none(row["existing_person_id"])
+            for row in data
+            if row["person_exists"] and row["existing_person_id"]
+        ),
+    )
+    persons_by_username = _group_by_field(
+        Person.objects.all(),
+        "username",
+        (
+            row["username"]
+            for row in data
+            if row["person_exists"] and not row["existing_person_id"]
+        ),
+    )
+    events_by_slug = _group_by_field(
+        Event.objects.all(), "slug", (row["event"] for row in data if row["role"])
+    )
+    roles_by_name = _group_by_field(
+        Role.objects.all(), "name", (row["role"] for row in data if row["event"])
+    )
+
     persons_created = []
-    tasks_created = []
-    events = set()
+    # (row, person, event, role) for every task to be created
+    row_tasks = []
 
     with transaction.atomic():
         for row in data:
@@ -286,78 +482,89 @@ def create_uploaded_persons_tasks(data, request=None):
 
                 if row["person_exists"] and row["existing_person_id"]:
                     # we should use existing Person
-                    p = Person.objects.get(pk=row["existing_person_id"])
+                    p = _get_one(
+                        persons_by_id,
+                        _person_id_or_none(row["existing_person_id"]),
+                        Person,
+                    )
 
                 elif row["person_exists"] and not row["existing_person_id"]:
                     # we should use existing Person
-                    p = Person.objects.get(
-                        personal=fields["personal"],
-                        family=fields["family"],
-                        username=fields["username"],
-                        email=fields["email"],
-                    )
+                    p = _get_one(persons_by_username, fields["username"], Person)
+                    if any(getattr(p, key) != value for key, value in fields.items()):
+                        raise Person.DoesNotExist(
+                            "Person matching query does not exist."
+                        )
 
                 else:
                     # we should create a new Person without any email provided
                     p = Person(**fields)
-                    p.save()
+                    # `bulk_create()` doesn't call `Person.save()`
+                    p.normalize_fields()
                     persons_created.append(p)
 
                 if row["event"] and row["role"]:
-                    e = Event.objects.get(slug=row["event"])
-                    r = Role.objects.get(name=row["role"])
-
-                    # if the number of learners attending the event changed,
-                    # we should update ``event.attendance``
-                    if row["role"] == "learner":
-                        events.add(e)
-
-                    t, created = Task.objects.get_or_create(person=p, event=e, role=r)
-                    if created:
-                        tasks_created.append(t)
-
-            except IntegrityError as e:
-                raise IntegrityError('{0} (for "{1}")'.format(str(e), row_repr))
+                    e = _get_one(events_by_slug, row["event"], Event)
+                    r = _get_one(roles_by_name, row["role"], Role)
+                    row_tasks.append((row_repr, p, e, r))
 
             except ObjectDoesNotExist as e:
                 raise ObjectDoesNotExist('{0} (for "{1}")'.format(str(e), row_repr))
 
+        try:
+            Person.objects.bulk_create(persons_created)
+        except IntegrityError as e:
+            raise IntegrityError("{0} (for one of new persons)".format(str(e)))
+        Consent.create_unset_consents_for_persons(persons_created)
+
+        # don't create tasks that exist, or that are repeated in the upload
+        existing_tasks = set()
+        if row_tasks:
+            existing_tasks = set(
+                Task.objects.filter(
+                    person__in={p for _, p, _, _ in row_tasks if p.pk},
+                    event__in={e for _, _, e, _ in row_tasks},
+                    role__in={r for _, _, _, r in row_tasks},
+                ).values_list("person_id", "event_id", "role_id")
+            )
+        tasks_created = []
+        for row_repr, p, e, r in row_tasks:
+            key = (p.pk, e.pk, r.pk)
+            if key not in existing_tasks:
+                existing_tasks.add(key)
+                tasks_created.append(Task(person=p, event=e, role=r))
+        Task.objects.bulk_create(tasks_created)
+        # `bulk_create()` doesn't send signals
+        refresh_task_summaries(
+            {t.person_id for t in tasks_created}, {t.event_id for t in tasks_created}
+        )
+
+        _add_to_revision(chain(persons_created, tasks_created))
+        for model, objs in [(Person, persons_created), (Task, tasks_created)]:
+            if objs:
+                bump_model_cache_versions(model)
+
     jobs_created = []
     rqjobs_created = []
 
-    # for each created task, try to add a new-(supporting)-instructor action
+    # for each created task, try to add a new-(supporting)-instructor action;
+    # uploaded tasks usually belong to a few events only
+    snapshots = {}
     with transaction.atomic():
         for task in tasks_created:
-            # conditions check out
-            if NewInstructorAction.check(task):
-                objs = dict(task=task, event=task.event)
+            if task.event_id not in snapshots:
+                snapshots[task.event_id] = EventSnapshot(task.event)
+            # actions whose conditions check out
+            for action_class, trigger_action, _ in action_transitions(
+                TASK_ACTIONS, None, (task, snapshots[task.event_id])
+            ):
                 # prepare context and everything and create corresponding RQJob
                 jobs, rqjobs = ActionManageMixin.add(
-                    action_class=NewInstructorAction,
+                    action_class=action_class,
                     logger=logger,
                     scheduler=scheduler,
-                    triggers=Trigger.objects.filter(
-                        active=True, action="new-instructor"
-                    ),
-                    context_objects=objs,
-                    object_=task,
-                    request=request,
-                )
-                jobs_created += jobs
-                rqjobs_created += rqjobs
-
-            # conditions check out
-            if NewSupportingInstructorAction.check(task):
-                objs = dict(task=task, event=task.event)
-                # prepare context and everything and create corresponding RQJob
-                jobs, rqjobs = ActionManageMixin.add(
-                    action_class=NewSupportingInstructorAction,
-                    logger=logger,
-                    scheduler=scheduler,
-                    triggers=Trigger.objects.filter(
-                        active=True, action="new-supporting-instructor"
-                    ),
-                    context_objects=objs,
+                    triggers=Trigger.objects.filter(active=True, action=trigger_action),
+                    context_objects=dict(task=task, event=task.event),
                     object_=task,
                     request=request,
                 )
@@ -488,27 +695,173 @@ def update_manual_score(cleaned_data):
     return records
 
 
-def create_username(personal, family, tries=NUM_TRIES):
-    """Generate unique username."""
-    stem = normalize_name(family or "") + "_" + normalize_name(personal or "")
+def bump_model_cache_versions(*models):
+    """Invalidate cached lookup results and paginated counts of models changed
+    with bulk queries, which don't send `post_save` or `post_delete` signals."""
+    from workshops.lookups import LOOKUP_CACHED_MODELS, bump_lookup_cache_version
 
-    counter = None
-    for i in range(tries):  # let's limit ourselves to only 100 tries
-        try:
-            if counter is None:
-                username = stem
-                counter = 1
-            else:
-                counter += 1
-                username = "{0}_{1}".format(stem, counter)
-            Person.objects.get(username=username)
-        except ObjectDoesNotExist:
-            return username
-
-    raise InternalError(
-        "Cannot find a non-repeating username"
-        "(tried {} usernames): {}.".format(tries, username)
+    for model in models:
+        if model in LOOKUP_CACHED_MODELS:
+            bump_lookup_cache_version(model)
+        if model in PAGINATOR_COUNT_CACHED_MODELS:
+            bump_paginator_count_cache_version(model)
+
+
+def _add_to_revision(objects):
+    if reversion.is_active():
+        for obj in objects:
+            reversion.add_to_revision(obj)
+
+
+def bulk_change_training_requests_state(requests, state):
+    """Change state of training requests with a single `UPDATE`.
+
+    Unlike `TrainingRequest.save()`, this doesn't recalculate automatic score,
+    which doesn't depend on the state.  Changed requests are added to the current
+    revision.  Return list of changed requests."""
+    from workshops.models import TrainingRequest
+
+    changed = [r for r in requests if r.state != state]
+    if not changed:
+        return []
+
+    now = timezone.now()
+    TrainingRequest.objects.filter(pk__in=[r.pk for r in changed]).update(
+        state=state, last_updated_at=now
     )
+    for r in changed:
+        r.state = state
+        r.last_updated_at = now
+    _add_to_revision(changed)
+    bump_model_cache_versions(TrainingRequest)
+    return changed
+
+
+def bulk_match_training_requests(
+    requests, event, seat_membership=None, seat_public=True, seat_open_training=False
+):
+    """Accept training requests and match their persons to the training `event`.
+
+    Learner tasks are created with a single `bulk_create()`, only for persons who
+    aren't learners at the event yet.  Return list of created tasks."""
+    requests = list(requests)
+    bulk_change_training_requests_state(requests, "a")
+
+    role = Role.objects.get(name="learner")
+    person_ids = {r.person_id for r in requests}
+    person_ids -= set(
+        Task.objects.filter(
+            event=event, role=role, person_id__in=person_ids
+        ).values_list("person_id", flat=True)
+    )
+    tasks = [
+        Task(
+            event=event,
+            person_id=person_id,
+            role=role,
+            seat_membership=seat_membership,
+            seat_public=seat_public,
+            seat_open_training=seat_open_training,
+        )
+        for person_id in sorted(person_ids)
+    ]
+    Task.objects.bulk_create(tasks)
+
+    if tasks:
+        # the same as in `Task.save()`
+        event.save()
+        refresh_task_summaries((task.person_id for task in tasks), [event.pk])
+        _add_to_revision(tasks)
+        bump_model_cache_versions(Task)
+    return tasks
+
+
+def bulk_unmatch_training_requests(requests):
+    """Remove persons of training requests from all instructor trainings they
+    are learners at.  Return number of deleted tasks."""
+    person_ids = {r.person_id for r in requests}
+    # the same tasks as `Person.get_training_tasks()`
+    tasks = Task.objects.filter(
+        person_id__in=person_ids, role__name="learner", event__tags__name="TTT"
+    )
+    event_ids = set(tasks.values_list("event_id", flat=True))
+    # summaries are refreshed once for all tasks, instead of one task at a time
+    with summary_refresh_suspended():
+        _, deleted = tasks.delete()
+    if deleted:
+        refresh_task_summaries(person_ids, event_ids)
+    return deleted.get(Task._meta.label, 0)
+
+
+def bulk_add_training_progress(trainees, **fields):
+    """Create the same training progress (with given `fields`) for every trainee
+    with a single `bulk_create()`, and refresh instructor eligibility of all
+    trainees at once.  Return list of created progresses."""
+    from workshops.models import InstructorEligibility, TrainingProgress
+
+    progresses = [TrainingProgress(trainee=trainee, **fields) for trainee in trainees]
+    TrainingProgress.objects.bulk_create(progresses)
+    if progresses:
+        InstructorEligibility.objects.refresh(p.trainee_id for p in progresses)
+        _add_to_revision(progresses)
+        bump_model_cache_versions(TrainingProgress)
+    return progresses
+
+
+def bulk_discard_training_progress(trainees):
+    """Discard all training progress of trainees with a single `UPDATE`.  Return
+    number of discarded progresses."""
+    from workshops.models import InstructorEligibility, TrainingProgress
+
+    trainees = list(trainees)
+    discarded = TrainingProgress.objects.filter(trainee__in=trainees).update(
+        discarded=True, last_updated_at=timezone.now()
+    )
+    # `update()` doesn't send signals
+    InstructorEligibility.objects.refresh(trainee.pk for trainee in trainees)
+    bump_model_cache_versions(TrainingProgress)
+    return discarded
+
+
+def create_usernames(names, tries=NUM_TRIES):
+    """Generate unique usernames for a list of `(personal, family)` pairs.
+
+    Existing usernames are fetched with a single query for all name prefixes, and
+    generated usernames are unique among themselves, too."""
+    stems = [
+        normalize_name(family or "") + "_" + normalize_name(personal or "")
+        for personal, family in names
+    ]
+    if not stems:
+        return []
+
+    taken = set(
+        Person.objects.filter(
+            reduce(operator.or_, (Q(username__startswith=stem) for stem in set(stems)))
+        ).values_list("username", flat=True)
+    )
+
+    usernames = []
+    for stem in stems:
+        # let's limit ourselves to only 100 tries
+        candidates = [stem] + [
+            "{0}_{1}".format(stem, counter) for counter in range(2, tries + 1)
+        ]
+        username = next((c for c in candidates if c not in taken), None)
+        if username is None:
+            raise InternalError(
+                "Cannot find a non-repeating username"
+                "(tried {} usernames): {}.".format(tries, candidates[-1])
+            )
+        taken.add(username)
+        usernames.append(username)
+
+    return usernames
+
+
+def create_username(personal, family, tries=NUM_TRIES):
+    """Generate unique username."""
+    return create_usernames([(personal, family)], tries=tries)[0]
 
 
 def normalize_name(name):
@@ -526,16 +879,121 @@ def normalize_name(name):
     return name.lower()
 
 
+# Models whose changes invalidate cached counts of paginated objects; populated by
+# `AMYListView` subclasses and used by `invalidate_paginator_count_cache` receiver.
+PAGINATOR_COUNT_CACHED_MODELS = set()
+
+# hits and misses of the paginator count cache in the current process
+paginator_count_cache_stats = {"hits": 0, "misses": 0}
+
+
+def paginator_count_cache():
+    return caches[settings.PAGINATOR_COUNT_CACHE_BACKEND]
+
+
+def paginator_count_cache_version_key(model):
+    return "paginator-count-version:{}:{}".format(
+        connection.settings_dict["NAME"], model._meta.label_lower
+    )
+
+
+def bump_paginator_count_cache_version(model):
+    cache = paginator_count_cache()
+    key = paginator_count_cache_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # key doesn't exist yet
+        cache.set(key, 1, timeout=None)
+
+
+def paginator_count_cache_key(request, queryset, page_param="page"):
+    """Key of cached count of paginated objects, or `None` if the count shouldn't
+    be cached.
+
+    Counts are cached for the requested path and the filter (all GET parameters
+    except for pagination ones), and only for querysets of models registered in
+    `PAGINATOR_COUNT_CACHED_MODELS`.  The key includes version of the model, so
+    that saving or deleting any object of the model makes cached counts stale
+    immediately; changes of related models (e.g. used in filters) are only
+    reflected after `PAGINATOR_COUNT_CACHE_TIMEOUT`."""
+    if (
+        not settings.PAGINATOR_COUNT_CACHE_TIMEOUT
+        or not isinstance(queryset, models.QuerySet)
+        or queryset.model not in PAGINATOR_COUNT_CACHED_MODELS
+    ):
+        return None
+
+    model = queryset.model
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        if key not in (page_param, "items_per_page")
+        for value in values
+        if value
+    )
+    version = paginator_count_cache().get(paginator_count_cache_version_key(model), 0)
+    parts = [request.path, page_param, params, version]
+    digest = sha1(repr(parts).encode("utf-8")).hexdigest()
+    return "paginator-count:{}:{}:{}".format(
+        connection.settings_dict["NAME"], model._meta.label_lower, digest
+    )
+
+
 class Paginator(DjangoPaginator):
     """Everything should work as in django.core.paginator.Paginator, except
-    this class provides additional generator for nicer set of pages."""
+    this class provides additional generator for nicer set of pages.
+
+    If `count_cache_key` is provided, the number of objects is cached under it
+    for `PAGINATOR_COUNT_CACHE_TIMEOUT` seconds."""
 
     _page_number = None
 
+    def __init__(self, *args, count_cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_cache_key = count_cache_key
+
+    @cached_property
+    def count(self):
+        if self.count_cache_key is None:
+            return super().count
+
+        cache = paginator_count_cache()
+        count = cache.get(self.count_cache_key)
+        hit = count is not None
+        stats = paginator_count_cache_stats
+        if not hit:
+            stats["misses"] += 1
+            count = super().count
+            cache.set(
+                self.count_cache_key,
+                count,
+                timeout=settings.PAGINATOR_COUNT_CACHE_TIMEOUT,
+            )
+        else:
+            stats["hits"] += 1
+
+        lookups = stats["hits"] + stats["misses"]
+        paginator_logger.info(
+            "Count cache %s for %s (hit rate %.0f%% of %d lookups)",
+            "hit" if hit else "miss",
+            self.count_cache_key,
+            100 * stats["hits"] / lookups,
+            lookups,
+        )
+        return count
+
     def page(self, number):
         """Overridden to store retrieved page number somewhere."""
         self._page_number = number
-        return super().page(number)
+        if self.count_cache_key is None:
+            return super().page(number)
+
+        # cached count may be stale, so don't let it cut objects off the page
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return self._get_page(self.object_list[bottom:top], number, self)
 
     def paginate_sections(self):
         """Divide pagination range into 3 sections.
@@ -604,8 +1062,245 @@ class Paginator(DjangoPaginator):
         return pagination
 
 
-def get_pagination_items(request, all_objects):
-    """Select paginated items."""
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """Unlike `DjangoJSONEncoder`, keep full precision of times, so that they can
+    be compared with values in the database."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage(collections.abc.Sequence):
+    """Page of objects returned by `KeysetPaginator`.
+
+    Instead of page numbers, neighbouring pages are referred to by cursors
+    (`next_cursor` and `previous_cursor`)."""
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return "<Keyset page of {} objects>".format(len(self.object_list))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by values of its ordering keys ("seek method").
+
+    Each page is fetched with `WHERE keys > last keys of previous page LIMIT n`
+    instead of `OFFSET`, so deep pages are as cheap as the first one, and the
+    paginator doesn't need to count all objects.  Pages are referred to by
+    cursors: encoded ordering key values of the first or last object on
+    a neighbouring page.
+
+    Only querysets ordered by fields (also on related models) or annotations are
+    supported, see `supports()`; primary key is added to the ordering to make it
+    unique.  NULLs are ordered as in PostgreSQL: last in ascending order, first
+    in descending order."""
+
+    keyset = True
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = max(int(per_page), 1)
+        self.keys = self.ordering_keys(object_list)
+        if self.keys is None:
+            raise ValueError("Queryset ordering isn't supported by keyset pagination.")
+
+    @classmethod
+    def supports(cls, queryset):
+        return (
+            isinstance(queryset, models.QuerySet)
+            and cls.ordering_keys(queryset) is not None
+        )
+
+    @staticmethod
+    def ordering_keys(queryset):
+        """Return list of `(name, descending, nullable)` ordering keys, or `None`
+        if ordering can't be used for keyset pagination."""
+        query = queryset.query
+        if query.order_by:
+            ordering = query.order_by
+        elif query.default_ordering:
+            ordering = query.get_meta().ordering
+        else:
+            ordering = []
+
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or item == "?":
+                return None
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+
+            if name in query.annotations:
+                # annotations can't be inspected easily
+                keys.append((name, descending, True))
+                continue
+
+            opts = query.get_meta()
+            nullable = False
+            try:
+                for part in name.split(LOOKUP_SEP):
+                    field = opts.pk if part == "pk" else opts.get_field(part)
+                    nullable = nullable or field.null
+                    if field.is_relation:
+                        opts = field.related_model._meta
+            except FieldDoesNotExist:
+                return None
+            # relations are ordered by related model's ordering
+            if field.is_relation:
+                return None
+            keys.append((name, descending, nullable))
+
+        pk_name = query.get_meta().pk.name
+        if not any(name in ("pk", pk_name) for name, _, _ in keys):
+            keys.append(("pk", False, False))
+        return keys
+
+    @cached_property
+    def count(self):
+        """Approximate number of objects, estimated by database planner."""
+        queryset = self.object_list.order_by()
+        if connection.vendor != "postgresql":
+            return queryset.count()
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def encode_cursor(self, values, reverse=False):
+        data = {"v": list(values), "o": [name for name, _, _ in self.keys]}
+        if reverse:
+            data["r"] = 1
+        text = json.dumps(data, cls=CursorJSONEncoder, separators=(",", ":"))
+        return urlsafe_base64_encode(text.encode())
+
+    def decode_cursor(self, cursor):
+        """Return (values, reverse) or `(None, False)` for an invalid cursor,
+        or a cursor created for different ordering."""
+        try:
+            data = json.loads(urlsafe_base64_decode(cursor).decode())
+            values, ordering = data["v"], data["o"]
+            reverse = bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            return None, False
+        if ordering != [name for name, _, _ in self.keys] or len(values) != len(
+            ordering
+        ):
+            return None, False
+        return values, reverse
+
+    @staticmethod
+    def after(keys, values):
+        """Condition for objects following `values` in ordering by `keys`."""
+        q = Q()
+        equal = Q()
+        for (name, descending, nullable), value in zip(keys, values):
+            if value is None and not descending:
+                # nothing follows NULL in ascending order, except for NULLs
+                following = None
+            elif value is None:
+                following = Q(**{f"{name}__isnull": False})
+            else:
+                lookup = "lt" if descending else "gt"
+                following = Q(**{f"{name}__{lookup}": value})
+                if nullable and not descending:
+                    following |= Q(**{f"{name}__isnull": True})
+
+            if following is not None:
+                q |= equal & following
+            equal &= Q(**{name: value})
+        return q
+
+    def page(self, cursor=None):
+        values, reverse = (None, False) if not cursor else self.decode_cursor(cursor)
+        keys = self.keys
+        if reverse:
+            keys = [
+                (name, not descending, nullable) for name, descending, nullable in keys
+            ]
+
+        queryset = self.object_list.order_by(
+            *["-" + name if descending else name for name, descending, _ in keys]
+        )
+        if values is not None:
+            queryset = queryset.filter(self.after(keys, values))
+        objects = list(queryset[: self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[: self.per_page]
+        if reverse:
+            objects.reverse()
+
+        first = last = None
+        if objects:
+            names = [name for name, _, _ in self.keys]
+            first = self.encode_cursor(self.key_values(objects[0], names), reverse=True)
+            last = self.encode_cursor(self.key_values(objects[-1], names))
+
+        if reverse:
+            next_cursor, previous_cursor = last, first if has_more else None
+        else:
+            next_cursor = last if has_more else None
+            previous_cursor = first if values is not None else None
+        return KeysetPage(objects, self, next_cursor, previous_cursor)
+
+    def key_values(self, obj, names):
+        """Values of ordering keys of an object from the page."""
+        if isinstance(obj, dict):
+            return [obj["pk" if name == "pk" else name] for name in names]
+        try:
+            return [self._attribute(obj, name) for name in names]
+        except AttributeError:
+            # related objects aren't loaded, or `values_list()` was used
+            return list(
+                self.object_list.model._default_manager.filter(pk=obj.pk)
+                .values_list(*names)
+                .get()
+            )
+
+    @staticmethod
+    def _attribute(obj, name):
+        for part in name.split(LOOKUP_SEP):
+            obj = getattr(obj, part)
+        return obj
+
+
+def get_pagination_items(
+    request, all_objects, page_param="page", keyset=False, count_cache=False
+):
+    """Select paginated items.
+
+    `page_param` allows for multiple paginated lists on a single page.
+
+    With `count_cache=True` the number of objects is cached (see
+    `paginator_count_cache_key`).
+
+    With `keyset=True` pages are selected with `KeysetPaginator` (and `page_param`
+    holds a cursor instead of page number), unless the ordering of `all_objects`
+    isn't supported by it."""
 
     # Get parameters.
     items = request.GET.get("items_per_page", ITEMS_PER_PAGE)
@@ -615,14 +1310,26 @@ def get_pagination_items(request, all_objects):
         except ValueError:
             items = ITEMS_PER_PAGE
     else:
-        # Show everything.
-        items = all_objects.count()
+        # Show everything; evaluate objects once instead of counting them first.
+        all_objects = list(all_objects)
+        items = max(len(all_objects), 1)
 
     # Figure out where we are.
-    page = request.GET.get("page")
+    page = request.GET.get(page_param)
+
+    if keyset and KeysetPaginator.supports(all_objects):
+        return KeysetPaginator(all_objects, items).page(page)
 
     # Show selected items.
-    paginator = Paginator(all_objects, items)
+    paginator = Paginator(
+        all_objects,
+        items,
+        count_cache_key=(
+            paginator_count_cache_key(request, all_objects, page_param)
+            if count_cache
+            else None
+        ),
+    )
 
     # Select the pages.
     try:
@@ -639,35 +1346,135 @@ def get_pagination_items(request, all_objects):
     return result
 
 
-def fetch_workshop_metadata(event_url, timeout=5):
+def iterate_in_chunks(queryset, chunk_size=None):
+    """Yield lists of at most `chunk_size` objects from the queryset.
+
+    Unlike `QuerySet.iterator()`, this respects `prefetch_related()`: ordered
+    primary keys are fetched first, then each chunk of objects is fetched (and
+    has its related objects prefetched) with a separate query."""
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    pks = list(queryset.values_list("pk", flat=True))
+
+    for start in range(0, len(pks), chunk_size):
+        end = start + chunk_size
+        chunk = pks[start:end]
+        objects = {obj.pk: obj for obj in queryset.filter(pk__in=chunk)}
+        yield [objects[pk] for pk in chunk if pk in objects]
+
+
+class Echo:
+    """File-like object that returns written value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(rows, filename):
+    """Stream `rows` (iterable of lists) as a CSV file attachment.
+
+    Rows are generated only when the response is sent, so that big exports
+    start immediately and aren't kept in memory."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows), content_type="text/csv"
+    )
+    response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
+    return response
+
+
+def fetch_workshop_metadata(event_url, timeout=5, session=None):
     """Handle metadata from any event site (works with rendered <meta> tags
     metadata or YAML metadata in `index.html`)."""
+    http = session or requests
+
     # fetch page
-    response = requests.get(event_url, timeout=timeout)
+    response = http.get(event_url, timeout=timeout)
     response.raise_for_status()  # assert it's 200 OK
     content = response.text
 
+    metadata, _ = find_workshop_metadata(
+        content, event_url, timeout=timeout, session=session
+    )
+
+    # leave normalization or validation to the caller function
+    return metadata
+
+
+ConditionalMetadata = namedtuple(
+    "ConditionalMetadata", ["metadata", "etag", "last_modified"]
+)
+
+
+def fetch_workshop_metadata_if_modified(
+    event_url, etag="", last_modified="", timeout=5, session=None
+):
+    """Conditional version of `fetch_workshop_metadata`.
+
+    Stored validators (`ETag`, `Last-Modified`) are sent along with the request,
+    so that an unchanged website costs a single "304 Not Modified" response.
+    Returns `ConditionalMetadata` with `metadata=None` if the website hasn't
+    changed, or with fetched metadata and new validators otherwise."""
+    http = session or requests
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    # fetch page
+    response = http.get(event_url, timeout=timeout, headers=headers)
+    if response.status_code == 304:
+        return ConditionalMetadata(None, etag, last_modified)
+    response.raise_for_status()  # assert it's 200 OK
+    content = response.text
+
+    metadata, from_html = find_workshop_metadata(
+        content, event_url, timeout=timeout, session=session
+    )
+
+    if not from_html:
+        # validators only describe the website, not the fallback `index.html`,
+        # so they can't be trusted for metadata read from YAML front matter
+        return ConditionalMetadata(metadata, "", "")
+
+    return ConditionalMetadata(
+        metadata,
+        response.headers.get("ETag", ""),
+        response.headers.get("Last-Modified", ""),
+    )
+
+
+def find_workshop_metadata(content, event_url, timeout=5, session=None):
+    """Find metadata in website content, falling back to YAML metadata from
+    event's `index.html`.
+
+    Returns a tuple of metadata and a flag indicating if they were found in the
+    website's <meta> tags."""
+    http = session or requests
+
     # find metadata
     metadata = find_workshop_HTML_metadata(content)
 
-    if not metadata:
-        # there are no HTML metadata, so let's try the old method
-        index_url, repository = generate_url_to_event_index(event_url)
+    if metadata:
+        return metadata, True
 
-        # fetch page
-        response = requests.get(index_url, timeout=timeout)
+    # there are no HTML metadata, so let's try the old method
+    index_url, repository = generate_url_to_event_index(event_url)
 
-        if response.status_code == 200:
-            # don't throw errors for pages we fall back to
-            content = response.text
-            metadata = find_workshop_YAML_metadata(content)
+    # fetch page
+    response = http.get(index_url, timeout=timeout)
 
-            # add 'slug' metadata if missing
-            if "slug" not in metadata:
-                metadata["slug"] = repository
+    if response.status_code == 200:
+        # don't throw errors for pages we fall back to
+        content = response.text
+        metadata = find_workshop_YAML_metadata(content)
 
-    # leave normalization or validation to the caller function
-    return metadata
+        # add 'slug' metadata if missing
+        if "slug" not in metadata:
+            metadata["slug"] = repository
+
+    return metadata, False
 
 
 class WrongWorkshopURL(Exception):
@@ -1039,6 +1846,7 @@ def archive_least_recent_active_consents(object_a, object_b, base_obj):
         archived_at=timezone.now()
     )
     Consent.objects.bulk_create(consents_to_recreate)
+    bump_consents_version([object_a.pk, object_b.pk])
 
 
 def merge_objects(
@@ -22,7 +22,6 @@ from django.db import IntegrityError
 from django.db.models import (
     Case,
     Count,
-    F,
     IntegerField,
     Prefetch,
     ProtectedError,
@@ -42,15 +41,18 @@ from reversion.models import Revision, Version
 from reversion_compare.forms import SelectDiffForm
 
 from autoemails.actions import (
+    EVENT_ACTIONS,
+    TASK_ACTIONS,
     AskForWebsiteAction,
     InstructorsHostIntroductionAction,
     NewInstructorAction,
     NewSupportingInstructorAction,
     PostWorkshopAction,
     RecruitHelpersAction,
+    action_transitions,
 )
 from autoemails.base_views import ActionManageMixin
-from autoemails.models import Trigger
+from autoemails.snapshots import EventSnapshot
 from communityroles.forms import CommunityRoleForm
 from consents.forms import ActiveTermConsentsForm
 from consents.models import Consent
@@ -94,16 +96,18 @@ from workshops.forms import (
 from workshops.management.commands.check_for_workshop_websites_updates import (
     Command as WebsiteUpdatesCommand,
 )
+from workshops.metadata_cache import fetch_workshop_metadata_cached
 from workshops.models import (
     Airport,
     Award,
     Badge,
     Event,
+    InstructorEligibility,
     Membership,
     Person,
+    PersonActivity,
     Qualification,
     Role,
-    Tag,
     Task,
     TrainingProgress,
 )
@@ -117,11 +121,13 @@ from workshops.util import (
     create_uploaded_persons_tasks,
     create_username,
     failed_to_delete,
-    fetch_workshop_metadata,
     get_pagination_items,
+    iterate_in_chunks,
     login_required,
     merge_objects,
     parse_workshop_metadata,
+    refresh_task_summaries,
+    streaming_csv_response,
     upload_person_task_csv,
     validate_workshop_metadata,
     verify_upload_person_task,
@@ -214,6 +220,7 @@ class AllPersons(OnlyForAdminsMixin, AMYListView):
         ),
     )
     title = "All Persons"
+    keyset_pagination = True
 
 
 class PersonDetails(OnlyForAdminsMixin, AMYDetailView):
@@ -221,31 +228,8 @@ class PersonDetails(OnlyForAdminsMixin, AMYDetailView):
     template_name = "workshops/person.html"
     pk_url_kwarg = "person_id"
     queryset = (
-        Person.objects.annotate(
-            num_taught=Count(
-                Case(
-                    When(task__role__name="instructor", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
-            num_helper=Count(
-                Case(
-                    When(task__role__name="helper", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
-            num_learner=Count(
-                Case(
-                    When(task__role__name="learner", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
-            num_supporting=Count(
-                Case(
-                    When(task__role__name="supporting-instructor", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
+        Person.objects.annotate_with_activity(
+            "num_taught", "num_helper", "num_learner", "num_supporting"
         )
         .prefetch_related(
             "badges",
@@ -867,6 +851,9 @@ def persons_merge(request):
                 _, integrity_errors = merge_objects(
                     obj_a, obj_b, easy, difficult, choices=data, base_a=base_a
                 )
+                # progress, awards and tasks were moved with `update()`
+                InstructorEligibility.objects.refresh([base_obj.pk])
+                PersonActivity.objects.refresh([base_obj.pk])
 
                 if integrity_errors:
                     msg = (
@@ -1072,7 +1059,8 @@ def validate_event(request, slug):
     warning_messages = []
 
     try:
-        metadata = fetch_workshop_metadata(page_url)
+        # the website could have just been fixed
+        metadata = fetch_workshop_metadata_cached(page_url, revalidate=True)
         # validate metadata
         error_messages, warning_messages = validate_workshop_metadata(metadata)
 
@@ -1112,35 +1100,16 @@ class EventCreate(OnlyForAdminsMixin, PermissionRequiredMixin, AMYCreateView):
         # save the object
         res = super().form_valid(form)
 
-        # check conditions for running a PostWorkshopAction
-        if PostWorkshopAction.check(self.object):
-            triggers = Trigger.objects.filter(
-                active=True, action="week-after-workshop-completion"
-            )
-            ActionManageMixin.add(
-                action_class=PostWorkshopAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # check conditions for running a InstructorsHostIntroductionAction
-        if InstructorsHostIntroductionAction.check(self.object):
-            triggers = Trigger.objects.filter(
-                active=True, action="instructors-host-introduction"
-            )
-            ActionManageMixin.add(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object),
-                object_=self.object,
-                request=self.request,
-            )
+        # schedule actions whose conditions are met
+        ActionManageMixin.apply_transitions(
+            action_transitions(EVENT_ACTIONS, None, (EventSnapshot(self.object),)),
+            logger=logger,
+            scheduler=scheduler,
+            connection=redis_connection,
+            context_objects=dict(event=self.object),
+            object_=self.object,
+            request=self.request,
+        )
 
         # return remembered results
         return res
@@ -1183,130 +1152,20 @@ class EventUpdate(OnlyForAdminsMixin, PermissionRequiredMixin, AMYUpdateView):
     def form_valid(self, form):
         """Check if RQ job conditions changed, and add/delete jobs if
         necessary."""
-        old = self.get_object()
-        check_pwa_old = PostWorkshopAction.check(old)
-        check_ihia_old = InstructorsHostIntroductionAction.check(old)
-        check_afwa_old = AskForWebsiteAction.check(old)
-        check_rha_old = RecruitHelpersAction.check(old)
+        old = EventSnapshot(self.get_object())
 
         res = super().form_valid(form)
-        new = self.object  # refreshed by `super().form_valid()`
-        check_pwa_new = PostWorkshopAction.check(new)
-        check_ihia_new = InstructorsHostIntroductionAction.check(new)
-        check_afwa_new = AskForWebsiteAction.check(new)
-        check_rha_new = RecruitHelpersAction.check(new)
-
-        # PostWorkshopAction conditions are not met, but weren't before
-        if not check_pwa_old and check_pwa_new:
-            triggers = Trigger.objects.filter(
-                active=True, action="week-after-workshop-completion"
-            )
-            ActionManageMixin.add(
-                action_class=PostWorkshopAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # PostWorkshopAction conditions were met, but aren't anymore
-        elif check_pwa_old and not check_pwa_new:
-            jobs = self.object.rq_jobs.filter(
-                trigger__action="week-after-workshop-completion"
-            )
-            ActionManageMixin.remove(
-                action_class=PostWorkshopAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # InstructorsHostIntroductionAction conditions are not met, but weren't before
-        if not check_ihia_old and check_ihia_new:
-            triggers = Trigger.objects.filter(
-                active=True, action="instructors-host-introduction"
-            )
-            ActionManageMixin.add(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # InstructorsHostIntroductionAction conditions were met, but aren't anymore
-        elif check_ihia_old and not check_ihia_new:
-            jobs = self.object.rq_jobs.filter(
-                trigger__action="instructors-host-introduction"
-            )
-            ActionManageMixin.remove(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object,
-                request=self.request,
-            )
+        new = EventSnapshot(self.object)  # refreshed by `super().form_valid()`
 
-        # AskForWebsiteAction conditions are met, but weren't before
-        if not check_afwa_old and check_afwa_new:
-            triggers = Trigger.objects.filter(active=True, action="ask-for-website")
-            ActionManageMixin.add(
-                action_class=AskForWebsiteAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # AskForWebsiteAction conditions were met, but aren't anymore
-        elif check_afwa_old and not check_afwa_new:
-            jobs = self.object.rq_jobs.filter(trigger__action="ask-for-website")
-            ActionManageMixin.remove(
-                action_class=AskForWebsiteAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # RecruitHelpersAction conditions are met, but weren't before
-        if not check_rha_old and check_rha_new:
-            triggers = Trigger.objects.filter(active=True, action="recruit-helpers")
-            ActionManageMixin.add(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # RecruitHelpersAction conditions were met, but aren't anymore
-        elif check_rha_old and not check_rha_new:
-            jobs = self.object.rq_jobs.filter(trigger__action="recruit-helpers")
-            ActionManageMixin.remove(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object,
-                request=self.request,
-            )
+        ActionManageMixin.apply_transitions(
+            action_transitions(EVENT_ACTIONS, (old,), (new,)),
+            logger=logger,
+            scheduler=scheduler,
+            connection=redis_connection,
+            context_objects=dict(event=self.object),
+            object_=self.object,
+            request=self.request,
+        )
 
         return res
 
@@ -1378,7 +1237,7 @@ def event_import(request):
     url = request.GET.get("url", "").strip()
 
     try:
-        metadata = fetch_workshop_metadata(url)
+        metadata = fetch_workshop_metadata_cached(url)
         # normalize the metadata
         metadata = parse_workshop_metadata(metadata)
         return JsonResponse(metadata)
@@ -1485,6 +1344,11 @@ def events_merge(request):
                 _, integrity_errors = merge_objects(
                     obj_a, obj_b, easy, difficult, choices=data, base_a=base_a
                 )
+                # tasks were moved with `update()`
+                refresh_task_summaries(
+                    base_obj.task_set.values_list("person_id", flat=True),
+                    [base_obj.pk],
+                )
 
                 if integrity_errors:
                     msg = (
@@ -1552,7 +1416,7 @@ def event_review_metadata_changes(request, slug):
         raise Http404("No event found matching the query.")
 
     try:
-        metadata = fetch_workshop_metadata(event.website_url)
+        metadata = fetch_workshop_metadata_cached(event.website_url, revalidate=True)
     except requests.exceptions.RequestException:
         messages.error(
             request,
@@ -1708,9 +1572,7 @@ class TaskCreate(
         seat_membership = form.cleaned_data["seat_membership"]
         seat_public = form.cleaned_data["seat_public"]
         event = form.cleaned_data["event"]
-        check_ihia_old = InstructorsHostIntroductionAction.check(event)
-        check_afwa_old = AskForWebsiteAction.check(event)
-        check_rha_old = RecruitHelpersAction.check(event)
+        event_old = EventSnapshot(event)
 
         # check associated membership remaining seats and validity
         if hasattr(self, "request") and seat_membership is not None:
@@ -1764,88 +1626,29 @@ class TaskCreate(
         # save the object
         res = super().form_valid(form)
 
-        # check conditions for running a NewInstructorAction
-        if NewInstructorAction.check(self.object):
-            ActionManageMixin.add(
-                action_class=NewInstructorAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=Trigger.objects.filter(active=True, action="new-instructor"),
-                context_objects=dict(task=self.object, event=self.object.event),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # check conditions for running a NewSupportingInstructorAction
-        if NewSupportingInstructorAction.check(self.object):
-            ActionManageMixin.add(
-                action_class=NewSupportingInstructorAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=Trigger.objects.filter(
-                    active=True, action="new-supporting-instructor"
-                ),
-                context_objects=dict(task=self.object, event=self.object.event),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # check conditions for running a InstructorsHostIntroductionAction
-        if not check_ihia_old and InstructorsHostIntroductionAction.check(
-            self.object.event
-        ):
-            triggers = Trigger.objects.filter(
-                active=True, action="instructors-host-introduction"
-            )
-            ActionManageMixin.add(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object.event),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # check conditions for running an AskForWebsiteAction
-        if not check_afwa_old and AskForWebsiteAction.check(self.object.event):
-            triggers = Trigger.objects.filter(active=True, action="ask-for-website")
-            ActionManageMixin.add(
-                action_class=AskForWebsiteAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object.event),
-                object_=self.object.event,
-                request=self.request,
-            )
+        event_new = EventSnapshot(self.object.event)
 
-        # check conditions for running a RecruitHelpersAction
-        if not check_rha_old and RecruitHelpersAction.check(self.object.event):
-            triggers = Trigger.objects.filter(active=True, action="recruit-helpers")
-            ActionManageMixin.add(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object.event),
-                object_=self.object.event,
-                request=self.request,
-            )
+        # check conditions for running task-related actions
+        ActionManageMixin.apply_transitions(
+            action_transitions(TASK_ACTIONS, None, (self.object, event_new)),
+            logger=logger,
+            scheduler=scheduler,
+            connection=redis_connection,
+            context_objects=dict(task=self.object, event=self.object.event),
+            object_=self.object,
+            request=self.request,
+        )
 
-        # When someone adds a helper, then the condition will no longer be met and we
-        # have to remove the job.
-        elif check_rha_old and not RecruitHelpersAction.check(self.object.event):
-            jobs = self.object.event.rq_jobs.filter(trigger__action="recruit-helpers")
-            ActionManageMixin.remove(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object.event,
-                request=self.request,
-            )
+        # new task could have changed conditions of event-related actions
+        ActionManageMixin.apply_transitions(
+            action_transitions(EVENT_ACTIONS, (event_old,), (event_new,)),
+            logger=logger,
+            scheduler=scheduler,
+            connection=redis_connection,
+            context_objects=dict(event=self.object.event),
+            object_=self.object.event,
+            request=self.request,
+        )
 
         # return remembered results
         return res
@@ -1866,19 +1669,15 @@ class TaskUpdate(
         """Check if RQ job conditions changed, and add/delete jobs if
         necessary."""
         old = self.get_object()
-        check_nia_old = NewInstructorAction.check(old)
-        check_nsia_old = NewSupportingInstructorAction.check(old)
-        check_ihia_old = InstructorsHostIntroductionAction.check(old.event)
-        check_afwa_old = AskForWebsiteAction.check(old.event)
-        check_rha_old = RecruitHelpersAction.check(old.event)
+        # the task can be moved to another event, so conditions of both events'
+        # actions could change
+        events = {old.event_id: old.event}
+        events.setdefault(form.cleaned_data["event"].pk, form.cleaned_data["event"])
+        events_old = {pk: EventSnapshot(event) for pk, event in events.items()}
 
         res = super().form_valid(form)
         new = self.object  # refreshed by `super().form_valid()`
-        check_nia_new = NewInstructorAction.check(new)
-        check_nsia_new = NewSupportingInstructorAction.check(new)
-        check_ihia_new = InstructorsHostIntroductionAction.check(new.event)
-        check_afwa_new = AskForWebsiteAction.check(new.event)
-        check_rha_new = RecruitHelpersAction.check(new.event)
+        events_new = {pk: EventSnapshot(event) for pk, event in events.items()}
 
         seat_membership = form.cleaned_data["seat_membership"]
         seat_public = form.cleaned_data["seat_public"]
@@ -1905,141 +1704,28 @@ class TaskUpdate(
                     "it's been allowed.",
                 )
 
-        # NewInstructorAction conditions are met, but weren't before
-        if not check_nia_old and check_nia_new:
-            triggers = Trigger.objects.filter(active=True, action="new-instructor")
-            ActionManageMixin.add(
-                action_class=NewInstructorAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(task=self.object, event=self.object.event),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # NewInstructorAction conditions were met, but aren't anymore
-        elif check_nia_old and not check_nia_new:
-            jobs = self.object.rq_jobs.filter(trigger__action="new-instructor")
-            ActionManageMixin.remove(
-                action_class=NewInstructorAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # NewSupportingInstructorAction conditions are met, but weren't before
-        if not check_nsia_old and check_nsia_new:
-            triggers = Trigger.objects.filter(
-                active=True, action="new-supporting-instructor"
-            )
-            ActionManageMixin.add(
-                action_class=NewSupportingInstructorAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(task=self.object, event=self.object.event),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # NewSupportingInstructorAction conditions were met, but aren't anymore
-        elif check_nsia_old and not check_nsia_new:
-            jobs = self.object.rq_jobs.filter(
-                trigger__action="new-supporting-instructor"
-            )
-            ActionManageMixin.remove(
-                action_class=NewSupportingInstructorAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object,
-                request=self.request,
-            )
-
-        # InstructorsHostIntroductionAction conditions are met, but weren't before
-        if not check_ihia_old and check_ihia_new:
-            triggers = Trigger.objects.filter(
-                active=True, action="instructors-host-introduction"
-            )
-            ActionManageMixin.add(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object.event),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # InstructorsHostIntroductionAction conditions were met, but aren't anymore
-        elif check_ihia_old and not check_ihia_new:
-            jobs = self.object.event.rq_jobs.filter(
-                trigger__action="instructors-host-introduction"
-            )
-            ActionManageMixin.remove(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # AskForWebsiteAction conditions are met, but weren't before
-        if not check_afwa_old and check_afwa_new:
-            triggers = Trigger.objects.filter(active=True, action="ask-for-website")
-            ActionManageMixin.add(
-                action_class=AskForWebsiteAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object.event),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # AskForWebsiteAction conditions were met, but aren't anymore
-        elif check_afwa_old and not check_afwa_new:
-            jobs = self.object.event.rq_jobs.filter(trigger__action="ask-for-website")
-            ActionManageMixin.remove(
-                action_class=AskForWebsiteAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # RecruitHelpersAction conditions are met, but weren't before
-        if not check_rha_old and check_rha_new:
-            triggers = Trigger.objects.filter(active=True, action="recruit-helpers")
-            ActionManageMixin.add(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.object.event),
-                object_=self.object.event,
-                request=self.request,
-            )
+        ActionManageMixin.apply_transitions(
+            action_transitions(
+                TASK_ACTIONS,
+                (old, events_old[old.event_id]),
+                (new, events_new[new.event_id]),
+            ),
+            logger=logger,
+            scheduler=scheduler,
+            connection=redis_connection,
+            context_objects=dict(task=self.object, event=self.object.event),
+            object_=self.object,
+            request=self.request,
+        )
 
-        # RecruitHelpersAction conditions were met, but aren't anymore
-        elif check_rha_old and not check_rha_new:
-            jobs = self.object.event.rq_jobs.filter(trigger__action="recruit-helpers")
-            ActionManageMixin.remove(
-                action_class=RecruitHelpersAction,
+        for pk, event in events.items():
+            ActionManageMixin.apply_transitions(
+                action_transitions(EVENT_ACTIONS, (events_old[pk],), (events_new[pk],)),
                 logger=logger,
                 scheduler=scheduler,
                 connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object.event,
+                context_objects=dict(event=event),
+                object_=event,
                 request=self.request,
             )
 
@@ -2080,72 +1766,24 @@ class TaskDelete(
             request=self.request,
         )
 
-        # We need to store the check from before object delete
-        # and compare in the `after_delete` method.
+        # We need to store the event's state from before object delete
+        # and compare it in the `after_delete` method.
         old = self.get_object()
         self.event = old.event
-        self.check_ihia_old = InstructorsHostIntroductionAction.check(self.event)
-        self.check_afwa_old = AskForWebsiteAction.check(self.event)
-        self.check_rha_old = RecruitHelpersAction.check(self.event)
+        self.event_old = EventSnapshot(self.event)
 
     def after_delete(self, *args, **kwargs):
-        self.check_ihia_new = InstructorsHostIntroductionAction.check(self.event)
-        self.check_afwa_new = AskForWebsiteAction.check(self.event)
-        self.check_rha_new = RecruitHelpersAction.check(self.event)
-
-        # InstructorsHostIntroductionAction conditions were met, but aren't anymore
-        if self.check_ihia_old and not self.check_ihia_new:
-            jobs = self.object.event.rq_jobs.filter(
-                trigger__action="instructors-host-introduction"
-            )
-            ActionManageMixin.remove(
-                action_class=InstructorsHostIntroductionAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # AskForWebsiteAction conditions were met, but aren't anymore
-        if self.check_afwa_old and not self.check_afwa_new:
-            jobs = self.object.event.rq_jobs.filter(trigger__action="ask-for-website")
-            ActionManageMixin.remove(
-                action_class=AskForWebsiteAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.object.event,
-                request=self.request,
-            )
-
-        # RecruitHelpersAction conditions are met, but weren't before
-        if not self.check_rha_old and self.check_rha_new:
-            triggers = Trigger.objects.filter(active=True, action="recruit-helpers")
-            ActionManageMixin.add(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                triggers=triggers,
-                context_objects=dict(event=self.event),
-                object_=self.event,
-                request=self.request,
-            )
-
-        # RecruitHelpersAction conditions were met, but aren't anymore
-        elif self.check_rha_old and not self.check_rha_new:
-            jobs = self.object.event.rq_jobs.filter(trigger__action="recruit-helpers")
-            ActionManageMixin.remove(
-                action_class=RecruitHelpersAction,
-                logger=logger,
-                scheduler=scheduler,
-                connection=redis_connection,
-                jobs=jobs.values_list("job_id", flat=True),
-                object_=self.event,
-                request=self.request,
-            )
+        ActionManageMixin.apply_transitions(
+            action_transitions(
+                EVENT_ACTIONS, (self.event_old,), (EventSnapshot(self.event),)
+            ),
+            logger=logger,
+            scheduler=scheduler,
+            connection=redis_connection,
+            context_objects=dict(event=self.event),
+            object_=self.event,
+            request=self.request,
+        )
 
 
 # ------------------------------------------------------------
@@ -2241,48 +1879,21 @@ class BadgeDetails(OnlyForAdminsMixin, AMYDetailView):
 # ------------------------------------------------------------
 
 
-def _workshop_staff_query(lat=None, lng=None):
+def _workshop_staff_query(lat=None, lng=None, distance=None):
     """This query is used in two views: workshop staff searching and its CSV
     results. Thanks to factoring-out this function, we're now quite certain
-    that the results in both of the views are the same."""
-    TTT = Tag.objects.get(name="TTT")
-    stalled = Tag.objects.get(name="stalled")
-    learner = Role.objects.get(name="learner")
-    important_badges = Badge.objects.filter(name__in=Badge.IMPORTANT_BADGES)
-
-    trainee_tasks = (
-        Task.objects.filter(event__tags=TTT, role=learner)
-        .exclude(event__tags=stalled)
-        .exclude(person__badges__in=important_badges)
-    )
+    that the results in both of the views are the same.
 
+    If `distance` (in km) is given, only people with airports at most that far
+    from `lat`, `lng` are returned."""
     # we need to count number of specific roles users had
     # and if they are SWC/DC/LC instructors
     people = (
-        Person.objects.filter(airport__isnull=False)
-        .select_related("airport")
-        .annotate(
-            num_taught=Count(
-                Case(
-                    When(task__role__name="instructor", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
-            num_helper=Count(
-                Case(
-                    When(task__role__name="helper", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
-            num_organizer=Count(
-                Case(
-                    When(task__role__name="organizer", then=Value(1)),
-                    output_field=IntegerField(),
-                )
-            ),
-            is_trainee=Count("task", filter=(Q(task__in=trainee_tasks))),
-            is_trainer=Count("badges", filter=(Q(badges__name="trainer"))),
+        Person.objects.annotate_with_activity(
+            "num_taught", "num_helper", "num_organizer", "is_trainee", "is_trainer"
         )
+        .filter(airport__isnull=False)
+        .select_related("airport")
         .prefetch_related(
             "lessons",
             Prefetch(
@@ -2294,12 +1905,16 @@ def _workshop_staff_query(lat=None, lng=None):
         .order_by("family", "personal")
     )
 
-    if lat and lng:
-        # using Euclidean distance just because it's faster and easier
-        complex_F = (F("airport__latitude") - lat) ** 2 + (
-            F("airport__longitude") - lng
-        ) ** 2
-        people = people.annotate(distance=complex_F).order_by("distance", "family")
+    if lat is not None and lng is not None:
+        if distance is not None:
+            # nearby airports are found with an index, and only their people
+            # need to be sorted
+            people = people.filter(
+                airport__in=Airport.objects.within_distance(lat, lng, distance)
+            )
+        people = people.annotate(
+            distance=Airport.objects.distance_expression(lat, lng, "airport__")
+        ).order_by("distance", "family")
 
     return people
 
@@ -2309,7 +1924,7 @@ def workshop_staff(request):
     """Search for workshop staff."""
 
     # read data from form, if it was submitted correctly
-    lat, lng = None, None
+    lat, lng, distance = None, None, None
     lessons = list()
     form = WorkshopStaffForm(request.GET)
     if form.is_valid():
@@ -2324,8 +1939,10 @@ def workshop_staff(request):
             lat = form.cleaned_data["latitude"]
             lng = form.cleaned_data["longitude"]
 
+        distance = form.cleaned_data["distance"]
+
     # prepare the query
-    people = _workshop_staff_query(lat, lng)
+    people = _workshop_staff_query(lat, lng, distance)
 
     # filter the query
     f = WorkshopStaffFilter(request.GET, queryset=people)
@@ -2345,7 +1962,7 @@ def workshop_staff_csv(request):
     """Generate CSV of workshop staff search results."""
 
     # read data from form, if it was submitted correctly
-    lat, lng = None, None
+    lat, lng, distance = None, None, None
     form = WorkshopStaffForm(request.GET)
     if form.is_valid():
         if form.cleaned_data["airport"]:
@@ -2356,8 +1973,10 @@ def workshop_staff_csv(request):
             lat = form.cleaned_data["latitude"]
             lng = form.cleaned_data["longitude"]
 
+        distance = form.cleaned_data["distance"]
+
     # prepare the query
-    people = _workshop_staff_query(lat, lng)
+    people = _workshop_staff_query(lat, lng, distance)
 
     # filter the query
     f = WorkshopStaffFilter(request.GET, queryset=people)
@@ -2377,28 +1996,24 @@ def workshop_staff_csv(request):
         "Affiliation",
     )
 
-    # CSV http header
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = "attachment; " 'filename="WorkshopStaff.csv"'
-    # CSV output
-    writer = csv.writer(response)
-    writer.writerow(header_row)
-    for person in people:
-        writer.writerow(
-            [
-                person.full_name,
-                person.email,
-                " ".join([badge.name for badge in person.important_badges]),
-                "yes" if person.is_trainer else "no",
-                person.num_taught,
-                "yes" if person.is_trainee else "no",
-                str(person.airport) if person.airport else "",
-                person.country.name if person.country else "",
-                " ".join([lesson.name for lesson in person.lessons.all()]),
-                person.affiliation or "",
-            ]
-        )
-    return response
+    def rows():
+        yield header_row
+        for chunk in iterate_in_chunks(people):
+            for person in chunk:
+                yield [
+                    person.full_name,
+                    person.email,
+                    " ".join([badge.name for badge in person.important_badges]),
+                    "yes" if person.is_trainer else "no",
+                    person.num_taught,
+                    "yes" if person.is_trainee else "no",
+                    str(person.airport) if person.airport else "",
+                    person.country.name if person.country else "",
+                    " ".join([lesson.name for lesson in person.lessons.all()]),
+                    person.affiliation or "",
+                ]
+
+    return streaming_csv_response(rows(), "WorkshopStaff.csv")
 
 
 # ------------------------------------------------------------
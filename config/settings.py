@@ -546,6 +546,11 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": True,
         },
+        "amy.paginator": {
+            "handlers": ["debug_log_file"],
+            "level": "INFO",
+            "propagate": True,
+        },
         "amy.server_logs": {
             "handlers": ["log_file"],
             "level": "ERROR",
@@ -575,6 +580,38 @@ SELECT2_JS = ""  # don't load JS on it's own - we're loading it in `base.html`
 SELECT2_CSS = ""  # the same for CSS
 SELECT2_I18N = "select2/js/i18n"
 SELECT2_CACHE_BACKEND = "select2"
+# How long (in seconds) results of lookup views are cached; 0 disables caching
+LOOKUP_CACHE_TIMEOUT = env.int("AMY_LOOKUP_CACHE_TIMEOUT", default=60)
+
+# PAGINATION
+# -----------------------------------------------------------------------------
+# Cache holding counts of objects paginated in list views (see
+# `workshops.util.Paginator`)
+PAGINATOR_COUNT_CACHE_BACKEND = "default"
+# How long (in seconds) the counts are cached; 0 disables caching
+PAGINATOR_COUNT_CACHE_TIMEOUT = env.int("AMY_PAGINATOR_COUNT_CACHE_TIMEOUT", default=60)
+
+# CONSENTS
+# -----------------------------------------------------------------------------
+# Cache holding the token which invalidates consent statuses remembered in
+# sessions by `consents.middleware.TermsMiddleware`
+CONSENTS_CACHE_BACKEND = "default"
+# Unset consents for all persons are created (or re-created when archiving
+# consents) in chunks of this size
+CONSENTS_FANOUT_CHUNK_SIZE = env.int("AMY_CONSENTS_FANOUT_CHUNK_SIZE", default=10000)
+# Create unset consents for new terms in a Redis Queue job instead of during
+# the request
+CONSENTS_FANOUT_ASYNC = env.bool("AMY_CONSENTS_FANOUT_ASYNC", default=False)
+
+# WORKSHOP WEBSITES
+# -----------------------------------------------------------------------------
+# Cache holding metadata fetched from workshop websites (see
+# `workshops.metadata_cache`)
+WORKSHOP_METADATA_CACHE_BACKEND = "default"
+# How long (in seconds) fetched metadata are reused; 0 disables caching
+WORKSHOP_METADATA_CACHE_TIMEOUT = env.int(
+    "AMY_WORKSHOP_METADATA_CACHE_TIMEOUT", default=300
+)
 
 # Django-RQ (Redis Queueing) settings
 # -----------------------------------------------------------------------------
@@ -607,6 +644,10 @@ AUTOEMAIL_OVERRIDE_OUTGOING_ADDRESS = env.str(
     "AMY_AUTOEMAIL_OVERRIDE_OUTGOING_ADDRESS",
     default=None,  # On test server: 'amy-tests@carpentries.org'
 )
+# How often (in seconds) statuses of jobs changed in Redis are saved in RQJobs
+AUTOEMAIL_RQJOBS_SYNC_INTERVAL = env.int(
+    "AMY_AUTOEMAIL_RQJOBS_SYNC_INTERVAL", default=60
+)
 
 # Reports
 # -----------------------------------------------------------------------------
@@ -630,3 +671,15 @@ REPORTS_LINK = env.str(
 INSTRUCTOR_RECRUITMENT_ENABLED = env.bool(
     "AMY_INSTRUCTOR_RECRUITMENT_ENABLED", default=False
 )
+
+# Search
+# -----------------------------------------------------------------------------
+# Backend used by the dashboard search; trigram ranking requires PostgreSQL,
+# other databases fall back to plain substring search.
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    _default_search_backend = "dashboard.search.TrigramSearchBackend"
+else:
+    _default_search_backend = "dashboard.search.ContainsSearchBackend"
+SEARCH_BACKEND = env.str("AMY_SEARCH_BACKEND", default=_default_search_backend)
+# Maximum number of results per searched model
+SEARCH_RESULTS_LIMIT = env.int("AMY_SEARCH_RESULTS_LIMIT", default=100)